@@ -0,0 +1,269 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, Request
+from typing import Any, Dict, List, Optional
+import logging
+import os
+import threading
+import pymysql
+
+try:
+    from Backend.db import _get_cursor
+    from Backend.stripe_payments import _require_admin_token, _stripe_gateway
+except ImportError:
+    from db import _get_cursor
+    from stripe_payments import _require_admin_token, _stripe_gateway
+
+router = APIRouter()
+
+logger = logging.getLogger(__name__)
+
+ACCOUNT_REFRESH_INTERVAL_SECONDS = int(os.getenv("ACCOUNT_REFRESH_INTERVAL_SECONDS") or 900)
+ACCOUNT_REFRESH_STALE_SECONDS = int(os.getenv("ACCOUNT_REFRESH_STALE_SECONDS") or 21600)
+ACCOUNT_REFRESH_CONCURRENCY = int(os.getenv("ACCOUNT_REFRESH_CONCURRENCY") or 8)
+ACCOUNT_REFRESH_BATCH_SIZE = int(os.getenv("ACCOUNT_REFRESH_BATCH_SIZE") or 200)
+ACCOUNT_REFRESH_LOCK_NAME = "gratly_account_refresh"
+
+ACCOUNT_STATUS_UPDATE_SQL = """
+    UPDATE GRATLYDB.STRIPE_CONNECTED_ACCOUNTS
+    SET CHARGES_ENABLED = %s,
+        PAYOUTS_ENABLED = %s,
+        DETAILS_SUBMITTED = %s,
+        DISABLED_REASON = %s,
+        LAST_REFRESHED_AT = NOW()
+    WHERE STRIPE_ACCOUNT_ID = %s
+"""
+
+class AccountRefreshError(Exception):
+    pass
+
+
+_stop_event = threading.Event()
+_wake_event = threading.Event()
+_refresher_thread: Optional[threading.Thread] = None
+_progress_lock = threading.Lock()
+_progress: Dict[str, Any] = {
+    "status": "idle",
+    "total": 0,
+    "processed": 0,
+    "updated": 0,
+    "failed": 0,
+    "becameReady": 0,
+    "priorityAccounts": 0,
+    "startedAt": None,
+    "finishedAt": None,
+    "lastError": None,
+}
+
+
+def _set_progress(**values: Any) -> None:
+    with _progress_lock:
+        _progress.update(values)
+
+
+def _bump_progress(**increments: int) -> None:
+    with _progress_lock:
+        for key, value in increments.items():
+            _progress[key] = _progress.get(key, 0) + value
+
+
+def _fetch_stale_accounts(limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    query = """
+        SELECT sca.EMPLOYEEGUID AS employee_guid,
+               sca.STRIPE_ACCOUNT_ID AS stripe_account_id,
+               sca.PAYOUTS_ENABLED AS payouts_enabled,
+               COALESCE(cf.carry_forward_cents, 0) AS carry_forward_cents
+        FROM GRATLYDB.STRIPE_CONNECTED_ACCOUNTS sca
+        LEFT JOIN (
+            SELECT EMPLOYEEGUID, SUM(CARRY_FORWARD_CENTS) AS carry_forward_cents
+            FROM GRATLYDB.STRIPE_EMPLOYEE_CARRY_FORWARD
+            WHERE CARRY_FORWARD_CENTS > 0
+            GROUP BY EMPLOYEEGUID
+        ) cf ON cf.EMPLOYEEGUID = sca.EMPLOYEEGUID
+        WHERE sca.STRIPE_ACCOUNT_ID IS NOT NULL
+          AND COALESCE(sca.ACCOUNT_DEAUTHORIZED, 0) = 0
+          AND (
+              sca.LAST_REFRESHED_AT IS NULL
+              OR (sca.PAYOUTS_ENABLED = 0 AND sca.LAST_REFRESHED_AT < NOW() - INTERVAL %s SECOND)
+              OR sca.LAST_REFRESHED_AT < NOW() - INTERVAL %s SECOND
+          )
+        ORDER BY COALESCE(cf.carry_forward_cents, 0) > 0 DESC,
+                 cf.carry_forward_cents DESC,
+                 sca.PAYOUTS_ENABLED ASC,
+                 sca.LAST_REFRESHED_AT IS NULL DESC,
+                 sca.LAST_REFRESHED_AT ASC
+    """
+    params: List[Any] = [ACCOUNT_REFRESH_INTERVAL_SECONDS, ACCOUNT_REFRESH_STALE_SECONDS]
+    if limit is not None:
+        query += " LIMIT %s"
+        params.append(limit)
+    cursor = _get_cursor(dictionary=True)
+    try:
+        cursor.execute(query, params)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def _retrieve_account_status(stripe, account_id: str) -> Dict[str, Any]:
+    account = stripe.Account.retrieve(account_id)
+    return {
+        "stripe_account_id": account_id,
+        "charges_enabled": bool(account.get("charges_enabled")),
+        "payouts_enabled": bool(account.get("payouts_enabled")),
+        "details_submitted": bool(account.get("details_submitted")),
+        "disabled_reason": account.get("disabled_reason"),
+    }
+
+
+def _write_account_statuses(statuses: List[Dict[str, Any]]) -> None:
+    if not statuses:
+        return
+    cursor = _get_cursor(dictionary=False)
+    try:
+        cursor.executemany(
+            ACCOUNT_STATUS_UPDATE_SQL,
+            [
+                (
+                    int(status["charges_enabled"]),
+                    int(status["payouts_enabled"]),
+                    int(status["details_submitted"]),
+                    status["disabled_reason"],
+                    status["stripe_account_id"],
+                )
+                for status in statuses
+            ],
+        )
+        cursor.connection.commit()
+    finally:
+        cursor.close()
+
+
+def refresh_account_rows(rows: List[Dict[str, Any]], track_progress: bool = False) -> Dict[str, Dict[str, Any]]:
+    if not _stripe_gateway.configured:
+        raise AccountRefreshError("Stripe secret key not configured")
+    stripe, StripeError = _stripe_gateway.client()
+    refreshed: Dict[str, Dict[str, Any]] = {}
+    if not rows:
+        return refreshed
+    pending: List[Dict[str, Any]] = []
+    workers = max(1, min(ACCOUNT_REFRESH_CONCURRENCY, len(rows)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="account-refresh") as executor:
+        futures = {
+            executor.submit(_retrieve_account_status, stripe, row["stripe_account_id"]): row
+            for row in rows
+            if row.get("stripe_account_id")
+        }
+        for future in as_completed(futures):
+            row = futures[future]
+            try:
+                status = future.result()
+            except StripeError:
+                logger.exception("Stripe account refresh failed for %s", row["stripe_account_id"])
+                if track_progress:
+                    _bump_progress(processed=1, failed=1)
+                continue
+            if track_progress:
+                became_ready = int(status["payouts_enabled"] and not row.get("payouts_enabled"))
+                _bump_progress(processed=1, updated=1, becameReady=became_ready)
+            refreshed[row["employee_guid"]] = status
+            pending.append(status)
+            if len(pending) >= ACCOUNT_REFRESH_BATCH_SIZE:
+                _write_account_statuses(pending)
+                pending = []
+    _write_account_statuses(pending)
+    return refreshed
+
+
+def _acquire_refresh_lock():
+    cursor = _get_cursor(dictionary=False)
+    cursor.execute("SELECT GET_LOCK(%s, 0)", (ACCOUNT_REFRESH_LOCK_NAME,))
+    row = cursor.fetchone()
+    if not row or row[0] != 1:
+        cursor.close()
+        return None
+    return cursor
+
+
+def run_account_refresh() -> Dict[str, Any]:
+    lock_cursor = _acquire_refresh_lock()
+    if lock_cursor is None:
+        logger.info("Connected account refresh already running elsewhere; skipping")
+        return get_refresh_progress()
+    try:
+        rows = _fetch_stale_accounts()
+        _set_progress(
+            status="running",
+            total=len(rows),
+            processed=0,
+            updated=0,
+            failed=0,
+            becameReady=0,
+            priorityAccounts=sum(1 for row in rows if int(row.get("carry_forward_cents") or 0) > 0),
+            startedAt=datetime.utcnow().isoformat(),
+            finishedAt=None,
+            lastError=None,
+        )
+        for start in range(0, len(rows), ACCOUNT_REFRESH_BATCH_SIZE):
+            if _stop_event.is_set():
+                break
+            refresh_account_rows(rows[start:start + ACCOUNT_REFRESH_BATCH_SIZE], track_progress=True)
+        _set_progress(status="idle", finishedAt=datetime.utcnow().isoformat())
+    except (pymysql.MySQLError, HTTPException, AccountRefreshError) as err:
+        _set_progress(status="failed", finishedAt=datetime.utcnow().isoformat(), lastError=str(err))
+        raise
+    finally:
+        try:
+            lock_cursor.execute("SELECT RELEASE_LOCK(%s)", (ACCOUNT_REFRESH_LOCK_NAME,))
+        finally:
+            lock_cursor.close()
+    return get_refresh_progress()
+
+
+def get_refresh_progress() -> Dict[str, Any]:
+    with _progress_lock:
+        return dict(_progress)
+
+
+def _refresher_loop() -> None:
+    while not _stop_event.is_set():
+        try:
+            if _stripe_gateway.configured:
+                run_account_refresh()
+        except (pymysql.MySQLError, HTTPException, AccountRefreshError):
+            logger.exception("Connected account refresh failed")
+        _wake_event.wait(ACCOUNT_REFRESH_INTERVAL_SECONDS)
+        _wake_event.clear()
+
+
+def start_account_refresher() -> None:
+    global _refresher_thread
+    if _refresher_thread is not None:
+        return
+    _stop_event.clear()
+    _refresher_thread = threading.Thread(target=_refresher_loop, name="account-refresher", daemon=True)
+    _refresher_thread.start()
+
+
+def stop_account_refresher() -> None:
+    global _refresher_thread
+    _stop_event.set()
+    _wake_event.set()
+    if _refresher_thread is not None:
+        _refresher_thread.join(timeout=5)
+    _refresher_thread = None
+
+
+@router.get("/admin/stripe/account-refresh")
+def get_account_refresh(request: Request):
+    _require_admin_token(request)
+    return get_refresh_progress()
+
+
+@router.post("/admin/stripe/account-refresh/run")
+def trigger_account_refresh(request: Request):
+    _require_admin_token(request)
+    if _refresher_thread is None:
+        raise HTTPException(status_code=503, detail="Account refresher is not running")
+    _wake_event.set()
+    return get_refresh_progress()
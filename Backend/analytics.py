@@ -0,0 +1,529 @@
+from datetime import date, datetime
+from fastapi import HTTPException
+from typing import Any, Dict, List, Optional, Tuple
+import importlib
+import json
+import logging
+import os
+import shutil
+import threading
+
+try:
+    from Backend.db import _business_date_sql
+    from Backend.exports import BUSINESS_DATE_SQL, _get_pyarrow_modules, _iter_row_chunks, _parquet_schema
+except ImportError:
+    from db import _business_date_sql
+    from exports import BUSINESS_DATE_SQL, _get_pyarrow_modules, _iter_row_chunks, _parquet_schema
+
+logger = logging.getLogger(__name__)
+
+
+class AnalyticsError(Exception):
+    pass
+
+
+ANALYTICS_SNAPSHOT_DIR = os.getenv("ANALYTICS_SNAPSHOT_DIR") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "analytics_snapshots"
+)
+ANALYTICS_ROUTING_ENABLED = (os.getenv("ANALYTICS_ROUTING_ENABLED") or "").strip().lower() in ("1", "true", "yes")
+MANIFEST_FILENAME = "manifest.json"
+
+SNAPSHOT_PARTITION_COLUMNS: List[Tuple[str, str]] = [
+    ("restaurant_id", "int"),
+    ("business_month", "string"),
+]
+
+
+SNAPSHOT_TABLES: Dict[str, Dict[str, Any]] = {
+    "payout_final": {
+        "query": f"""
+            SELECT
+                pf.RESTAURANTID AS restaurant_id,
+                DATE_FORMAT({BUSINESS_DATE_SQL}, '%%Y-%%m') AS business_month,
+                pf.PAYOUT_FINALID AS payout_final_id,
+                pf.PAYOUT_APPROVALID AS payout_approval_id,
+                pf.PAYOUT_SCHEDULEID AS payout_schedule_id,
+                {BUSINESS_DATE_SQL} AS business_date,
+                pf.EMPLOYEEGUID AS employee_guid,
+                pf.EMPLOYEE_NAME AS employee_name,
+                pf.JOBTITLE AS job_title,
+                pf.IS_CONTRIBUTOR AS is_contributor,
+                pf.PAYOUT_PERCENTAGE AS payout_percentage,
+                pf.TOTAL_SALES AS total_sales,
+                pf.NET_SALES AS net_sales,
+                pf.TOTAL_TIPS AS total_tips,
+                pf.TOTAL_GRATUITY AS total_gratuity,
+                pf.OVERALL_TIPS AS overall_tips,
+                pf.OVERALL_GRATUITY AS overall_gratuity,
+                pf.PAYOUT_TIPS AS payout_tips,
+                pf.PAYOUT_GRATUITY AS payout_gratuity,
+                pf.NET_PAYOUT AS net_payout,
+                pf.PREPAYOUT_DEDUCTION AS prepayout_deduction
+            FROM GRATLYDB.PAYOUT_FINAL pf
+            WHERE {BUSINESS_DATE_SQL} < %s
+        """,
+        "columns": [
+            ("payout_final_id", "int"),
+            ("payout_approval_id", "int"),
+            ("payout_schedule_id", "int"),
+            ("business_date", "date"),
+            ("employee_guid", "string"),
+            ("employee_name", "string"),
+            ("job_title", "string"),
+            ("is_contributor", "string"),
+            ("payout_percentage", "decimal"),
+            ("total_sales", "decimal"),
+            ("net_sales", "decimal"),
+            ("total_tips", "decimal"),
+            ("total_gratuity", "decimal"),
+            ("overall_tips", "decimal"),
+            ("overall_gratuity", "decimal"),
+            ("payout_tips", "decimal"),
+            ("payout_gratuity", "decimal"),
+            ("net_payout", "decimal"),
+            ("prepayout_deduction", "decimal"),
+        ],
+    },
+    "all_orders": {
+        "query": f"""
+            SELECT
+                so.RESTAURANTID AS restaurant_id,
+                DATE_FORMAT({_business_date_sql("ao.BUSINESSDATE")}, '%%Y-%%m') AS business_month,
+                ao.ORDERGUID AS order_guid,
+                {_business_date_sql("ao.BUSINESSDATE")} AS business_date,
+                ao.EMPLOYEEGUID AS employee_guid,
+                ao.VOIDED AS voided,
+                ao.NETAMOUNT AS net_amount,
+                ao.TIPAMOUNT AS tip_amount,
+                ao.GRATUITYAMOUNT AS gratuity_amount,
+                ao.TAXAMOUNT AS tax_amount,
+                ao.TOTALAMOUNT AS total_amount
+            FROM GRATLYDB.SRC_ALLORDERS ao
+            JOIN GRATLYDB.SRC_ONBOARDING so
+                ON so.RESTAURANTGUID = ao.RESTAURANTGUID
+            WHERE {_business_date_sql("ao.BUSINESSDATE")} < %s
+        """,
+        "columns": [
+            ("order_guid", "string"),
+            ("business_date", "date"),
+            ("employee_guid", "string"),
+            ("voided", "string"),
+            ("net_amount", "decimal"),
+            ("tip_amount", "decimal"),
+            ("gratuity_amount", "decimal"),
+            ("tax_amount", "decimal"),
+            ("total_amount", "decimal"),
+        ],
+    },
+    "time_entries": {
+        "query": f"""
+            SELECT
+                so.RESTAURANTID AS restaurant_id,
+                DATE_FORMAT({_business_date_sql("te.BUSINESSDATE")}, '%%Y-%%m') AS business_month,
+                te.TIMEENTRYGUID AS time_entry_guid,
+                {_business_date_sql("te.BUSINESSDATE")} AS business_date,
+                te.EMPLOYEEGUID AS employee_guid,
+                te.JOBID AS job_id,
+                te.REGULARHOURS AS regular_hours,
+                te.OVERTIMEHOURS AS overtime_hours,
+                te.NONCASHSALES AS non_cash_sales,
+                te.CASHSALES AS cash_sales,
+                te.NONCASHGRATUITYSERVICECHARGES AS non_cash_gratuity,
+                te.CASHGRATUITYSERVICECHARGES AS cash_gratuity,
+                te.NONCASHTIPS AS non_cash_tips,
+                te.DECLAREDCASHTIPS AS declared_cash_tips
+            FROM GRATLYDB.SRC_TIMEENTRIES te
+            JOIN GRATLYDB.SRC_ONBOARDING so
+                ON so.RESTAURANTGUID = te.RESTAURANTGUID
+            WHERE {_business_date_sql("te.BUSINESSDATE")} < %s
+        """,
+        "columns": [
+            ("time_entry_guid", "string"),
+            ("business_date", "date"),
+            ("employee_guid", "string"),
+            ("job_id", "string"),
+            ("regular_hours", "decimal"),
+            ("overtime_hours", "decimal"),
+            ("non_cash_sales", "decimal"),
+            ("cash_sales", "decimal"),
+            ("non_cash_gratuity", "decimal"),
+            ("cash_gratuity", "decimal"),
+            ("non_cash_tips", "decimal"),
+            ("declared_cash_tips", "decimal"),
+        ],
+    },
+    "settlement_transfers": {
+        "query": """
+            SELECT
+                so.RESTAURANTID AS restaurant_id,
+                DATE_FORMAT(st.CREATED_AT, '%%Y-%%m') AS business_month,
+                st.SETTLEMENT_ID AS settlement_id,
+                st.EMPLOYEEGUID AS employee_guid,
+                (
+                    SELECT CONCAT_WS(' ', se.EMPLOYEEFNAME, se.EMPLOYEELNAME)
+                    FROM GRATLYDB.SRC_EMPLOYEES se
+                    WHERE se.EMPLOYEEGUID = st.EMPLOYEEGUID
+                    LIMIT 1
+                ) AS employee_name,
+                st.TRANSFER_ID AS transfer_id,
+                st.AMOUNT_CENTS AS amount_cents,
+                st.FEE_CENTS AS fee_cents,
+                st.CARRY_FORWARD_CENTS AS carry_forward_cents,
+                st.CREATED_AT AS created_at
+            FROM GRATLYDB.STRIPE_SETTLEMENT_TRANSFERS st
+            JOIN GRATLYDB.SRC_ONBOARDING so
+                ON so.RESTAURANTGUID = st.RESTAURANTGUID
+            WHERE st.CREATED_AT < %s
+        """,
+        "columns": [
+            ("settlement_id", "string"),
+            ("employee_guid", "string"),
+            ("employee_name", "string"),
+            ("transfer_id", "string"),
+            ("amount_cents", "int"),
+            ("fee_cents", "int"),
+            ("carry_forward_cents", "int"),
+            ("created_at", "datetime"),
+        ],
+    },
+}
+
+
+def _snapshot_table(name: str, spec: Dict[str, Any], watermark: date) -> int:
+    pa, _ = _get_pyarrow_modules()
+    dataset = importlib.import_module("pyarrow.dataset")
+    schema = _parquet_schema(pa, SNAPSHOT_PARTITION_COLUMNS + spec["columns"])
+    partition_schema = _parquet_schema(pa, SNAPSHOT_PARTITION_COLUMNS)
+    staging_dir = os.path.join(ANALYTICS_SNAPSHOT_DIR, f".{name}.staging")
+    final_dir = os.path.join(ANALYTICS_SNAPSHOT_DIR, name)
+    retired_dir = os.path.join(ANALYTICS_SNAPSHOT_DIR, f".{name}.retired")
+    for path in (staging_dir, retired_dir):
+        shutil.rmtree(path, ignore_errors=True)
+
+    row_count = 0
+
+    def _batches():
+        nonlocal row_count
+        for rows in _iter_row_chunks(spec["query"], [watermark]):
+            rows = [row for row in rows if row.get("business_month")]
+            row_count += len(rows)
+            yield pa.RecordBatch.from_pylist(rows, schema=schema)
+
+    dataset.write_dataset(
+        _batches(),
+        staging_dir,
+        schema=schema,
+        format="parquet",
+        partitioning=dataset.partitioning(partition_schema, flavor="hive"),
+        existing_data_behavior="overwrite_or_ignore",
+    )
+    if os.path.isdir(final_dir):
+        os.replace(final_dir, retired_dir)
+    os.makedirs(staging_dir, exist_ok=True)
+    os.replace(staging_dir, final_dir)
+    shutil.rmtree(retired_dir, ignore_errors=True)
+    return row_count
+
+
+def run_nightly_snapshot(watermark: Optional[date] = None) -> Dict[str, Any]:
+    watermark = watermark or date.today()
+    os.makedirs(ANALYTICS_SNAPSHOT_DIR, exist_ok=True)
+    started_at = datetime.utcnow()
+    table_counts: Dict[str, int] = {}
+    for name, spec in SNAPSHOT_TABLES.items():
+        logger.info("Snapshotting %s through %s", name, watermark.isoformat())
+        table_counts[name] = _snapshot_table(name, spec, watermark)
+        logger.info("Snapshot of %s wrote %s rows", name, table_counts[name])
+    manifest = {
+        "watermark": watermark.isoformat(),
+        "startedAt": started_at.isoformat(),
+        "finishedAt": datetime.utcnow().isoformat(),
+        "tables": table_counts,
+    }
+    manifest_path = os.path.join(ANALYTICS_SNAPSHOT_DIR, MANIFEST_FILENAME)
+    with open(f"{manifest_path}.tmp", "w", encoding="utf-8") as handle:
+        json.dump(manifest, handle)
+    os.replace(f"{manifest_path}.tmp", manifest_path)
+    _reset_duckdb()
+    return manifest
+
+
+def _read_manifest() -> Optional[Dict[str, Any]]:
+    manifest_path = os.path.join(ANALYTICS_SNAPSHOT_DIR, MANIFEST_FILENAME)
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+def _snapshot_watermark() -> Optional[date]:
+    manifest = _read_manifest()
+    if not manifest or not manifest.get("watermark"):
+        return None
+    try:
+        return date.fromisoformat(manifest["watermark"])
+    except ValueError:
+        return None
+
+
+def analytics_watermark() -> Optional[date]:
+    if not ANALYTICS_ROUTING_ENABLED:
+        return None
+    watermark = _snapshot_watermark()
+    if watermark is None:
+        return None
+    try:
+        _get_duckdb_connection()
+    except Exception:
+        logger.warning("DuckDB unavailable; serving report from MySQL")
+        return None
+    return watermark
+
+
+def analytics_covers(end_value: date) -> bool:
+    watermark = analytics_watermark()
+    return watermark is not None and end_value < watermark
+
+
+_duckdb_lock = threading.Lock()
+_duckdb_connection = None
+_duckdb_manifest_mtime: Optional[int] = None
+
+
+def _reset_duckdb() -> None:
+    global _duckdb_connection
+    with _duckdb_lock:
+        if _duckdb_connection is not None:
+            _duckdb_connection.close()
+        _duckdb_connection = None
+
+
+def _manifest_mtime() -> Optional[int]:
+    try:
+        return os.stat(os.path.join(ANALYTICS_SNAPSHOT_DIR, MANIFEST_FILENAME)).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _get_duckdb_connection():
+    global _duckdb_connection, _duckdb_manifest_mtime
+    # The snapshot usually runs in another process, so rebuild the views whenever its manifest changes.
+    manifest_mtime = _manifest_mtime()
+    with _duckdb_lock:
+        if _duckdb_connection is not None and manifest_mtime != _duckdb_manifest_mtime:
+            _duckdb_connection.close()
+            _duckdb_connection = None
+        if _duckdb_connection is None:
+            duckdb = importlib.import_module("duckdb")
+            connection = duckdb.connect(database=":memory:")
+            for name in SNAPSHOT_TABLES:
+                table_dir = os.path.join(ANALYTICS_SNAPSHOT_DIR, name)
+                if not os.path.isdir(table_dir):
+                    continue
+                pattern = os.path.join(table_dir, "**", "*.parquet").replace("'", "''")
+                connection.execute(
+                    f"CREATE OR REPLACE VIEW {name} AS "
+                    f"SELECT * FROM read_parquet('{pattern}', hive_partitioning = true)"
+                )
+            _duckdb_connection = connection
+            _duckdb_manifest_mtime = manifest_mtime
+        return _duckdb_connection
+
+
+def run_analytics_query(query: str, params: List[Any]) -> List[Dict[str, Any]]:
+    duckdb = importlib.import_module("duckdb")
+    try:
+        cursor = _get_duckdb_connection().cursor()
+        try:
+            cursor.execute(query, params)
+            names = [column[0] for column in cursor.description]
+            return [dict(zip(names, row)) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+    except duckdb.Error as err:
+        raise AnalyticsError(f"Analytics query failed: {err}") from err
+
+
+SNAPSHOT_TIMESERIES_METRICS = {
+    "TIPS": "COALESCE(overall_tips, 0) + COALESCE(payout_tips, 0)",
+    "GRATUITY": "COALESCE(overall_gratuity, 0) + COALESCE(payout_gratuity, 0)",
+    "NET_PAYOUT": "net_payout",
+    "TOTAL_SALES": "total_sales",
+    "NET_SALES": "net_sales",
+    "PREPAYOUT_DEDUCTION": "prepayout_deduction",
+}
+
+SNAPSHOT_TIMESERIES_PERIODS = {
+    "day": "business_date",
+    "week": "CAST(date_trunc('week', business_date) AS DATE)",
+    "month": "CAST(date_trunc('month', business_date) AS DATE)",
+}
+
+SNAPSHOT_TIMESERIES_GROUPS = {
+    "EMPLOYEEGUID": "COALESCE(employee_guid, '')",
+    "JOBTITLE": "COALESCE(job_title, '')",
+}
+
+
+def fetch_timeseries_snapshot(
+    restaurant_id: int,
+    employee_guid: Optional[str],
+    metric_columns: List[str],
+    start_value: date,
+    end_value: date,
+    granularity: str,
+    group_column: Optional[str],
+) -> List[Dict[str, Any]]:
+    metric_select = ",\n".join(
+        f"COALESCE(SUM({SNAPSHOT_TIMESERIES_METRICS[column]}), 0) AS {column}" for column in metric_columns
+    )
+    group_select = ""
+    group_clause = ""
+    if group_column:
+        group_select = f"{SNAPSHOT_TIMESERIES_GROUPS[group_column]} AS group_key, MAX(employee_name) AS group_label,"
+        group_clause = ", group_key"
+    query = f"""
+        SELECT
+            {SNAPSHOT_TIMESERIES_PERIODS[granularity]} AS period_start,
+            {group_select}
+            {metric_select}
+        FROM payout_final
+        WHERE restaurant_id = ?
+          AND business_month BETWEEN ? AND ?
+          AND business_date BETWEEN ? AND ?
+    """
+    params: List[Any] = [
+        restaurant_id,
+        start_value.strftime("%Y-%m"),
+        end_value.strftime("%Y-%m"),
+        start_value,
+        end_value,
+    ]
+    if employee_guid:
+        query += " AND employee_guid = ?"
+        params.append(employee_guid)
+    query += f" GROUP BY period_start{group_clause} ORDER BY period_start"
+    return run_analytics_query(query, params)
+
+
+def fetch_daily_totals_snapshot(employee_guid: Optional[str], day: date, compare_day: date) -> Dict[str, Any]:
+    filter_params: List[Any] = [day.strftime("%Y-%m"), compare_day.strftime("%Y-%m")]
+    employee_filter = ""
+    if employee_guid:
+        employee_filter = "AND employee_guid = ?"
+        filter_params.append(employee_guid)
+    time_entry_row = run_analytics_query(
+        f"""
+        SELECT
+            COALESCE(SUM(CASE WHEN business_date = ? THEN non_cash_gratuity ELSE 0 END), 0) AS total_gratuity,
+            COALESCE(SUM(CASE WHEN business_date = ? THEN non_cash_gratuity ELSE 0 END), 0) AS gratuity_change,
+            COALESCE(SUM(CASE WHEN business_date = ? THEN non_cash_tips ELSE 0 END), 0) AS total_tips,
+            COALESCE(SUM(CASE WHEN business_date = ? THEN non_cash_tips ELSE 0 END), 0) AS tips_change
+        FROM time_entries
+        WHERE business_month IN (?, ?)
+          {employee_filter}
+        """,
+        [day, compare_day, day, compare_day, *filter_params],
+    )[0]
+    net_sales = (
+        "COALESCE(total_amount, 0) - (COALESCE(tax_amount, 0) + COALESCE(tip_amount, 0) + COALESCE(gratuity_amount, 0))"
+    )
+    order_row = run_analytics_query(
+        f"""
+        SELECT
+            COALESCE(SUM(CASE WHEN business_date = ? THEN {net_sales} ELSE 0 END), 0) AS net_sales,
+            COALESCE(SUM(CASE WHEN business_date = ? THEN {net_sales} ELSE 0 END), 0) AS net_sales_change
+        FROM all_orders
+        WHERE business_month IN (?, ?)
+          {employee_filter}
+        """,
+        [day, compare_day, *filter_params],
+    )[0]
+    return {**time_entry_row, **order_row}
+
+
+def fetch_pending_payout_totals_snapshot(
+    restaurant_id: int,
+    employee_guid: Optional[str],
+) -> Tuple[float, float]:
+    employee_filter = ""
+    params: List[Any] = [restaurant_id]
+    if employee_guid:
+        employee_filter = "AND employee_guid = ?"
+        params.append(employee_guid)
+    order_row = run_analytics_query(
+        f"""
+        SELECT COALESCE(SUM(COALESCE(tip_amount, 0) + COALESCE(gratuity_amount, 0)), 0) AS total_tips_gratuity
+        FROM all_orders
+        WHERE restaurant_id = ?
+          AND (voided IS NULL OR voided <> '1')
+          {employee_filter}
+        """,
+        params,
+    )[0]
+    payout_row = run_analytics_query(
+        f"""
+        SELECT COALESCE(SUM(COALESCE(net_payout, 0) + COALESCE(prepayout_deduction, 0)), 0) AS total_paid
+        FROM payout_final
+        WHERE restaurant_id = ?
+          {employee_filter}
+        """,
+        params,
+    )[0]
+    return float(order_row["total_tips_gratuity"] or 0), float(payout_row["total_paid"] or 0)
+
+
+def fetch_settlement_totals_snapshot(
+    restaurant_id: int,
+    employee_guid: Optional[str],
+    start_value: date,
+    end_value: date,
+) -> List[Dict[str, Any]]:
+    from datetime import timedelta
+
+    query = """
+        SELECT
+            employee_guid,
+            ANY_VALUE(employee_name) AS employee_name,
+            COALESCE(SUM(amount_cents), 0) AS amount_cents
+        FROM settlement_transfers
+        WHERE restaurant_id = ?
+          AND business_month BETWEEN ? AND ?
+          AND created_at >= ?
+          AND created_at < ?
+    """
+    params: List[Any] = [
+        restaurant_id,
+        start_value.strftime("%Y-%m"),
+        end_value.strftime("%Y-%m"),
+        start_value,
+        end_value + timedelta(days=1),
+    ]
+    if employee_guid:
+        query += " AND employee_guid = ?"
+        params.append(employee_guid)
+    query += " GROUP BY employee_guid ORDER BY employee_name"
+    rows = run_analytics_query(query, params)
+    return [
+        {
+            "employeeGuid": row.get("employee_guid"),
+            "employeeName": (row.get("employee_name") or "").strip() or "Unknown",
+            "totalPayout": round((float(row.get("amount_cents") or 0) / 100), 2),
+        }
+        for row in rows
+    ]
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(message)s")
+    try:
+        manifest = run_nightly_snapshot()
+    except HTTPException as err:
+        logger.error("Analytics snapshot failed: %s", err.detail)
+        raise SystemExit(1)
+    logger.info("Analytics snapshot complete: %s", json.dumps(manifest["tables"]))
+
+
+if __name__ == "__main__":
+    main()
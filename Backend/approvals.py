@@ -4,9 +4,11 @@ import pymysql
 from pydantic import BaseModel
 
 try:
-    from Backend.db import _get_cursor, _fetch_restaurant_guid, _fetch_restaurant_key
+    from Backend.db import _get_cursor, _fetch_restaurant_guid, _fetch_restaurant_key, _refresh_payout_daily_totals, _resolve_column
+    from Backend.payout_config import get_payout_config
 except ImportError:
-    from db import _get_cursor, _fetch_restaurant_guid, _fetch_restaurant_key
+    from db import _get_cursor, _fetch_restaurant_guid, _fetch_restaurant_key, _refresh_payout_daily_totals, _resolve_column
+    from payout_config import get_payout_config
 
 router = APIRouter()
 
@@ -46,19 +48,8 @@ class ApprovalFinalizePayload(BaseModel):
     businessDate: str
     userId: int
 
-def _get_contributor_column(cursor) -> Optional[str]:
-    cursor.execute(
-        """
-        SELECT COLUMN_NAME AS column_name
-        FROM information_schema.COLUMNS
-        WHERE TABLE_SCHEMA = 'GRATLYDB'
-          AND TABLE_NAME = 'PAYOUTRECEIVERS'
-          AND COLUMN_NAME IN ('CONTRIBUTOR_RECEIVER', 'CONTRIBUTOR_RECIEVER')
-        LIMIT 1
-        """
-    )
-    row = cursor.fetchone()
-    return row["column_name"] if row else None
+def _get_contributor_column() -> Optional[str]:
+    return _resolve_column("PAYOUTRECEIVERS", "CONTRIBUTOR_RECEIVER", "CONTRIBUTOR_RECIEVER")
 
 @router.get("/approvals")
 def get_approvals(
@@ -108,32 +99,16 @@ def get_approvals(
 
     cursor = _get_cursor(dictionary=True)
     try:
-        contributor_column = _get_contributor_column(cursor)
+        contributor_column = _get_contributor_column()
         if not contributor_column:
             return {"schedules": []}
 
-        cursor.execute(
-            f"""
-            SELECT
-                ps.PAYOUT_SCHEDULEID AS payout_schedule_id,
-                SUM(CASE WHEN pr.{contributor_column} = 0 THEN 1 ELSE 0 END) AS contributor_count,
-                SUM(CASE WHEN pr.{contributor_column} = 1 THEN 1 ELSE 0 END) AS receiver_count
-            FROM GRATLYDB.PAYOUT_SCHEDULE ps
-            JOIN GRATLYDB.PAYOUTRECEIVERS pr
-                ON pr.PAYOUT_SCHEDULEID = ps.PAYOUT_SCHEDULEID
-            WHERE ps.RESTAURANTID = %s
-            GROUP BY ps.PAYOUT_SCHEDULEID
-            """,
-            (restaurant_id,),
-        )
-        schedule_count_rows = cursor.fetchall()
-        schedule_counts = {
-            row["payout_schedule_id"]: {
-                "contributorCount": int(row["contributor_count"] or 0),
-                "receiverCount": int(row["receiver_count"] or 0),
-            }
-            for row in schedule_count_rows
-        }
+        schedule_configs = get_payout_config(restaurant_id)["schedules"]
+        if not any(
+            str(config["payout_rule_id"]) == "4" and config["contributor_count"]
+            for config in schedule_configs.values()
+        ):
+            return {"schedules": []}
 
         contributor_flag = 0
         cursor.execute(
@@ -357,30 +332,6 @@ def get_approvals(
         if not rows:
             return {"schedules": []}
 
-        schedule_ids = sorted({row["PAYOUT_SCHEDULEID"] for row in rows})
-        cursor.execute(
-            f"""
-            SELECT
-                PAYOUT_SCHEDULEID AS payout_schedule_id,
-                PAYOUT_RECEIVERID AS receiver_id,
-                PAYOUT_PERCENTAGE AS payout_percentage,
-                {contributor_column} AS contributor_flag
-            FROM GRATLYDB.PAYOUTRECEIVERS
-            WHERE PAYOUT_SCHEDULEID IN ({", ".join(["%s"] * len(schedule_ids))})
-            """,
-            schedule_ids,
-        )
-        receiver_rows = cursor.fetchall()
-        receiver_roles: Dict[int, list] = {}
-        for row in receiver_rows:
-            receiver_roles.setdefault(row["payout_schedule_id"], []).append(
-                {
-                    "receiverId": row["receiver_id"],
-                    "payoutPercentage": float(row["payout_percentage"] or 0),
-                    "isContributor": bool(row["contributor_flag"]),
-                }
-            )
-
         schedule_map: Dict[str, dict] = {}
         schedule_contributors: Dict[str, Dict[str, dict]] = {}
         for row in rows:
@@ -408,9 +359,9 @@ def get_approvals(
                     "totalTips": 0.0,
                     "totalGratuity": 0.0,
                     "orderCount": 0,
-                    "contributorCount": schedule_counts.get(schedule_id, {}).get("contributorCount", 0),
-                    "receiverCount": schedule_counts.get(schedule_id, {}).get("receiverCount", 0),
-                    "receiverRoles": receiver_roles.get(schedule_id, []),
+                    "contributorCount": schedule_configs.get(schedule_id, {}).get("contributor_count", 0),
+                    "receiverCount": schedule_configs.get(schedule_id, {}).get("receiver_count", 0),
+                    "receiverRoles": [dict(role) for role in schedule_configs.get(schedule_id, {}).get("receiver_roles", [])],
                     "contributors": [],
                 },
             )
@@ -763,6 +714,7 @@ def approve_payout_schedule(payload: ApprovalFinalizePayload):
                 "already_approved": True,
             }
 
+        conn.begin()
         cursor.execute(
             """
             UPDATE GRATLYDB.PAYOUT_APPROVAL
@@ -860,6 +812,7 @@ def approve_payout_schedule(payload: ApprovalFinalizePayload):
                 row["approval_id"],
             ),
         )
+        _refresh_payout_daily_totals(cursor, payload.restaurantId, payload.businessDate)
         conn.commit()
         debit_result = None
         debit_error = None
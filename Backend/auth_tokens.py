@@ -0,0 +1,272 @@
+from fastapi import APIRouter, Depends, Header, HTTPException
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import time
+import pymysql
+
+try:
+    from Backend.db import (
+        _fetch_employee_guid_for_user,
+        _fetch_restaurant_guid,
+        _fetch_restaurant_key,
+        _fetch_user_permission_names,
+        _get_cursor,
+        _get_env_or_ini,
+        _serialize_permissions,
+    )
+except ImportError:
+    from db import (
+        _fetch_employee_guid_for_user,
+        _fetch_restaurant_guid,
+        _fetch_restaurant_key,
+        _fetch_user_permission_names,
+        _get_cursor,
+        _get_env_or_ini,
+        _serialize_permissions,
+    )
+
+router = APIRouter()
+
+logger = logging.getLogger(__name__)
+
+AUTH_TOKEN_ISSUER = "gratly"
+ACCESS_TOKEN_TTL_SECONDS = int(os.getenv("ACCESS_TOKEN_TTL_SECONDS") or 900)
+REFRESH_TOKEN_TTL_SECONDS = int(os.getenv("REFRESH_TOKEN_TTL_SECONDS") or 14 * 24 * 3600)
+AUTH_REQUIRE_TOKENS = (os.getenv("AUTH_REQUIRE_TOKENS") or "").strip().lower() in ("1", "true", "yes")
+AUTH_TOKEN_SECRET = _get_env_or_ini("AUTH_TOKEN_SECRET")
+if not AUTH_TOKEN_SECRET:
+    if AUTH_REQUIRE_TOKENS:
+        raise RuntimeError("AUTH_TOKEN_SECRET must be set when AUTH_REQUIRE_TOKENS is enabled")
+    logger.warning("AUTH_TOKEN_SECRET not configured; access tokens are disabled")
+_signing_key = AUTH_TOKEN_SECRET.encode("utf-8") if AUTH_TOKEN_SECRET else None
+_token_header = base64.urlsafe_b64encode(b'{"alg":"HS256","typ":"JWT"}').rstrip(b"=")
+
+
+class RefreshTokenPayload(BaseModel):
+    refreshToken: str
+
+
+class AccessContext:
+    def __init__(
+        self,
+        user_id: int,
+        restaurant_id: Optional[int],
+        restaurant_guid: Optional[str],
+        employee_guid: Optional[str],
+        permissions: Dict[str, bool],
+    ):
+        self.user_id = user_id
+        self.restaurant_id = restaurant_id
+        self.restaurant_guid = restaurant_guid
+        self.employee_guid = employee_guid
+        self.permissions = permissions
+
+    @property
+    def is_admin_view(self) -> bool:
+        return bool(self.permissions.get("adminAccess") or self.permissions.get("managerAccess"))
+
+    @property
+    def has_business_access(self) -> bool:
+        return bool(
+            self.is_admin_view
+            or self.permissions.get("createPayoutSchedules")
+            or self.permissions.get("approvePayouts")
+            or self.permissions.get("manageTeam")
+        )
+
+    @property
+    def is_employee(self) -> bool:
+        return bool(self.permissions.get("employeeOnly"))
+
+    def require_restaurant(self) -> int:
+        if not self.restaurant_id:
+            raise HTTPException(status_code=404, detail="Restaurant not found")
+        return self.restaurant_id
+
+    def to_claims(self) -> Dict[str, Any]:
+        return {
+            "sub": str(self.user_id),
+            "rid": self.restaurant_id,
+            "rguid": self.restaurant_guid,
+            "eguid": self.employee_guid,
+            "perms": sorted(key for key, enabled in self.permissions.items() if enabled),
+        }
+
+    @classmethod
+    def from_claims(cls, claims: Dict[str, Any]) -> "AccessContext":
+        permissions = _serialize_permissions([]) or {}
+        for key in claims.get("perms") or []:
+            if key in permissions:
+                permissions[key] = True
+        return cls(
+            user_id=int(claims["sub"]),
+            restaurant_id=claims.get("rid"),
+            restaurant_guid=claims.get("rguid"),
+            employee_guid=claims.get("eguid"),
+            permissions=permissions,
+        )
+
+
+def _b64encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(signing_input: bytes) -> bytes:
+    return _b64encode(hmac.new(_signing_key, signing_input, hashlib.sha256).digest())
+
+
+def _encode_token(claims: Dict[str, Any], token_type: str, ttl_seconds: int) -> str:
+    now = int(time.time())
+    body = dict(claims, typ=token_type, iss=AUTH_TOKEN_ISSUER, iat=now, exp=now + ttl_seconds)
+    signing_input = _token_header + b"." + _b64encode(json.dumps(body, separators=(",", ":")).encode("utf-8"))
+    return (signing_input + b"." + _sign(signing_input)).decode("ascii")
+
+
+def _decode_token(token: str, token_type: str) -> Dict[str, Any]:
+    if _signing_key is None:
+        raise HTTPException(status_code=401, detail="Token authentication is not configured")
+    try:
+        header, body, signature = token.encode("ascii").split(b".")
+        if not hmac.compare_digest(_sign(header + b"." + body), signature):
+            raise ValueError("bad signature")
+        claims = json.loads(_b64decode(body.decode("ascii")))
+    except (ValueError, UnicodeError):
+        raise HTTPException(status_code=401, detail="Invalid token", headers={"WWW-Authenticate": "Bearer"})
+    if (
+        not isinstance(claims, dict)
+        or claims.get("typ") != token_type
+        or claims.get("iss") != AUTH_TOKEN_ISSUER
+        or not claims.get("sub")
+    ):
+        raise HTTPException(status_code=401, detail="Invalid token", headers={"WWW-Authenticate": "Bearer"})
+    if int(claims.get("exp") or 0) < int(time.time()):
+        raise HTTPException(status_code=401, detail="Token expired", headers={"WWW-Authenticate": "Bearer"})
+    return claims
+
+
+def _load_access_context(user_id: int) -> AccessContext:
+    permissions = _serialize_permissions(_fetch_user_permission_names(user_id))
+    if permissions is None:
+        raise HTTPException(status_code=404, detail="User permissions not found")
+    return AccessContext(
+        user_id=user_id,
+        restaurant_id=_fetch_restaurant_key(user_id),
+        restaurant_guid=_fetch_restaurant_guid(user_id),
+        employee_guid=_fetch_employee_guid_for_user(user_id),
+        permissions=permissions,
+    )
+
+
+def _fetch_token_version(user_id: int) -> Optional[int]:
+    cursor = _get_cursor(dictionary=True)
+    try:
+        cursor.execute(
+            "SELECT TOKEN_VERSION AS token_version FROM GRATLYDB.USER_MASTER WHERE USERID = %s",
+            (user_id,),
+        )
+        row = cursor.fetchone()
+    finally:
+        cursor.close()
+    return int(row["token_version"] or 0) if row else None
+
+
+def issue_tokens(context: AccessContext, token_version: int = 0) -> Dict[str, Any]:
+    if _signing_key is None:
+        return {}
+    return {
+        "access_token": _encode_token(context.to_claims(), "access", ACCESS_TOKEN_TTL_SECONDS),
+        "refresh_token": _encode_token(
+            {"sub": str(context.user_id), "ver": token_version}, "refresh", REFRESH_TOKEN_TTL_SECONDS
+        ),
+        "token_type": "bearer",
+        "expires_in": ACCESS_TOKEN_TTL_SECONDS,
+    }
+
+
+def issue_tokens_for_user(user_id: int, token_version: int = 0) -> Dict[str, Any]:
+    return issue_tokens(_load_access_context(user_id), token_version)
+
+
+def issue_tokens_for_profile(profile: Dict[str, Any]) -> Dict[str, Any]:
+    return issue_tokens(
+        AccessContext(
+            user_id=profile["user_id"],
+            restaurant_id=profile["restaurant_id"],
+            restaurant_guid=profile["restaurant_guid"],
+            employee_guid=profile["employee_guid"],
+            permissions=_serialize_permissions(profile["permission_names"]),
+        ),
+        profile.get("token_version") or 0,
+    )
+
+
+def _bearer_token(authorization: Optional[str]) -> Optional[str]:
+    if not authorization:
+        return None
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token.strip():
+        raise HTTPException(status_code=401, detail="Invalid authorization header", headers={"WWW-Authenticate": "Bearer"})
+    return token.strip()
+
+
+def optional_access_context(authorization: Optional[str] = Header(None)) -> Optional[AccessContext]:
+    token = _bearer_token(authorization)
+    if token is None:
+        return None
+    return AccessContext.from_claims(_decode_token(token, "access"))
+
+
+def require_access_context(
+    context: Optional[AccessContext] = Depends(optional_access_context),
+) -> AccessContext:
+    if context is None:
+        raise HTTPException(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+    return context
+
+
+def resolve_access_context(user_id: Optional[int], context: Optional[AccessContext]) -> AccessContext:
+    if context is not None:
+        if user_id is not None and int(user_id) != context.user_id:
+            raise HTTPException(status_code=403, detail="Token does not match user")
+        return context
+    if AUTH_REQUIRE_TOKENS:
+        raise HTTPException(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+    if user_id is None:
+        raise HTTPException(status_code=400, detail="user_id is required")
+    return _load_access_context(user_id)
+
+
+@router.post("/auth/refresh")
+def refresh_access_token(payload: RefreshTokenPayload):
+    claims = _decode_token(payload.refreshToken.strip(), "refresh")
+    user_id = int(claims["sub"])
+    try:
+        token_version = _fetch_token_version(user_id)
+    except pymysql.MySQLError as err:
+        raise HTTPException(status_code=500, detail=f"Error refreshing token: {err}")
+    # Password resets bump TOKEN_VERSION, which revokes every refresh token issued before them.
+    if token_version is None or int(claims.get("ver") or 0) != token_version:
+        raise HTTPException(status_code=401, detail="Token revoked", headers={"WWW-Authenticate": "Bearer"})
+    return issue_tokens_for_user(user_id, token_version)
+
+
+@router.get("/auth/me")
+def get_current_user(context: AccessContext = Depends(require_access_context)):
+    permissions: List[str] = context.to_claims()["perms"]
+    return {
+        "userId": context.user_id,
+        "restaurantId": context.restaurant_id,
+        "restaurantGuid": context.restaurant_guid,
+        "employeeGuid": context.employee_guid,
+        "permissions": permissions,
+    }
@@ -0,0 +1,184 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Response
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import os
+import time
+import pymysql
+
+try:
+    from Backend.analytics import AnalyticsError
+    from Backend.db import _get_pooled_cursor
+    from Backend.auth_tokens import AccessContext, optional_access_context, resolve_access_context
+    from Backend.reports import (
+        _fetch_pending_payouts,
+        _fetch_settlement_totals,
+        _fetch_total_gratuity,
+        _fetch_weekly_tips_gratuities,
+        _fetch_yesterday_schedules,
+    )
+    from Backend.stripe_payments import _fetch_recent_settlements
+except ImportError:
+    from analytics import AnalyticsError
+    from db import _get_pooled_cursor
+    from auth_tokens import AccessContext, optional_access_context, resolve_access_context
+    from reports import (
+        _fetch_pending_payouts,
+        _fetch_settlement_totals,
+        _fetch_total_gratuity,
+        _fetch_weekly_tips_gratuities,
+        _fetch_yesterday_schedules,
+    )
+    from stripe_payments import _fetch_recent_settlements
+
+router = APIRouter()
+
+DASHBOARD_WORKERS = int(os.getenv("DASHBOARD_WORKERS") or 7)
+_dashboard_executor = ThreadPoolExecutor(max_workers=DASHBOARD_WORKERS, thread_name_prefix="dashboard")
+
+
+class _DashboardContext:
+    def __init__(self, access: AccessContext):
+        self.user_id = access.user_id
+        self.is_admin_view = access.is_admin_view
+        self.has_business_access = access.has_business_access
+        self.is_employee = access.is_employee
+        self.restaurant_id = access.restaurant_id
+        self.restaurant_guid = access.restaurant_guid
+        self.employee_guid = None if access.is_admin_view else access.employee_guid
+
+    def require_restaurant(self) -> int:
+        if not self.restaurant_id:
+            raise HTTPException(status_code=404, detail="Restaurant not found")
+        return self.restaurant_id
+
+
+def _section_total_gratuity(cursor, context: _DashboardContext) -> Dict[str, Any]:
+    employee_guid = None
+    if not context.has_business_access:
+        if not context.is_employee:
+            raise HTTPException(status_code=403, detail="User is not authorized to view totals")
+        employee_guid = context.employee_guid
+        if not employee_guid:
+            raise HTTPException(status_code=404, detail="Employee not found for user")
+    return _fetch_total_gratuity(cursor, employee_guid)
+
+
+def _section_weekly_tips_gratuities(cursor, context: _DashboardContext) -> Dict[str, Any]:
+    restaurant_id = context.require_restaurant()
+    if not context.is_admin_view and not context.employee_guid:
+        return {"days": []}
+    return {"days": _fetch_weekly_tips_gratuities(cursor, restaurant_id, context.employee_guid)}
+
+
+def _section_pending_payouts(cursor, context: _DashboardContext) -> Dict[str, Any]:
+    restaurant_id = context.require_restaurant()
+    if not context.restaurant_guid:
+        raise HTTPException(status_code=404, detail="Restaurant not found")
+    if not context.is_admin_view and not context.employee_guid:
+        return {"pendingPayouts": 0.0}
+    return {
+        "pendingPayouts": _fetch_pending_payouts(
+            cursor, restaurant_id, context.restaurant_guid, context.employee_guid
+        )
+    }
+
+
+def _settlement_totals_section(cursor, context: _DashboardContext, start_value: date) -> Dict[str, Any]:
+    restaurant_id = context.require_restaurant()
+    if not context.is_admin_view and not context.employee_guid:
+        return {"employees": [], "startDate": None, "endDate": None}
+    end_value = date.today()
+    employees = _fetch_settlement_totals(
+        cursor, restaurant_id, context.employee_guid, start_value, end_value
+    )
+    return {
+        "employees": employees,
+        "startDate": start_value.strftime("%Y-%m-%d"),
+        "endDate": end_value.strftime("%Y-%m-%d"),
+    }
+
+
+def _section_this_week(cursor, context: _DashboardContext) -> Dict[str, Any]:
+    today = date.today()
+    return _settlement_totals_section(cursor, context, today - timedelta(days=today.weekday()))
+
+
+def _section_this_month(cursor, context: _DashboardContext) -> Dict[str, Any]:
+    today = date.today()
+    return _settlement_totals_section(cursor, context, date(today.year, today.month, 1))
+
+
+def _section_yesterday(cursor, context: _DashboardContext) -> Dict[str, Any]:
+    if not context.is_admin_view and not context.employee_guid:
+        return {"schedules": []}
+    return {"schedules": _fetch_yesterday_schedules(cursor, context.restaurant_id, context.employee_guid)}
+
+
+def _section_recent_settlements(cursor, context: _DashboardContext) -> Dict[str, Any]:
+    restaurant_id = context.require_restaurant()
+    if not context.is_admin_view and not context.employee_guid:
+        return {"settlements": []}
+    return {"settlements": _fetch_recent_settlements(cursor, restaurant_id, context.employee_guid, 5)}
+
+
+DASHBOARD_SECTIONS: Dict[str, Callable[[Any, _DashboardContext], Dict[str, Any]]] = {
+    "total-gratuity": _section_total_gratuity,
+    "weekly-tips-gratuities": _section_weekly_tips_gratuities,
+    "pending-payouts": _section_pending_payouts,
+    "this-week": _section_this_week,
+    "this-month": _section_this_month,
+    "yesterday": _section_yesterday,
+    "recent-settlements": _section_recent_settlements,
+}
+
+
+def _run_section(name: str, context: _DashboardContext) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]], float]:
+    started = time.perf_counter()
+    result = None
+    error = None
+    cursor = None
+    try:
+        cursor = _get_pooled_cursor(dictionary=True)
+        result = DASHBOARD_SECTIONS[name](cursor, context)
+    except HTTPException as err:
+        error = {"status": err.status_code, "detail": err.detail}
+    except (pymysql.MySQLError, AnalyticsError) as err:
+        error = {"status": 500, "detail": f"Error fetching {name}: {err}"}
+    finally:
+        if cursor is not None:
+            cursor.close()
+    return result, error, (time.perf_counter() - started) * 1000
+
+
+def _format_server_timing(timings: List[Tuple[str, float]]) -> str:
+    return ", ".join(f"{name};dur={duration:.1f}" for name, duration in timings)
+
+
+@router.get("/dashboard")
+def get_dashboard(
+    response: Response,
+    user_id: Optional[int] = None,
+    access: Optional[AccessContext] = Depends(optional_access_context),
+):
+    started = time.perf_counter()
+    context = _DashboardContext(resolve_access_context(user_id, access))
+    timings: List[Tuple[str, float]] = [("context", (time.perf_counter() - started) * 1000)]
+
+    futures = {
+        name: _dashboard_executor.submit(_run_section, name, context)
+        for name in DASHBOARD_SECTIONS
+    }
+    sections: Dict[str, Any] = {}
+    errors: Dict[str, Any] = {}
+    for name, future in futures.items():
+        result, error, duration = future.result()
+        timings.append((name, duration))
+        if error is not None:
+            errors[name] = error
+        else:
+            sections[name] = result
+
+    timings.append(("total", (time.perf_counter() - started) * 1000))
+    response.headers["Server-Timing"] = _format_server_timing(timings)
+    return {"sections": sections, "errors": errors}
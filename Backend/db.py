@@ -3,7 +3,11 @@ import pymysql
 import os
 from dotenv import load_dotenv
 import configparser
-from typing import Iterable, List, Optional
+import queue
+import threading
+import time
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
 load_dotenv()
 
@@ -27,6 +31,198 @@ _ini_db_config = _load_db_config_from_ini(os.path.join(os.path.dirname(__file__)
 def _get_env_or_ini(key: str) -> Optional[str]:
     return os.getenv(key) or _ini_db_config.get(key)
 
+BUSINESS_DATE_FORMATS = ("%Y-%m-%d", "%Y/%m/%d", "%m/%d/%Y", "%m-%d-%Y", "%Y%m%d")
+
+def _business_date_sql(column: str) -> str:
+    fallbacks = [f"STR_TO_DATE({column}, '{fmt.replace('%', '%%')}')" for fmt in BUSINESS_DATE_FORMATS]
+    fallbacks.append(f"STR_TO_DATE(LEFT({column}, 10), '%%Y-%%m-%%d')")
+    return "COALESCE(" + ", ".join(fallbacks) + ")"
+
+def _parse_business_date(value: Optional[str]) -> Optional[date]:
+    if not value:
+        return None
+    text = str(value).strip()
+    for fmt in BUSINESS_DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    try:
+        return datetime.strptime(text[:10], "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+STRIPE_EVENT_TABLES = (
+    "STRIPE_PAYMENT_EVENTS",
+    "STRIPE_DISPUTE_EVENTS",
+    "STRIPE_BALANCE_EVENTS",
+    "STRIPE_TRANSFER_EVENTS",
+    "STRIPE_PAYOUT_EVENTS",
+)
+
+def _payload_value_sql(path: str, returning: str) -> str:
+    return f"JSON_VALUE(RAW_PAYLOAD, '$.data.object.{path}' RETURNING {returning} NULL ON EMPTY NULL ON ERROR)"
+
+def _payload_metadata_sql(size: int, *keys: str) -> str:
+    values = ", ".join(f"NULLIF({_payload_value_sql(f'metadata.{key}', f'CHAR({size})')}, '')" for key in keys)
+    return f"COALESCE({values})"
+
+STRIPE_EVENT_PAYLOAD_COLUMNS = (
+    (
+        "PAYLOAD_EMPLOYEEGUID",
+        f"VARCHAR(64) GENERATED ALWAYS AS ({_payload_metadata_sql(64, 'employee_guid', 'employeeGuid')}) STORED",
+        "EMPLOYEE",
+    ),
+    (
+        "PAYLOAD_RESTAURANTGUID",
+        f"VARCHAR(36) GENERATED ALWAYS AS ({_payload_metadata_sql(36, 'restaurant_guid', 'restaurantGuid')}) STORED",
+        "RESTAURANT",
+    ),
+    (
+        "PAYLOAD_OBJECT_ID",
+        f"VARCHAR(255) GENERATED ALWAYS AS ({_payload_value_sql('id', 'CHAR(255)')}) STORED",
+        "OBJECT",
+    ),
+    (
+        "PAYLOAD_AMOUNT",
+        f"BIGINT GENERATED ALWAYS AS ({_payload_value_sql('amount', 'SIGNED')}) STORED",
+        None,
+    ),
+)
+
+PAYOUT_DAILY_TOTALS_SELECT = f"""
+    SELECT
+        pf.RESTAURANTID,
+        %s AS BUSINESS_DATE,
+        COALESCE(pf.EMPLOYEEGUID, '') AS EMPLOYEEGUID,
+        COALESCE(pf.JOBTITLE, '') AS JOBTITLE,
+        MAX(pf.EMPLOYEE_NAME) AS EMPLOYEE_NAME,
+        COALESCE(SUM(pf.TOTAL_SALES), 0) AS TOTAL_SALES,
+        COALESCE(SUM(pf.NET_SALES), 0) AS NET_SALES,
+        COALESCE(SUM(COALESCE(pf.OVERALL_TIPS, 0) + COALESCE(pf.PAYOUT_TIPS, 0)), 0) AS TIPS,
+        COALESCE(SUM(COALESCE(pf.OVERALL_GRATUITY, 0) + COALESCE(pf.PAYOUT_GRATUITY, 0)), 0) AS GRATUITY,
+        COALESCE(SUM(pf.NET_PAYOUT), 0) AS NET_PAYOUT,
+        COALESCE(SUM(pf.PREPAYOUT_DEDUCTION), 0) AS PREPAYOUT_DEDUCTION
+    FROM GRATLYDB.PAYOUT_FINAL pf
+"""
+
+PAYOUT_DAILY_TOTALS_GROUP_BY = "GROUP BY pf.RESTAURANTID, COALESCE(pf.EMPLOYEEGUID, ''), COALESCE(pf.JOBTITLE, '')"
+
+PAYOUT_DAILY_TOTALS_COLUMNS = """
+    RESTAURANTID,
+    BUSINESS_DATE,
+    EMPLOYEEGUID,
+    JOBTITLE,
+    EMPLOYEE_NAME,
+    TOTAL_SALES,
+    NET_SALES,
+    TIPS,
+    GRATUITY,
+    NET_PAYOUT,
+    PREPAYOUT_DEDUCTION
+"""
+
+def _business_date_variants(value: date) -> List[str]:
+    variants: List[str] = []
+    for fmt in BUSINESS_DATE_FORMATS:
+        for month, day in ((f"{value.month:02d}", f"{value.day:02d}"), (str(value.month), str(value.day))):
+            text = fmt.replace("%Y", f"{value.year:04d}").replace("%m", month).replace("%d", day)
+            if text not in variants:
+                variants.append(text)
+    return variants
+
+# Business dates are matched as strings: STR_TO_DATE inside INSERT ... SELECT fails under strict mode.
+def _write_payout_daily_totals(cursor, restaurant_id: int, date_value: date, business_dates: List[str]) -> None:
+    cursor.execute(
+        """
+        DELETE FROM GRATLYDB.PAYOUT_DAILY_TOTALS
+        WHERE RESTAURANTID = %s AND BUSINESS_DATE = %s
+        """,
+        (restaurant_id, date_value),
+    )
+    placeholders = ", ".join(["%s"] * len(business_dates))
+    cursor.execute(
+        f"""
+        INSERT INTO GRATLYDB.PAYOUT_DAILY_TOTALS ({PAYOUT_DAILY_TOTALS_COLUMNS})
+        {PAYOUT_DAILY_TOTALS_SELECT}
+        WHERE pf.RESTAURANTID = %s
+          AND (pf.BUSINESSDATE IN ({placeholders}) OR pf.BUSINESSDATE LIKE %s)
+        {PAYOUT_DAILY_TOTALS_GROUP_BY}
+        """,
+        (date_value, restaurant_id, *business_dates, f"{date_value.isoformat()}%"),
+    )
+
+def _refresh_payout_daily_totals(cursor, restaurant_id: int, business_date: str) -> None:
+    date_value = _parse_business_date(business_date)
+    if date_value is None:
+        return
+    business_dates = _business_date_variants(date_value)
+    if business_date not in business_dates:
+        business_dates.append(business_date)
+    _write_payout_daily_totals(cursor, restaurant_id, date_value, business_dates)
+
+def _backfill_payout_daily_totals(cursor) -> int:
+    cursor.execute(
+        """
+        SELECT DISTINCT RESTAURANTID AS restaurant_id, BUSINESSDATE AS business_date
+        FROM GRATLYDB.PAYOUT_FINAL
+        WHERE RESTAURANTID IS NOT NULL AND BUSINESSDATE IS NOT NULL
+        """
+    )
+    groups: Dict[Tuple[int, date], List[str]] = {}
+    for row in cursor.fetchall():
+        if not isinstance(row, dict):
+            row = {"restaurant_id": row[0], "business_date": row[1]}
+        date_value = _parse_business_date(row["business_date"])
+        if date_value is not None:
+            groups.setdefault((row["restaurant_id"], date_value), []).append(row["business_date"])
+    for (restaurant_id, date_value), business_dates in groups.items():
+        _write_payout_daily_totals(cursor, restaurant_id, date_value, business_dates)
+    return len(groups)
+
+SCHEMA_NAME = "GRATLYDB"
+_schema_columns: Dict[str, Set[str]] = {}
+_schema_loaded = False
+_schema_lock = threading.Lock()
+
+def _load_schema_registry(cursor) -> None:
+    global _schema_loaded
+    cursor.execute(
+        """
+        SELECT TABLE_NAME, COLUMN_NAME
+        FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = %s
+        """,
+        (SCHEMA_NAME,),
+    )
+    columns: Dict[str, Set[str]] = {}
+    for row in cursor.fetchall():
+        if isinstance(row, dict):
+            table_name, column_name = row["TABLE_NAME"], row["COLUMN_NAME"]
+        else:
+            table_name, column_name = row
+        columns.setdefault(table_name.upper(), set()).add(column_name.upper())
+    with _schema_lock:
+        _schema_columns.clear()
+        _schema_columns.update(columns)
+        _schema_loaded = True
+
+def _schema_registry() -> Dict[str, Set[str]]:
+    if not _schema_loaded:
+        cursor = _get_cursor(dictionary=False)
+        try:
+            _load_schema_registry(cursor)
+        finally:
+            cursor.close()
+    return _schema_columns
+
+def _resolve_column(table: str, *candidates: str) -> Optional[str]:
+    columns = _schema_registry().get(table.upper(), set())
+    for candidate in candidates:
+        if candidate.upper() in columns:
+            return candidate
+    return None
+
 DB_CONFIG = {}
 try:
     DB_CONFIG = {
@@ -75,7 +271,7 @@ try:
         if not cursor.fetchone():
             cursor.execute(f"ALTER TABLE GRATLYDB.{table} ADD COLUMN {ddl}")
 
-    def _ensure_index(table: str, index_name: str, columns: str) -> None:
+    def _index_exists(table: str, index_name: str) -> bool:
         cursor.execute(
             """
             SELECT 1
@@ -86,8 +282,16 @@ try:
             """,
             ("GRATLYDB", table, index_name),
         )
-        if not cursor.fetchone():
-            cursor.execute(f"CREATE INDEX {index_name} ON GRATLYDB.{table} ({columns})")
+        return bool(cursor.fetchone())
+
+    def _ensure_index(table: str, index_name: str, columns: str, unique: bool = False) -> None:
+        if not _index_exists(table, index_name):
+            kind = "UNIQUE INDEX" if unique else "INDEX"
+            cursor.execute(f"CREATE {kind} {index_name} ON GRATLYDB.{table} ({columns})")
+
+    def _drop_index(table: str, index_name: str) -> None:
+        if _index_exists(table, index_name):
+            cursor.execute(f"DROP INDEX {index_name} ON GRATLYDB.{table}")
 
     _ensure_column(
         "STRIPE_CONNECTED_ACCOUNTS",
@@ -119,6 +323,11 @@ try:
         "RESTAURANTGUID",
         "RESTAURANTGUID VARCHAR(36) FIRST",
     )
+    _ensure_column(
+        "STRIPE_CONNECTED_ACCOUNTS",
+        "LAST_REFRESHED_AT",
+        "LAST_REFRESHED_AT DATETIME",
+    )
 
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS STRIPE_PAYMENT_EVENTS (
@@ -215,6 +424,13 @@ try:
     _ensure_index("STRIPE_PAYOUT_EVENTS", "IDX_STRIPE_PAYOUT_RESTAURANT", "RESTAURANTGUID")
     _ensure_index("STRIPE_PAYOUT_EVENTS", "IDX_STRIPE_PAYOUT_ID", "PAYOUT_ID")
 
+    for event_table in STRIPE_EVENT_TABLES:
+        for column, ddl, index_suffix in STRIPE_EVENT_PAYLOAD_COLUMNS:
+            _ensure_column(event_table, column, f"{column} {ddl}")
+            if index_suffix:
+                _ensure_index(event_table, f"IDX_{event_table}_PAYLOAD_{index_suffix}", column)
+        _ensure_column(event_table, "RAW_PAYLOAD_COMPRESSED", "RAW_PAYLOAD_COMPRESSED LONGBLOB")
+
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS STRIPE_RESTAURANT_SETTINGS (
             RESTAURANTGUID VARCHAR(36),
@@ -279,6 +495,227 @@ try:
         "RESTAURANTGUID",
         "RESTAURANTGUID VARCHAR(36) FIRST",
     )
+    cursor.execute("""
+        UPDATE GRATLYDB.STRIPE_SETTLEMENT_TRANSFERS st
+        JOIN GRATLYDB.SRC_EMPLOYEES se
+          ON se.EMPLOYEEGUID = st.EMPLOYEEGUID
+        SET st.RESTAURANTGUID = se.RESTAURANTGUID
+        WHERE (st.RESTAURANTGUID IS NULL OR st.RESTAURANTGUID = '')
+          AND se.RESTAURANTGUID IS NOT NULL
+    """)
+    _ensure_index(
+        "STRIPE_SETTLEMENT_TRANSFERS",
+        "IDX_STRIPE_SETTLEMENT_RESTAURANT_CREATED",
+        "RESTAURANTGUID, CREATED_AT, EMPLOYEEGUID, AMOUNT_CENTS",
+    )
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS PAYOUT_DAILY_TOTALS (
+            RESTAURANTID INT NOT NULL,
+            BUSINESS_DATE DATE NOT NULL,
+            EMPLOYEEGUID VARCHAR(36) NOT NULL DEFAULT '',
+            JOBTITLE VARCHAR(128) NOT NULL DEFAULT '',
+            EMPLOYEE_NAME VARCHAR(128),
+            TOTAL_SALES DECIMAL(14,2) NOT NULL DEFAULT 0,
+            NET_SALES DECIMAL(14,2) NOT NULL DEFAULT 0,
+            TIPS DECIMAL(14,2) NOT NULL DEFAULT 0,
+            GRATUITY DECIMAL(14,2) NOT NULL DEFAULT 0,
+            NET_PAYOUT DECIMAL(14,2) NOT NULL DEFAULT 0,
+            PREPAYOUT_DEDUCTION DECIMAL(14,2) NOT NULL DEFAULT 0,
+            UPDATED_AT DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            PRIMARY KEY (RESTAURANTID, BUSINESS_DATE, EMPLOYEEGUID, JOBTITLE)
+        )
+    """)
+    _ensure_index(
+        "PAYOUT_DAILY_TOTALS",
+        "IDX_PAYOUT_DAILY_EMPLOYEE",
+        "RESTAURANTID, EMPLOYEEGUID, BUSINESS_DATE",
+    )
+    cursor.execute("SELECT 1 FROM GRATLYDB.PAYOUT_DAILY_TOTALS LIMIT 1")
+    if not cursor.fetchone():
+        _backfill_payout_daily_totals(cursor)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS STRIPE_WEBHOOK_INBOX (
+            INBOX_ID BIGINT AUTO_INCREMENT PRIMARY KEY,
+            EVENT_ID VARCHAR(255) NOT NULL UNIQUE,
+            SOURCE VARCHAR(16) NOT NULL,
+            EVENT_TYPE VARCHAR(128),
+            OBJECT_ID VARCHAR(255),
+            STATUS VARCHAR(16) NOT NULL DEFAULT 'pending',
+            ATTEMPTS INT NOT NULL DEFAULT 0,
+            NEXT_ATTEMPT_AT DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            LOCKED_BY VARCHAR(64),
+            LOCKED_AT DATETIME,
+            LAST_ERROR TEXT,
+            PAYLOAD JSON NOT NULL,
+            RECEIVED_AT DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PROCESSED_AT DATETIME
+        )
+    """)
+    _ensure_index("STRIPE_WEBHOOK_INBOX", "IDX_STRIPE_WEBHOOK_INBOX_STATUS", "STATUS, NEXT_ATTEMPT_AT")
+    _ensure_index("STRIPE_WEBHOOK_INBOX", "IDX_STRIPE_WEBHOOK_INBOX_OBJECT", "OBJECT_ID, INBOX_ID")
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS STRIPE_SETTLEMENT_TRANSFER_STATE (
+            SETTLEMENT_ID VARCHAR(64) NOT NULL,
+            EMPLOYEEGUID VARCHAR(64) NOT NULL,
+            RESTAURANTID INT NOT NULL,
+            RESTAURANTGUID VARCHAR(36),
+            BUSINESS_DATE VARCHAR(32),
+            STATUS VARCHAR(16) NOT NULL DEFAULT 'pending',
+            STRIPE_ACCOUNT_ID VARCHAR(255),
+            AMOUNT_CENTS BIGINT NOT NULL DEFAULT 0,
+            FEE_CENTS BIGINT NOT NULL DEFAULT 0,
+            CARRY_FORWARD_CENTS BIGINT NOT NULL DEFAULT 0,
+            TRANSFER_ID VARCHAR(255),
+            ATTEMPTS INT NOT NULL DEFAULT 0,
+            LAST_ERROR TEXT,
+            CREATED_AT DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            UPDATED_AT DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            PRIMARY KEY (SETTLEMENT_ID, EMPLOYEEGUID)
+        )
+    """)
+    _ensure_index(
+        "STRIPE_SETTLEMENT_TRANSFER_STATE",
+        "IDX_STRIPE_SETTLEMENT_STATE_STATUS",
+        "STATUS, UPDATED_AT",
+    )
+    _ensure_column("STRIPE_SETTLEMENT_TRANSFER_STATE", "CLAIMED_BY", "CLAIMED_BY VARCHAR(64)")
+    _ensure_column("STRIPE_SETTLEMENT_TRANSFER_STATE", "CLAIMED_AT", "CLAIMED_AT DATETIME")
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS STRIPE_BACKFILL_JOBS (
+            JOB_NAME VARCHAR(64) NOT NULL PRIMARY KEY,
+            STATUS VARCHAR(16) NOT NULL DEFAULT 'running',
+            CURSOR_VALUE VARCHAR(255),
+            SCANNED BIGINT NOT NULL DEFAULT 0,
+            UPDATED BIGINT NOT NULL DEFAULT 0,
+            LAST_ERROR TEXT,
+            STARTED_AT DATETIME,
+            UPDATED_AT DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            FINISHED_AT DATETIME
+        )
+    """)
+    _ensure_index("STRIPE_CONNECTED_ACCOUNTS", "IDX_STRIPE_CONNECTED_ACCOUNT_ID", "STRIPE_ACCOUNT_ID")
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS STRIPE_RECONCILIATION_RESULTS (
+            RESULT_ID BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+            CHECK_TYPE VARCHAR(32) NOT NULL,
+            RESTAURANTID INT,
+            RESTAURANTGUID VARCHAR(36),
+            SETTLEMENT_ID VARCHAR(64) NOT NULL DEFAULT '',
+            EMPLOYEEGUID VARCHAR(64) NOT NULL DEFAULT '',
+            REFERENCE_ID VARCHAR(255) NOT NULL DEFAULT '',
+            EXPECTED_CENTS BIGINT,
+            ACTUAL_CENTS BIGINT,
+            DETAIL VARCHAR(255),
+            STATUS VARCHAR(16) NOT NULL DEFAULT 'open',
+            FIRST_SEEN_AT DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            LAST_SEEN_AT DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            RESOLVED_AT DATETIME,
+            UNIQUE KEY UQ_STRIPE_RECONCILIATION_RESULT (CHECK_TYPE, SETTLEMENT_ID, EMPLOYEEGUID, REFERENCE_ID)
+        )
+    """)
+    _ensure_index(
+        "STRIPE_RECONCILIATION_RESULTS",
+        "IDX_STRIPE_RECONCILIATION_STATUS",
+        "STATUS, RESTAURANTID, LAST_SEEN_AT",
+    )
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS STRIPE_RECONCILIATION_WATERMARKS (
+            NAME VARCHAR(64) NOT NULL PRIMARY KEY,
+            WATERMARK DATETIME NOT NULL
+        )
+    """)
+    _ensure_index("STRIPE_TRANSFER_EVENTS", "IDX_STRIPE_TRANSFER_TYPE_CREATED", "EVENT_TYPE, CREATED_AT")
+    _ensure_index("STRIPE_PAYOUT_EVENTS", "IDX_STRIPE_PAYOUT_TYPE_CREATED", "EVENT_TYPE, CREATED_AT")
+    _ensure_index("STRIPE_SETTLEMENT_TRANSFER_STATE", "IDX_STRIPE_SETTLEMENT_STATE_UPDATED", "UPDATED_AT")
+    _ensure_index(
+        "STRIPE_SETTLEMENT_TRANSFER_STATE",
+        "IDX_STRIPE_SETTLEMENT_STATE_EMPLOYEE",
+        "RESTAURANTID, EMPLOYEEGUID, CREATED_AT",
+    )
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS EMAIL_OUTBOX (
+            OUTBOX_ID BIGINT AUTO_INCREMENT PRIMARY KEY,
+            TO_EMAIL VARCHAR(255) NOT NULL,
+            SENDER_NAME VARCHAR(255) NOT NULL,
+            SUBJECT VARCHAR(255) NOT NULL,
+            TEXT_CONTENT MEDIUMTEXT NOT NULL,
+            HTML_CONTENT MEDIUMTEXT,
+            INVITEID INT,
+            STATUS VARCHAR(16) NOT NULL DEFAULT 'pending',
+            ATTEMPTS INT NOT NULL DEFAULT 0,
+            NEXT_ATTEMPT_AT DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            LOCKED_BY VARCHAR(64),
+            LOCKED_AT DATETIME,
+            LAST_ERROR TEXT,
+            CREATED_AT DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            SENT_AT DATETIME
+        )
+    """)
+    _ensure_index("EMAIL_OUTBOX", "IDX_EMAIL_OUTBOX_STATUS", "STATUS, NEXT_ATTEMPT_AT")
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS RESTAURANT_EMAIL_BRANDING (
+            RESTAURANTID INT NOT NULL PRIMARY KEY,
+            PRIMARY_COLOR VARCHAR(16),
+            BACKGROUND_COLOR VARCHAR(16),
+            BORDER_COLOR VARCHAR(16),
+            TEXT_COLOR VARCHAR(16),
+            LOGO_URL VARCHAR(1024),
+            UPDATED_AT DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS PASSWORD_RESET_TOKENS (
+            RESETID INT AUTO_INCREMENT PRIMARY KEY,
+            USERID INT NOT NULL,
+            TOKEN_HASH VARCHAR(64) NOT NULL,
+            EXPIRES_AT TIMESTAMP NOT NULL,
+            USED_AT TIMESTAMP NULL,
+            CREATED_AT TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE KEY UQ_PASSWORD_RESET_TOKEN_HASH (TOKEN_HASH),
+            INDEX IDX_PASSWORD_RESET_TOKENS_EXPIRES (EXPIRES_AT),
+            INDEX IDX_PASSWORD_RESET_TOKENS_USED (USED_AT),
+            INDEX (USERID)
+        )
+    """)
+    _ensure_index("PASSWORD_RESET_TOKENS", "UQ_PASSWORD_RESET_TOKEN_HASH", "TOKEN_HASH", unique=True)
+    _drop_index("PASSWORD_RESET_TOKENS", "TOKEN_HASH")
+    _ensure_index("PASSWORD_RESET_TOKENS", "IDX_PASSWORD_RESET_TOKENS_EXPIRES", "EXPIRES_AT")
+    _ensure_index("PASSWORD_RESET_TOKENS", "IDX_PASSWORD_RESET_TOKENS_USED", "USED_AT")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS TEAM_INVITE_TOKENS (
+            INVITE_TOKEN_ID INT AUTO_INCREMENT PRIMARY KEY,
+            INVITEID INT NOT NULL,
+            RESTAURANTID INT NOT NULL,
+            TOKEN_HASH VARCHAR(64) NOT NULL,
+            EMAIL VARCHAR(128),
+            EXPIRES_AT TIMESTAMP NOT NULL,
+            USED_AT TIMESTAMP NULL,
+            CREATED_AT TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE KEY UQ_TEAM_INVITE_TOKEN_HASH (TOKEN_HASH),
+            INDEX IDX_TEAM_INVITE_TOKENS_EXPIRES (EXPIRES_AT),
+            INDEX IDX_TEAM_INVITE_TOKENS_USED (USED_AT),
+            INDEX (INVITEID),
+            INDEX (RESTAURANTID)
+        )
+    """)
+    _ensure_column("TEAM_INVITE_TOKENS", "EMAIL", "EMAIL VARCHAR(128)")
+    _ensure_column("USER_MASTER", "TOKEN_VERSION", "TOKEN_VERSION INT NOT NULL DEFAULT 0")
+    _ensure_column("EMAIL_INVITES", "BATCH_ID", "BATCH_ID VARCHAR(32)")
+    _ensure_index("EMAIL_INVITES", "IDX_EMAIL_INVITES_BATCH", "BATCH_ID")
+    _ensure_index("TEAM_INVITE_TOKENS", "UQ_TEAM_INVITE_TOKEN_HASH", "TOKEN_HASH", unique=True)
+    _drop_index("TEAM_INVITE_TOKENS", "TOKEN_HASH")
+    _ensure_index("TEAM_INVITE_TOKENS", "IDX_TEAM_INVITE_TOKENS_EXPIRES", "EXPIRES_AT")
+    _ensure_index("TEAM_INVITE_TOKENS", "IDX_TEAM_INVITE_TOKENS_USED", "USED_AT")
+
+    _load_schema_registry(cursor)
 
     db.commit()
     cursor.close()
@@ -309,6 +746,63 @@ def _get_cursor(dictionary: bool = True):
     cursor.close = _close
     return cursor
 
+DB_POOL_SIZE = int(_get_env_or_ini("DB_POOL_SIZE") or 8)
+_connection_pool: "queue.LifoQueue" = queue.LifoQueue(maxsize=DB_POOL_SIZE)
+
+def _get_pooled_cursor(dictionary: bool = True):
+    if not DB_CONFIG:
+        raise HTTPException(status_code=500, detail="Database connection not initialized.")
+    try:
+        try:
+            connection = _connection_pool.get_nowait()
+            connection.ping(reconnect=True)
+        except queue.Empty:
+            connection = pymysql.connect(**DB_CONFIG)
+        cursor_class = pymysql.cursors.DictCursor if dictionary else pymysql.cursors.Cursor
+        cursor = connection.cursor(cursor_class)
+    except pymysql.MySQLError as err:
+        raise HTTPException(status_code=500, detail=f"Database connection error: {err}")
+
+    original_close = cursor.close
+
+    def _close():
+        try:
+            original_close()
+            connection.rollback()
+        except pymysql.MySQLError:
+            connection.close()
+            return
+        try:
+            _connection_pool.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    cursor.close = _close
+    return cursor
+
+def _get_streaming_cursor(dictionary: bool = True):
+    if not DB_CONFIG:
+        raise HTTPException(status_code=500, detail="Database connection not initialized.")
+    try:
+        connection_config = dict(DB_CONFIG)
+        connection_config["cursorclass"] = (
+            pymysql.cursors.SSDictCursor if dictionary else pymysql.cursors.SSCursor
+        )
+        connection = pymysql.connect(**connection_config)
+        cursor = connection.cursor()
+    except pymysql.MySQLError as err:
+        raise HTTPException(status_code=500, detail=f"Database connection error: {err}")
+
+    def _close():
+        # Closing the connection directly avoids draining unread rows of an abandoned stream.
+        try:
+            connection.close()
+        except pymysql.Error:
+            pass
+
+    cursor.close = _close
+    return cursor
+
 def _fetch_restaurant_key(user_id: int) -> Optional[int]:
     cursor = _get_cursor(dictionary=True)
     try:
@@ -483,20 +977,115 @@ def _serialize_permissions(permission_names: Optional[Iterable[str]]) -> Optiona
             permissions[key] = True
     return permissions
 
-def _fetch_restaurant_id_for_email(email: str) -> Optional[int]:
+EMAIL_RESTAURANT_CACHE_TTL_SECONDS = int(os.getenv("EMAIL_RESTAURANT_CACHE_TTL_SECONDS") or 300)
+_email_restaurant_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+_email_restaurant_lock = threading.Lock()
+
+def _email_cache_key(email: str) -> str:
+    return (email or "").strip().lower()
+
+def _cached_email_restaurant(email: str) -> Optional[Dict[str, Any]]:
+    with _email_restaurant_lock:
+        entry = _email_restaurant_cache.get(_email_cache_key(email))
+    if entry and entry[0] > time.monotonic():
+        return entry[1]
+    return None
+
+def _remember_email_restaurant(email: str, mapping: Dict[str, Any]) -> None:
+    # Only positive matches are cached so newly imported employees resolve immediately.
+    if mapping.get("restaurant_id") is None:
+        return
+    with _email_restaurant_lock:
+        _email_restaurant_cache[_email_cache_key(email)] = (
+            time.monotonic() + EMAIL_RESTAURANT_CACHE_TTL_SECONDS,
+            mapping,
+        )
+
+def _fetch_email_restaurant(email: str) -> Optional[Dict[str, Any]]:
+    cached = _cached_email_restaurant(email)
+    if cached is not None:
+        return cached
     cursor = _get_cursor(dictionary=True)
     try:
         cursor.execute(
             """
-            SELECT ob.RESTAURANTID AS restaurant_id
+            SELECT
+                ob.RESTAURANTID AS restaurant_id,
+                ob.RESTAURANTGUID AS restaurant_guid,
+                rd.RESTAURANTNAME AS restaurant_name,
+                se.EMPLOYEEGUID AS employee_guid
             FROM GRATLYDB.SRC_EMPLOYEES se
             JOIN GRATLYDB.SRC_ONBOARDING ob ON se.RESTAURANTGUID = ob.RESTAURANTGUID
+            LEFT JOIN GRATLYDB.SRC_RESTAURANTDETAILS rd ON rd.RESTAURANTGUID = ob.RESTAURANTGUID
             WHERE se.EMAIL = %s
             LIMIT 1
             """,
             (email,),
         )
         row = cursor.fetchone()
-        return row["restaurant_id"] if row else None
     finally:
         cursor.close()
+    if not row:
+        return None
+    _remember_email_restaurant(email, row)
+    return row
+
+def _fetch_login_profile(cursor, email: str) -> Optional[Dict[str, Any]]:
+    cursor.execute(
+        """
+        SELECT
+            um.USERID AS user_id,
+            um.FIRSTNAME AS firstname,
+            um.LASTNAME AS lastname,
+            um.PASSWORD_HASH AS password_hash,
+            um.TOKEN_VERSION AS token_version,
+            ur.RESTAURANTID AS user_restaurant_id,
+            ur_ob.RESTAURANTGUID AS user_restaurant_guid,
+            ur_rd.RESTAURANTNAME AS user_restaurant_name,
+            se.EMPLOYEEGUID AS employee_guid,
+            se_ob.RESTAURANTID AS email_restaurant_id,
+            se_ob.RESTAURANTGUID AS email_restaurant_guid,
+            se_rd.RESTAURANTNAME AS email_restaurant_name,
+            (
+                SELECT GROUP_CONCAT(mp.PERMISSIONSNAME SEPARATOR '|')
+                FROM GRATLYDB.USER_PERMISSIONS up
+                JOIN GRATLYDB.MSTR_PERMISSIONS mp ON up.PERMISSIONSID = mp.PERMISSIONSID
+                WHERE up.USERID = um.USERID
+                  AND (mp.DELETED IS NULL OR mp.DELETED = 0)
+            ) AS permission_names
+        FROM GRATLYDB.USER_MASTER um
+        LEFT JOIN GRATLYDB.USERRESTAURANT ur ON ur.USERID = um.USERID
+        LEFT JOIN GRATLYDB.SRC_ONBOARDING ur_ob ON ur_ob.RESTAURANTID = ur.RESTAURANTID
+        LEFT JOIN GRATLYDB.SRC_RESTAURANTDETAILS ur_rd ON ur_rd.RESTAURANTGUID = ur_ob.RESTAURANTGUID
+        LEFT JOIN GRATLYDB.SRC_EMPLOYEES se ON se.EMAIL = um.EMAIL
+        LEFT JOIN GRATLYDB.SRC_ONBOARDING se_ob ON se_ob.RESTAURANTGUID = se.RESTAURANTGUID
+        LEFT JOIN GRATLYDB.SRC_RESTAURANTDETAILS se_rd ON se_rd.RESTAURANTGUID = se_ob.RESTAURANTGUID
+        WHERE um.EMAIL = %s
+        ORDER BY ur.RESTAURANTID IS NULL, se_ob.RESTAURANTID IS NULL
+        LIMIT 1
+        """,
+        (email,),
+    )
+    row = cursor.fetchone()
+    if not row:
+        return None
+    email_mapping = {
+        "restaurant_id": row["email_restaurant_id"],
+        "restaurant_guid": row["email_restaurant_guid"],
+        "restaurant_name": row["email_restaurant_name"],
+        "employee_guid": row["employee_guid"],
+    }
+    _remember_email_restaurant(email, email_mapping)
+    restaurant_id = row["user_restaurant_id"]
+    return {
+        "user_id": row["user_id"],
+        "firstname": row["firstname"],
+        "lastname": row["lastname"],
+        "password_hash": row["password_hash"],
+        "token_version": row["token_version"] or 0,
+        "restaurant_id": restaurant_id if restaurant_id is not None else email_mapping["restaurant_id"],
+        "restaurant_guid": row["user_restaurant_guid"] or email_mapping["restaurant_guid"],
+        "restaurant_name": row["user_restaurant_name"] or email_mapping["restaurant_name"],
+        "employee_guid": row["employee_guid"],
+        "permission_names": [name for name in (row["permission_names"] or "").split("|") if name],
+    }
@@ -0,0 +1,478 @@
+from fastapi import APIRouter, HTTPException, Request
+from typing import Any, Dict, List, Optional, Tuple
+import http.client
+import json
+import logging
+import os
+import socket
+import threading
+import pymysql
+
+try:
+    from Backend.db import _get_cursor
+    from Backend.email_utils import SENDGRID_HOST, SENDGRID_SEND_PATH, _sendgrid_settings
+except ImportError:
+    from db import _get_cursor
+    from email_utils import SENDGRID_HOST, SENDGRID_SEND_PATH, _sendgrid_settings
+
+router = APIRouter()
+
+logger = logging.getLogger(__name__)
+
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv("EMAIL_OUTBOX_BATCH_SIZE") or 100)
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS") or 8)
+EMAIL_OUTBOX_POLL_SECONDS = float(os.getenv("EMAIL_OUTBOX_POLL_SECONDS") or 1.0)
+EMAIL_OUTBOX_LOCK_TIMEOUT_SECONDS = int(os.getenv("EMAIL_OUTBOX_LOCK_TIMEOUT_SECONDS") or 300)
+EMAIL_OUTBOX_RETRY_BASE_SECONDS = int(os.getenv("EMAIL_OUTBOX_RETRY_BASE_SECONDS") or 30)
+EMAIL_OUTBOX_RETRY_MAX_SECONDS = 3600
+SENDGRID_TIMEOUT_SECONDS = float(os.getenv("SENDGRID_TIMEOUT_SECONDS") or 15)
+# SendGrid caps substitutions at 10,000 bytes per personalization; larger messages go out on their own.
+SENDGRID_SUBSTITUTION_LIMIT_BYTES = 10000
+SENDGRID_RETRYABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+
+_SUBJECT_TAG = "-gratlySubject-"
+_TEXT_TAG = "-gratlyText-"
+_HTML_TAG = "-gratlyHtml-"
+
+_wake_event = threading.Event()
+_stop_event = threading.Event()
+_sender_thread: Optional[threading.Thread] = None
+
+
+class _SendGridError(Exception):
+    def __init__(self, message: str, retryable: bool):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+# Enqueuing joins the caller's transaction; call wake_email_sender() once it commits.
+def enqueue_email(
+    cursor,
+    to_email: str,
+    subject: str,
+    content: str,
+    sender_name: Optional[str] = None,
+    html_content: Optional[str] = None,
+    invite_id: Optional[int] = None,
+) -> int:
+    _sendgrid_settings()
+    cursor.execute(
+        """
+        INSERT INTO GRATLYDB.EMAIL_OUTBOX (
+            TO_EMAIL,
+            SENDER_NAME,
+            SUBJECT,
+            TEXT_CONTENT,
+            HTML_CONTENT,
+            INVITEID
+        )
+        VALUES (%s, %s, %s, %s, %s, %s)
+        """,
+        (to_email, sender_name or "Gratly", subject, content, html_content, invite_id),
+    )
+    return cursor.lastrowid
+
+
+def enqueue_emails(cursor, messages: List[Dict[str, Any]]) -> int:
+    if not messages:
+        return 0
+    _sendgrid_settings()
+    cursor.executemany(
+        """
+        INSERT INTO GRATLYDB.EMAIL_OUTBOX (
+            TO_EMAIL,
+            SENDER_NAME,
+            SUBJECT,
+            TEXT_CONTENT,
+            HTML_CONTENT,
+            INVITEID
+        )
+        VALUES (%s, %s, %s, %s, %s, %s)
+        """,
+        [
+            (
+                message["to_email"],
+                message.get("sender_name") or "Gratly",
+                message["subject"],
+                message["content"],
+                message.get("html_content"),
+                message.get("invite_id"),
+            )
+            for message in messages
+        ],
+    )
+    return len(messages)
+
+
+def wake_email_sender() -> None:
+    _wake_event.set()
+
+
+class _SendGridClient:
+    def __init__(self):
+        self._connection: Optional[http.client.HTTPSConnection] = None
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def send(self, payload: Dict[str, Any]) -> None:
+        api_key, _ = _sendgrid_settings()
+        body = json.dumps(payload).encode("utf-8")
+        headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+        # One retry on a fresh connection covers keep-alive sockets the server has already closed.
+        for reconnect in (False, True):
+            if self._connection is None:
+                self._connection = http.client.HTTPSConnection(SENDGRID_HOST, timeout=SENDGRID_TIMEOUT_SECONDS)
+            try:
+                self._connection.request("POST", SENDGRID_SEND_PATH, body=body, headers=headers)
+                response = self._connection.getresponse()
+                response_body = response.read()
+            except (http.client.HTTPException, OSError) as exc:
+                self.close()
+                if reconnect:
+                    raise _SendGridError(f"SendGrid connection error: {exc}", retryable=True)
+                continue
+            if response.will_close:
+                self.close()
+            if response.status in (200, 202):
+                return
+            detail = response_body.decode("utf-8", "replace")[:2000]
+            raise _SendGridError(
+                f"SendGrid error {response.status}: {detail}",
+                retryable=response.status in SENDGRID_RETRYABLE_STATUSES,
+            )
+
+
+def _contents(text: str, html: Optional[str]) -> List[Dict[str, str]]:
+    contents = [{"type": "text/plain", "value": text}]
+    if html:
+        contents.append({"type": "text/html", "value": html})
+    return contents
+
+
+def _single_payload(row: Dict[str, Any], from_email: str) -> Dict[str, Any]:
+    return {
+        "personalizations": [{"to": [{"email": row["to_email"]}]}],
+        "from": {"email": from_email, "name": row["sender_name"]},
+        "subject": row["subject"],
+        "content": _contents(row["text_content"], row["html_content"]),
+    }
+
+
+def _batch_payload(rows: List[Dict[str, Any]], from_email: str) -> Dict[str, Any]:
+    has_html = any(row["html_content"] for row in rows)
+    personalizations = []
+    for row in rows:
+        substitutions = {_SUBJECT_TAG: row["subject"], _TEXT_TAG: row["text_content"]}
+        if has_html:
+            substitutions[_HTML_TAG] = row["html_content"] or row["text_content"]
+        personalizations.append(
+            {"to": [{"email": row["to_email"]}], "subject": row["subject"], "substitutions": substitutions}
+        )
+    return {
+        "personalizations": personalizations,
+        "from": {"email": from_email, "name": rows[0]["sender_name"]},
+        "subject": _SUBJECT_TAG,
+        "content": _contents(_TEXT_TAG, _HTML_TAG if has_html else None),
+    }
+
+
+def _substitution_size(row: Dict[str, Any]) -> int:
+    return sum(
+        len((row.get(key) or "").encode("utf-8"))
+        for key in ("subject", "text_content", "html_content")
+    )
+
+
+def _plan_batches(rows: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    batches: List[List[Dict[str, Any]]] = []
+    by_sender: Dict[str, List[Dict[str, Any]]] = {}
+    for row in rows:
+        if _substitution_size(row) > SENDGRID_SUBSTITUTION_LIMIT_BYTES:
+            batches.append([row])
+        else:
+            by_sender.setdefault(row["sender_name"], []).append(row)
+    batches.extend(by_sender.values())
+    return batches
+
+
+def _release_stale_claims(cursor) -> None:
+    cursor.execute(
+        """
+        UPDATE GRATLYDB.EMAIL_OUTBOX
+        SET STATUS = 'pending', LOCKED_BY = NULL, LOCKED_AT = NULL
+        WHERE STATUS = 'sending'
+          AND LOCKED_AT < NOW() - INTERVAL %s SECOND
+        """,
+        (EMAIL_OUTBOX_LOCK_TIMEOUT_SECONDS,),
+    )
+
+
+def _claim_batch(worker_id: str) -> List[Dict[str, Any]]:
+    cursor = _get_cursor(dictionary=True)
+    conn = cursor.connection
+    try:
+        conn.begin()
+        cursor.execute(
+            """
+            SELECT OUTBOX_ID AS outbox_id,
+                   TO_EMAIL AS to_email,
+                   SENDER_NAME AS sender_name,
+                   SUBJECT AS subject,
+                   TEXT_CONTENT AS text_content,
+                   HTML_CONTENT AS html_content,
+                   INVITEID AS invite_id,
+                   ATTEMPTS AS attempts
+            FROM GRATLYDB.EMAIL_OUTBOX
+            WHERE STATUS = 'pending'
+              AND NEXT_ATTEMPT_AT <= NOW()
+            ORDER BY OUTBOX_ID
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+            """,
+            (EMAIL_OUTBOX_BATCH_SIZE,),
+        )
+        rows = cursor.fetchall()
+        if rows:
+            placeholders = ", ".join(["%s"] * len(rows))
+            cursor.execute(
+                f"""
+                UPDATE GRATLYDB.EMAIL_OUTBOX
+                SET STATUS = 'sending',
+                    ATTEMPTS = ATTEMPTS + 1,
+                    LOCKED_BY = %s,
+                    LOCKED_AT = NOW()
+                WHERE OUTBOX_ID IN ({placeholders})
+                """,
+                (worker_id, *[row["outbox_id"] for row in rows]),
+            )
+        conn.commit()
+    except pymysql.MySQLError:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    for row in rows:
+        row["attempts"] = int(row.get("attempts") or 0) + 1
+    return list(rows)
+
+
+def _record_results(sent: List[Dict[str, Any]], failed: List[Tuple[Dict[str, Any], _SendGridError]]) -> None:
+    cursor = _get_cursor(dictionary=False)
+    conn = cursor.connection
+    try:
+        conn.begin()
+        if sent:
+            outbox_ids = [row["outbox_id"] for row in sent]
+            placeholders = ", ".join(["%s"] * len(outbox_ids))
+            cursor.execute(
+                f"""
+                UPDATE GRATLYDB.EMAIL_OUTBOX
+                SET STATUS = 'sent', LOCKED_BY = NULL, LOCKED_AT = NULL, LAST_ERROR = NULL, SENT_AT = NOW()
+                WHERE OUTBOX_ID IN ({placeholders})
+                """,
+                outbox_ids,
+            )
+            invite_ids = [row["invite_id"] for row in sent if row.get("invite_id")]
+            if invite_ids:
+                placeholders = ", ".join(["%s"] * len(invite_ids))
+                cursor.execute(
+                    f"""
+                    UPDATE GRATLYDB.EMAIL_INVITES
+                    SET STATUS = 'sent'
+                    WHERE INVITEID IN ({placeholders})
+                      AND STATUS = 'queued'
+                    """,
+                    invite_ids,
+                )
+        for row, error in failed:
+            attempts = int(row["attempts"])
+            dead = not error.retryable or attempts >= EMAIL_OUTBOX_MAX_ATTEMPTS
+            delay_seconds = min(EMAIL_OUTBOX_RETRY_BASE_SECONDS * (2 ** (attempts - 1)), EMAIL_OUTBOX_RETRY_MAX_SECONDS)
+            cursor.execute(
+                """
+                UPDATE GRATLYDB.EMAIL_OUTBOX
+                SET STATUS = %s,
+                    NEXT_ATTEMPT_AT = NOW() + INTERVAL %s SECOND,
+                    LOCKED_BY = NULL,
+                    LOCKED_AT = NULL,
+                    LAST_ERROR = %s
+                WHERE OUTBOX_ID = %s
+                """,
+                ("dead" if dead else "pending", delay_seconds, str(error)[:65000], row["outbox_id"]),
+            )
+            if dead and row.get("invite_id"):
+                cursor.execute(
+                    """
+                    UPDATE GRATLYDB.EMAIL_INVITES
+                    SET STATUS = 'failed', PROVIDER_RESPONSE = %s
+                    WHERE INVITEID = %s
+                      AND STATUS = 'queued'
+                    """,
+                    (str(error)[:65000], row["invite_id"]),
+                )
+        conn.commit()
+    except pymysql.MySQLError:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    for row, error in failed:
+        logger.warning("Email outbox message %s failed (attempt %s): %s", row["outbox_id"], row["attempts"], error)
+
+
+def _send_rows(client: _SendGridClient, rows: List[Dict[str, Any]]) -> None:
+    try:
+        _, from_email = _sendgrid_settings()
+    except HTTPException as exc:
+        _record_results([], [(row, _SendGridError(str(exc.detail), retryable=True)) for row in rows])
+        return
+    sent: List[Dict[str, Any]] = []
+    failed: List[Tuple[Dict[str, Any], _SendGridError]] = []
+    for batch in _plan_batches(rows):
+        payload = _single_payload(batch[0], from_email) if len(batch) == 1 else _batch_payload(batch, from_email)
+        try:
+            client.send(payload)
+            sent.extend(batch)
+            continue
+        except _SendGridError as error:
+            if error.retryable or len(batch) == 1:
+                failed.extend((row, error) for row in batch)
+                continue
+        # A rejected batch is usually one bad address; send individually so the rest still go out.
+        for row in batch:
+            try:
+                client.send(_single_payload(row, from_email))
+                sent.append(row)
+            except _SendGridError as error:
+                failed.append((row, error))
+    _record_results(sent, failed)
+
+
+def _sender_loop(worker_id: str) -> None:
+    client = _SendGridClient()
+    stale_check_interval = max(1.0, EMAIL_OUTBOX_LOCK_TIMEOUT_SECONDS / 2)
+    idle_seconds = stale_check_interval
+    try:
+        while not _stop_event.is_set():
+            try:
+                if idle_seconds >= stale_check_interval:
+                    idle_seconds = 0.0
+                    cursor = _get_cursor(dictionary=False)
+                    try:
+                        _release_stale_claims(cursor)
+                    finally:
+                        cursor.close()
+                rows = _claim_batch(worker_id)
+                if rows:
+                    _send_rows(client, rows)
+                    continue
+            except (pymysql.MySQLError, HTTPException):
+                logger.exception("Email outbox sender %s failed", worker_id)
+            _wake_event.wait(EMAIL_OUTBOX_POLL_SECONDS)
+            _wake_event.clear()
+            idle_seconds += EMAIL_OUTBOX_POLL_SECONDS
+    finally:
+        client.close()
+
+
+def start_email_sender() -> None:
+    global _sender_thread
+    if _sender_thread is not None:
+        return
+    _stop_event.clear()
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:email"
+    _sender_thread = threading.Thread(target=_sender_loop, args=(worker_id,), name="email-outbox", daemon=True)
+    _sender_thread.start()
+
+
+def stop_email_sender() -> None:
+    global _sender_thread
+    _stop_event.set()
+    _wake_event.set()
+    if _sender_thread is not None:
+        _sender_thread.join(timeout=SENDGRID_TIMEOUT_SECONDS)
+        _sender_thread = None
+
+
+@router.get("/admin/email-outbox")
+def get_email_outbox(request: Request, status: str = "dead", limit: int = 50):
+    try:
+        from Backend.stripe_payments import _require_admin_token
+    except ImportError:
+        from stripe_payments import _require_admin_token
+    _require_admin_token(request)
+    safe_limit = max(1, min(int(limit), 500))
+    cursor = _get_cursor(dictionary=True)
+    try:
+        cursor.execute(
+            """
+            SELECT STATUS AS status, COUNT(*) AS count
+            FROM GRATLYDB.EMAIL_OUTBOX
+            GROUP BY STATUS
+            """
+        )
+        counts = {row["status"]: int(row["count"]) for row in cursor.fetchall()}
+        cursor.execute(
+            """
+            SELECT OUTBOX_ID AS outboxId,
+                   TO_EMAIL AS toEmail,
+                   SUBJECT AS subject,
+                   INVITEID AS inviteId,
+                   ATTEMPTS AS attempts,
+                   NEXT_ATTEMPT_AT AS nextAttemptAt,
+                   LAST_ERROR AS lastError,
+                   CREATED_AT AS createdAt,
+                   SENT_AT AS sentAt
+            FROM GRATLYDB.EMAIL_OUTBOX
+            WHERE STATUS = %s
+            ORDER BY OUTBOX_ID DESC
+            LIMIT %s
+            """,
+            (status, safe_limit),
+        )
+        return {"counts": counts, "messages": cursor.fetchall()}
+    except pymysql.MySQLError as err:
+        raise HTTPException(status_code=500, detail=f"Error fetching email outbox: {err}")
+    finally:
+        cursor.close()
+
+
+@router.post("/admin/email-outbox/{outbox_id}/retry")
+def retry_email_outbox_message(outbox_id: int, request: Request):
+    try:
+        from Backend.stripe_payments import _require_admin_token
+    except ImportError:
+        from stripe_payments import _require_admin_token
+    _require_admin_token(request)
+    cursor = _get_cursor(dictionary=False)
+    try:
+        cursor.execute(
+            """
+            UPDATE GRATLYDB.EMAIL_OUTBOX
+            SET STATUS = 'pending', ATTEMPTS = 0, NEXT_ATTEMPT_AT = NOW(), LAST_ERROR = NULL
+            WHERE OUTBOX_ID = %s AND STATUS = 'dead'
+            """,
+            (outbox_id,),
+        )
+        if cursor.rowcount == 0:
+            raise HTTPException(status_code=404, detail="Dead-lettered message not found")
+        cursor.execute(
+            """
+            UPDATE GRATLYDB.EMAIL_INVITES ei
+            JOIN GRATLYDB.EMAIL_OUTBOX outbox ON outbox.INVITEID = ei.INVITEID
+            SET ei.STATUS = 'queued'
+            WHERE outbox.OUTBOX_ID = %s
+              AND ei.STATUS = 'failed'
+            """,
+            (outbox_id,),
+        )
+        cursor.connection.commit()
+    except pymysql.MySQLError as err:
+        raise HTTPException(status_code=500, detail=f"Error requeueing email: {err}")
+    finally:
+        cursor.close()
+    _wake_event.set()
+    return {"success": True, "outboxId": outbox_id}
@@ -0,0 +1,358 @@
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import FileResponse
+from pydantic import BaseModel
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import argparse
+import base64
+import html
+import json
+import logging
+import os
+import re
+import threading
+import time
+import pymysql
+
+router = APIRouter()
+
+logger = logging.getLogger(__name__)
+
+EMAIL_TEMPLATE_DIR = os.getenv("EMAIL_TEMPLATE_DIR") or os.path.join(os.path.dirname(__file__), "templates", "email")
+EMAIL_BRANDING_CACHE_TTL_SECONDS = int(os.getenv("EMAIL_BRANDING_CACHE_TTL_SECONDS") or 300)
+EMAIL_LOGO_FILE = os.path.join(EMAIL_TEMPLATE_DIR, "gratly_logo.png")
+EMAIL_LOGO_URL = os.getenv("EMAIL_LOGO_URL")
+EMAIL_TEMPLATE_PARTS = {
+    "subject": ("subject.txt", False),
+    "content": ("txt", False),
+    "html_content": ("html", True),
+}
+HEX_COLOR_PATTERN = re.compile(r"^#[0-9a-fA-F]{3}(?:[0-9a-fA-F]{3})?$")
+_PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*([a-z_][a-z0-9_]*)\s*\}\}")
+
+
+def _load_logo_data_uri() -> str:
+    with open(EMAIL_LOGO_FILE, "rb") as logo_file:
+        return "data:image/png;base64," + base64.b64encode(logo_file.read()).decode("ascii")
+
+
+def _default_logo_src() -> str:
+    # A hosted logo keeps each invite under SendGrid's 10,000-byte substitution limit; the inline fallback does not.
+    if EMAIL_LOGO_URL:
+        return EMAIL_LOGO_URL
+    logger.warning("EMAIL_LOGO_URL is not set; inlining the email logo, so invites are sent one by one")
+    return _load_logo_data_uri()
+
+
+DEFAULT_BRANDING = {
+    "primary_color": "#cab99a",
+    "background_color": "#f4f2ee",
+    "border_color": "#e4dccf",
+    "text_color": "#1f2937",
+    "logo_src": _default_logo_src(),
+}
+BRANDING_COLUMNS = {
+    "primary_color": "PRIMARY_COLOR",
+    "background_color": "BACKGROUND_COLOR",
+    "border_color": "BORDER_COLOR",
+    "text_color": "TEXT_COLOR",
+    "logo_src": "LOGO_URL",
+}
+
+
+class EmailBrandingPayload(BaseModel):
+    user_id: Optional[int] = None
+    primaryColor: Optional[str] = None
+    backgroundColor: Optional[str] = None
+    borderColor: Optional[str] = None
+    textColor: Optional[str] = None
+    logoUrl: Optional[str] = None
+
+
+class CompiledTemplate:
+    def __init__(self, segments: List[Tuple[bool, str]], escape: bool):
+        self.segments = segments
+        self.escape = escape
+        self.fields = sorted({value for is_field, value in segments if is_field})
+        # Literal text is folded into a str.format pattern so rendering is one C-level format_map call.
+        self._pattern = "".join(
+            "{" + value + "}" if is_field else value.replace("{", "{{").replace("}", "}}")
+            for is_field, value in segments
+        )
+
+    @classmethod
+    def compile(cls, source: str, escape: bool) -> "CompiledTemplate":
+        segments: List[Tuple[bool, str]] = []
+        position = 0
+        for match in _PLACEHOLDER_PATTERN.finditer(source):
+            if match.start() > position:
+                segments.append((False, source[position:match.start()]))
+            segments.append((True, match.group(1)))
+            position = match.end()
+        if position < len(source):
+            segments.append((False, source[position:]))
+        return cls(segments, escape)
+
+    def _value(self, value: Any) -> str:
+        text = "" if value is None else str(value)
+        return html.escape(text, quote=True) if self.escape else text
+
+    def bind(self, context: Dict[str, Any]) -> "CompiledTemplate":
+        segments: List[Tuple[bool, str]] = []
+        for is_field, value in self.segments:
+            if is_field and value in context:
+                is_field, value = False, self._value(context[value])
+            if segments and not is_field and not segments[-1][0]:
+                segments[-1] = (False, segments[-1][1] + value)
+            else:
+                segments.append((is_field, value))
+        return CompiledTemplate(segments, self.escape)
+
+    def render(self, context: Dict[str, Any]) -> str:
+        try:
+            return self._pattern.format_map({field: self._value(context[field]) for field in self.fields})
+        except KeyError as exc:
+            raise ValueError(f"Missing email template variable {exc.args[0]}") from exc
+
+
+class EmailTemplate:
+    def __init__(self, name: str, parts: Dict[str, CompiledTemplate]):
+        self.name = name
+        self.parts = parts
+
+    @classmethod
+    def load(cls, name: str) -> "EmailTemplate":
+        parts = {}
+        for part, (extension, escape) in EMAIL_TEMPLATE_PARTS.items():
+            path = os.path.join(EMAIL_TEMPLATE_DIR, f"{name}.{extension}")
+            if not os.path.exists(path):
+                continue
+            with open(path, encoding="utf-8") as template_file:
+                source = template_file.read()
+            if part != "html_content":
+                source = source.rstrip("\n")
+            parts[part] = CompiledTemplate.compile(source, escape)
+        if "subject" not in parts or "content" not in parts:
+            raise RuntimeError(f"Email template {name} needs {name}.subject.txt and {name}.txt")
+        return cls(name, parts)
+
+    def bind(self, context: Dict[str, Any]) -> "EmailTemplate":
+        return EmailTemplate(self.name, {part: template.bind(context) for part, template in self.parts.items()})
+
+    def render(self, context: Dict[str, Any]) -> Dict[str, str]:
+        return {part: template.render(context) for part, template in self.parts.items()}
+
+
+def load_templates() -> Dict[str, EmailTemplate]:
+    names = sorted(
+        {
+            filename[: -len(".subject.txt")]
+            for filename in os.listdir(EMAIL_TEMPLATE_DIR)
+            if filename.endswith(".subject.txt")
+        }
+    )
+    return {name: EmailTemplate.load(name) for name in names}
+
+
+EMAIL_TEMPLATES = load_templates()
+
+_branding_cache: Dict[int, Tuple[float, Dict[str, str]]] = {}
+_bound_templates: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], EmailTemplate] = {}
+_branding_lock = threading.Lock()
+_BOUND_TEMPLATE_CACHE_SIZE = 256
+
+
+def get_template(name: str) -> EmailTemplate:
+    template = EMAIL_TEMPLATES.get(name)
+    if template is None:
+        raise KeyError(f"Unknown email template {name}")
+    return template
+
+
+def _load_branding(restaurant_id: int) -> Dict[str, str]:
+    # Imported lazily so the benchmark CLI can run without a database.
+    try:
+        from Backend.db import _get_cursor
+    except ImportError:
+        from db import _get_cursor
+    cursor = _get_cursor(dictionary=True)
+    try:
+        cursor.execute(
+            """
+            SELECT PRIMARY_COLOR AS primary_color,
+                   BACKGROUND_COLOR AS background_color,
+                   BORDER_COLOR AS border_color,
+                   TEXT_COLOR AS text_color,
+                   LOGO_URL AS logo_src
+            FROM GRATLYDB.RESTAURANT_EMAIL_BRANDING
+            WHERE RESTAURANTID = %s
+            """,
+            (restaurant_id,),
+        )
+        row = cursor.fetchone() or {}
+    finally:
+        cursor.close()
+    return {key: value for key, value in row.items() if value}
+
+
+def get_branding(restaurant_id: Optional[int], restaurant_name: str) -> Dict[str, str]:
+    overrides: Dict[str, str] = {}
+    if restaurant_id:
+        now = time.monotonic()
+        with _branding_lock:
+            entry = _branding_cache.get(restaurant_id)
+        if entry and entry[0] > now:
+            overrides = entry[1]
+        else:
+            overrides = _load_branding(restaurant_id)
+            with _branding_lock:
+                _branding_cache[restaurant_id] = (now + EMAIL_BRANDING_CACHE_TTL_SECONDS, overrides)
+    return {**DEFAULT_BRANDING, **overrides, "restaurant_name": restaurant_name}
+
+
+def invalidate_branding(restaurant_id: int) -> None:
+    with _branding_lock:
+        _branding_cache.pop(restaurant_id, None)
+
+
+def _bound_template(name: str, branding: Dict[str, str]) -> EmailTemplate:
+    key = (name, tuple(sorted(branding.items())))
+    with _branding_lock:
+        bound = _bound_templates.get(key)
+    if bound is None:
+        bound = get_template(name).bind(branding)
+        with _branding_lock:
+            if len(_bound_templates) >= _BOUND_TEMPLATE_CACHE_SIZE:
+                _bound_templates.clear()
+            _bound_templates[key] = bound
+    return bound
+
+
+def render_email(name: str, branding: Dict[str, str], context: Dict[str, Any]) -> Dict[str, str]:
+    return _bound_template(name, branding).render(context)
+
+
+def render_emails(name: str, branding: Dict[str, str], contexts: Iterable[Dict[str, Any]]) -> List[Dict[str, str]]:
+    bound = _bound_template(name, branding)
+    return [bound.render(context) for context in contexts]
+
+
+def invite_context(recipient_name: str, signup_link: str) -> Dict[str, str]:
+    return {
+        "greeting": f"Hi {recipient_name}," if recipient_name else "Hi,",
+        "signup_link": signup_link,
+    }
+
+
+def _normalize_branding_value(key: str, value: Optional[str]) -> Optional[str]:
+    value = (value or "").strip()
+    if not value:
+        return None
+    if key == "logo_src":
+        if not value.startswith("https://"):
+            raise HTTPException(status_code=400, detail="logoUrl must be an https URL")
+    elif not HEX_COLOR_PATTERN.match(value):
+        raise HTTPException(status_code=400, detail=f"{key} must be a hex color such as #cab99a")
+    return value
+
+
+@router.get("/email-assets/gratly_logo.png")
+def get_email_logo():
+    return FileResponse(EMAIL_LOGO_FILE, media_type="image/png")
+
+
+def _optional_access_context(authorization: Optional[str] = Header(None)):
+    # Imported lazily so the benchmark CLI can run without a database.
+    try:
+        from Backend.auth_tokens import optional_access_context
+    except ImportError:
+        from auth_tokens import optional_access_context
+    return optional_access_context(authorization)
+
+
+@router.put("/email-branding")
+def update_email_branding(payload: EmailBrandingPayload, context=Depends(_optional_access_context)):
+    try:
+        from Backend.auth_tokens import resolve_access_context
+        from Backend.db import _get_cursor
+    except ImportError:
+        from auth_tokens import resolve_access_context
+        from db import _get_cursor
+
+    access = resolve_access_context(payload.user_id, context)
+    if not access.permissions.get("adminAccess"):
+        raise HTTPException(status_code=403, detail="Admin access is required to change email branding")
+    restaurant_id = access.require_restaurant()
+    values = {
+        "primary_color": _normalize_branding_value("primary_color", payload.primaryColor),
+        "background_color": _normalize_branding_value("background_color", payload.backgroundColor),
+        "border_color": _normalize_branding_value("border_color", payload.borderColor),
+        "text_color": _normalize_branding_value("text_color", payload.textColor),
+        "logo_src": _normalize_branding_value("logo_src", payload.logoUrl),
+    }
+    columns = [BRANDING_COLUMNS[key] for key in values]
+    cursor = _get_cursor(dictionary=False)
+    try:
+        cursor.execute(
+            f"""
+            INSERT INTO GRATLYDB.RESTAURANT_EMAIL_BRANDING (RESTAURANTID, {", ".join(columns)})
+            VALUES (%s, {", ".join(["%s"] * len(columns))})
+            ON DUPLICATE KEY UPDATE {", ".join(f"{column} = VALUES({column})" for column in columns)}
+            """,
+            (restaurant_id, *values.values()),
+        )
+        cursor.connection.commit()
+    except pymysql.MySQLError as err:
+        raise HTTPException(status_code=500, detail=f"Error updating email branding: {err}")
+    finally:
+        cursor.close()
+    invalidate_branding(restaurant_id)
+    return {"success": True, "restaurantId": restaurant_id}
+
+
+def run_benchmark(count: int, template_name: str = "invite") -> Dict[str, Any]:
+    branding = {**DEFAULT_BRANDING, "restaurant_name": "Benchmark Bistro"}
+    contexts = [
+        invite_context(f"Employee {index}", f"http://localhost:5173/signup?token=bench{index:08d}")
+        for index in range(count)
+    ]
+
+    started = time.perf_counter()
+    compiled = EmailTemplate.load(template_name)
+    compile_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    for context in contexts:
+        compiled.render({**branding, **context})
+    unbound_seconds = time.perf_counter() - started
+
+    bound = compiled.bind(branding)
+    started = time.perf_counter()
+    for context in contexts:
+        bound.render(context)
+    bound_seconds = time.perf_counter() - started
+
+    def _rate(seconds: float) -> float:
+        return round(count / seconds, 1) if seconds else 0.0
+
+    return {
+        "template": template_name,
+        "renders": count,
+        "compileMs": round(compile_ms, 3),
+        "perCallRendersPerSecond": _rate(unbound_seconds),
+        "boundRendersPerSecond": _rate(bound_seconds),
+        "htmlBytes": len(compiled.render({**branding, **contexts[0]}).get("html_content", "")) if contexts else 0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Micro-benchmark email template rendering.")
+    parser.add_argument("--count", type=int, default=20000, help="Number of emails to render")
+    parser.add_argument("--template", default="invite")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(message)s")
+    print(json.dumps(run_benchmark(max(1, args.count), args.template), indent=2))
+
+
+if __name__ == "__main__":
+    main()
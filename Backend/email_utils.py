@@ -1,7 +1,7 @@
 import json
 import urllib.request
 import urllib.error
-from typing import Optional
+from typing import Optional, Tuple
 from fastapi import HTTPException
 
 try:
@@ -9,6 +9,16 @@ try:
 except ImportError:
     from db import _get_env_or_ini
 
+SENDGRID_HOST = "api.sendgrid.com"
+SENDGRID_SEND_PATH = "/v3/mail/send"
+
+def _sendgrid_settings() -> Tuple[str, str]:
+    api_key = _get_env_or_ini("SENDGRID_API_KEY")
+    from_email = _get_env_or_ini("SENDGRID_FROM_EMAIL")
+    if not api_key or not from_email:
+        raise HTTPException(status_code=500, detail="SendGrid is not configured")
+    return api_key, from_email
+
 def send_sendgrid_email(
     to_email: str,
     subject: str,
@@ -16,10 +26,7 @@ def send_sendgrid_email(
     sender_name: Optional[str] = None,
     html_content: Optional[str] = None,
 ):
-    api_key = _get_env_or_ini("SENDGRID_API_KEY")
-    from_email = _get_env_or_ini("SENDGRID_FROM_EMAIL")
-    if not api_key or not from_email:
-        raise HTTPException(status_code=500, detail="SendGrid is not configured")
+    api_key, from_email = _sendgrid_settings()
 
     contents = [{"type": "text/plain", "value": content}]
     if html_content:
@@ -32,7 +39,7 @@ def send_sendgrid_email(
         "content": contents,
     }
     request = urllib.request.Request(
-        "https://api.sendgrid.com/v3/mail/send",
+        f"https://{SENDGRID_HOST}{SENDGRID_SEND_PATH}",
         data=json.dumps(payload).encode("utf-8"),
         headers={
             "Authorization": f"Bearer {api_key}",
@@ -0,0 +1,324 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import csv
+import importlib
+import io
+import os
+import pymysql
+
+try:
+    from Backend.db import _business_date_sql, _get_streaming_cursor
+    from Backend.auth_tokens import AccessContext, optional_access_context, resolve_access_context
+except ImportError:
+    from db import _business_date_sql, _get_streaming_cursor
+    from auth_tokens import AccessContext, optional_access_context, resolve_access_context
+
+router = APIRouter()
+
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE") or 5000)
+
+BUSINESS_DATE_SQL = _business_date_sql("pf.BUSINESSDATE")
+
+PAYOUT_EXPORT_COLUMNS: List[Tuple[str, str]] = [
+    ("payout_final_id", "int"),
+    ("payout_approval_id", "int"),
+    ("payout_schedule_id", "int"),
+    ("business_date", "date"),
+    ("employee_guid", "string"),
+    ("employee_name", "string"),
+    ("job_title", "string"),
+    ("is_contributor", "string"),
+    ("payout_receiver_id", "string"),
+    ("payout_percentage", "decimal"),
+    ("total_sales", "decimal"),
+    ("net_sales", "decimal"),
+    ("total_tips", "decimal"),
+    ("total_gratuity", "decimal"),
+    ("overall_tips", "decimal"),
+    ("overall_gratuity", "decimal"),
+    ("payout_tips", "decimal"),
+    ("payout_gratuity", "decimal"),
+    ("net_payout", "decimal"),
+    ("prepayout_deduction", "decimal"),
+    ("updated_at", "datetime"),
+]
+
+SETTLEMENT_TRANSFER_EXPORT_COLUMNS: List[Tuple[str, str]] = [
+    ("settlement_id", "string"),
+    ("employee_guid", "string"),
+    ("employee_name", "string"),
+    ("transfer_id", "string"),
+    ("amount_cents", "int"),
+    ("fee_cents", "int"),
+    ("carry_forward_cents", "int"),
+    ("created_at", "datetime"),
+]
+
+
+def _get_pyarrow_modules():
+    try:
+        pyarrow_module = importlib.import_module("pyarrow")
+        parquet_module = importlib.import_module("pyarrow.parquet")
+        return pyarrow_module, parquet_module
+    except Exception as exc:
+        raise HTTPException(
+            status_code=501,
+            detail=f"Parquet export requires pyarrow: {exc}",
+        ) from exc
+
+
+def _parse_export_range(start_date: str, end_date: str):
+    from datetime import datetime, timedelta
+
+    try:
+        start_value = datetime.strptime(start_date, "%Y-%m-%d").date()
+        end_value = datetime.strptime(end_date, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format; use YYYY-MM-DD")
+    if end_value < start_value:
+        raise HTTPException(status_code=400, detail="End date must be on or after start date")
+    return start_value, end_value + timedelta(days=1)
+
+
+def _resolve_export_scope(access: AccessContext) -> Tuple[int, Optional[str]]:
+    restaurant_id = access.require_restaurant()
+    employee_guid = None
+    if not access.is_admin_view:
+        employee_guid = access.employee_guid
+        if not employee_guid:
+            raise HTTPException(status_code=404, detail="Employee not found for user")
+    return restaurant_id, employee_guid
+
+
+def _payout_export_query(restaurant_id: int, employee_guid: Optional[str], start_value, end_value):
+    query = f"""
+        SELECT
+            pf.PAYOUT_FINALID AS payout_final_id,
+            pf.PAYOUT_APPROVALID AS payout_approval_id,
+            pf.PAYOUT_SCHEDULEID AS payout_schedule_id,
+            {BUSINESS_DATE_SQL} AS business_date,
+            pf.EMPLOYEEGUID AS employee_guid,
+            pf.EMPLOYEE_NAME AS employee_name,
+            pf.JOBTITLE AS job_title,
+            pf.IS_CONTRIBUTOR AS is_contributor,
+            pf.PAYOUT_RECEIVER_ID AS payout_receiver_id,
+            pf.PAYOUT_PERCENTAGE AS payout_percentage,
+            pf.TOTAL_SALES AS total_sales,
+            pf.NET_SALES AS net_sales,
+            pf.TOTAL_TIPS AS total_tips,
+            pf.TOTAL_GRATUITY AS total_gratuity,
+            pf.OVERALL_TIPS AS overall_tips,
+            pf.OVERALL_GRATUITY AS overall_gratuity,
+            pf.PAYOUT_TIPS AS payout_tips,
+            pf.PAYOUT_GRATUITY AS payout_gratuity,
+            pf.NET_PAYOUT AS net_payout,
+            pf.PREPAYOUT_DEDUCTION AS prepayout_deduction,
+            pf.UPDATED_AT AS updated_at
+        FROM GRATLYDB.PAYOUT_FINAL pf
+        WHERE pf.RESTAURANTID = %s
+          AND {BUSINESS_DATE_SQL} >= %s
+          AND {BUSINESS_DATE_SQL} < %s
+    """
+    params: List[Any] = [restaurant_id, start_value, end_value]
+    if employee_guid:
+        query += " AND pf.EMPLOYEEGUID = %s"
+        params.append(employee_guid)
+    query += " ORDER BY pf.PAYOUT_FINALID"
+    return query, params
+
+
+def _settlement_transfer_export_query(restaurant_id: int, employee_guid: Optional[str], start_value, end_value):
+    query = """
+        SELECT
+            st.SETTLEMENT_ID AS settlement_id,
+            st.EMPLOYEEGUID AS employee_guid,
+            (
+                SELECT CONCAT_WS(' ', se.EMPLOYEEFNAME, se.EMPLOYEELNAME)
+                FROM GRATLYDB.SRC_EMPLOYEES se
+                WHERE se.EMPLOYEEGUID = st.EMPLOYEEGUID
+                LIMIT 1
+            ) AS employee_name,
+            st.TRANSFER_ID AS transfer_id,
+            st.AMOUNT_CENTS AS amount_cents,
+            st.FEE_CENTS AS fee_cents,
+            st.CARRY_FORWARD_CENTS AS carry_forward_cents,
+            st.CREATED_AT AS created_at
+        FROM GRATLYDB.STRIPE_SETTLEMENT_TRANSFERS st
+        JOIN GRATLYDB.SRC_ONBOARDING so
+            ON so.RESTAURANTGUID = st.RESTAURANTGUID
+        WHERE so.RESTAURANTID = %s
+          AND st.CREATED_AT >= %s
+          AND st.CREATED_AT < %s
+    """
+    params: List[Any] = [restaurant_id, start_value, end_value]
+    if employee_guid:
+        query += " AND st.EMPLOYEEGUID = %s"
+        params.append(employee_guid)
+    query += " ORDER BY st.CREATED_AT, st.SETTLEMENT_ID, st.EMPLOYEEGUID"
+    return query, params
+
+
+def _iter_row_chunks(query: str, params: List[Any]) -> Iterator[List[Dict[str, Any]]]:
+    cursor = _get_streaming_cursor(dictionary=True)
+    try:
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(EXPORT_CHUNK_SIZE)
+            if not rows:
+                break
+            yield rows
+    except pymysql.MySQLError as err:
+        raise HTTPException(status_code=500, detail=f"Error streaming export: {err}")
+    finally:
+        cursor.close()
+
+
+def _stream_csv(chunks: Iterator[List[Dict[str, Any]]], columns: List[Tuple[str, str]]) -> Iterator[bytes]:
+    names = [name for name, _ in columns]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(names)
+    for rows in chunks:
+        for row in rows:
+            writer.writerow([row.get(name) for name in names])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate(0)
+    remainder = buffer.getvalue()
+    if remainder:
+        yield remainder.encode("utf-8")
+
+
+class _ParquetChunkSink:
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        payload = bytes(data)
+        self._chunks.append(payload)
+        self._position += len(payload)
+        return len(payload)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        return None
+
+    def close(self) -> None:
+        self.closed = True
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return False
+
+    def drain(self) -> bytes:
+        payload = b"".join(self._chunks)
+        self._chunks = []
+        return payload
+
+
+def _parquet_schema(pa, columns: List[Tuple[str, str]]):
+    types = {
+        "string": pa.string(),
+        "int": pa.int64(),
+        "decimal": pa.decimal128(12, 2),
+        "date": pa.date32(),
+        "datetime": pa.timestamp("s"),
+    }
+    return pa.schema([(name, types[kind]) for name, kind in columns])
+
+
+def _stream_parquet(chunks: Iterator[List[Dict[str, Any]]], columns: List[Tuple[str, str]]) -> Iterator[bytes]:
+    pa, pq = _get_pyarrow_modules()
+    schema = _parquet_schema(pa, columns)
+    sink = _ParquetChunkSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema, compression="snappy")
+    try:
+        for rows in chunks:
+            writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+            payload = sink.drain()
+            if payload:
+                yield payload
+    finally:
+        writer.close()
+    payload = sink.drain()
+    if payload:
+        yield payload
+
+
+def _export_response(
+    export_name: str,
+    export_format: str,
+    query: str,
+    params: List[Any],
+    columns: List[Tuple[str, str]],
+) -> StreamingResponse:
+    chunks = _iter_row_chunks(query, params)
+    if export_format == "csv":
+        body = _stream_csv(chunks, columns)
+        media_type = "text/csv"
+    else:
+        body = _stream_parquet(chunks, columns)
+        media_type = "application/vnd.apache.parquet"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{export_name}.{export_format}"'},
+    )
+
+
+def _validate_export_format(export_format: str) -> str:
+    value = (export_format or "").strip().lower()
+    if value not in ("csv", "parquet"):
+        raise HTTPException(status_code=400, detail="format must be csv or parquet")
+    if value == "parquet":
+        _get_pyarrow_modules()
+    return value
+
+
+@router.get("/reports/export/payouts")
+def export_payouts(
+    start_date: str,
+    end_date: str,
+    format: str = "csv",
+    user_id: Optional[int] = None,
+    context: Optional[AccessContext] = Depends(optional_access_context),
+):
+    export_format = _validate_export_format(format)
+    start_value, end_value = _parse_export_range(start_date, end_date)
+    restaurant_id, employee_guid = _resolve_export_scope(resolve_access_context(user_id, context))
+    query, params = _payout_export_query(restaurant_id, employee_guid, start_value, end_value)
+    return _export_response(
+        f"payouts_{start_date}_{end_date}",
+        export_format,
+        query,
+        params,
+        PAYOUT_EXPORT_COLUMNS,
+    )
+
+
+@router.get("/reports/export/settlement-transfers")
+def export_settlement_transfers(
+    start_date: str,
+    end_date: str,
+    format: str = "csv",
+    user_id: Optional[int] = None,
+    context: Optional[AccessContext] = Depends(optional_access_context),
+):
+    export_format = _validate_export_format(format)
+    start_value, end_value = _parse_export_range(start_date, end_date)
+    restaurant_id, employee_guid = _resolve_export_scope(resolve_access_context(user_id, context))
+    query, params = _settlement_transfer_export_query(restaurant_id, employee_guid, start_value, end_value)
+    return _export_response(
+        f"settlement_transfers_{start_date}_{end_date}",
+        export_format,
+        query,
+        params,
+        SETTLEMENT_TRANSFER_EXPORT_COLUMNS,
+    )
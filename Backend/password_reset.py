@@ -3,15 +3,19 @@ import hashlib
 import secrets
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
+import pymysql
+from starlette.concurrency import run_in_threadpool
 
 try:
     from Backend.db import _get_cursor
-    from Backend.email_utils import send_sendgrid_email
-    from Backend.security import hash_password
+    from Backend.email_outbox import enqueue_email, wake_email_sender
+    from Backend.email_templates import get_branding, render_email
+    from Backend.security import hash_password_async
 except ImportError:
     from db import _get_cursor
-    from email_utils import send_sendgrid_email
-    from security import hash_password
+    from email_outbox import enqueue_email, wake_email_sender
+    from email_templates import get_branding, render_email
+    from security import hash_password_async
 
 router = APIRouter()
 
@@ -27,22 +31,6 @@ class PasswordResetConfirm(BaseModel):
 def _hash_token(token: str) -> str:
     return hashlib.sha256(token.encode("utf-8")).hexdigest()
 
-def _ensure_reset_table(cursor) -> None:
-    cursor.execute(
-        """
-        CREATE TABLE IF NOT EXISTS GRATLYDB.PASSWORD_RESET_TOKENS (
-            RESETID INT AUTO_INCREMENT PRIMARY KEY,
-            USERID INT NOT NULL,
-            TOKEN_HASH VARCHAR(64) NOT NULL,
-            EXPIRES_AT TIMESTAMP NOT NULL,
-            USED_AT TIMESTAMP NULL,
-            CREATED_AT TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            INDEX (TOKEN_HASH),
-            INDEX (USERID)
-        )
-        """
-    )
-
 def _validate_password(password: str) -> None:
     min_length = 8
     max_length = 12
@@ -76,11 +64,12 @@ def request_password_reset(payload: PasswordResetRequest):
         if not user:
             return {"success": True}
 
-        _ensure_reset_table(cursor)
         token = secrets.token_urlsafe(32)
         token_hash = _hash_token(token)
         expires_at = datetime.now(timezone.utc) + timedelta(hours=1)
 
+        conn = cursor.connection
+        conn.begin()
         cursor.execute(
             """
             INSERT INTO GRATLYDB.PASSWORD_RESET_TOKENS (USERID, TOKEN_HASH, EXPIRES_AT)
@@ -89,35 +78,30 @@ def request_password_reset(payload: PasswordResetRequest):
             (user["userId"], token_hash, expires_at),
         )
 
-        reset_link = f"{RESET_LINK_BASE}?token={token}"
-        name = user.get("firstName") or "there"
-        message = (
-            f"Hi {name},\n\n"
-            "We received a request to reset your Gratly password.\n"
-            f"Reset your password using this link:\n{reset_link}\n\n"
-            "If you did not request this, you can ignore this email."
+        rendered = render_email(
+            "password_reset",
+            get_branding(None, "Gratly"),
+            {"name": user.get("firstName") or "there", "reset_link": f"{RESET_LINK_BASE}?token={token}"},
         )
-        send_sendgrid_email(
+        enqueue_email(
+            cursor,
             to_email=email,
-            subject="Reset your Gratly password",
-            content=message,
+            subject=rendered["subject"],
+            content=rendered["content"],
             sender_name="Gratly",
         )
+        conn.commit()
+        wake_email_sender()
         return {"success": True}
+    except pymysql.MySQLError as err:
+        cursor.connection.rollback()
+        raise HTTPException(status_code=500, detail=f"Error requesting password reset: {err}")
     finally:
         cursor.close()
 
-@router.post("/password-reset/confirm")
-def confirm_password_reset(payload: PasswordResetConfirm):
-    token = payload.token.strip()
-    if not token:
-        raise HTTPException(status_code=400, detail="Reset token is required")
-
-    _validate_password(payload.password)
-    token_hash = _hash_token(token)
+def _load_reset_token(token_hash: str) -> dict:
     cursor = _get_cursor(dictionary=True)
     try:
-        _ensure_reset_table(cursor)
         cursor.execute(
             """
             SELECT RESETID AS resetId, USERID AS userId, EXPIRES_AT AS expiresAt, USED_AT AS usedAt
@@ -128,25 +112,57 @@ def confirm_password_reset(payload: PasswordResetConfirm):
             (token_hash,),
         )
         row = cursor.fetchone()
-        if not row:
-            raise HTTPException(status_code=400, detail="Invalid reset token")
-        if row.get("usedAt") is not None:
-            raise HTTPException(status_code=400, detail="Reset token already used")
-        expires_at = row.get("expiresAt")
-        if expires_at and expires_at.tzinfo is None:
-            expires_at = expires_at.replace(tzinfo=timezone.utc)
-        if not expires_at or expires_at < datetime.now(timezone.utc):
-            raise HTTPException(status_code=400, detail="Reset token expired")
-
-        password_hash = hash_password(payload.password)
+    except pymysql.MySQLError as err:
+        raise HTTPException(status_code=500, detail=f"Error resetting password: {err}")
+    finally:
+        cursor.close()
+    if not row:
+        raise HTTPException(status_code=400, detail="Invalid reset token")
+    if row.get("usedAt") is not None:
+        raise HTTPException(status_code=400, detail="Reset token already used")
+    expires_at = row.get("expiresAt")
+    if expires_at and expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    if not expires_at or expires_at < datetime.now(timezone.utc):
+        raise HTTPException(status_code=400, detail="Reset token expired")
+    return row
+
+def _apply_password_reset(row: dict, password_hash: str) -> None:
+    cursor = _get_cursor(dictionary=True)
+    try:
+        conn = cursor.connection
+        conn.begin()
         cursor.execute(
-            "UPDATE USER_MASTER SET PASSWORD_HASH = %s WHERE USERID = %s",
-            (password_hash, row["userId"]),
+            """
+            UPDATE GRATLYDB.PASSWORD_RESET_TOKENS
+            SET USED_AT = CURRENT_TIMESTAMP
+            WHERE RESETID = %s
+              AND USED_AT IS NULL
+            """,
+            (row["resetId"],),
         )
+        if cursor.rowcount != 1:
+            conn.rollback()
+            raise HTTPException(status_code=400, detail="Reset token already used")
         cursor.execute(
-            "UPDATE GRATLYDB.PASSWORD_RESET_TOKENS SET USED_AT = CURRENT_TIMESTAMP WHERE RESETID = %s",
-            (row["resetId"],),
+            "UPDATE USER_MASTER SET PASSWORD_HASH = %s, TOKEN_VERSION = TOKEN_VERSION + 1 WHERE USERID = %s",
+            (password_hash, row["userId"]),
         )
-        return {"success": True}
+        conn.commit()
+    except pymysql.MySQLError as err:
+        cursor.connection.rollback()
+        raise HTTPException(status_code=500, detail=f"Error resetting password: {err}")
     finally:
         cursor.close()
+
+@router.post("/password-reset/confirm")
+async def confirm_password_reset(payload: PasswordResetConfirm):
+    token = payload.token.strip()
+    if not token:
+        raise HTTPException(status_code=400, detail="Reset token is required")
+
+    _validate_password(payload.password)
+    row = await run_in_threadpool(_load_reset_token, _hash_token(token))
+    password_hash = await hash_password_async(payload.password)
+    await run_in_threadpool(_apply_password_reset, row, password_hash)
+    return {"success": True}
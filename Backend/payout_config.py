@@ -0,0 +1,147 @@
+from typing import Any, Dict, Tuple
+import os
+import threading
+import time
+
+try:
+    from Backend.db import _get_cursor, _resolve_column
+except ImportError:
+    from db import _get_cursor, _resolve_column
+
+PAYOUT_CONFIG_CACHE_TTL_SECONDS = int(os.getenv("PAYOUT_CONFIG_CACHE_TTL_SECONDS") or 300)
+
+_payout_config_cache: Dict[int, Tuple[float, Dict[str, Any]]] = {}
+_payout_config_versions: Dict[int, int] = {}
+_payout_config_lock = threading.Lock()
+
+
+def _contributor_column() -> str:
+    return _resolve_column("PAYOUTRECEIVERS", "CONTRIBUTOR_RECEIVER", "CONTRIBUTOR_RECIEVER") or "CONTRIBUTOR_RECIEVER"
+
+
+def _compile_schedule(schedule: Dict[str, Any]) -> Dict[str, Any]:
+    receivers = schedule["payout_receivers"]
+    schedule["receiver_roles"] = [
+        {
+            "receiverId": receiver["payout_receiver_id"],
+            "payoutPercentage": float(receiver["payout_percentage"] or 0),
+            "isContributor": bool(receiver["contributor_receiver"]),
+        }
+        for receiver in receivers
+    ]
+    schedule["contributor_count"] = sum(1 for receiver in receivers if receiver["contributor_receiver"] == 0)
+    schedule["receiver_count"] = sum(1 for receiver in receivers if receiver["contributor_receiver"] == 1)
+    return schedule
+
+
+def _load_payout_config(restaurant_id: int) -> Dict[int, Dict[str, Any]]:
+    cursor = _get_cursor(dictionary=True)
+    try:
+        cursor.execute(
+            """
+            SELECT
+                PAYOUT_SCHEDULEID AS payout_schedule_id,
+                NAME AS name,
+                START_DAY AS start_day,
+                END_DAY AS end_day,
+                START_TIME AS start_time,
+                END_TIME AS end_time,
+                PAYOUT_RULE_ID AS payout_rule_id,
+                PREPAYOUT_FLAG AS prepayout_flag,
+                PAYOUTTRIGGER_GRATUITY AS payouttrigger_gratuity,
+                PAYOUTTRIGGER_TIPS AS payouttrigger_tips
+            FROM GRATLYDB.PAYOUT_SCHEDULE
+            WHERE RESTAURANTID = %s
+            """,
+            (restaurant_id,),
+        )
+        schedules = {
+            row["payout_schedule_id"]: {**row, "payout_receivers": [], "custom": {}, "pre_payouts": []}
+            for row in cursor.fetchall()
+        }
+        if not schedules:
+            return {}
+
+        cursor.execute(
+            f"""
+            SELECT
+                pr.PAYOUT_SCHEDULEID AS payout_schedule_id,
+                pr.PAYOUT_RECEIVERID AS payout_receiver_id,
+                pr.PAYOUT_PERCENTAGE AS payout_percentage,
+                pr.{_contributor_column()} AS contributor_receiver
+            FROM GRATLYDB.PAYOUTRECEIVERS pr
+            JOIN GRATLYDB.PAYOUT_SCHEDULE ps
+                ON ps.PAYOUT_SCHEDULEID = pr.PAYOUT_SCHEDULEID
+            WHERE ps.RESTAURANTID = %s
+            """,
+            (restaurant_id,),
+        )
+        for row in cursor.fetchall():
+            schedule_id = row.pop("payout_schedule_id")
+            if schedule_id in schedules:
+                schedules[schedule_id]["payout_receivers"].append(row)
+
+        cursor.execute(
+            """
+            SELECT
+                pc.PAYOUT_SCHEDULEID AS payout_schedule_id,
+                pc.INDIVIDUAL_PAYOUT AS individual_payout,
+                pc.GROUPCONTRIBUTION AS group_contribution
+            FROM GRATLYDB.PAYOUT_CUSTOM pc
+            JOIN GRATLYDB.PAYOUT_SCHEDULE ps
+                ON ps.PAYOUT_SCHEDULEID = pc.PAYOUT_SCHEDULEID
+            WHERE ps.RESTAURANTID = %s
+            """,
+            (restaurant_id,),
+        )
+        for row in cursor.fetchall():
+            schedule = schedules.get(row.pop("payout_schedule_id"))
+            if schedule is not None and not schedule["custom"]:
+                schedule["custom"] = row
+
+        cursor.execute(
+            """
+            SELECT
+                pp.PAYOUT_SCHEDULEID AS payout_schedule_id,
+                pp.PREPAYOUTOPTION AS pre_payout_option,
+                pp.PREPAYOUT_VALUE AS pre_payout_value,
+                pp.USERACCOUNT AS user_account
+            FROM GRATLYDB.PREPAYOUT pp
+            JOIN GRATLYDB.PAYOUT_SCHEDULE ps
+                ON ps.PAYOUT_SCHEDULEID = pp.PAYOUT_SCHEDULEID
+            WHERE ps.RESTAURANTID = %s
+            """,
+            (restaurant_id,),
+        )
+        for row in cursor.fetchall():
+            schedule_id = row.pop("payout_schedule_id")
+            if schedule_id in schedules:
+                schedules[schedule_id]["pre_payouts"].append(row)
+    finally:
+        cursor.close()
+    return {schedule_id: _compile_schedule(schedule) for schedule_id, schedule in schedules.items()}
+
+
+def get_payout_config(restaurant_id: int) -> Dict[str, Any]:
+    now = time.monotonic()
+    with _payout_config_lock:
+        entry = _payout_config_cache.get(restaurant_id)
+        version = _payout_config_versions.get(restaurant_id, 0)
+    if entry and entry[0] > now:
+        return entry[1]
+    config = {"version": version, "schedules": _load_payout_config(restaurant_id)}
+    with _payout_config_lock:
+        # A write that landed while we were loading bumps the version; don't cache what we read before it.
+        if _payout_config_versions.get(restaurant_id, 0) == version:
+            _payout_config_cache[restaurant_id] = (now + PAYOUT_CONFIG_CACHE_TTL_SECONDS, config)
+    return config
+
+
+def get_payout_schedule_config(restaurant_id: int, schedule_id: int) -> Dict[str, Any]:
+    return get_payout_config(restaurant_id)["schedules"].get(schedule_id) or {}
+
+
+def invalidate_payout_config(restaurant_id: int) -> None:
+    with _payout_config_lock:
+        _payout_config_versions[restaurant_id] = _payout_config_versions.get(restaurant_id, 0) + 1
+        _payout_config_cache.pop(restaurant_id, None)
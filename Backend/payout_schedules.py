@@ -5,8 +5,10 @@ import pymysql
 
 try:
     from Backend.db import _get_cursor, _fetch_restaurant_key
+    from Backend.payout_config import get_payout_schedule_config, invalidate_payout_config
 except ImportError:
     from db import _get_cursor, _fetch_restaurant_key
+    from payout_config import get_payout_schedule_config, invalidate_payout_config
 
 router = APIRouter()
 
@@ -222,6 +224,7 @@ def create_payout_schedule(payload: PayoutSchedulePayload):
             )
 
         conn.commit()
+        invalidate_payout_config(restaurant_id)
         return {"success": True, "payout_schedule_id": payout_schedule_id}
     except pymysql.MySQLError as err:
         conn.rollback()
@@ -420,6 +423,7 @@ def update_payout_schedule(schedule_id: int, payload: PayoutSchedulePayload):
             )
 
         conn.commit()
+        invalidate_payout_config(restaurant_id)
         return {"success": True, "payout_schedule_id": schedule_id}
     except pymysql.MySQLError as err:
         conn.rollback()
@@ -432,90 +436,29 @@ def get_payout_schedule(schedule_id: int, user_id: int):
     restaurant_id = _fetch_restaurant_key(user_id)
     if not restaurant_id:
         raise HTTPException(status_code=404, detail="Restaurant not found for user")
-    cursor = _get_cursor(dictionary=True)
     try:
-        cursor.execute(
-            """
-            SELECT
-                PAYOUT_SCHEDULEID AS payout_schedule_id,
-                NAME AS name,
-                START_DAY AS start_day,
-                END_DAY AS end_day,
-                START_TIME AS start_time,
-                END_TIME AS end_time,
-                PAYOUT_RULE_ID AS payout_rule_id,
-                PAYOUTTRIGGER_GRATUITY AS payouttrigger_gratuity,
-                PAYOUTTRIGGER_TIPS AS payouttrigger_tips
-            FROM GRATLYDB.PAYOUT_SCHEDULE
-            WHERE PAYOUT_SCHEDULEID = %s AND RESTAURANTID = %s
-            LIMIT 1
-            """,
-            (schedule_id, restaurant_id),
-        )
-        schedule = cursor.fetchone()
-        if not schedule:
-            raise HTTPException(status_code=404, detail="Payout schedule not found")
-
-        cursor.execute(
-            """
-            SELECT
-                PAYOUT_RECEIVERID AS payout_receiver_id,
-                PAYOUT_PERCENTAGE AS payout_percentage,
-                CONTRIBUTOR_RECIEVER AS contributor_receiver
-            FROM GRATLYDB.PAYOUTRECEIVERS
-            WHERE PAYOUT_SCHEDULEID = %s
-            """,
-            (schedule_id,),
-        )
-        receivers = cursor.fetchall()
-
-        cursor.execute(
-            """
-            SELECT
-                INDIVIDUAL_PAYOUT AS individual_payout,
-                GROUPCONTRIBUTION AS group_contribution
-            FROM GRATLYDB.PAYOUT_CUSTOM
-            WHERE PAYOUT_SCHEDULEID = %s
-            LIMIT 1
-            """,
-            (schedule_id,),
-        )
-        custom = cursor.fetchone() or {}
-
-        cursor.execute(
-            """
-            SELECT
-                PREPAYOUTOPTION AS pre_payout_option,
-                PREPAYOUT_VALUE AS pre_payout_value,
-                USERACCOUNT AS user_account
-            FROM GRATLYDB.PREPAYOUT
-            WHERE PAYOUT_SCHEDULEID = %s
-            """,
-            (schedule_id,),
-        )
-        pre_payouts = cursor.fetchall()
-
-        return {
-            "payout_schedule_id": schedule["payout_schedule_id"],
-            "name": schedule["name"],
-            "start_day": schedule["start_day"],
-            "end_day": schedule["end_day"],
-            "start_time": schedule["start_time"],
-            "end_time": schedule["end_time"],
-            "payout_rule_id": schedule["payout_rule_id"],
-            "payout_triggers": {
-                "gratuity": schedule.get("payouttrigger_gratuity"),
-                "tips": schedule.get("payouttrigger_tips"),
-            },
-            "payout_receivers": receivers,
-            "custom_individual_payout": custom.get("individual_payout"),
-            "custom_group_contribution": custom.get("group_contribution"),
-            "pre_payouts": pre_payouts,
-        }
+        schedule = get_payout_schedule_config(restaurant_id, schedule_id)
     except pymysql.MySQLError as err:
         raise HTTPException(status_code=500, detail=f"Error fetching payout schedule: {err}")
-    finally:
-        cursor.close()
+    if not schedule:
+        raise HTTPException(status_code=404, detail="Payout schedule not found")
+    return {
+        "payout_schedule_id": schedule["payout_schedule_id"],
+        "name": schedule["name"],
+        "start_day": schedule["start_day"],
+        "end_day": schedule["end_day"],
+        "start_time": schedule["start_time"],
+        "end_time": schedule["end_time"],
+        "payout_rule_id": schedule["payout_rule_id"],
+        "payout_triggers": {
+            "gratuity": schedule.get("payouttrigger_gratuity"),
+            "tips": schedule.get("payouttrigger_tips"),
+        },
+        "payout_receivers": schedule["payout_receivers"],
+        "custom_individual_payout": schedule["custom"].get("individual_payout"),
+        "custom_group_contribution": schedule["custom"].get("group_contribution"),
+        "pre_payouts": schedule["pre_payouts"],
+    }
 
 @router.delete("/payout-schedules/{schedule_id}")
 def delete_payout_schedule(schedule_id: int, user_id: int):
@@ -555,6 +498,7 @@ def delete_payout_schedule(schedule_id: int, user_id: int):
             (schedule_id,),
         )
         conn.commit()
+        invalidate_payout_config(restaurant_id)
         return {"success": True}
     except pymysql.MySQLError as err:
         conn.rollback()
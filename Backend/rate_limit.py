@@ -0,0 +1,272 @@
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware.base import BaseHTTPMiddleware
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import importlib
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+try:
+    from Backend.auth_tokens import _decode_token
+except ImportError:
+    from auth_tokens import _decode_token
+
+router = APIRouter()
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_ENABLED = (os.getenv("RATE_LIMIT_ENABLED") or "1").strip().lower() in ("1", "true", "yes")
+RATE_LIMIT_BACKEND = (os.getenv("RATE_LIMIT_BACKEND") or "memory").strip().lower()
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL") or "redis://127.0.0.1:6390/0"
+RATE_LIMIT_WINDOW_SECONDS = int(os.getenv("RATE_LIMIT_WINDOW_SECONDS") or 60)
+RATE_LIMIT_TRUST_FORWARDED = (os.getenv("RATE_LIMIT_TRUST_FORWARDED") or "").strip().lower() in ("1", "true", "yes")
+RATE_LIMIT_SCOPE_LIMITS = {
+    "ip": int(os.getenv("RATE_LIMIT_IP_PER_WINDOW") or 120),
+    "user": int(os.getenv("RATE_LIMIT_USER_PER_WINDOW") or 60),
+    "restaurant": int(os.getenv("RATE_LIMIT_RESTAURANT_PER_WINDOW") or 300),
+    "email": int(os.getenv("RATE_LIMIT_EMAIL_PER_WINDOW") or 30),
+}
+# Unauthenticated routes whose JSON body names the account being targeted.
+RATE_LIMIT_EMAIL_ROUTES = ("/login", "/password-reset/request")
+DEFAULT_ROUTE_COSTS = {
+    "/login": 5,
+    "/password-reset/request": 10,
+    "/team/invite": 5,
+    "/approvals": 3,
+}
+_KEY_PREFIX = "gratly:rl"
+
+
+def _parse_route_costs(value: Optional[str]) -> Dict[str, int]:
+    costs = dict(DEFAULT_ROUTE_COSTS)
+    for item in (value or "").split(","):
+        path, _, cost = item.partition("=")
+        if path.strip() and cost.strip():
+            costs[path.strip()] = int(cost)
+    return costs
+
+
+RATE_LIMIT_ROUTE_COSTS = _parse_route_costs(os.getenv("RATE_LIMIT_ROUTE_COSTS"))
+
+
+class MemoryRateLimitStore:
+    blocking = False
+
+    def __init__(self):
+        self._counts: Dict[str, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+    def hit(self, keys: List[str], previous_keys: List[str], cost: int, ttl_seconds: int) -> List[Tuple[int, int]]:
+        now = time.monotonic()
+        results = []
+        with self._lock:
+            if now - self._last_sweep > ttl_seconds:
+                self._counts = {key: entry for key, entry in self._counts.items() if entry[1] > now}
+                self._last_sweep = now
+            for key, previous_key in zip(keys, previous_keys):
+                count, expires_at = self._counts.get(key, (0, 0.0))
+                if expires_at <= now:
+                    count = 0
+                count += cost
+                self._counts[key] = (count, now + ttl_seconds)
+                previous, previous_expires_at = self._counts.get(previous_key, (0, 0.0))
+                results.append((count, previous if previous_expires_at > now else 0))
+        return results
+
+    def refund(self, keys: List[str], cost: int) -> None:
+        with self._lock:
+            for key in keys:
+                count, expires_at = self._counts.get(key, (0, 0.0))
+                if count:
+                    self._counts[key] = (max(0, count - cost), expires_at)
+
+
+class RedisRateLimitStore:
+    blocking = True
+
+    def __init__(self, url: str):
+        try:
+            redis = importlib.import_module("redis")
+        except Exception as exc:
+            raise RuntimeError(f"RATE_LIMIT_BACKEND=redis requires the redis package: {exc}") from exc
+        self._client = redis.Redis.from_url(url, socket_timeout=0.25, socket_connect_timeout=0.25)
+
+    def hit(self, keys: List[str], previous_keys: List[str], cost: int, ttl_seconds: int) -> List[Tuple[int, int]]:
+        pipeline = self._client.pipeline(transaction=False)
+        for key in keys:
+            pipeline.incrby(key, cost)
+            pipeline.expire(key, ttl_seconds)
+        pipeline.mget(previous_keys)
+        replies = pipeline.execute()
+        previous = replies[-1]
+        return [
+            (int(replies[index * 2]), int(previous[index] or 0))
+            for index in range(len(keys))
+        ]
+
+    def refund(self, keys: List[str], cost: int) -> None:
+        pipeline = self._client.pipeline(transaction=False)
+        for key in keys:
+            pipeline.incrby(key, -cost)
+        pipeline.execute()
+
+
+RATE_LIMIT_STORES = {
+    "memory": MemoryRateLimitStore,
+    "redis": lambda: RedisRateLimitStore(RATE_LIMIT_REDIS_URL),
+}
+
+
+class RateLimiter:
+    def __init__(self, store, window_seconds: int, scope_limits: Dict[str, int], route_costs: Dict[str, int]):
+        self.store = store
+        self.window_seconds = window_seconds
+        self.scope_limits = scope_limits
+        self.route_costs = route_costs
+        self._metrics_lock = threading.Lock()
+        self._metrics: Dict[str, Dict[str, int]] = {}
+
+    def route_cost(self, path: str) -> Tuple[Optional[str], int]:
+        for route, cost in self.route_costs.items():
+            if path == route or path.startswith(route + "/"):
+                return route, cost
+        return None, 0
+
+    def check(self, route: str, cost: int, identities: Dict[str, str]) -> Optional[int]:
+        # Sliding window counter: the previous fixed window is weighted by how much of it still overlaps.
+        now = time.time()
+        window = int(now // self.window_seconds)
+        overlap = 1 - (now % self.window_seconds) / self.window_seconds
+        scopes = [scope for scope in identities if self.scope_limits.get(scope, 0) > 0]
+        keys = [f"{_KEY_PREFIX}:{scope}:{identities[scope]}:{window}" for scope in scopes]
+        previous_keys = [f"{_KEY_PREFIX}:{scope}:{identities[scope]}:{window - 1}" for scope in scopes]
+        counts = self.store.hit(keys, previous_keys, cost, self.window_seconds * 2)
+        retry_after = None
+        limited_scope = None
+        for scope, (current, previous) in zip(scopes, counts):
+            if current + previous * overlap > self.scope_limits[scope]:
+                retry_after = max(1, math.ceil(self.window_seconds * overlap))
+                limited_scope = limited_scope or scope
+        if limited_scope:
+            # Rejected requests don't spend budget, so a client that keeps retrying recovers once the window slides.
+            self.store.refund(keys, cost)
+        self._record(route, limited_scope)
+        return retry_after
+
+    def _record(self, route: str, limited_scope: Optional[str]) -> None:
+        with self._metrics_lock:
+            stats = self._metrics.setdefault(route, {"allowed": 0, "limited": 0})
+            if limited_scope:
+                stats["limited"] += 1
+                stats[f"limitedBy:{limited_scope}"] = stats.get(f"limitedBy:{limited_scope}", 0) + 1
+            else:
+                stats["allowed"] += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._metrics_lock:
+            routes = {route: dict(stats) for route, stats in self._metrics.items()}
+        return {
+            "backend": RATE_LIMIT_BACKEND,
+            "windowSeconds": self.window_seconds,
+            "limits": dict(self.scope_limits),
+            "routeCosts": dict(self.route_costs),
+            "routes": routes,
+        }
+
+
+def _build_limiter() -> RateLimiter:
+    store_factory = RATE_LIMIT_STORES.get(RATE_LIMIT_BACKEND)
+    if store_factory is None:
+        raise RuntimeError(f"Unknown RATE_LIMIT_BACKEND: {RATE_LIMIT_BACKEND}")
+    return RateLimiter(store_factory(), RATE_LIMIT_WINDOW_SECONDS, RATE_LIMIT_SCOPE_LIMITS, RATE_LIMIT_ROUTE_COSTS)
+
+
+rate_limiter = _build_limiter()
+
+
+def _client_ip(request: Request) -> str:
+    if RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = request.headers.get("X-Forwarded-For")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def _request_email(body: bytes) -> Optional[str]:
+    try:
+        payload = json.loads(body or b"{}")
+    except ValueError:
+        return None
+    email = payload.get("email") if isinstance(payload, dict) else None
+    if not isinstance(email, str) or not email.strip():
+        return None
+    # Keys are hashed so the shared store never holds raw addresses.
+    return hashlib.sha256(email.strip().lower().encode("utf-8")).hexdigest()
+
+
+def _request_identities(request: Request, body: Optional[bytes] = None) -> Dict[str, str]:
+    # User and restaurant scopes come only from a verified token; query parameters are caller-controlled.
+    identities = {"ip": _client_ip(request)}
+    scheme, _, token = (request.headers.get("Authorization") or "").partition(" ")
+    if scheme.lower() == "bearer" and token.strip():
+        try:
+            claims = _decode_token(token.strip(), "access")
+        except HTTPException:
+            claims = {}
+        if claims.get("sub"):
+            identities["user"] = str(claims["sub"])
+        if claims.get("rid"):
+            identities["restaurant"] = str(claims["rid"])
+    if body is not None:
+        email = _request_email(body)
+        if email:
+            identities["email"] = email
+    return identities
+
+
+class RateLimitMiddleware(BaseHTTPMiddleware):
+    def __init__(self, app, limiter: Optional[RateLimiter] = None):
+        super().__init__(app)
+        self.limiter = limiter or rate_limiter
+
+    async def dispatch(self, request: Request, call_next):
+        if not RATE_LIMIT_ENABLED or request.method == "OPTIONS":
+            return await call_next(request)
+        route, cost = self.limiter.route_cost(request.url.path)
+        if not route or cost <= 0:
+            return await call_next(request)
+        body = await request.body() if route in RATE_LIMIT_EMAIL_ROUTES else None
+        identities = _request_identities(request, body)
+        try:
+            if self.limiter.store.blocking:
+                retry_after = await run_in_threadpool(self.limiter.check, route, cost, identities)
+            else:
+                retry_after = self.limiter.check(route, cost, identities)
+        except Exception as exc:
+            # A store outage must not take the API down with it.
+            logger.warning("Rate limit check failed for %s: %s", route, exc)
+            return await call_next(request)
+        if retry_after is not None:
+            return JSONResponse(
+                status_code=429,
+                content={"detail": "Too many requests"},
+                headers={"Retry-After": str(retry_after)},
+            )
+        return await call_next(request)
+
+
+@router.get("/admin/security/rate-limits")
+def get_rate_limit_metrics(request: Request):
+    try:
+        from Backend.stripe_payments import _require_admin_token
+    except ImportError:
+        from stripe_payments import _require_admin_token
+    _require_admin_token(request)
+    return rate_limiter.metrics()
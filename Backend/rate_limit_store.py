@@ -0,0 +1,157 @@
+from socketserver import StreamRequestHandler, ThreadingTCPServer
+from typing import Dict, List, Optional, Tuple
+import argparse
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_STORE_HOST = os.getenv("RATE_LIMIT_STORE_HOST") or "127.0.0.1"
+RATE_LIMIT_STORE_PORT = int(os.getenv("RATE_LIMIT_STORE_PORT") or 6390)
+
+
+class _StoreError(Exception):
+    pass
+
+
+class StandInStore:
+    def __init__(self):
+        self._values: Dict[bytes, Tuple[int, Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key: bytes, now: float) -> Optional[Tuple[int, Optional[float]]]:
+        entry = self._values.get(key)
+        if entry and entry[1] is not None and entry[1] <= now:
+            del self._values[key]
+            return None
+        return entry
+
+    def incrby(self, key: bytes, amount: int) -> int:
+        with self._lock:
+            value, expires_at = self._live(key, time.monotonic()) or (0, None)
+            value += amount
+            self._values[key] = (value, expires_at)
+            return value
+
+    def expire(self, key: bytes, seconds: int) -> int:
+        with self._lock:
+            entry = self._live(key, time.monotonic())
+            if not entry:
+                return 0
+            self._values[key] = (entry[0], time.monotonic() + seconds)
+            return 1
+
+    def mget(self, keys: List[bytes]) -> List[Optional[bytes]]:
+        now = time.monotonic()
+        with self._lock:
+            entries = [self._live(key, now) for key in keys]
+        return [str(entry[0]).encode("ascii") if entry else None for entry in entries]
+
+    def flushall(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def dbsize(self) -> int:
+        now = time.monotonic()
+        with self._lock:
+            return sum(1 for key in list(self._values) if self._live(key, now))
+
+
+def _encode(value) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, _StoreError):
+        return b"-ERR " + str(value).encode("utf-8") + b"\r\n"
+    if isinstance(value, int):
+        return b":" + str(value).encode("ascii") + b"\r\n"
+    if isinstance(value, list):
+        return b"*" + str(len(value)).encode("ascii") + b"\r\n" + b"".join(_encode(item) for item in value)
+    if isinstance(value, str):
+        return b"+" + value.encode("utf-8") + b"\r\n"
+    return b"$" + str(len(value)).encode("ascii") + b"\r\n" + value + b"\r\n"
+
+
+class _StandInHandler(StreamRequestHandler):
+    store: StandInStore
+
+    def _read_command(self) -> Optional[List[bytes]]:
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            return line.strip().split()
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def _execute(self, args: List[bytes]):
+        command = args[0].upper()
+        try:
+            if command == b"PING":
+                return "PONG"
+            if command in (b"CLIENT", b"SELECT"):
+                return "OK"
+            if command == b"INCRBY":
+                return self.store.incrby(args[1], int(args[2]))
+            if command == b"INCR":
+                return self.store.incrby(args[1], 1)
+            if command == b"EXPIRE":
+                return self.store.expire(args[1], int(args[2]))
+            if command == b"GET":
+                return self.store.mget([args[1]])[0]
+            if command == b"MGET":
+                return self.store.mget(args[1:])
+            if command == b"DBSIZE":
+                return self.store.dbsize()
+            if command == b"FLUSHALL":
+                self.store.flushall()
+                return "OK"
+        except (IndexError, ValueError) as exc:
+            return _StoreError(f"invalid arguments for '{command.decode('ascii', 'replace')}': {exc}")
+        return _StoreError(f"unknown command '{command.decode('ascii', 'replace')}'")
+
+    def handle(self) -> None:
+        while True:
+            args = self._read_command()
+            if args is None:
+                return
+            if not args:
+                continue
+            self.wfile.write(_encode(self._execute(args)))
+
+
+class _StandInServer(ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+def create_store_server(host: str, port: int, store: Optional[StandInStore] = None) -> ThreadingTCPServer:
+    handler = type("StandInHandler", (_StandInHandler,), {"store": store or StandInStore()})
+    return _StandInServer((host, port), handler)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Local stand-in for the shared rate limit store (speaks the Redis commands the limiter uses).",
+    )
+    parser.add_argument("--host", default=RATE_LIMIT_STORE_HOST)
+    parser.add_argument("--port", type=int, default=RATE_LIMIT_STORE_PORT)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(message)s")
+    server = create_store_server(args.host, args.port)
+    logger.info("Rate limit store stand-in listening on %s:%s", args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
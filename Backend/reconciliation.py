@@ -0,0 +1,396 @@
+from datetime import datetime, timedelta
+from fastapi import APIRouter, HTTPException, Request
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+import os
+import threading
+import pymysql
+
+try:
+    from Backend.db import _get_cursor
+    from Backend.stripe_payments import _require_admin_token
+except ImportError:
+    from db import _get_cursor
+    from stripe_payments import _require_admin_token
+
+router = APIRouter()
+
+logger = logging.getLogger(__name__)
+
+RECONCILIATION_INTERVAL_SECONDS = int(os.getenv("RECONCILIATION_INTERVAL_SECONDS") or 3600)
+RECONCILIATION_GRACE_SECONDS = int(os.getenv("RECONCILIATION_GRACE_SECONDS") or 1800)
+RECONCILIATION_LOOKBACK_SECONDS = int(os.getenv("RECONCILIATION_LOOKBACK_SECONDS") or 3600)
+RECONCILIATION_LOCK_NAME = "gratly_reconciliation"
+RECONCILIATION_WATERMARK = "stripe"
+
+RESULT_COLUMNS = """
+        CHECK_TYPE,
+        RESTAURANTID,
+        RESTAURANTGUID,
+        SETTLEMENT_ID,
+        EMPLOYEEGUID,
+        REFERENCE_ID,
+        EXPECTED_CENTS,
+        ACTUAL_CENTS,
+        DETAIL
+"""
+
+RESULT_INSERT_SQL = """
+    INSERT INTO GRATLYDB.STRIPE_RECONCILIATION_RESULTS ({columns})
+    {select}
+    ON DUPLICATE KEY UPDATE
+        EXPECTED_CENTS = VALUES(EXPECTED_CENTS),
+        ACTUAL_CENTS = VALUES(ACTUAL_CENTS),
+        DETAIL = VALUES(DETAIL),
+        STATUS = IF(STATUS = 'resolved', STATUS, 'open'),
+        LAST_SEEN_AT = NOW()
+"""
+
+# ON DUPLICATE KEY UPDATE reports 2 per updated row and 0 per unchanged row, so flagged rows are counted separately.
+RESULT_COUNT_SQL = """
+    SELECT COUNT(*) AS flagged
+    FROM ({select}) AS flagged ({columns})
+"""
+
+RECONCILIATION_CHECKS: Dict[str, Tuple[str, str]] = {
+    "missing_transfer": (
+        "s.RESTAURANTID",
+        """
+        SELECT 'missing_transfer',
+               planned.RESTAURANTID,
+               planned.RESTAURANTGUID,
+               planned.SETTLEMENT_ID,
+               pf.EMPLOYEEGUID,
+               '',
+               ROUND(SUM(pf.NET_PAYOUT) * 100),
+               0,
+               MAX(COALESCE(state.STATUS, 'unplanned'))
+        FROM (
+            SELECT DISTINCT s.SETTLEMENT_ID, s.RESTAURANTID, s.RESTAURANTGUID
+            FROM GRATLYDB.STRIPE_SETTLEMENT_TRANSFER_STATE s
+            WHERE s.UPDATED_AT >= %s
+              AND s.UPDATED_AT < %s
+              {restaurant_filter}
+        ) planned
+        JOIN GRATLYDB.PAYOUT_FINAL pf
+          ON pf.PAYOUT_APPROVALID = planned.SETTLEMENT_ID
+         AND pf.RESTAURANTID = planned.RESTAURANTID
+        LEFT JOIN GRATLYDB.STRIPE_SETTLEMENT_TRANSFER_STATE state
+          ON state.SETTLEMENT_ID = planned.SETTLEMENT_ID
+         AND state.EMPLOYEEGUID = pf.EMPLOYEEGUID
+        LEFT JOIN GRATLYDB.STRIPE_SETTLEMENT_TRANSFERS st
+          ON st.SETTLEMENT_ID = planned.SETTLEMENT_ID
+         AND st.EMPLOYEEGUID = pf.EMPLOYEEGUID
+        WHERE st.TRANSFER_ID IS NULL
+          AND pf.EMPLOYEEGUID IS NOT NULL
+          AND pf.NET_PAYOUT > 0
+          AND COALESCE(state.STATUS, 'unplanned') NOT IN ('skipped', 'carried_forward')
+        GROUP BY planned.RESTAURANTID, planned.RESTAURANTGUID, planned.SETTLEMENT_ID, pf.EMPLOYEEGUID
+        """,
+    ),
+    "reversed_transfer": (
+        "so.RESTAURANTID",
+        """
+        SELECT 'reversed_transfer',
+               so.RESTAURANTID,
+               st.RESTAURANTGUID,
+               st.SETTLEMENT_ID,
+               st.EMPLOYEEGUID,
+               te.TRANSFER_ID,
+               st.AMOUNT_CENTS,
+               NULL,
+               te.EVENT_TYPE
+        FROM GRATLYDB.STRIPE_TRANSFER_EVENTS te
+        JOIN GRATLYDB.STRIPE_SETTLEMENT_TRANSFERS st
+          ON st.TRANSFER_ID = te.TRANSFER_ID
+        LEFT JOIN GRATLYDB.SRC_ONBOARDING so
+          ON so.RESTAURANTGUID = st.RESTAURANTGUID
+        WHERE te.EVENT_TYPE = 'transfer.reversed'
+          AND te.CREATED_AT >= %s
+          AND te.CREATED_AT < %s
+          {restaurant_filter}
+        """,
+    ),
+    "failed_payout": (
+        "so.RESTAURANTID",
+        """
+        SELECT 'failed_payout',
+               so.RESTAURANTID,
+               pe.RESTAURANTGUID,
+               '',
+               COALESCE(pe.EMPLOYEEGUID, ''),
+               pe.PAYOUT_ID,
+               pe.AMOUNT,
+               0,
+               CONCAT_WS(' ', pe.STATUS, pe.ACCOUNT_ID)
+        FROM GRATLYDB.STRIPE_PAYOUT_EVENTS pe
+        LEFT JOIN GRATLYDB.SRC_ONBOARDING so
+          ON so.RESTAURANTGUID = pe.RESTAURANTGUID
+        WHERE pe.EVENT_TYPE = 'payout.failed'
+          AND pe.CREATED_AT >= %s
+          AND pe.CREATED_AT < %s
+          {restaurant_filter}
+        """,
+    ),
+    "carry_forward_drift": (
+        "s.RESTAURANTID",
+        """
+        SELECT 'carry_forward_drift',
+               latest.RESTAURANTID,
+               latest.RESTAURANTGUID,
+               latest.SETTLEMENT_ID,
+               latest.EMPLOYEEGUID,
+               '',
+               latest.expected_cents,
+               COALESCE(cf.CARRY_FORWARD_CENTS, 0),
+               latest.STATUS
+        FROM (
+            SELECT state.RESTAURANTID,
+                   state.RESTAURANTGUID,
+                   state.SETTLEMENT_ID,
+                   state.EMPLOYEEGUID,
+                   state.STATUS,
+                   CASE
+                       WHEN state.STATUS = 'sent' THEN 0
+                       WHEN state.STATUS = 'carried_forward' THEN state.AMOUNT_CENTS + state.FEE_CENTS
+                       ELSE state.CARRY_FORWARD_CENTS
+                   END AS expected_cents,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY state.RESTAURANTID, state.EMPLOYEEGUID
+                       ORDER BY state.CREATED_AT DESC, state.SETTLEMENT_ID DESC
+                   ) AS row_rank
+            FROM GRATLYDB.STRIPE_SETTLEMENT_TRANSFER_STATE state
+            JOIN (
+                SELECT DISTINCT s.RESTAURANTID, s.EMPLOYEEGUID
+                FROM GRATLYDB.STRIPE_SETTLEMENT_TRANSFER_STATE s
+                WHERE s.UPDATED_AT >= %s
+                  AND s.UPDATED_AT < %s
+                  {restaurant_filter}
+            ) touched
+              ON touched.RESTAURANTID = state.RESTAURANTID
+             AND touched.EMPLOYEEGUID = state.EMPLOYEEGUID
+        ) latest
+        LEFT JOIN GRATLYDB.STRIPE_EMPLOYEE_CARRY_FORWARD cf
+          ON cf.EMPLOYEEGUID = latest.EMPLOYEEGUID
+         AND cf.RESTAURANTID = latest.RESTAURANTID
+        WHERE latest.row_rank = 1
+          AND latest.STATUS IN ('sent', 'skipped', 'carried_forward')
+          AND COALESCE(cf.CARRY_FORWARD_CENTS, 0) <> latest.expected_cents
+        """,
+    ),
+}
+
+_stop_event = threading.Event()
+_reconciler_thread: Optional[threading.Thread] = None
+
+
+class ReconciliationRunPayload(BaseModel):
+    restaurantId: Optional[int] = None
+    startDate: Optional[str] = None
+    endDate: Optional[str] = None
+
+
+def _run_checks(cursor, since: datetime, until: datetime, restaurant_id: Optional[int]) -> Dict[str, int]:
+    results: Dict[str, int] = {}
+    for check_type, (restaurant_column, select_sql) in RECONCILIATION_CHECKS.items():
+        params: List[Any] = [since, until]
+        restaurant_filter = ""
+        if restaurant_id is not None:
+            restaurant_filter = f"AND {restaurant_column} = %s"
+            params.append(restaurant_id)
+        select = select_sql.format(restaurant_filter=restaurant_filter)
+        cursor.execute(RESULT_COUNT_SQL.format(select=select, columns=RESULT_COLUMNS), params)
+        results[check_type] = int((cursor.fetchone() or {}).get("flagged") or 0)
+        cursor.execute(RESULT_INSERT_SQL.format(select=select, columns=RESULT_COLUMNS), params)
+    return results
+
+
+def run_reconciliation(
+    restaurant_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    cursor = _get_cursor(dictionary=True)
+    conn = cursor.connection
+    try:
+        cursor.execute("SELECT GET_LOCK(%s, 0) AS acquired", (RECONCILIATION_LOCK_NAME,))
+        if (cursor.fetchone() or {}).get("acquired") != 1:
+            raise HTTPException(status_code=409, detail="Reconciliation already running")
+        try:
+            incremental = since is None and until is None and restaurant_id is None
+            cursor.execute(
+                """
+                SELECT w.WATERMARK AS watermark, NOW() - INTERVAL %s SECOND AS cutoff
+                FROM (SELECT 1) probe
+                LEFT JOIN GRATLYDB.STRIPE_RECONCILIATION_WATERMARKS w
+                  ON w.NAME = %s
+                """,
+                (RECONCILIATION_GRACE_SECONDS, RECONCILIATION_WATERMARK),
+            )
+            row = cursor.fetchone() or {}
+            if incremental and row.get("watermark"):
+                since = row["watermark"] - timedelta(seconds=RECONCILIATION_LOOKBACK_SECONDS)
+            since = since or datetime(1970, 1, 1)
+            until = until or row["cutoff"]
+            conn.begin()
+            counts = _run_checks(cursor, since, until, restaurant_id)
+            if incremental:
+                cursor.execute(
+                    """
+                    INSERT INTO GRATLYDB.STRIPE_RECONCILIATION_WATERMARKS (NAME, WATERMARK)
+                    VALUES (%s, %s)
+                    ON DUPLICATE KEY UPDATE WATERMARK = VALUES(WATERMARK)
+                    """,
+                    (RECONCILIATION_WATERMARK, until),
+                )
+            conn.commit()
+        except pymysql.MySQLError:
+            conn.rollback()
+            raise
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (RECONCILIATION_LOCK_NAME,))
+    finally:
+        cursor.close()
+    return {
+        "restaurantId": restaurant_id,
+        "since": since.isoformat(),
+        "until": until.isoformat(),
+        "incremental": incremental,
+        "flagged": counts,
+    }
+
+
+def _reconciler_loop() -> None:
+    while not _stop_event.wait(RECONCILIATION_INTERVAL_SECONDS):
+        try:
+            run_reconciliation()
+        except HTTPException as err:
+            if err.status_code != 409:
+                logger.exception("Stripe reconciliation failed")
+        except pymysql.MySQLError:
+            logger.exception("Stripe reconciliation failed")
+
+
+def start_reconciler() -> None:
+    global _reconciler_thread
+    if _reconciler_thread is not None:
+        return
+    _stop_event.clear()
+    _reconciler_thread = threading.Thread(target=_reconciler_loop, name="stripe-reconciler", daemon=True)
+    _reconciler_thread.start()
+
+
+def stop_reconciler() -> None:
+    global _reconciler_thread
+    _stop_event.set()
+    if _reconciler_thread is not None:
+        _reconciler_thread.join(timeout=5)
+    _reconciler_thread = None
+
+
+def _parse_run_date(value: Optional[str], field: str) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {field}; use YYYY-MM-DD")
+
+
+@router.post("/admin/stripe/reconciliation/run")
+def run_stripe_reconciliation(payload: ReconciliationRunPayload, request: Request):
+    _require_admin_token(request)
+    since = _parse_run_date(payload.startDate, "startDate")
+    until = _parse_run_date(payload.endDate, "endDate")
+    if until is not None:
+        until = until + timedelta(days=1)
+    if since is not None and until is not None and until <= since:
+        raise HTTPException(status_code=400, detail="End date must be on or after start date")
+    try:
+        return run_reconciliation(payload.restaurantId, since, until)
+    except pymysql.MySQLError as err:
+        raise HTTPException(status_code=500, detail=f"Error running reconciliation: {err}")
+
+
+@router.get("/admin/stripe/reconciliation")
+def get_stripe_reconciliation(
+    request: Request,
+    restaurant_id: Optional[int] = None,
+    check_type: Optional[str] = None,
+    status: str = "open",
+    limit: int = 100,
+):
+    _require_admin_token(request)
+    safe_limit = max(1, min(int(limit), 1000))
+    filters = ["STATUS = %s"]
+    params: List[Any] = [status]
+    if restaurant_id is not None:
+        filters.append("RESTAURANTID = %s")
+        params.append(restaurant_id)
+    if check_type:
+        filters.append("CHECK_TYPE = %s")
+        params.append(check_type)
+    where_clause = " AND ".join(filters)
+    cursor = _get_cursor(dictionary=True)
+    try:
+        cursor.execute(
+            f"""
+            SELECT CHECK_TYPE AS check_type, COUNT(*) AS count
+            FROM GRATLYDB.STRIPE_RECONCILIATION_RESULTS
+            WHERE {where_clause}
+            GROUP BY CHECK_TYPE
+            """,
+            params,
+        )
+        counts = {row["check_type"]: int(row["count"]) for row in cursor.fetchall()}
+        cursor.execute(
+            f"""
+            SELECT RESULT_ID AS resultId,
+                   CHECK_TYPE AS checkType,
+                   RESTAURANTID AS restaurantId,
+                   RESTAURANTGUID AS restaurantGuid,
+                   SETTLEMENT_ID AS settlementId,
+                   EMPLOYEEGUID AS employeeGuid,
+                   REFERENCE_ID AS referenceId,
+                   EXPECTED_CENTS AS expectedCents,
+                   ACTUAL_CENTS AS actualCents,
+                   DETAIL AS detail,
+                   STATUS AS status,
+                   FIRST_SEEN_AT AS firstSeenAt,
+                   LAST_SEEN_AT AS lastSeenAt
+            FROM GRATLYDB.STRIPE_RECONCILIATION_RESULTS
+            WHERE {where_clause}
+            ORDER BY LAST_SEEN_AT DESC, RESULT_ID DESC
+            LIMIT %s
+            """,
+            [*params, safe_limit],
+        )
+        return {"counts": counts, "results": cursor.fetchall()}
+    except pymysql.MySQLError as err:
+        raise HTTPException(status_code=500, detail=f"Error fetching reconciliation results: {err}")
+    finally:
+        cursor.close()
+
+
+@router.post("/admin/stripe/reconciliation/{result_id}/resolve")
+def resolve_stripe_reconciliation_result(result_id: int, request: Request):
+    _require_admin_token(request)
+    cursor = _get_cursor(dictionary=False)
+    try:
+        cursor.execute(
+            """
+            UPDATE GRATLYDB.STRIPE_RECONCILIATION_RESULTS
+            SET STATUS = 'resolved', RESOLVED_AT = NOW()
+            WHERE RESULT_ID = %s AND STATUS = 'open'
+            """,
+            (result_id,),
+        )
+        cursor.connection.commit()
+        if cursor.rowcount == 0:
+            raise HTTPException(status_code=404, detail="Open reconciliation result not found")
+    except pymysql.MySQLError as err:
+        raise HTTPException(status_code=500, detail=f"Error resolving reconciliation result: {err}")
+    finally:
+        cursor.close()
+    return {"success": True, "resultId": result_id}
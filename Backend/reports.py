@@ -1,28 +1,37 @@
-from fastapi import APIRouter, HTTPException
-from typing import Dict, Optional, List
+from fastapi import APIRouter, Depends, HTTPException
+from typing import Any, Dict, Optional, List
+import logging
 import pymysql
 
 try:
-    from Backend.db import (
-        _get_cursor,
-        _fetch_employee_guid_for_user,
-        _fetch_restaurant_guid,
-        _fetch_restaurant_key,
-        _fetch_user_permission_names,
-        _serialize_permissions,
+    from Backend.db import _business_date_sql, _get_cursor
+    from Backend.auth_tokens import AUTH_REQUIRE_TOKENS, AccessContext, optional_access_context, resolve_access_context
+    from Backend.analytics import (
+        AnalyticsError,
+        analytics_covers,
+        analytics_watermark,
+        fetch_daily_totals_snapshot,
+        fetch_pending_payout_totals_snapshot,
+        fetch_settlement_totals_snapshot,
+        fetch_timeseries_snapshot,
     )
 except ImportError:
-    from db import (
-        _get_cursor,
-        _fetch_employee_guid_for_user,
-        _fetch_restaurant_guid,
-        _fetch_restaurant_key,
-        _fetch_user_permission_names,
-        _serialize_permissions,
+    from db import _business_date_sql, _get_cursor
+    from auth_tokens import AUTH_REQUIRE_TOKENS, AccessContext, optional_access_context, resolve_access_context
+    from analytics import (
+        AnalyticsError,
+        analytics_covers,
+        analytics_watermark,
+        fetch_daily_totals_snapshot,
+        fetch_pending_payout_totals_snapshot,
+        fetch_settlement_totals_snapshot,
+        fetch_timeseries_snapshot,
     )
 
 router = APIRouter()
 
+logger = logging.getLogger(__name__)
+
 
 def _get_date_key(value: Optional[str]) -> str:
     if not value:
@@ -44,156 +53,294 @@ def _get_yesterday_date_strings() -> tuple[str, str]:
     return yesterday.strftime("%Y%m%d"), yesterday.strftime("%Y-%m-%d")
 
 
-@router.get("/reports/weekly-tips-gratuities")
-def get_weekly_tips_gratuities(user_id: int):
-    permission_names = _fetch_user_permission_names(user_id)
-    permissions = _serialize_permissions(permission_names)
-    if permissions is None:
-        raise HTTPException(status_code=404, detail="User permissions not found")
-    restaurant_id = _fetch_restaurant_key(user_id)
-    if not restaurant_id:
-        raise HTTPException(status_code=404, detail="Restaurant not found")
+def _fetch_total_gratuity_rows(cursor, employee_guid: Optional[str]) -> Dict[str, Any]:
+    timeentry_filter = ""
+    timeentry_params: tuple = ()
+    if employee_guid:
+        timeentry_filter = "WHERE EMPLOYEEGUID = %s"
+        timeentry_params = (employee_guid,)
 
-    is_admin_view = bool(permissions.get("adminAccess") or permissions.get("managerAccess"))
-    employee_guid = None
-    if not is_admin_view:
-        employee_guid = _fetch_employee_guid_for_user(user_id)
-        if not employee_guid:
-            return {"days": []}
+    cursor.execute(
+        f"""
+        SELECT
+            COALESCE(SUM(CASE
+                WHEN BUSINESSDATE = DATE_SUB(CURDATE(), INTERVAL 1 DAY)
+                THEN NONCASHGRATUITYSERVICECHARGES
+                ELSE 0
+            END), 0) AS total_gratuity,
+            COALESCE(SUM(CASE
+                WHEN BUSINESSDATE = DATE_SUB(CURDATE(), INTERVAL 8 DAY)
+                THEN NONCASHGRATUITYSERVICECHARGES
+                ELSE 0
+            END), 0) AS gratuity_change
+            ,
+            COALESCE(SUM(CASE
+                WHEN BUSINESSDATE = DATE_SUB(CURDATE(), INTERVAL 1 DAY)
+                THEN NONCASHTIPS
+                ELSE 0
+            END), 0) AS total_tips
+            ,
+            COALESCE(SUM(CASE
+                WHEN BUSINESSDATE = DATE_SUB(CURDATE(), INTERVAL 8 DAY)
+                THEN NONCASHTIPS
+                ELSE 0
+            END), 0) AS tips_change
+        FROM GRATLYDB.SRC_TIMEENTRIES
+        {timeentry_filter}
+        """,
+        timeentry_params,
+    )
+    timeentry_row = cursor.fetchone() or {}
 
-    cursor = _get_cursor(dictionary=True)
-    try:
-        query = """
+    order_filter = ""
+    order_params: tuple = ()
+    if employee_guid:
+        order_filter = "WHERE EMPLOYEEGUID = %s"
+        order_params = (employee_guid,)
+
+    cursor.execute(
+        f"""
+        SELECT
+            COALESCE(SUM(CASE
+                WHEN BUSINESSDATE = DATE_SUB(CURDATE(), INTERVAL 1 DAY)
+                THEN COALESCE(TOTALAMOUNT, 0) - (COALESCE(TAXAMOUNT, 0) + COALESCE(TIPAMOUNT, 0) + COALESCE(GRATUITYAMOUNT, 0))
+                ELSE 0
+            END), 0) AS net_sales,
+            COALESCE(SUM(CASE
+                WHEN BUSINESSDATE = DATE_SUB(CURDATE(), INTERVAL 8 DAY)
+                THEN COALESCE(TOTALAMOUNT, 0) - (COALESCE(TAXAMOUNT, 0) + COALESCE(TIPAMOUNT, 0) + COALESCE(GRATUITYAMOUNT, 0))
+                ELSE 0
+            END), 0) AS net_sales_change
+        FROM GRATLYDB.SRC_ALLORDERS
+        {order_filter}
+        """,
+        order_params,
+    )
+    net_sales_row = cursor.fetchone() or {}
+    return {**timeentry_row, **net_sales_row}
+
+
+def _fetch_total_gratuity(cursor, employee_guid: Optional[str]) -> Dict[str, float]:
+    from datetime import date, timedelta
+
+    yesterday = date.today() - timedelta(days=1)
+    totals = None
+    if analytics_covers(yesterday):
+        try:
+            totals = fetch_daily_totals_snapshot(employee_guid, yesterday, yesterday - timedelta(days=7))
+        except AnalyticsError:
+            logger.warning("Analytics snapshot failed; serving total gratuity from MySQL", exc_info=True)
+    if totals is None:
+        totals = _fetch_total_gratuity_rows(cursor, employee_guid)
+    return {
+        "totalGratuity": float(totals.get("total_gratuity") or 0),
+        "gratuityChange": float(totals.get("gratuity_change") or 0),
+        "totalTips": float(totals.get("total_tips") or 0),
+        "tipsChange": float(totals.get("tips_change") or 0),
+        "netSales": float(totals.get("net_sales") or 0),
+        "netSalesChange": float(totals.get("net_sales_change") or 0),
+    }
+
+
+BUSINESS_DATE_COLUMN_SQL = _business_date_sql("BUSINESSDATE")
+
+TIMESERIES_METRICS = {
+    "tips": "TIPS",
+    "gratuity": "GRATUITY",
+    "netPayout": "NET_PAYOUT",
+    "totalSales": "TOTAL_SALES",
+    "netSales": "NET_SALES",
+    "prepayoutDeduction": "PREPAYOUT_DEDUCTION",
+}
+
+TIMESERIES_PERIOD_SQL = {
+    "day": "BUSINESS_DATE",
+    "week": "DATE_SUB(BUSINESS_DATE, INTERVAL WEEKDAY(BUSINESS_DATE) DAY)",
+    "month": "DATE_SUB(BUSINESS_DATE, INTERVAL DAYOFMONTH(BUSINESS_DATE) - 1 DAY)",
+}
+
+TIMESERIES_GROUP_COLUMNS = {
+    "employee": "EMPLOYEEGUID",
+    "job": "JOBTITLE",
+}
+
+
+def _get_period_start(value, granularity: str):
+    from datetime import timedelta
+
+    if granularity == "week":
+        return value - timedelta(days=value.weekday())
+    if granularity == "month":
+        return value.replace(day=1)
+    return value
+
+
+def _get_periods(start_value, end_value, granularity: str) -> List:
+    from datetime import timedelta
+
+    periods = []
+    current = _get_period_start(start_value, granularity)
+    while current <= end_value:
+        periods.append(current)
+        if granularity == "month":
+            current = (current.replace(day=28) + timedelta(days=4)).replace(day=1)
+        elif granularity == "week":
+            current = current + timedelta(days=7)
+        else:
+            current = current + timedelta(days=1)
+    return periods
+
+
+def _fetch_timeseries(
+    cursor,
+    restaurant_id: int,
+    employee_guid: Optional[str],
+    metrics: List[str],
+    start_value,
+    end_value,
+    granularity: str,
+    group_by: Optional[str],
+) -> List[dict]:
+    group_column = TIMESERIES_GROUP_COLUMNS.get(group_by or "")
+    rows = None
+    if analytics_covers(end_value):
+        try:
+            rows = fetch_timeseries_snapshot(
+                restaurant_id,
+                employee_guid,
+                [TIMESERIES_METRICS[metric] for metric in metrics],
+                start_value,
+                end_value,
+                granularity,
+                group_column,
+            )
+        except AnalyticsError:
+            logger.warning("Analytics snapshot failed; serving timeseries from MySQL", exc_info=True)
+    if rows is None:
+        metric_columns = ",\n".join(
+            f"COALESCE(SUM({TIMESERIES_METRICS[metric]}), 0) AS {TIMESERIES_METRICS[metric]}"
+            for metric in metrics
+        )
+        group_select = ""
+        group_clause = ""
+        if group_column:
+            group_select = f"{group_column} AS group_key, MAX(EMPLOYEE_NAME) AS group_label,"
+            group_clause = ", group_key"
+        query = f"""
             SELECT
-                date_value,
-                COALESCE(SUM(total_tips), 0) AS total_tips,
-                COALESCE(SUM(total_gratuity), 0) AS total_gratuity
-            FROM (
-                SELECT
-                    COALESCE(
-                        STR_TO_DATE(BUSINESSDATE, '%%Y-%%m-%%d'),
-                        STR_TO_DATE(BUSINESSDATE, '%%Y/%%m/%%d'),
-                        STR_TO_DATE(BUSINESSDATE, '%%m/%%d/%%Y'),
-                        STR_TO_DATE(BUSINESSDATE, '%%m-%%d-%%Y'),
-                        STR_TO_DATE(BUSINESSDATE, '%%Y%%m%%d'),
-                        STR_TO_DATE(LEFT(BUSINESSDATE, 10), '%%Y-%%m-%%d')
-                    ) AS date_value,
-                    COALESCE(OVERALL_TIPS, 0) + COALESCE(PAYOUT_TIPS, 0) AS total_tips,
-                    COALESCE(OVERALL_GRATUITY, 0) + COALESCE(PAYOUT_GRATUITY, 0) AS total_gratuity
-                FROM GRATLYDB.PAYOUT_FINAL
-                WHERE RESTAURANTID = %s
-                  AND BUSINESSDATE IS NOT NULL
+                {TIMESERIES_PERIOD_SQL[granularity]} AS period_start,
+                {group_select}
+                {metric_columns}
+            FROM GRATLYDB.PAYOUT_DAILY_TOTALS
+            WHERE RESTAURANTID = %s
+              AND BUSINESS_DATE BETWEEN %s AND %s
         """
-        params: List[object] = [restaurant_id]
+        params: List[object] = [restaurant_id, start_value, end_value]
         if employee_guid:
             query += " AND EMPLOYEEGUID = %s"
             params.append(employee_guid)
-        query += """
-            ) totals
-            WHERE date_value >= DATE_SUB(CURDATE(), INTERVAL 6 DAY)
-            GROUP BY date_value
-            ORDER BY date_value
-        """
+        query += f" GROUP BY period_start{group_clause} ORDER BY period_start"
         cursor.execute(query, params)
         rows = cursor.fetchall()
-        totals_by_date = {
-            row["date_value"].strftime("%Y-%m-%d"): {
-                "tips": float(row.get("total_tips") or 0),
-                "gratuity": float(row.get("total_gratuity") or 0),
-            }
-            for row in rows
-            if row.get("date_value")
-        }
 
-        from datetime import date, timedelta
+    periods = _get_periods(start_value, end_value, granularity)
+    series_map: Dict[Optional[str], dict] = {}
+    if not group_column:
+        series_map[None] = {"key": None, "label": None, "values": {}}
+    for row in rows:
+        key = row.get("group_key") if group_column else None
+        label = key
+        if group_by == "employee":
+            label = (row.get("group_label") or "").strip() or None
+        series = series_map.setdefault(key, {"key": key, "label": label, "values": {}})
+        series["values"][row["period_start"]] = {
+            metric: float(row.get(TIMESERIES_METRICS[metric]) or 0) for metric in metrics
+        }
 
-        days = []
-        for offset in range(6, -1, -1):
-            day_value = date.today() - timedelta(days=offset)
-            key = day_value.strftime("%Y-%m-%d")
-            totals = totals_by_date.get(key, {"tips": 0.0, "gratuity": 0.0})
-            days.append(
+    empty_point = {metric: 0.0 for metric in metrics}
+    return [
+        {
+            "key": series["key"],
+            "label": series["label"],
+            "points": [
                 {
-                    "date": key,
-                    "tips": totals["tips"],
-                    "gratuity": totals["gratuity"],
+                    "period": period.strftime("%Y-%m-%d"),
+                    **series["values"].get(period, empty_point),
                 }
-            )
-        return {"days": days}
-    except pymysql.MySQLError as err:
-        raise HTTPException(status_code=500, detail=f"Error fetching weekly tips/gratuities: {err}")
-    finally:
-        cursor.close()
+                for period in periods
+            ],
+        }
+        for series in series_map.values()
+    ]
 
 
-@router.get("/reports/pending-payouts")
-def get_pending_payouts(user_id: int):
-    permission_names = _fetch_user_permission_names(user_id)
-    permissions = _serialize_permissions(permission_names)
-    if permissions is None:
-        raise HTTPException(status_code=404, detail="User permissions not found")
-    restaurant_id = _fetch_restaurant_key(user_id)
-    if not restaurant_id:
-        raise HTTPException(status_code=404, detail="Restaurant not found")
-    restaurant_guid = _fetch_restaurant_guid(user_id)
-    if not restaurant_guid:
-        raise HTTPException(status_code=404, detail="Restaurant not found")
+def _fetch_weekly_tips_gratuities(cursor, restaurant_id: int, employee_guid: Optional[str]) -> List[dict]:
+    from datetime import date, timedelta
+
+    today = date.today()
+    series = _fetch_timeseries(
+        cursor,
+        restaurant_id,
+        employee_guid,
+        ["tips", "gratuity"],
+        today - timedelta(days=6),
+        today,
+        "day",
+        None,
+    )
+    return [
+        {
+            "date": point["period"],
+            "tips": point["tips"],
+            "gratuity": point["gratuity"],
+        }
+        for point in series[0]["points"]
+    ]
+
+
+@router.get("/reports/weekly-tips-gratuities")
+def get_weekly_tips_gratuities(
+    user_id: Optional[int] = None,
+    context: Optional[AccessContext] = Depends(optional_access_context),
+):
+    access = resolve_access_context(user_id, context)
+    restaurant_id = access.require_restaurant()
 
-    is_admin_view = bool(permissions.get("adminAccess") or permissions.get("managerAccess"))
     employee_guid = None
-    if not is_admin_view:
-        employee_guid = _fetch_employee_guid_for_user(user_id)
+    if not access.is_admin_view:
+        employee_guid = access.employee_guid
         if not employee_guid:
-            return {"pendingPayouts": 0.0}
+            return {"days": []}
 
     cursor = _get_cursor(dictionary=True)
     try:
-        order_query = """
-            SELECT
-                COALESCE(SUM(COALESCE(TIPAMOUNT, 0) + COALESCE(GRATUITYAMOUNT, 0)), 0) AS total_tips_gratuity
-            FROM GRATLYDB.SRC_ALLORDERS
-            WHERE RESTAURANTGUID = %s
-              AND (VOIDED IS NULL OR VOIDED <> '1')
-        """
-        order_params: List[object] = [restaurant_guid]
-        if employee_guid:
-            order_query += " AND EMPLOYEEGUID = %s"
-            order_params.append(employee_guid)
-        cursor.execute(order_query, order_params)
-        order_row = cursor.fetchone()
-        total_orders = float(order_row["total_tips_gratuity"] or 0)
-
-        payout_query = """
-            SELECT
-                COALESCE(SUM(COALESCE(NET_PAYOUT, 0) + COALESCE(PREPAYOUT_DEDUCTION, 0)), 0) AS total_paid
-            FROM GRATLYDB.PAYOUT_FINAL
-            WHERE RESTAURANTID = %s
-        """
-        payout_params: List[object] = [restaurant_id]
-        if employee_guid:
-            payout_query += " AND EMPLOYEEGUID = %s"
-            payout_params.append(employee_guid)
-        cursor.execute(payout_query, payout_params)
-        payout_row = cursor.fetchone()
-        total_paid = float(payout_row["total_paid"] or 0)
-
-        pending = max(0.0, round(total_orders - total_paid, 2))
-        return {"pendingPayouts": pending}
+        return {"days": _fetch_weekly_tips_gratuities(cursor, restaurant_id, employee_guid)}
     except pymysql.MySQLError as err:
-        raise HTTPException(status_code=500, detail=f"Error fetching pending payouts: {err}")
+        raise HTTPException(status_code=500, detail=f"Error fetching weekly tips/gratuities: {err}")
     finally:
         cursor.close()
 
 
-@router.get("/reports/payroll")
-def get_payroll_report(user_id: int, start_date: str, end_date: str):
-    permission_names = _fetch_user_permission_names(user_id)
-    permissions = _serialize_permissions(permission_names)
-    if permissions is None:
-        raise HTTPException(status_code=404, detail="User permissions not found")
-    restaurant_id = _fetch_restaurant_key(user_id)
-    if not restaurant_id:
-        raise HTTPException(status_code=404, detail="Restaurant not found")
+@router.get("/reports/timeseries")
+def get_timeseries_report(
+    start_date: str,
+    end_date: str,
+    metrics: str = "tips,gratuity",
+    granularity: str = "day",
+    group_by: Optional[str] = None,
+    user_id: Optional[int] = None,
+    context: Optional[AccessContext] = Depends(optional_access_context),
+):
+    metric_list = [metric.strip() for metric in metrics.split(",") if metric.strip()]
+    if not metric_list or any(metric not in TIMESERIES_METRICS for metric in metric_list):
+        raise HTTPException(
+            status_code=400,
+            detail=f"metrics must be a comma-separated list of: {', '.join(TIMESERIES_METRICS)}",
+        )
+    if granularity not in TIMESERIES_PERIOD_SQL:
+        raise HTTPException(status_code=400, detail="granularity must be day, week or month")
+    if group_by is not None and group_by not in TIMESERIES_GROUP_COLUMNS:
+        raise HTTPException(status_code=400, detail="group_by must be employee or job")
 
     from datetime import datetime
 
@@ -205,49 +352,119 @@ def get_payroll_report(user_id: int, start_date: str, end_date: str):
     if end_value < start_value:
         raise HTTPException(status_code=400, detail="End date must be on or after start date")
 
-    is_admin_view = bool(permissions.get("adminAccess") or permissions.get("managerAccess"))
+    access = resolve_access_context(user_id, context)
+    restaurant_id = access.require_restaurant()
+
+    response = {
+        "startDate": start_value.strftime("%Y-%m-%d"),
+        "endDate": end_value.strftime("%Y-%m-%d"),
+        "granularity": granularity,
+        "groupBy": group_by,
+        "metrics": metric_list,
+        "series": [],
+    }
     employee_guid = None
-    if not is_admin_view:
-        employee_guid = _fetch_employee_guid_for_user(user_id)
+    if not access.is_admin_view:
+        employee_guid = access.employee_guid
         if not employee_guid:
-            return {"employees": []}
+            return response
 
     cursor = _get_cursor(dictionary=True)
     try:
-        query = """
-            SELECT
-                st.EMPLOYEEGUID AS employee_guid,
-                CONCAT_WS(' ', se.EMPLOYEEFNAME, se.EMPLOYEELNAME) AS employee_name,
-                COALESCE(SUM(st.AMOUNT_CENTS), 0) AS amount_cents
-            FROM GRATLYDB.STRIPE_SETTLEMENT_TRANSFERS st
-            LEFT JOIN GRATLYDB.SRC_EMPLOYEES se
-                ON se.EMPLOYEEGUID = st.EMPLOYEEGUID
-            LEFT JOIN GRATLYDB.SRC_ONBOARDING so
-                ON so.RESTAURANTGUID = COALESCE(st.RESTAURANTGUID, se.RESTAURANTGUID)
-            WHERE so.RESTAURANTID = %s
-              AND DATE(st.CREATED_AT) BETWEEN %s AND %s
-        """
-        params: List[object] = [restaurant_id, start_value, end_value]
-        if employee_guid:
-            query += " AND st.EMPLOYEEGUID = %s"
-            params.append(employee_guid)
-        query += """
-            GROUP BY st.EMPLOYEEGUID, employee_name
-            ORDER BY employee_name
-        """
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        employees = [
-            {
-                "employeeGuid": row.get("employee_guid"),
-                "employeeName": (row.get("employee_name") or "").strip() or "Unknown",
-                "totalPayout": round((float(row.get("amount_cents") or 0) / 100), 2),
-            }
-            for row in rows
-        ]
-        return {"employees": employees}
+        response["series"] = _fetch_timeseries(
+            cursor,
+            restaurant_id,
+            employee_guid,
+            metric_list,
+            start_value,
+            end_value,
+            granularity,
+            group_by,
+        )
+        return response
     except pymysql.MySQLError as err:
-        raise HTTPException(status_code=500, detail=f"Error fetching payroll report: {err}")
+        raise HTTPException(status_code=500, detail=f"Error fetching timeseries report: {err}")
+    finally:
+        cursor.close()
+
+
+def _fetch_pending_payouts(
+    cursor,
+    restaurant_id: int,
+    restaurant_guid: str,
+    employee_guid: Optional[str],
+) -> float:
+    # Days before the snapshot watermark come from DuckDB; MySQL only sums the rows after it.
+    total_orders = 0.0
+    total_paid = 0.0
+    watermark = analytics_watermark()
+    if watermark is not None:
+        try:
+            total_orders, total_paid = fetch_pending_payout_totals_snapshot(restaurant_id, employee_guid)
+        except AnalyticsError:
+            logger.warning("Analytics snapshot failed; serving pending payouts from MySQL", exc_info=True)
+            watermark = None
+
+    order_query = """
+        SELECT
+            COALESCE(SUM(COALESCE(TIPAMOUNT, 0) + COALESCE(GRATUITYAMOUNT, 0)), 0) AS total_tips_gratuity
+        FROM GRATLYDB.SRC_ALLORDERS
+        WHERE RESTAURANTGUID = %s
+          AND (VOIDED IS NULL OR VOIDED <> '1')
+    """
+    order_params: List[object] = [restaurant_guid]
+    if watermark is not None:
+        order_query += f" AND COALESCE({BUSINESS_DATE_COLUMN_SQL} >= %s, TRUE)"
+        order_params.append(watermark)
+    if employee_guid:
+        order_query += " AND EMPLOYEEGUID = %s"
+        order_params.append(employee_guid)
+    cursor.execute(order_query, order_params)
+    order_row = cursor.fetchone()
+    total_orders += float(order_row["total_tips_gratuity"] or 0)
+
+    payout_query = """
+        SELECT
+            COALESCE(SUM(COALESCE(NET_PAYOUT, 0) + COALESCE(PREPAYOUT_DEDUCTION, 0)), 0) AS total_paid
+        FROM GRATLYDB.PAYOUT_FINAL
+        WHERE RESTAURANTID = %s
+    """
+    payout_params: List[object] = [restaurant_id]
+    if watermark is not None:
+        payout_query += f" AND COALESCE({BUSINESS_DATE_COLUMN_SQL} >= %s, TRUE)"
+        payout_params.append(watermark)
+    if employee_guid:
+        payout_query += " AND EMPLOYEEGUID = %s"
+        payout_params.append(employee_guid)
+    cursor.execute(payout_query, payout_params)
+    payout_row = cursor.fetchone()
+    total_paid += float(payout_row["total_paid"] or 0)
+
+    return max(0.0, round(total_orders - total_paid, 2))
+
+
+@router.get("/reports/pending-payouts")
+def get_pending_payouts(
+    user_id: Optional[int] = None,
+    context: Optional[AccessContext] = Depends(optional_access_context),
+):
+    access = resolve_access_context(user_id, context)
+    restaurant_id = access.require_restaurant()
+    restaurant_guid = access.restaurant_guid
+    if not restaurant_guid:
+        raise HTTPException(status_code=404, detail="Restaurant not found")
+
+    employee_guid = None
+    if not access.is_admin_view:
+        employee_guid = access.employee_guid
+        if not employee_guid:
+            return {"pendingPayouts": 0.0}
+
+    cursor = _get_cursor(dictionary=True)
+    try:
+        return {"pendingPayouts": _fetch_pending_payouts(cursor, restaurant_id, restaurant_guid, employee_guid)}
+    except pymysql.MySQLError as err:
+        raise HTTPException(status_code=500, detail=f"Error fetching pending payouts: {err}")
     finally:
         cursor.close()
 
@@ -259,6 +476,14 @@ def _fetch_settlement_totals(
     start_value,
     end_value,
 ):
+    if analytics_covers(end_value):
+        try:
+            return fetch_settlement_totals_snapshot(restaurant_id, employee_guid, start_value, end_value)
+        except AnalyticsError:
+            logger.warning("Analytics snapshot failed; serving settlement totals from MySQL", exc_info=True)
+
+    from datetime import timedelta
+
     query = """
         SELECT
             st.EMPLOYEEGUID AS employee_guid,
@@ -267,12 +492,13 @@ def _fetch_settlement_totals(
         FROM GRATLYDB.STRIPE_SETTLEMENT_TRANSFERS st
         LEFT JOIN GRATLYDB.SRC_EMPLOYEES se
             ON se.EMPLOYEEGUID = st.EMPLOYEEGUID
-        LEFT JOIN GRATLYDB.SRC_ONBOARDING so
-            ON so.RESTAURANTGUID = COALESCE(st.RESTAURANTGUID, se.RESTAURANTGUID)
+        JOIN GRATLYDB.SRC_ONBOARDING so
+            ON so.RESTAURANTGUID = st.RESTAURANTGUID
         WHERE so.RESTAURANTID = %s
-          AND DATE(st.CREATED_AT) BETWEEN %s AND %s
+          AND st.CREATED_AT >= %s
+          AND st.CREATED_AT < %s
     """
-    params: List[object] = [restaurant_id, start_value, end_value]
+    params: List[object] = [restaurant_id, start_value, end_value + timedelta(days=1)]
     if employee_guid:
         query += " AND st.EMPLOYEEGUID = %s"
         params.append(employee_guid)
@@ -292,20 +518,55 @@ def _fetch_settlement_totals(
     ]
 
 
+@router.get("/reports/payroll")
+def get_payroll_report(
+    start_date: str,
+    end_date: str,
+    user_id: Optional[int] = None,
+    context: Optional[AccessContext] = Depends(optional_access_context),
+):
+    access = resolve_access_context(user_id, context)
+    restaurant_id = access.require_restaurant()
+
+    from datetime import datetime
+
+    try:
+        start_value = datetime.strptime(start_date, "%Y-%m-%d").date()
+        end_value = datetime.strptime(end_date, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format; use YYYY-MM-DD")
+    if end_value < start_value:
+        raise HTTPException(status_code=400, detail="End date must be on or after start date")
+
+    employee_guid = None
+    if not access.is_admin_view:
+        employee_guid = access.employee_guid
+        if not employee_guid:
+            return {"employees": []}
+
+    cursor = _get_cursor(dictionary=True)
+    try:
+        employees = _fetch_settlement_totals(
+            cursor, restaurant_id, employee_guid, start_value, end_value
+        )
+        return {"employees": employees}
+    except pymysql.MySQLError as err:
+        raise HTTPException(status_code=500, detail=f"Error fetching payroll report: {err}")
+    finally:
+        cursor.close()
+
+
 @router.get("/reports/this-week")
-def get_this_week_report(user_id: int):
-    permission_names = _fetch_user_permission_names(user_id)
-    permissions = _serialize_permissions(permission_names)
-    if permissions is None:
-        raise HTTPException(status_code=404, detail="User permissions not found")
-    restaurant_id = _fetch_restaurant_key(user_id)
-    if not restaurant_id:
-        raise HTTPException(status_code=404, detail="Restaurant not found")
+def get_this_week_report(
+    user_id: Optional[int] = None,
+    context: Optional[AccessContext] = Depends(optional_access_context),
+):
+    access = resolve_access_context(user_id, context)
+    restaurant_id = access.require_restaurant()
 
-    is_admin_view = bool(permissions.get("adminAccess") or permissions.get("managerAccess"))
     employee_guid = None
-    if not is_admin_view:
-        employee_guid = _fetch_employee_guid_for_user(user_id)
+    if not access.is_admin_view:
+        employee_guid = access.employee_guid
         if not employee_guid:
             return {"employees": [], "startDate": None, "endDate": None}
 
@@ -332,19 +593,16 @@ def get_this_week_report(user_id: int):
 
 
 @router.get("/reports/this-month")
-def get_this_month_report(user_id: int):
-    permission_names = _fetch_user_permission_names(user_id)
-    permissions = _serialize_permissions(permission_names)
-    if permissions is None:
-        raise HTTPException(status_code=404, detail="User permissions not found")
-    restaurant_id = _fetch_restaurant_key(user_id)
-    if not restaurant_id:
-        raise HTTPException(status_code=404, detail="Restaurant not found")
+def get_this_month_report(
+    user_id: Optional[int] = None,
+    context: Optional[AccessContext] = Depends(optional_access_context),
+):
+    access = resolve_access_context(user_id, context)
+    restaurant_id = access.require_restaurant()
 
-    is_admin_view = bool(permissions.get("adminAccess") or permissions.get("managerAccess"))
     employee_guid = None
-    if not is_admin_view:
-        employee_guid = _fetch_employee_guid_for_user(user_id)
+    if not access.is_admin_view:
+        employee_guid = access.employee_guid
         if not employee_guid:
             return {"employees": [], "startDate": None, "endDate": None}
 
@@ -370,136 +628,139 @@ def get_this_month_report(user_id: int):
         cursor.close()
 
 
+def _fetch_yesterday_schedules(cursor, restaurant_id: Optional[int], employee_guid: Optional[str]) -> List[dict]:
+    date_compact, date_dash = _get_yesterday_date_strings()
+    query = """
+        SELECT
+            pa.PAYOUT_SCHEDULEID AS payout_schedule_id,
+            pa.BUSINESSDATE AS business_date,
+            ps.NAME AS payout_schedule_name,
+            pai.EMPLOYEEGUID AS employee_guid,
+            pai.EMPLOYEE_NAME AS employee_name,
+            pai.JOBTITLE AS job_title,
+            pai.IS_CONTRIBUTOR AS is_contributor,
+            pai.PAYOUT_RECEIVER_ID AS payout_receiver_id,
+            pai.PAYOUT_PERCENTAGE AS payout_percentage,
+            pai.TOTAL_SALES AS total_sales,
+            pai.NET_SALES AS net_sales,
+            pai.TOTAL_TIPS AS total_tips,
+            pai.TOTAL_GRATUITY AS total_gratuity,
+            pai.OVERALL_TIPS AS overall_tips,
+            pai.OVERALL_GRATUITY AS overall_gratuity,
+            pai.PAYOUT_TIPS AS payout_tips,
+            pai.PAYOUT_GRATUITY AS payout_gratuity,
+            pai.NET_PAYOUT AS net_payout
+        FROM GRATLYDB.PAYOUT_APPROVAL_ITEMS pai
+        JOIN GRATLYDB.PAYOUT_APPROVAL pa
+            ON pa.PAYOUT_APPROVALID = pai.PAYOUT_APPROVALID
+        LEFT JOIN GRATLYDB.PAYOUT_SCHEDULE ps
+            ON ps.PAYOUT_SCHEDULEID = pa.PAYOUT_SCHEDULEID
+        WHERE pa.RESTAURANTID = %s
+          AND pa.BUSINESSDATE IN (%s, %s)
+          AND pa.IS_APPROVED = 1
+    """
+    params: List[object] = [restaurant_id, date_compact, date_dash]
+    if employee_guid:
+        query += " AND pai.EMPLOYEEGUID = %s"
+        params.append(employee_guid)
+    query += " ORDER BY pa.PAYOUT_SCHEDULEID, pa.BUSINESSDATE, pai.EMPLOYEE_NAME"
+    cursor.execute(query, params)
+    rows = cursor.fetchall()
+    if not rows:
+        return []
+
+    schedule_map: Dict[str, dict] = {}
+    for row in rows:
+        schedule_key = f"{row['payout_schedule_id']}-{row['business_date']}"
+        schedule_entry = schedule_map.setdefault(
+            schedule_key,
+            {
+                "payoutScheduleId": row["payout_schedule_id"],
+                "name": row["payout_schedule_name"],
+                "payoutRuleId": None,
+                "payoutRuleLabel": None,
+                "businessDate": row["business_date"],
+                "startDay": None,
+                "endDay": None,
+                "startTime": None,
+                "endTime": None,
+                "startDateTime": None,
+                "endDateTime": None,
+                "prepayoutFlag": False,
+                "totalSales": 0.0,
+                "netSales": 0.0,
+                "totalTips": 0.0,
+                "totalGratuity": 0.0,
+                "contributorCount": 0,
+                "receiverCount": 0,
+                "receiverRoles": [],
+                "contributors": [],
+            },
+        )
+
+        schedule_entry["totalSales"] += float(row["total_sales"] or 0)
+        schedule_entry["netSales"] += float(row["net_sales"] or 0)
+        schedule_entry["totalTips"] += float(row["total_tips"] or 0)
+        schedule_entry["totalGratuity"] += float(row["total_gratuity"] or 0)
+
+        contributor_entry = {
+            "employeeGuid": row["employee_guid"],
+            "employeeName": row["employee_name"],
+            "jobTitle": row["job_title"],
+            "businessDate": row["business_date"],
+            "inTime": None,
+            "outTime": None,
+            "hoursWorked": 0,
+            "isContributor": row["is_contributor"],
+            "payoutReceiverId": row["payout_receiver_id"],
+            "payoutPercentage": float(row["payout_percentage"] or 0),
+            "totalSales": float(row["total_sales"] or 0),
+            "netSales": float(row["net_sales"] or 0),
+            "totalTips": float(row["total_tips"] or 0),
+            "totalGratuity": float(row["total_gratuity"] or 0),
+            "overallTips": float(row["overall_tips"] or 0),
+            "overallGratuity": float(row["overall_gratuity"] or 0),
+            "payoutTips": float(row["payout_tips"] or 0),
+            "payoutGratuity": float(row["payout_gratuity"] or 0),
+            "netPayout": float(row["net_payout"] or 0),
+        }
+        schedule_entry["contributors"].append(contributor_entry)
+
+        if (row["is_contributor"] or "").lower() == "yes":
+            schedule_entry["contributorCount"] += 1
+        else:
+            schedule_entry["receiverCount"] += 1
+
+    return list(schedule_map.values())
+
+
 @router.get("/reports/yesterday")
 def get_yesterday_report(
     restaurant_id: Optional[int] = None,
     restaurant_guid: Optional[str] = None,
     user_id: Optional[int] = None,
+    context: Optional[AccessContext] = Depends(optional_access_context),
 ):
     employee_guid = None
-    if user_id is not None:
-        permission_names = _fetch_user_permission_names(user_id)
-        permissions = _serialize_permissions(permission_names)
-        if permissions is None:
-            raise HTTPException(status_code=404, detail="User permissions not found")
-        is_admin_view = bool(permissions.get("adminAccess") or permissions.get("managerAccess"))
-        if not is_admin_view:
-            employee_guid = _fetch_employee_guid_for_user(user_id)
+    if user_id is not None or context is not None or AUTH_REQUIRE_TOKENS:
+        access = resolve_access_context(user_id, context)
+        if (restaurant_id is not None and restaurant_id != access.restaurant_id) or (
+            restaurant_guid is not None and restaurant_guid != access.restaurant_guid
+        ):
+            raise HTTPException(status_code=403, detail="Restaurant does not match user")
+        if not access.is_admin_view:
+            employee_guid = access.employee_guid
             if not employee_guid:
                 return {"schedules": []}
-        if restaurant_id is None:
-            restaurant_id = _fetch_restaurant_key(user_id)
-        if restaurant_guid is None:
-            restaurant_guid = _fetch_restaurant_guid(user_id)
+        restaurant_id = access.restaurant_id
+        restaurant_guid = access.restaurant_guid
 
-    if restaurant_id is None and restaurant_guid is None and user_id is None:
+    if restaurant_id is None and restaurant_guid is None and context is None and user_id is None:
         raise HTTPException(status_code=400, detail="restaurant_id, restaurant_guid, or user_id is required")
 
     cursor = _get_cursor(dictionary=True)
     try:
-        date_compact, date_dash = _get_yesterday_date_strings()
-        query = """
-            SELECT
-                pa.PAYOUT_SCHEDULEID AS payout_schedule_id,
-                pa.BUSINESSDATE AS business_date,
-                ps.NAME AS payout_schedule_name,
-                pai.EMPLOYEEGUID AS employee_guid,
-                pai.EMPLOYEE_NAME AS employee_name,
-                pai.JOBTITLE AS job_title,
-                pai.IS_CONTRIBUTOR AS is_contributor,
-                pai.PAYOUT_RECEIVER_ID AS payout_receiver_id,
-                pai.PAYOUT_PERCENTAGE AS payout_percentage,
-                pai.TOTAL_SALES AS total_sales,
-                pai.NET_SALES AS net_sales,
-                pai.TOTAL_TIPS AS total_tips,
-                pai.TOTAL_GRATUITY AS total_gratuity,
-                pai.OVERALL_TIPS AS overall_tips,
-                pai.OVERALL_GRATUITY AS overall_gratuity,
-                pai.PAYOUT_TIPS AS payout_tips,
-                pai.PAYOUT_GRATUITY AS payout_gratuity,
-                pai.NET_PAYOUT AS net_payout
-            FROM GRATLYDB.PAYOUT_APPROVAL_ITEMS pai
-            JOIN GRATLYDB.PAYOUT_APPROVAL pa
-                ON pa.PAYOUT_APPROVALID = pai.PAYOUT_APPROVALID
-            LEFT JOIN GRATLYDB.PAYOUT_SCHEDULE ps
-                ON ps.PAYOUT_SCHEDULEID = pa.PAYOUT_SCHEDULEID
-            WHERE pa.RESTAURANTID = %s
-              AND pa.BUSINESSDATE IN (%s, %s)
-              AND pa.IS_APPROVED = 1
-        """
-        params: List[object] = [restaurant_id, date_compact, date_dash]
-        if employee_guid:
-            query += " AND pai.EMPLOYEEGUID = %s"
-            params.append(employee_guid)
-        query += " ORDER BY pa.PAYOUT_SCHEDULEID, pa.BUSINESSDATE, pai.EMPLOYEE_NAME"
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        if not rows:
-            return {"schedules": []}
-
-        schedule_map: Dict[str, dict] = {}
-        for row in rows:
-            schedule_key = f"{row['payout_schedule_id']}-{row['business_date']}"
-            schedule_entry = schedule_map.setdefault(
-                schedule_key,
-                {
-                    "payoutScheduleId": row["payout_schedule_id"],
-                    "name": row["payout_schedule_name"],
-                    "payoutRuleId": None,
-                    "payoutRuleLabel": None,
-                    "businessDate": row["business_date"],
-                    "startDay": None,
-                    "endDay": None,
-                    "startTime": None,
-                    "endTime": None,
-                    "startDateTime": None,
-                    "endDateTime": None,
-                    "prepayoutFlag": False,
-                    "totalSales": 0.0,
-                    "netSales": 0.0,
-                    "totalTips": 0.0,
-                    "totalGratuity": 0.0,
-                    "contributorCount": 0,
-                    "receiverCount": 0,
-                    "receiverRoles": [],
-                    "contributors": [],
-                },
-            )
-
-            schedule_entry["totalSales"] += float(row["total_sales"] or 0)
-            schedule_entry["netSales"] += float(row["net_sales"] or 0)
-            schedule_entry["totalTips"] += float(row["total_tips"] or 0)
-            schedule_entry["totalGratuity"] += float(row["total_gratuity"] or 0)
-
-            contributor_entry = {
-                "employeeGuid": row["employee_guid"],
-                "employeeName": row["employee_name"],
-                "jobTitle": row["job_title"],
-                "businessDate": row["business_date"],
-                "inTime": None,
-                "outTime": None,
-                "hoursWorked": 0,
-                "isContributor": row["is_contributor"],
-                "payoutReceiverId": row["payout_receiver_id"],
-                "payoutPercentage": float(row["payout_percentage"] or 0),
-                "totalSales": float(row["total_sales"] or 0),
-                "netSales": float(row["net_sales"] or 0),
-                "totalTips": float(row["total_tips"] or 0),
-                "totalGratuity": float(row["total_gratuity"] or 0),
-                "overallTips": float(row["overall_tips"] or 0),
-                "overallGratuity": float(row["overall_gratuity"] or 0),
-                "payoutTips": float(row["payout_tips"] or 0),
-                "payoutGratuity": float(row["payout_gratuity"] or 0),
-                "netPayout": float(row["net_payout"] or 0),
-            }
-            schedule_entry["contributors"].append(contributor_entry)
-
-            if (row["is_contributor"] or "").lower() == "yes":
-                schedule_entry["contributorCount"] += 1
-            else:
-                schedule_entry["receiverCount"] += 1
-
-        return {"schedules": list(schedule_map.values())}
+        return {"schedules": _fetch_yesterday_schedules(cursor, restaurant_id, employee_guid)}
     except pymysql.MySQLError as err:
         raise HTTPException(status_code=500, detail=f"Error fetching yesterday report: {err}")
     finally:
@@ -1,10 +1,281 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from fastapi import APIRouter, HTTPException, Request
+from typing import Any, Callable, Dict, Optional, Tuple
+import asyncio
 import hashlib
+import hmac
+import importlib
+import logging
+import math
+import os
+import re
+import threading
+import time
+
+router = APIRouter()
+
+logger = logging.getLogger(__name__)
+
+PASSWORD_HASH_SCHEME = (os.getenv("PASSWORD_HASH_SCHEME") or "bcrypt").strip().lower()
+PASSWORD_HASH_TARGET_MS = float(os.getenv("PASSWORD_HASH_TARGET_MS") or 250)
+PASSWORD_HASH_ROUNDS = int(os.getenv("PASSWORD_HASH_ROUNDS") or 0)
+PASSWORD_HASH_MEMORY_KIB = int(os.getenv("PASSWORD_HASH_MEMORY_KIB") or 65536)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS") or max(1, (os.cpu_count() or 2) // 2))
+PASSWORD_HASH_QUEUE_SIZE = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE") or 32)
+
+LEGACY_SHA256_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+BCRYPT_PATTERN = re.compile(r"^\$2[aby]\$(\d{2})\$")
 
 def _prehash(password: str) -> str:
     return hashlib.sha256(password.encode("utf-8")).hexdigest()
 
+def _load_module(name: str):
+    try:
+        return importlib.import_module(name)
+    except Exception as exc:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Password hashing requires {name}: {exc}",
+        ) from exc
+
+class _BcryptHasher:
+    scheme = "bcrypt"
+
+    def __init__(self, rounds: int):
+        self._bcrypt = _load_module("bcrypt")
+        self.rounds = rounds or self._calibrate()
+
+    def _calibrate(self) -> int:
+        probe_rounds = 10
+        started = time.perf_counter()
+        self._bcrypt.hashpw(b"calibration", self._bcrypt.gensalt(probe_rounds))
+        elapsed_ms = max((time.perf_counter() - started) * 1000, 0.1)
+        return min(15, max(10, probe_rounds + int(math.floor(math.log2(PASSWORD_HASH_TARGET_MS / elapsed_ms)))))
+
+    def identify(self, hashed: str) -> bool:
+        return bool(BCRYPT_PATTERN.match(hashed))
+
+    def hash(self, password: str) -> str:
+        return self._bcrypt.hashpw(_prehash(password).encode("utf-8"), self._bcrypt.gensalt(self.rounds)).decode("utf-8")
+
+    def verify(self, password: str, hashed: str) -> bool:
+        try:
+            return self._bcrypt.checkpw(_prehash(password).encode("utf-8"), hashed.encode("utf-8"))
+        except ValueError:
+            return False
+
+    def needs_update(self, hashed: str) -> bool:
+        match = BCRYPT_PATTERN.match(hashed)
+        return not match or int(match.group(1)) < self.rounds
+
+class _Argon2Hasher:
+    scheme = "argon2"
+
+    def __init__(self, time_cost: int):
+        self._argon2 = _load_module("argon2")
+        self.time_cost = time_cost or self._calibrate()
+        self._hasher = self._argon2.PasswordHasher(time_cost=self.time_cost, memory_cost=PASSWORD_HASH_MEMORY_KIB)
+
+    def _calibrate(self) -> int:
+        probe = self._argon2.PasswordHasher(time_cost=1, memory_cost=PASSWORD_HASH_MEMORY_KIB)
+        started = time.perf_counter()
+        probe.hash("calibration")
+        elapsed_ms = max((time.perf_counter() - started) * 1000, 0.1)
+        return min(10, max(2, int(round(PASSWORD_HASH_TARGET_MS / elapsed_ms))))
+
+    def identify(self, hashed: str) -> bool:
+        return hashed.startswith("$argon2")
+
+    def hash(self, password: str) -> str:
+        return self._hasher.hash(password)
+
+    def verify(self, password: str, hashed: str) -> bool:
+        try:
+            return self._hasher.verify(hashed, password)
+        except self._argon2.exceptions.VerificationError:
+            return False
+        except self._argon2.exceptions.InvalidHashError:
+            return False
+
+    def needs_update(self, hashed: str) -> bool:
+        return self._hasher.check_needs_rehash(hashed)
+
+PASSWORD_HASHERS = {
+    "bcrypt": _BcryptHasher,
+    "argon2": _Argon2Hasher,
+}
+
+class _HashingPool:
+    def __init__(self, workers: int, queue_size: int):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._lock = threading.Lock()
+        self._workers = workers
+        self._queue_size = queue_size
+        self._metrics: Dict[str, float] = {
+            "submitted": 0,
+            "completed": 0,
+            "rejected": 0,
+            "inFlight": 0,
+            "maxInFlight": 0,
+            "totalWaitMs": 0.0,
+            "maxWaitMs": 0.0,
+            "totalRunMs": 0.0,
+            "maxRunMs": 0.0,
+        }
+
+    def _submit(self, func: Callable[..., Any], *args: Any) -> "Future[Any]":
+        # Never wait for a slot: a caller parked here would hold a request thread while doing nothing.
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._metrics["rejected"] += 1
+            raise HTTPException(status_code=503, detail="Too many sign-in attempts in progress; try again shortly")
+        submitted = time.perf_counter()
+        with self._lock:
+            self._metrics["submitted"] += 1
+            self._metrics["inFlight"] += 1
+            self._metrics["maxInFlight"] = max(self._metrics["maxInFlight"], self._metrics["inFlight"])
+
+        def _timed() -> Any:
+            started = time.perf_counter()
+            try:
+                result = func(*args)
+            finally:
+                # Freed before the caller is woken, so a finished caller can immediately hash again.
+                self._release()
+            run_ms = (time.perf_counter() - started) * 1000
+            wait_ms = (started - submitted) * 1000
+            with self._lock:
+                self._metrics["completed"] += 1
+                self._metrics["totalWaitMs"] += wait_ms
+                self._metrics["maxWaitMs"] = max(self._metrics["maxWaitMs"], wait_ms)
+                self._metrics["totalRunMs"] += run_ms
+                self._metrics["maxRunMs"] = max(self._metrics["maxRunMs"], run_ms)
+            return result
+
+        try:
+            return self._executor.submit(_timed)
+        except RuntimeError:
+            self._release()
+            raise
+
+    def _release(self) -> None:
+        self._slots.release()
+        with self._lock:
+            self._metrics["inFlight"] -= 1
+
+    def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        return self._submit(func, *args).result()
+
+    async def run_async(self, func: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.wrap_future(self._submit(func, *args))
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot: Dict[str, Any] = dict(self._metrics)
+        completed = snapshot["completed"]
+        snapshot["avgWaitMs"] = round(snapshot["totalWaitMs"] / completed, 2) if completed else 0.0
+        snapshot["avgRunMs"] = round(snapshot["totalRunMs"] / completed, 2) if completed else 0.0
+        snapshot["queued"] = max(0, snapshot["inFlight"] - self._workers)
+        snapshot["workers"] = self._workers
+        snapshot["queueSize"] = self._queue_size
+        for key in ("totalWaitMs", "maxWaitMs", "totalRunMs", "maxRunMs"):
+            snapshot[key] = round(snapshot[key], 2)
+        return snapshot
+
+_hashing_pool = _HashingPool(PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE_SIZE)
+_hasher = None
+_hasher_lock = threading.Lock()
+_verification_hashers: Dict[str, Any] = {}
+
+def _get_hasher():
+    global _hasher
+    if _hasher is None:
+        with _hasher_lock:
+            if _hasher is None:
+                hasher_class = PASSWORD_HASHERS.get(PASSWORD_HASH_SCHEME)
+                if hasher_class is None:
+                    raise HTTPException(status_code=500, detail=f"Unknown password hash scheme: {PASSWORD_HASH_SCHEME}")
+                _hasher = hasher_class(PASSWORD_HASH_ROUNDS)
+                logger.info("Password hashing uses %s with cost %s", _hasher.scheme, _hasher_cost(_hasher))
+    return _hasher
+
+def _hasher_cost(hasher) -> int:
+    return getattr(hasher, "rounds", None) or getattr(hasher, "time_cost", 0)
+
+def _is_legacy_hash(hashed: str) -> bool:
+    return bool(LEGACY_SHA256_PATTERN.match(hashed))
+
+def _verification_hasher(scheme: str):
+    candidate = _verification_hashers.get(scheme)
+    if candidate is None:
+        with _hasher_lock:
+            candidate = _verification_hashers.get(scheme)
+            if candidate is None:
+                # Any cost works for verification; the stored hash carries its own parameters.
+                candidate = PASSWORD_HASHERS[scheme](1 if scheme == "argon2" else 10)
+                _verification_hashers[scheme] = candidate
+    return candidate
+
+def _hasher_for(hashed: str):
+    hasher = _get_hasher()
+    if hasher.identify(hashed):
+        return hasher
+    for scheme in PASSWORD_HASHERS:
+        if scheme == hasher.scheme:
+            continue
+        candidate = _verification_hasher(scheme)
+        if candidate.identify(hashed):
+            return candidate
+    return None
+
+def _verify(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    hasher = _get_hasher()
+    if _is_legacy_hash(hashed_password):
+        if not hmac.compare_digest(_prehash(plain_password), hashed_password):
+            return False, None
+        return True, hasher.hash(plain_password)
+    stored_hasher = _hasher_for(hashed_password)
+    if stored_hasher is None or not stored_hasher.verify(plain_password, hashed_password):
+        return False, None
+    if stored_hasher is not hasher or hasher.needs_update(hashed_password):
+        return True, hasher.hash(plain_password)
+    return True, None
+
 def hash_password(password: str) -> str:
-    return _prehash(password)
+    hasher = _get_hasher()
+    return _hashing_pool.run(hasher.hash, password)
+
+async def hash_password_async(password: str) -> str:
+    hasher = _get_hasher()
+    return await _hashing_pool.run_async(hasher.hash, password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return _prehash(plain_password) == hashed_password
+    return verify_and_update_password(plain_password, hashed_password)[0]
+
+def verify_and_update_password(plain_password: str, hashed_password: Optional[str]) -> Tuple[bool, Optional[str]]:
+    if not hashed_password:
+        return False, None
+    _get_hasher()
+    return _hashing_pool.run(_verify, plain_password, hashed_password)
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: Optional[str]) -> Tuple[bool, Optional[str]]:
+    if not hashed_password:
+        return False, None
+    return await _hashing_pool.run_async(_verify, plain_password, hashed_password)
+
+def password_hash_metrics() -> Dict[str, Any]:
+    metrics = _hashing_pool.metrics()
+    if _hasher is not None:
+        metrics["scheme"] = _hasher.scheme
+        metrics["cost"] = _hasher_cost(_hasher)
+    return metrics
+
+@router.get("/admin/security/password-hashing")
+def get_password_hash_metrics(request: Request):
+    try:
+        from Backend.stripe_payments import _require_admin_token
+    except ImportError:
+        from stripe_payments import _require_admin_token
+    _require_admin_token(request)
+    return password_hash_metrics()
@@ -0,0 +1,626 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from fastapi import APIRouter, HTTPException, Request
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+import os
+import threading
+import uuid
+import pymysql
+
+try:
+    from Backend.account_refresher import refresh_account_rows
+    from Backend.db import _get_cursor
+    from Backend.stripe_payments import (
+        SETTLEMENT_TRANSFER_INSERT_SQL,
+        _fetch_payout_final_rows,
+        _fetch_settlement_transfer_context,
+        _stripe_gateway,
+        _require_admin_token,
+        _settlement_transfer_params,
+        _to_cents,
+    )
+except ImportError:
+    from account_refresher import refresh_account_rows
+    from db import _get_cursor
+    from stripe_payments import (
+        SETTLEMENT_TRANSFER_INSERT_SQL,
+        _fetch_payout_final_rows,
+        _fetch_settlement_transfer_context,
+        _stripe_gateway,
+        _require_admin_token,
+        _settlement_transfer_params,
+        _to_cents,
+    )
+
+router = APIRouter()
+
+logger = logging.getLogger(__name__)
+
+SETTLEMENT_FEE_CENTS = 100
+SETTLEMENT_TRANSFER_CONCURRENCY = int(os.getenv("SETTLEMENT_TRANSFER_CONCURRENCY") or 8)
+SETTLEMENT_WRITE_BATCH_SIZE = int(os.getenv("SETTLEMENT_WRITE_BATCH_SIZE") or 25)
+SETTLEMENT_TRANSFER_MAX_ATTEMPTS = int(os.getenv("SETTLEMENT_TRANSFER_MAX_ATTEMPTS") or 5)
+SETTLEMENT_RESUME_INTERVAL_SECONDS = int(os.getenv("SETTLEMENT_RESUME_INTERVAL_SECONDS") or 300)
+SETTLEMENT_RESUME_STALE_SECONDS = int(os.getenv("SETTLEMENT_RESUME_STALE_SECONDS") or 600)
+# Failures where Stripe may still have created the transfer; these are never moved back to carry-forward.
+SETTLEMENT_UNCERTAIN_ERRORS = ("APIConnectionError",)
+
+STATE_INSERT_SQL = """
+    INSERT IGNORE INTO GRATLYDB.STRIPE_SETTLEMENT_TRANSFER_STATE (
+        SETTLEMENT_ID,
+        EMPLOYEEGUID,
+        RESTAURANTID,
+        RESTAURANTGUID,
+        BUSINESS_DATE,
+        STATUS,
+        STRIPE_ACCOUNT_ID,
+        AMOUNT_CENTS,
+        FEE_CENTS,
+        CARRY_FORWARD_CENTS
+    )
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+CARRY_FORWARD_ADJUST_SQL = """
+    INSERT INTO GRATLYDB.STRIPE_EMPLOYEE_CARRY_FORWARD (
+        RESTAURANTGUID,
+        EMPLOYEEGUID,
+        RESTAURANTID,
+        CARRY_FORWARD_CENTS
+    )
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE CARRY_FORWARD_CENTS = CARRY_FORWARD_CENTS + VALUES(CARRY_FORWARD_CENTS)
+"""
+
+STATE_CLAIM_SQL = """
+    UPDATE GRATLYDB.STRIPE_SETTLEMENT_TRANSFER_STATE
+    SET STATUS = 'sending', CLAIMED_BY = %s, CLAIMED_AT = NOW(), ATTEMPTS = ATTEMPTS + 1
+    WHERE SETTLEMENT_ID = %s
+      AND (
+          STATUS = 'pending'
+          OR (STATUS = 'failed' AND ATTEMPTS < %s AND UPDATED_AT < %s)
+      )
+    ORDER BY EMPLOYEEGUID
+    LIMIT %s
+"""
+
+STATE_SENT_SQL = """
+    UPDATE GRATLYDB.STRIPE_SETTLEMENT_TRANSFER_STATE
+    SET STATUS = 'sent', TRANSFER_ID = %s, LAST_ERROR = NULL, CLAIMED_BY = NULL
+    WHERE SETTLEMENT_ID = %s AND EMPLOYEEGUID = %s AND CLAIMED_BY = %s
+"""
+
+STATE_FAILED_SQL = """
+    UPDATE GRATLYDB.STRIPE_SETTLEMENT_TRANSFER_STATE
+    SET STATUS = %s, LAST_ERROR = %s, CLAIMED_BY = NULL
+    WHERE SETTLEMENT_ID = %s AND EMPLOYEEGUID = %s AND CLAIMED_BY = %s
+"""
+
+STATE_RELEASE_STALE_SQL = """
+    UPDATE GRATLYDB.STRIPE_SETTLEMENT_TRANSFER_STATE
+    SET STATUS = IF(ATTEMPTS >= %s, 'dead', 'failed'),
+        LAST_ERROR = 'Transfer claim expired before the outcome was recorded',
+        CLAIMED_BY = NULL
+    WHERE STATUS = 'sending'
+      AND CLAIMED_AT < NOW() - INTERVAL %s SECOND
+"""
+
+_stop_event = threading.Event()
+_resumer_thread: Optional[threading.Thread] = None
+
+
+def _settlement_is_planned(settlement_id: str) -> bool:
+    cursor = _get_cursor(dictionary=False)
+    try:
+        cursor.execute(
+            """
+            SELECT 1
+            FROM GRATLYDB.STRIPE_SETTLEMENT_TRANSFER_STATE
+            WHERE SETTLEMENT_ID = %s
+            LIMIT 1
+            """,
+            (settlement_id,),
+        )
+        return cursor.fetchone() is not None
+    finally:
+        cursor.close()
+
+
+def _lock_carry_forwards(cursor, restaurant_id: int, employee_guids: List[str]) -> Dict[str, int]:
+    if not employee_guids:
+        return {}
+    cursor.execute(
+        f"""
+        SELECT EMPLOYEEGUID AS employee_guid, CARRY_FORWARD_CENTS AS carry_forward_cents
+        FROM GRATLYDB.STRIPE_EMPLOYEE_CARRY_FORWARD
+        WHERE RESTAURANTID = %s
+          AND EMPLOYEEGUID IN ({", ".join(["%s"] * len(employee_guids))})
+        FOR UPDATE
+        """,
+        (restaurant_id, *employee_guids),
+    )
+    return {row["employee_guid"]: int(row["carry_forward_cents"] or 0) for row in cursor.fetchall()}
+
+
+def _build_settlement_plan(
+    settlement_id: str,
+    restaurant_id: int,
+    restaurant_guid: Optional[str],
+    business_date: Optional[str],
+    rows: List[Dict[str, Any]],
+    existing_transfers: set,
+    carry_forwards: Dict[str, int],
+    accounts: Dict[str, Dict[str, Any]],
+) -> Tuple[Dict[str, Tuple[Any, ...]], List[Tuple[Any, ...]], int]:
+    plan: Dict[str, Tuple[Any, ...]] = {}
+    carry_forward_deltas: List[Tuple[Any, ...]] = []
+    carry_forwards = dict(carry_forwards)
+    planned_transfers = set(existing_transfers)
+    skipped_count = 0
+    for row in rows:
+        employee_guid = row.get("employee_guid")
+        if not employee_guid or employee_guid in planned_transfers:
+            skipped_count += 1
+            continue
+
+        net_cents = _to_cents(row.get("net_payout"))
+        carry_forward_cents = carry_forwards.get(employee_guid, 0)
+        effective_cents = net_cents + carry_forward_cents
+        transfer_cents = effective_cents - SETTLEMENT_FEE_CENTS
+        account = accounts.get(employee_guid)
+
+        status = "pending"
+        if transfer_cents <= 0:
+            status = "skipped"
+        elif not account or not account.get("stripe_account_id"):
+            logger.warning("Missing Stripe account for %s", employee_guid)
+            status = "skipped"
+        elif not account.get("payouts_enabled") or account.get("account_deauthorized"):
+            logger.warning("Stripe account not payout-ready for %s", employee_guid)
+            status = "skipped"
+
+        if status == "skipped":
+            # The net amount joins the balance the employee already carries.
+            carry_forwards[employee_guid] = effective_cents
+            if net_cents:
+                carry_forward_deltas.append((restaurant_guid, employee_guid, restaurant_id, net_cents))
+            skipped_count += 1
+            plan[employee_guid] = (
+                settlement_id,
+                employee_guid,
+                restaurant_id,
+                restaurant_guid,
+                business_date,
+                status,
+                None,
+                0,
+                0,
+                effective_cents,
+            )
+            continue
+
+        # The carried balance is spent by this plan, so no later settlement can pay it out again.
+        carry_forwards[employee_guid] = 0
+        if carry_forward_cents:
+            carry_forward_deltas.append((restaurant_guid, employee_guid, restaurant_id, -carry_forward_cents))
+        planned_transfers.add(employee_guid)
+        plan[employee_guid] = (
+            settlement_id,
+            employee_guid,
+            restaurant_id,
+            restaurant_guid,
+            business_date,
+            status,
+            account.get("stripe_account_id"),
+            transfer_cents,
+            SETTLEMENT_FEE_CENTS,
+            carry_forward_cents,
+        )
+    return plan, carry_forward_deltas, skipped_count
+
+
+def _plan_settlement(
+    settlement_id: str,
+    restaurant_id: int,
+    restaurant_guid: Optional[str],
+    business_date: Optional[str],
+    rows: List[Dict[str, Any]],
+) -> int:
+    employee_guids = sorted({row.get("employee_guid") for row in rows if row.get("employee_guid")})
+    existing_transfers, accounts = _fetch_settlement_transfer_context(settlement_id, employee_guids)
+    not_ready = [
+        {"employee_guid": employee_guid, **account}
+        for employee_guid, account in accounts.items()
+        if account.get("stripe_account_id")
+        and not account.get("payouts_enabled")
+        and not account.get("account_deauthorized")
+    ]
+    if not_ready and _stripe_gateway.configured:
+        for employee_guid, status in refresh_account_rows(not_ready).items():
+            accounts[employee_guid] = {**accounts[employee_guid], "payouts_enabled": status["payouts_enabled"]}
+
+    cursor = _get_cursor(dictionary=True)
+    conn = cursor.connection
+    try:
+        conn.begin()
+        carry_forwards = _lock_carry_forwards(cursor, restaurant_id, employee_guids)
+        cursor.execute(
+            """
+            SELECT 1
+            FROM GRATLYDB.STRIPE_SETTLEMENT_TRANSFER_STATE
+            WHERE SETTLEMENT_ID = %s
+            LIMIT 1
+            FOR UPDATE
+            """,
+            (settlement_id,),
+        )
+        if cursor.fetchone():
+            conn.rollback()
+            logger.info("Settlement %s was planned concurrently", settlement_id)
+            return 0
+        plan, carry_forward_deltas, skipped_count = _build_settlement_plan(
+            settlement_id,
+            restaurant_id,
+            restaurant_guid,
+            business_date,
+            rows,
+            existing_transfers,
+            carry_forwards,
+            accounts,
+        )
+        if carry_forward_deltas:
+            cursor.executemany(CARRY_FORWARD_ADJUST_SQL, carry_forward_deltas)
+        if plan:
+            cursor.executemany(STATE_INSERT_SQL, list(plan.values()))
+        conn.commit()
+    except pymysql.MySQLError:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return skipped_count
+
+
+def _claim_transfer_states(settlement_id: str, claim_id: str, claimed_since) -> List[Dict[str, Any]]:
+    cursor = _get_cursor(dictionary=True)
+    try:
+        cursor.execute(
+            STATE_CLAIM_SQL,
+            (claim_id, settlement_id, SETTLEMENT_TRANSFER_MAX_ATTEMPTS, claimed_since, SETTLEMENT_WRITE_BATCH_SIZE),
+        )
+        if cursor.rowcount <= 0:
+            return []
+        cursor.execute(
+            """
+            SELECT SETTLEMENT_ID AS settlement_id,
+                   EMPLOYEEGUID AS employee_guid,
+                   RESTAURANTID AS restaurant_id,
+                   RESTAURANTGUID AS restaurant_guid,
+                   BUSINESS_DATE AS business_date,
+                   STRIPE_ACCOUNT_ID AS stripe_account_id,
+                   AMOUNT_CENTS AS amount_cents,
+                   FEE_CENTS AS fee_cents,
+                   CARRY_FORWARD_CENTS AS carry_forward_cents,
+                   ATTEMPTS AS attempts
+            FROM GRATLYDB.STRIPE_SETTLEMENT_TRANSFER_STATE
+            WHERE SETTLEMENT_ID = %s
+              AND STATUS = 'sending'
+              AND CLAIMED_BY = %s
+            ORDER BY EMPLOYEEGUID
+            """,
+            (settlement_id, claim_id),
+        )
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def _count_open_transfer_states(settlement_id: str) -> int:
+    cursor = _get_cursor(dictionary=True)
+    try:
+        cursor.execute(
+            """
+            SELECT COUNT(*) AS open_count
+            FROM GRATLYDB.STRIPE_SETTLEMENT_TRANSFER_STATE
+            WHERE SETTLEMENT_ID = %s
+              AND (STATUS = 'pending' OR (STATUS = 'failed' AND ATTEMPTS < %s))
+            """,
+            (settlement_id, SETTLEMENT_TRANSFER_MAX_ATTEMPTS),
+        )
+        return int((cursor.fetchone() or {}).get("open_count") or 0)
+    finally:
+        cursor.close()
+
+
+def _send_transfer(stripe, state: Dict[str, Any]) -> Dict[str, Any]:
+    settlement_id = state["settlement_id"]
+    employee_guid = state["employee_guid"]
+    return stripe.Transfer.create(
+        amount=int(state["amount_cents"]),
+        currency="usd",
+        destination=state["stripe_account_id"],
+        metadata={
+            "settlement_id": settlement_id,
+            "employee_guid": employee_guid,
+            "business_date": state.get("business_date"),
+            "fee_cents": int(state["fee_cents"]),
+        },
+        idempotency_key=f"tr_{settlement_id}_{employee_guid}",
+    )
+
+
+def _failure_status(state: Dict[str, Any], rejected: bool) -> str:
+    if int(state.get("attempts") or 0) < SETTLEMENT_TRANSFER_MAX_ATTEMPTS:
+        return "failed"
+    # Stripe refused the transfer, so the money is still ours to carry; otherwise an admin has to check Stripe.
+    return "carried_forward" if rejected else "dead"
+
+
+def _write_transfer_outcomes(
+    claim_id: str,
+    sent: List[Tuple[Dict[str, Any], str]],
+    failed: List[Tuple[Dict[str, Any], str, bool]],
+) -> None:
+    if not sent and not failed:
+        return
+    cursor = _get_cursor(dictionary=False)
+    conn = cursor.connection
+    try:
+        conn.begin()
+        if sent:
+            cursor.executemany(
+                SETTLEMENT_TRANSFER_INSERT_SQL,
+                [
+                    _settlement_transfer_params(
+                        state["settlement_id"],
+                        state["employee_guid"],
+                        transfer_id,
+                        int(state["amount_cents"]),
+                        int(state["fee_cents"]),
+                        int(state["carry_forward_cents"]),
+                        state["restaurant_guid"],
+                    )
+                    for state, transfer_id in sent
+                ],
+            )
+            cursor.executemany(
+                STATE_SENT_SQL,
+                [
+                    (transfer_id, state["settlement_id"], state["employee_guid"], claim_id)
+                    for state, transfer_id in sent
+                ],
+            )
+        for state, error, rejected in failed:
+            status = _failure_status(state, rejected)
+            cursor.execute(
+                STATE_FAILED_SQL,
+                (status, error[:65000], state["settlement_id"], state["employee_guid"], claim_id),
+            )
+            if status == "carried_forward" and cursor.rowcount == 1:
+                cursor.execute(
+                    CARRY_FORWARD_ADJUST_SQL,
+                    (
+                        state["restaurant_guid"],
+                        state["employee_guid"],
+                        state["restaurant_id"],
+                        int(state["amount_cents"]) + int(state["fee_cents"]),
+                    ),
+                )
+            if status != "failed":
+                logger.error(
+                    "Settlement %s transfer for %s gave up after %s attempts (%s)",
+                    state["settlement_id"],
+                    state["employee_guid"],
+                    state.get("attempts"),
+                    status,
+                )
+        conn.commit()
+    except pymysql.MySQLError:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def _settlement_clock():
+    cursor = _get_cursor(dictionary=True)
+    try:
+        cursor.execute("SELECT NOW() AS now")
+        return cursor.fetchone()["now"]
+    finally:
+        cursor.close()
+
+
+def _execute_settlement_transfers(settlement_id: str) -> Tuple[int, int]:
+    stripe, StripeError = _stripe_gateway.client()
+    if not _stripe_gateway.configured:
+        logger.warning("Stripe secret key not configured; leaving settlement %s pending", settlement_id)
+        return 0, _count_open_transfer_states(settlement_id)
+
+    claim_id = uuid.uuid4().hex
+    # Rows that fail during this run are left for the resumer instead of being retried in a tight loop.
+    claimed_since = _settlement_clock()
+    sent_count = 0
+    failed_count = 0
+    workers = max(1, min(SETTLEMENT_TRANSFER_CONCURRENCY, SETTLEMENT_WRITE_BATCH_SIZE))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="settlement-transfer") as executor:
+        while True:
+            states = _claim_transfer_states(settlement_id, claim_id, claimed_since)
+            if not states:
+                break
+            sent: List[Tuple[Dict[str, Any], str]] = []
+            failed: List[Tuple[Dict[str, Any], str, bool]] = []
+            futures = {executor.submit(_send_transfer, stripe, state): state for state in states}
+            for future in as_completed(futures):
+                state = futures[future]
+                try:
+                    transfer = future.result()
+                except Exception as exc:
+                    logger.exception("Stripe transfer failed for %s", state["employee_guid"])
+                    rejected = isinstance(exc, StripeError) and type(exc).__name__ not in SETTLEMENT_UNCERTAIN_ERRORS
+                    failed.append((state, f"{type(exc).__name__}: {exc}", rejected))
+                else:
+                    sent.append((state, transfer.get("id")))
+            _write_transfer_outcomes(claim_id, sent, failed)
+            sent_count += len(sent)
+            failed_count += len(failed)
+    return sent_count, failed_count
+
+
+def run_settlement_transfers(
+    settlement_id: str,
+    restaurant_id: int,
+    restaurant_guid: Optional[str],
+    business_date: Optional[str],
+) -> Dict[str, Any]:
+    rows_count = 0
+    skipped_count = 0
+    if _settlement_is_planned(settlement_id):
+        logger.info("Resuming planned settlement %s", settlement_id)
+    else:
+        rows = _fetch_payout_final_rows(settlement_id, restaurant_id)
+        if not rows:
+            logger.warning("No payout rows for settlement %s", settlement_id)
+            return {"settlementId": settlement_id, "restaurantId": restaurant_id, "rows": 0, "transfersCreated": 0, "transfersSkipped": 0}
+        rows_count = len(rows)
+        skipped_count = _plan_settlement(settlement_id, restaurant_id, restaurant_guid, business_date, rows)
+
+    created_count, failed_count = _execute_settlement_transfers(settlement_id)
+    return {
+        "settlementId": settlement_id,
+        "restaurantId": restaurant_id,
+        "rows": rows_count,
+        "transfersCreated": created_count,
+        "transfersSkipped": skipped_count + failed_count,
+    }
+
+
+def resume_stale_settlements() -> int:
+    cursor = _get_cursor(dictionary=True)
+    try:
+        cursor.execute(STATE_RELEASE_STALE_SQL, (SETTLEMENT_TRANSFER_MAX_ATTEMPTS, SETTLEMENT_RESUME_STALE_SECONDS))
+        if cursor.rowcount:
+            logger.warning("Released %s stale settlement transfer claims", cursor.rowcount)
+        cursor.execute(
+            """
+            SELECT DISTINCT SETTLEMENT_ID AS settlement_id
+            FROM GRATLYDB.STRIPE_SETTLEMENT_TRANSFER_STATE
+            WHERE (STATUS = 'pending' OR (STATUS = 'failed' AND ATTEMPTS < %s))
+              AND UPDATED_AT < NOW() - INTERVAL %s SECOND
+            """,
+            (SETTLEMENT_TRANSFER_MAX_ATTEMPTS, SETTLEMENT_RESUME_STALE_SECONDS),
+        )
+        settlement_ids = [row["settlement_id"] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+    for settlement_id in settlement_ids:
+        if _stop_event.is_set():
+            break
+        created_count, failed_count = _execute_settlement_transfers(settlement_id)
+        logger.info(
+            "Resumed settlement %s (created %s, failed %s)",
+            settlement_id,
+            created_count,
+            failed_count,
+        )
+    return len(settlement_ids)
+
+
+def _resumer_loop() -> None:
+    while True:
+        try:
+            resume_stale_settlements()
+        except (pymysql.MySQLError, HTTPException):
+            logger.exception("Settlement resumer failed")
+        if _stop_event.wait(SETTLEMENT_RESUME_INTERVAL_SECONDS):
+            break
+
+
+def start_settlement_resumer() -> None:
+    global _resumer_thread
+    if _resumer_thread is not None:
+        return
+    _stop_event.clear()
+    _resumer_thread = threading.Thread(target=_resumer_loop, name="settlement-resumer", daemon=True)
+    _resumer_thread.start()
+
+
+def stop_settlement_resumer() -> None:
+    global _resumer_thread
+    _stop_event.set()
+    if _resumer_thread is not None:
+        _resumer_thread.join(timeout=5)
+    _resumer_thread = None
+
+
+@router.get("/admin/stripe/settlements/{settlement_id}/transfers")
+def get_settlement_transfer_state(settlement_id: str, request: Request):
+    _require_admin_token(request)
+    cursor = _get_cursor(dictionary=True)
+    try:
+        cursor.execute(
+            """
+            SELECT EMPLOYEEGUID AS employeeGuid,
+                   STATUS AS status,
+                   AMOUNT_CENTS AS amountCents,
+                   FEE_CENTS AS feeCents,
+                   CARRY_FORWARD_CENTS AS carryForwardCents,
+                   TRANSFER_ID AS transferId,
+                   ATTEMPTS AS attempts,
+                   LAST_ERROR AS lastError,
+                   UPDATED_AT AS updatedAt
+            FROM GRATLYDB.STRIPE_SETTLEMENT_TRANSFER_STATE
+            WHERE SETTLEMENT_ID = %s
+            ORDER BY EMPLOYEEGUID
+            """,
+            (settlement_id,),
+        )
+        employees = cursor.fetchall()
+    except pymysql.MySQLError as err:
+        raise HTTPException(status_code=500, detail=f"Error fetching settlement state: {err}")
+    finally:
+        cursor.close()
+    if not employees:
+        raise HTTPException(status_code=404, detail="Settlement not found")
+    counts: Dict[str, int] = {}
+    for employee in employees:
+        counts[employee["status"]] = counts.get(employee["status"], 0) + 1
+    return {"settlementId": settlement_id, "counts": counts, "employees": employees}
+
+
+@router.get("/admin/stripe/settlements/dead-transfers")
+def get_dead_settlement_transfers(request: Request, limit: int = 100):
+    _require_admin_token(request)
+    cursor = _get_cursor(dictionary=True)
+    try:
+        cursor.execute(
+            """
+            SELECT SETTLEMENT_ID AS settlementId,
+                   EMPLOYEEGUID AS employeeGuid,
+                   RESTAURANTID AS restaurantId,
+                   STRIPE_ACCOUNT_ID AS stripeAccountId,
+                   AMOUNT_CENTS AS amountCents,
+                   ATTEMPTS AS attempts,
+                   LAST_ERROR AS lastError,
+                   UPDATED_AT AS updatedAt
+            FROM GRATLYDB.STRIPE_SETTLEMENT_TRANSFER_STATE
+            WHERE STATUS = 'dead'
+            ORDER BY UPDATED_AT DESC
+            LIMIT %s
+            """,
+            (max(1, min(limit, 1000)),),
+        )
+        return {"transfers": cursor.fetchall()}
+    except pymysql.MySQLError as err:
+        raise HTTPException(status_code=500, detail=f"Error fetching dead settlement transfers: {err}")
+    finally:
+        cursor.close()
+
+
+@router.post("/admin/stripe/settlements/{settlement_id}/resume")
+def resume_settlement(settlement_id: str, request: Request):
+    _require_admin_token(request)
+    if not _settlement_is_planned(settlement_id):
+        raise HTTPException(status_code=404, detail="Settlement not found")
+    created_count, failed_count = _execute_settlement_transfers(settlement_id)
+    return {"settlementId": settlement_id, "transfersCreated": created_count, "transfersFailed": failed_count}
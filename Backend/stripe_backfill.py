@@ -0,0 +1,407 @@
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import APIRouter, HTTPException, Request
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import logging
+import os
+import threading
+import pymysql
+
+try:
+    from Backend.db import _get_cursor
+    from Backend.stripe_payments import (
+        BACKFILL_CHUNK_SIZE,
+        _backfill_dispute_events,
+        _backfill_payout_events,
+        _backfill_restaurant_guid_by_employee,
+        _backfill_restaurant_guid_by_restaurant_id,
+        _backfill_restaurant_guid_connected_accounts,
+        _backfill_restaurant_guid_settlement_transfers,
+        _backfill_transfer_events,
+        _require_admin_token,
+        _resolve_metadata_from_charge,
+        _resolve_metadata_from_transfer,
+        _stripe_gateway,
+    )
+except ImportError:
+    from db import _get_cursor
+    from stripe_payments import (
+        BACKFILL_CHUNK_SIZE,
+        _backfill_dispute_events,
+        _backfill_payout_events,
+        _backfill_restaurant_guid_by_employee,
+        _backfill_restaurant_guid_by_restaurant_id,
+        _backfill_restaurant_guid_connected_accounts,
+        _backfill_restaurant_guid_settlement_transfers,
+        _backfill_transfer_events,
+        _require_admin_token,
+        _resolve_metadata_from_charge,
+        _resolve_metadata_from_transfer,
+        _stripe_gateway,
+    )
+
+router = APIRouter()
+
+logger = logging.getLogger(__name__)
+
+STRIPE_BACKFILL_CHUNK_SIZE = int(os.getenv("STRIPE_BACKFILL_CHUNK_SIZE") or 200)
+STRIPE_BACKFILL_CONCURRENCY = int(os.getenv("STRIPE_BACKFILL_CONCURRENCY") or 8)
+
+STRIPE_BACKFILL_LOCK_PREFIX = "gratly_stripe_backfill_"
+
+# Jobs that resolve metadata through Stripe lookups, walking their table by EVENT_ID.
+STRIPE_BACKFILL_JOBS: Dict[str, Tuple[str, str, Callable[[Optional[str]], Tuple[Optional[str], Optional[str]]]]] = {
+    "dispute-events": ("STRIPE_DISPUTE_EVENTS", "CHARGE_ID", _resolve_metadata_from_charge),
+    "transfer-events": ("STRIPE_TRANSFER_EVENTS", "TRANSFER_ID", _resolve_metadata_from_transfer),
+}
+
+# Set-based jobs; each step updates at most the given number of rows and returns how many it changed.
+STRIPE_BACKFILL_SQL_JOBS: Dict[str, Callable[[int], int]] = {
+    "dispute-payload": _backfill_dispute_events,
+    "transfer-payload": _backfill_transfer_events,
+    "payout-payload": _backfill_payout_events,
+    "restaurant-guid-connected-accounts": _backfill_restaurant_guid_connected_accounts,
+    "restaurant-guid-payment-events": partial(_backfill_restaurant_guid_by_employee, "STRIPE_PAYMENT_EVENTS"),
+    "restaurant-guid-dispute-events": partial(_backfill_restaurant_guid_by_employee, "STRIPE_DISPUTE_EVENTS"),
+    "restaurant-guid-transfer-events": partial(_backfill_restaurant_guid_by_employee, "STRIPE_TRANSFER_EVENTS"),
+    "restaurant-guid-payout-events": partial(_backfill_restaurant_guid_by_employee, "STRIPE_PAYOUT_EVENTS"),
+    "restaurant-guid-carry-forward": partial(
+        _backfill_restaurant_guid_by_restaurant_id, "STRIPE_EMPLOYEE_CARRY_FORWARD"
+    ),
+    "restaurant-guid-settlement-transfers": _backfill_restaurant_guid_settlement_transfers,
+    "restaurant-guid-restaurant-settings": partial(
+        _backfill_restaurant_guid_by_restaurant_id, "STRIPE_RESTAURANT_SETTINGS"
+    ),
+}
+
+METADATA_BACKFILL_JOBS = ["dispute-payload", "transfer-payload", "payout-payload", *STRIPE_BACKFILL_JOBS]
+RESTAURANT_GUID_BACKFILL_JOBS = [name for name in STRIPE_BACKFILL_SQL_JOBS if name.startswith("restaurant-guid-")]
+
+_stop_event = threading.Event()
+_job_threads: Dict[str, threading.Thread] = {}
+_jobs_lock = threading.Lock()
+
+
+def _load_job(job_name: str) -> Optional[Dict[str, Any]]:
+    cursor = _get_cursor(dictionary=True)
+    try:
+        cursor.execute(
+            """
+            SELECT JOB_NAME AS job_name,
+                   STATUS AS status,
+                   CURSOR_VALUE AS cursor_value,
+                   SCANNED AS scanned,
+                   UPDATED AS updated
+            FROM GRATLYDB.STRIPE_BACKFILL_JOBS
+            WHERE JOB_NAME = %s
+            """,
+            (job_name,),
+        )
+        return cursor.fetchone()
+    finally:
+        cursor.close()
+
+
+def _mark_job(job_name: str, status: str, error: Optional[str] = None) -> None:
+    cursor = _get_cursor(dictionary=False)
+    try:
+        cursor.execute(
+            """
+            UPDATE GRATLYDB.STRIPE_BACKFILL_JOBS
+            SET STATUS = %s,
+                LAST_ERROR = %s,
+                FINISHED_AT = CASE WHEN %s IN ('done', 'failed') THEN NOW() ELSE NULL END
+            WHERE JOB_NAME = %s
+            """,
+            (status, error[:65000] if error else None, status, job_name),
+        )
+        cursor.connection.commit()
+    finally:
+        cursor.close()
+
+
+def _acquire_job_lock(job_name: str):
+    # Held on its own connection for the life of the job; MySQL drops it if this process dies.
+    cursor = _get_cursor(dictionary=True)
+    try:
+        cursor.execute("SELECT GET_LOCK(%s, 0) AS acquired", (f"{STRIPE_BACKFILL_LOCK_PREFIX}{job_name}",))
+        if (cursor.fetchone() or {}).get("acquired") == 1:
+            return cursor
+    except pymysql.MySQLError:
+        cursor.close()
+        raise
+    cursor.close()
+    return None
+
+
+def _release_job_lock(lock_cursor, job_name: str) -> None:
+    try:
+        lock_cursor.execute("SELECT RELEASE_LOCK(%s)", (f"{STRIPE_BACKFILL_LOCK_PREFIX}{job_name}",))
+    except pymysql.MySQLError:
+        logger.warning("Unable to release lock for Stripe backfill job %s", job_name)
+    finally:
+        lock_cursor.close()
+
+
+def _claim_job(job_name: str) -> None:
+    cursor = _get_cursor(dictionary=False)
+    try:
+        cursor.execute(
+            """
+            INSERT INTO GRATLYDB.STRIPE_BACKFILL_JOBS (JOB_NAME, STATUS, STARTED_AT)
+            VALUES (%s, 'running', NOW())
+            ON DUPLICATE KEY UPDATE
+                CURSOR_VALUE = IF(STATUS = 'done', NULL, CURSOR_VALUE),
+                SCANNED = IF(STATUS = 'done', 0, SCANNED),
+                UPDATED = IF(STATUS = 'done', 0, UPDATED),
+                STARTED_AT = IF(STATUS = 'done', NOW(), STARTED_AT),
+                STATUS = 'running',
+                LAST_ERROR = NULL,
+                FINISHED_AT = NULL
+            """,
+            (job_name,),
+        )
+        cursor.connection.commit()
+    finally:
+        cursor.close()
+
+
+def _fetch_backfill_chunk(table: str, id_column: str, after: Optional[str]) -> List[Dict[str, Any]]:
+    cursor = _get_cursor(dictionary=True)
+    try:
+        cursor.execute(
+            f"""
+            SELECT EVENT_ID AS event_id, {id_column} AS object_id
+            FROM GRATLYDB.{table}
+            WHERE EVENT_ID > %s
+              AND (EMPLOYEEGUID IS NULL OR RESTAURANTGUID IS NULL)
+              AND {id_column} IS NOT NULL
+            ORDER BY EVENT_ID
+            LIMIT %s
+            """,
+            (after or "", STRIPE_BACKFILL_CHUNK_SIZE),
+        )
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def _write_backfill_chunk(
+    job_name: str,
+    table: str,
+    updates: List[Tuple[Optional[str], Optional[str], str]],
+    cursor_value: str,
+    scanned: int,
+) -> None:
+    cursor = _get_cursor(dictionary=False)
+    conn = cursor.connection
+    try:
+        conn.begin()
+        if updates:
+            cursor.executemany(
+                f"""
+                UPDATE GRATLYDB.{table}
+                SET EMPLOYEEGUID = COALESCE(EMPLOYEEGUID, %s),
+                    RESTAURANTGUID = COALESCE(RESTAURANTGUID, %s)
+                WHERE EVENT_ID = %s
+                """,
+                updates,
+            )
+        cursor.execute(
+            """
+            UPDATE GRATLYDB.STRIPE_BACKFILL_JOBS
+            SET CURSOR_VALUE = %s,
+                SCANNED = SCANNED + %s,
+                UPDATED = UPDATED + %s
+            WHERE JOB_NAME = %s
+            """,
+            (cursor_value, scanned, len(updates), job_name),
+        )
+        conn.commit()
+    except pymysql.MySQLError:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def _record_job_progress(job_name: str, updated: int) -> None:
+    cursor = _get_cursor(dictionary=False)
+    try:
+        cursor.execute(
+            """
+            UPDATE GRATLYDB.STRIPE_BACKFILL_JOBS
+            SET SCANNED = SCANNED + %s,
+                UPDATED = UPDATED + %s
+            WHERE JOB_NAME = %s
+            """,
+            (updated, updated, job_name),
+        )
+        cursor.connection.commit()
+    finally:
+        cursor.close()
+
+
+def _run_lookup_job(job_name: str) -> bool:
+    table, id_column, resolver = STRIPE_BACKFILL_JOBS[job_name]
+    job = _load_job(job_name) or {}
+    after = job.get("cursor_value")
+    with ThreadPoolExecutor(
+        max_workers=STRIPE_BACKFILL_CONCURRENCY,
+        thread_name_prefix=f"stripe-backfill-{job_name}",
+    ) as executor:
+        while not _stop_event.is_set():
+            rows = _fetch_backfill_chunk(table, id_column, after)
+            if not rows:
+                return True
+            object_ids = sorted({row["object_id"] for row in rows})
+            resolved = dict(zip(object_ids, executor.map(resolver, object_ids)))
+            updates = []
+            for row in rows:
+                employee_guid, restaurant_guid = resolved.get(row["object_id"]) or (None, None)
+                if employee_guid or restaurant_guid:
+                    updates.append((employee_guid, restaurant_guid, row["event_id"]))
+            after = rows[-1]["event_id"]
+            _write_backfill_chunk(job_name, table, updates, after, len(rows))
+    return False
+
+
+def _run_sql_job(job_name: str) -> bool:
+    step = STRIPE_BACKFILL_SQL_JOBS[job_name]
+    while not _stop_event.is_set():
+        updated = step(BACKFILL_CHUNK_SIZE)
+        if updated <= 0:
+            return True
+        _record_job_progress(job_name, updated)
+    return False
+
+
+def _run_job(job_name: str, lock_cursor) -> None:
+    try:
+        if job_name in STRIPE_BACKFILL_SQL_JOBS:
+            finished = _run_sql_job(job_name)
+        else:
+            finished = _run_lookup_job(job_name)
+        _mark_job(job_name, "done" if finished else "paused")
+    except Exception as exc:
+        logger.exception("Stripe backfill job %s failed", job_name)
+        try:
+            _mark_job(job_name, "failed", f"{type(exc).__name__}: {exc}")
+        except pymysql.MySQLError:
+            logger.exception("Unable to record failure for Stripe backfill job %s", job_name)
+    finally:
+        _release_job_lock(lock_cursor, job_name)
+        with _jobs_lock:
+            _job_threads.pop(job_name, None)
+
+
+def _start_job(job_name: str) -> None:
+    with _jobs_lock:
+        if job_name in _job_threads:
+            return
+        lock_cursor = _acquire_job_lock(job_name)
+        if lock_cursor is None:
+            logger.info("Stripe backfill job %s is running in another process", job_name)
+            return
+        try:
+            _claim_job(job_name)
+        except pymysql.MySQLError:
+            _release_job_lock(lock_cursor, job_name)
+            raise
+        thread = threading.Thread(
+            target=_run_job,
+            args=(job_name, lock_cursor),
+            name=f"stripe-backfill-{job_name}",
+            daemon=True,
+        )
+        _job_threads[job_name] = thread
+        thread.start()
+
+
+def _fetch_job_statuses() -> List[Dict[str, Any]]:
+    cursor = _get_cursor(dictionary=True)
+    try:
+        cursor.execute(
+            """
+            SELECT JOB_NAME AS jobName,
+                   STATUS AS status,
+                   CURSOR_VALUE AS cursor,
+                   SCANNED AS scanned,
+                   UPDATED AS updated,
+                   LAST_ERROR AS lastError,
+                   STARTED_AT AS startedAt,
+                   UPDATED_AT AS updatedAt,
+                   FINISHED_AT AS finishedAt
+            FROM GRATLYDB.STRIPE_BACKFILL_JOBS
+            ORDER BY JOB_NAME
+            """
+        )
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def start_stripe_backfill_jobs(job_names: List[str]) -> List[Dict[str, Any]]:
+    _stop_event.clear()
+    try:
+        for job_name in job_names:
+            _start_job(job_name)
+        return _fetch_job_statuses()
+    except pymysql.MySQLError as err:
+        raise HTTPException(status_code=500, detail=f"Error starting Stripe backfill: {err}")
+
+
+def resume_stripe_backfill_jobs() -> None:
+    _stop_event.clear()
+    cursor = None
+    try:
+        cursor = _get_cursor(dictionary=True)
+        cursor.execute(
+            """
+            SELECT JOB_NAME AS job_name
+            FROM GRATLYDB.STRIPE_BACKFILL_JOBS
+            WHERE STATUS IN ('running', 'paused')
+            """
+        )
+        job_names = [row["job_name"] for row in cursor.fetchall()]
+        cursor.close()
+        cursor = None
+        for job_name in job_names:
+            if job_name in STRIPE_BACKFILL_SQL_JOBS or (job_name in STRIPE_BACKFILL_JOBS and _stripe_gateway.configured):
+                _start_job(job_name)
+    except (pymysql.MySQLError, HTTPException):
+        logger.exception("Unable to resume Stripe backfill jobs")
+    finally:
+        if cursor is not None:
+            cursor.close()
+
+
+def stop_stripe_backfill_jobs() -> None:
+    _stop_event.set()
+    with _jobs_lock:
+        threads = list(_job_threads.values())
+    for thread in threads:
+        thread.join(timeout=5)
+
+
+@router.get("/admin/stripe/backfill-jobs")
+def get_stripe_backfill_jobs(request: Request):
+    _require_admin_token(request)
+    try:
+        return {"jobs": _fetch_job_statuses()}
+    except pymysql.MySQLError as err:
+        raise HTTPException(status_code=500, detail=f"Error fetching Stripe backfill jobs: {err}")
+
+
+@router.post("/admin/stripe/backfill-metadata")
+def backfill_stripe_metadata(request: Request):
+    _require_admin_token(request)
+    if not _stripe_gateway.configured:
+        raise HTTPException(status_code=500, detail="Stripe secret key not configured")
+    return {"jobs": start_stripe_backfill_jobs(METADATA_BACKFILL_JOBS)}
+
+
+@router.post("/admin/stripe/backfill-restaurant-guid")
+def backfill_restaurant_guid(request: Request):
+    _require_admin_token(request)
+    return {"jobs": start_stripe_backfill_jobs(RESTAURANT_GUID_BACKFILL_JOBS)}
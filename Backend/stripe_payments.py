@@ -1,4 +1,5 @@
 from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import Any, Dict, Optional, Tuple, List
 from decimal import Decimal, ROUND_HALF_UP
@@ -8,8 +9,11 @@ import hmac
 import json
 import logging
 import os
+import random
+import threading
 import time
 import importlib
+import zlib
 from dotenv import load_dotenv
 
 try:
@@ -49,10 +53,6 @@ class PaymentIntentPayload(BaseModel):
     description: Optional[str] = None
 
 
-class StripeBackfillPayload(BaseModel):
-    limit: int = 50
-
-
 class SettlementTransferPayload(BaseModel):
     settlementId: str
     restaurantId: Optional[int] = None
@@ -80,10 +80,6 @@ class StripeBulkRefreshPayload(BaseModel):
     limit: int = 50
 
 
-class StripeRestaurantGuidBackfillPayload(BaseModel):
-    limit: int = 500
-
-
 class RecentSettlementRow(BaseModel):
     settlementId: str
     employeeGuid: Optional[str] = None
@@ -106,17 +102,137 @@ def _require_admin_token(request: Request) -> None:
         raise HTTPException(status_code=403, detail="Forbidden")
 
 
-def _get_stripe_module():
-    try:
-        stripe_module = importlib.import_module("stripe")
-        stripe_error_module = getattr(stripe_module, "error", None)
-        StripeError = getattr(stripe_error_module, "StripeError", Exception)
-        return stripe_module, StripeError
-    except Exception as exc:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Stripe SDK not installed: {exc}",
-        ) from exc
+STRIPE_MAX_RETRIES = int(os.getenv("STRIPE_MAX_RETRIES") or 3)
+STRIPE_RETRY_BASE_SECONDS = float(os.getenv("STRIPE_RETRY_BASE_SECONDS") or 0.5)
+STRIPE_RETRY_MAX_SECONDS = 8.0
+STRIPE_TIMEOUT_SECONDS = float(os.getenv("STRIPE_TIMEOUT_SECONDS") or 30)
+STRIPE_API_BASE = os.getenv("STRIPE_API_BASE")
+
+
+class _StripeResource:
+    def __init__(self, gateway: "_StripeGateway", name: str):
+        self._gateway = gateway
+        self._name = name
+
+    def __getattr__(self, method_name: str):
+        operation = f"{self._name}.{method_name}"
+
+        def _call(*args, **kwargs):
+            return self._gateway.call(operation, *args, **kwargs)
+
+        return _call
+
+
+class _StripeOperations:
+    def __init__(self, gateway: "_StripeGateway"):
+        self._gateway = gateway
+
+    def __getattr__(self, resource_name: str) -> _StripeResource:
+        return _StripeResource(self._gateway, resource_name)
+
+
+class _StripeGateway:
+    def __init__(self):
+        self.secret_key = os.getenv("STRIPE_SECRET_KEY") or os.getenv("STRIPE_API_KEY")
+        self._lock = threading.Lock()
+        self._module = None
+        self._error: Any = Exception
+        self._rate_limit_error: Any = None
+        self._metrics: Dict[str, Dict[str, float]] = {}
+        self._operations = _StripeOperations(self)
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.secret_key)
+
+    def _load(self):
+        if self._module is not None:
+            return self._module
+        with self._lock:
+            if self._module is None:
+                try:
+                    stripe_module = importlib.import_module("stripe")
+                except Exception as exc:
+                    raise HTTPException(
+                        status_code=500,
+                        detail=f"Stripe SDK not installed: {exc}",
+                    ) from exc
+                stripe_error_module = getattr(stripe_module, "error", None)
+                self._error = getattr(stripe_error_module, "StripeError", Exception)
+                self._rate_limit_error = getattr(stripe_error_module, "RateLimitError", None)
+                requests_client = getattr(stripe_module, "RequestsClient", None)
+                if requests_client is not None:
+                    stripe_module.default_http_client = requests_client(timeout=STRIPE_TIMEOUT_SECONDS)
+                stripe_module.max_network_retries = 0
+                if STRIPE_API_BASE:
+                    stripe_module.api_base = STRIPE_API_BASE.rstrip("/")
+                    logger.warning("Stripe API calls are routed to %s", stripe_module.api_base)
+                self._module = stripe_module
+        return self._module
+
+    def use_module(self, stripe_module: Any, error: Any = Exception, secret_key: Optional[str] = None) -> None:
+        with self._lock:
+            self._module = stripe_module
+            self._error = error
+            self._rate_limit_error = None
+            if secret_key:
+                self.secret_key = secret_key
+
+    def client(self) -> Tuple[_StripeOperations, Any]:
+        self._load()
+        return self._operations, self._error
+
+    def _record(self, operation: str, elapsed_ms: float, error: bool, retried: bool) -> None:
+        with self._lock:
+            stats = self._metrics.setdefault(
+                operation,
+                {"calls": 0, "errors": 0, "retries": 0, "totalMs": 0.0, "maxMs": 0.0},
+            )
+            stats["calls"] += 1
+            stats["totalMs"] += elapsed_ms
+            stats["maxMs"] = max(stats["maxMs"], elapsed_ms)
+            if error:
+                stats["errors"] += 1
+            if retried:
+                stats["retries"] += 1
+
+    def call(self, operation: str, *args, **kwargs):
+        stripe_module = self._load()
+        resource_name, method_name = operation.split(".", 1)
+        method = getattr(getattr(stripe_module, resource_name), method_name)
+        kwargs.setdefault("api_key", self.secret_key)
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                result = method(*args, **kwargs)
+            except self._error as exc:
+                retryable = (
+                    self._rate_limit_error is not None
+                    and isinstance(exc, self._rate_limit_error)
+                    and attempt < STRIPE_MAX_RETRIES
+                )
+                self._record(operation, (time.perf_counter() - started) * 1000, not retryable, retryable)
+                if not retryable:
+                    raise
+                delay = min(STRIPE_RETRY_BASE_SECONDS * (2 ** attempt), STRIPE_RETRY_MAX_SECONDS)
+                time.sleep(delay * (0.5 + random.random() / 2))
+                attempt += 1
+                continue
+            self._record(operation, (time.perf_counter() - started) * 1000, False, False)
+            return result
+
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            snapshot = {operation: dict(stats) for operation, stats in self._metrics.items()}
+        for stats in snapshot.values():
+            stats["avgMs"] = round(stats["totalMs"] / stats["calls"], 2) if stats["calls"] else 0.0
+            stats["totalMs"] = round(stats["totalMs"], 2)
+            stats["maxMs"] = round(stats["maxMs"], 2)
+        return snapshot
+
+
+_stripe_gateway = _StripeGateway()
 
 
 def _parse_signature_header(signature_header: str) -> Optional[Tuple[int, List[str]]]:
@@ -230,9 +346,10 @@ def _log_payment_intent_event(event: Dict[str, Any], payment_intent: Dict[str, A
                 STATUS,
                 CREATED_AT,
                 RAW_PAYLOAD,
+                RAW_PAYLOAD_COMPRESSED,
                 RESTAURANTGUID
             )
-            VALUES (%s, %s, %s, %s, %s, %s, %s, FROM_UNIXTIME(%s), %s, %s)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, FROM_UNIXTIME(%s), %s, %s, %s)
             """,
             (
                 event_id,
@@ -243,7 +360,7 @@ def _log_payment_intent_event(event: Dict[str, Any], payment_intent: Dict[str, A
                 currency,
                 status,
                 created_unix,
-                json.dumps(event),
+                *_raw_payload_values(event),
                 restaurant_guid,
             ),
         )
@@ -261,19 +378,37 @@ def _extract_metadata(obj: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]
     return employee_guid, restaurant_guid
 
 
-def _extract_metadata_from_raw(raw_payload: Optional[object]) -> Tuple[Optional[str], Optional[str]]:
-    if raw_payload is None:
-        return None, None
-    try:
-        payload = raw_payload
-        if isinstance(raw_payload, str):
-            payload = json.loads(raw_payload)
-        data_object = payload.get("data", {}).get("object", {}) if isinstance(payload, dict) else {}
-        if isinstance(data_object, dict):
-            return _extract_metadata(data_object)
-    except (ValueError, TypeError, AttributeError):
-        return None, None
-    return None, None
+STRIPE_COMPRESS_RAW_PAYLOAD = (os.getenv("STRIPE_COMPRESS_RAW_PAYLOAD") or "").strip().lower() in ("1", "true", "yes")
+
+
+def _raw_payload_values(event: Dict[str, Any]) -> Tuple[str, Optional[bytes]]:
+    if not STRIPE_COMPRESS_RAW_PAYLOAD:
+        return json.dumps(event), None
+    data_object = (event.get("data") or {}).get("object") or {}
+    if not isinstance(data_object, dict):
+        data_object = {}
+    summary = {
+        "id": event.get("id"),
+        "type": event.get("type"),
+        "account": event.get("account"),
+        "created": event.get("created"),
+        "data": {
+            "object": {
+                key: data_object.get(key)
+                for key in ("id", "object", "amount", "metadata")
+                if key in data_object
+            }
+        },
+    }
+    return json.dumps(summary), zlib.compress(json.dumps(event).encode("utf-8"))
+
+
+def _load_raw_payload(raw_payload: Any, compressed: Optional[bytes] = None) -> Optional[Dict[str, Any]]:
+    if compressed:
+        return json.loads(zlib.decompress(compressed).decode("utf-8"))
+    if isinstance(raw_payload, (str, bytes)):
+        return json.loads(raw_payload)
+    return raw_payload
 
 
 def _build_card_summary(card: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
@@ -467,46 +602,6 @@ def _fetch_settlement_business_date(settlement_id: str, restaurant_id: int) -> O
         cursor.close()
 
 
-def _get_carry_forward(employee_guid: str, restaurant_id: int) -> int:
-    cursor = _get_cursor(dictionary=True)
-    try:
-        cursor.execute(
-            """
-            SELECT CARRY_FORWARD_CENTS AS carry_forward_cents
-            FROM GRATLYDB.STRIPE_EMPLOYEE_CARRY_FORWARD
-            WHERE EMPLOYEEGUID = %s AND RESTAURANTID = %s
-            LIMIT 1
-            """,
-            (employee_guid, restaurant_id),
-        )
-        row = cursor.fetchone()
-        return int(row["carry_forward_cents"] or 0) if row else 0
-    finally:
-        cursor.close()
-
-
-def _set_carry_forward(employee_guid: str, restaurant_id: int, carry_forward_cents: int) -> None:
-    restaurant_guid = _fetch_restaurant_guid_by_id(restaurant_id)
-    cursor = _get_cursor(dictionary=False)
-    try:
-        cursor.execute(
-            """
-            INSERT INTO GRATLYDB.STRIPE_EMPLOYEE_CARRY_FORWARD (
-                RESTAURANTGUID,
-                EMPLOYEEGUID,
-                RESTAURANTID,
-                CARRY_FORWARD_CENTS
-            )
-            VALUES (%s, %s, %s, %s)
-            ON DUPLICATE KEY UPDATE CARRY_FORWARD_CENTS = VALUES(CARRY_FORWARD_CENTS)
-            """,
-            (restaurant_guid, employee_guid, restaurant_id, carry_forward_cents),
-        )
-        cursor.connection.commit()
-    finally:
-        cursor.close()
-
-
 def _fetch_connected_account(employee_guid: str) -> Optional[Dict[str, Any]]:
     cursor = _get_cursor(dictionary=True)
     try:
@@ -545,7 +640,8 @@ def _update_connected_account_status(
                 PAYOUTS_ENABLED = %s,
                 DETAILS_SUBMITTED = %s,
                 DISABLED_REASON = %s,
-                ACCOUNT_DEAUTHORIZED = %s
+                ACCOUNT_DEAUTHORIZED = %s,
+                LAST_REFRESHED_AT = NOW()
             WHERE STRIPE_ACCOUNT_ID = %s
             """,
             (
@@ -599,7 +695,31 @@ def _update_connected_account_status(
         cursor.close()
 
 
-def _record_settlement_transfer(
+SETTLEMENT_TRANSFER_INSERT_SQL = """
+    INSERT IGNORE INTO GRATLYDB.STRIPE_SETTLEMENT_TRANSFERS (
+        RESTAURANTGUID,
+        SETTLEMENT_ID,
+        EMPLOYEEGUID,
+        TRANSFER_ID,
+        AMOUNT_CENTS,
+        FEE_CENTS,
+        CARRY_FORWARD_CENTS
+    )
+    VALUES (
+        COALESCE(
+            NULLIF(%s, ''),
+            (
+                SELECT se.RESTAURANTGUID
+                FROM GRATLYDB.SRC_EMPLOYEES se
+                WHERE se.EMPLOYEEGUID = %s
+                LIMIT 1
+            )
+        ),
+        %s, %s, %s, %s, %s, %s
+    )
+"""
+
+def _settlement_transfer_params(
     settlement_id: str,
     employee_guid: str,
     transfer_id: str,
@@ -607,50 +727,51 @@ def _record_settlement_transfer(
     fee_cents: int,
     carry_forward_cents: int,
     restaurant_guid: Optional[str],
-) -> None:
-    cursor = _get_cursor(dictionary=False)
-    try:
-        cursor.execute(
-            """
-            INSERT IGNORE INTO GRATLYDB.STRIPE_SETTLEMENT_TRANSFERS (
-                RESTAURANTGUID,
-                SETTLEMENT_ID,
-                EMPLOYEEGUID,
-                TRANSFER_ID,
-                AMOUNT_CENTS,
-                FEE_CENTS,
-                CARRY_FORWARD_CENTS
-            )
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """,
-            (
-                restaurant_guid,
-                settlement_id,
-                employee_guid,
-                transfer_id,
-                amount_cents,
-                fee_cents,
-                carry_forward_cents,
-            ),
-        )
-        cursor.connection.commit()
-    finally:
-        cursor.close()
+) -> Tuple[Any, ...]:
+    return (
+        restaurant_guid,
+        employee_guid,
+        settlement_id,
+        employee_guid,
+        transfer_id,
+        amount_cents,
+        fee_cents,
+        carry_forward_cents,
+    )
 
 
-def _settlement_transfer_exists(settlement_id: str, employee_guid: str) -> bool:
+def _fetch_settlement_transfer_context(
+    settlement_id: str,
+    employee_guids: List[str],
+) -> Tuple[set, Dict[str, Dict[str, Any]]]:
+    if not employee_guids:
+        return set(), {}
+    placeholders = ", ".join(["%s"] * len(employee_guids))
     cursor = _get_cursor(dictionary=True)
     try:
         cursor.execute(
             """
-            SELECT 1
+            SELECT EMPLOYEEGUID AS employee_guid
             FROM GRATLYDB.STRIPE_SETTLEMENT_TRANSFERS
-            WHERE SETTLEMENT_ID = %s AND EMPLOYEEGUID = %s
-            LIMIT 1
+            WHERE SETTLEMENT_ID = %s
+            """,
+            (settlement_id,),
+        )
+        existing = {row["employee_guid"] for row in cursor.fetchall()}
+
+        cursor.execute(
+            f"""
+            SELECT EMPLOYEEGUID AS employee_guid,
+                   STRIPE_ACCOUNT_ID AS stripe_account_id,
+                   PAYOUTS_ENABLED AS payouts_enabled,
+                   ACCOUNT_DEAUTHORIZED AS account_deauthorized
+            FROM GRATLYDB.STRIPE_CONNECTED_ACCOUNTS
+            WHERE EMPLOYEEGUID IN ({placeholders})
             """,
-            (settlement_id, employee_guid),
+            tuple(employee_guids),
         )
-        return bool(cursor.fetchone())
+        accounts = {row["employee_guid"]: row for row in cursor.fetchall()}
+        return existing, accounts
     finally:
         cursor.close()
 
@@ -695,89 +816,14 @@ def _create_transfers_for_settlement(payment_intent: Dict[str, Any]) -> Dict[str
 
     restaurant_guid_resolved = restaurant_guid or _fetch_restaurant_guid_by_id(int(restaurant_id))
 
-    rows = _fetch_payout_final_rows(settlement_id, int(restaurant_id))
-    if not rows:
-        logger.warning("No payout rows for settlement %s", settlement_id)
-        return {"settlementId": settlement_id, "restaurantId": int(restaurant_id), "rows": 0, "transfersCreated": 0, "transfersSkipped": 0}
-
-    stripe, StripeError = _get_stripe_module()
-    stripe_secret_key = os.getenv("STRIPE_SECRET_KEY") or os.getenv("STRIPE_API_KEY")
-    if not stripe_secret_key:
-        logger.warning("Stripe secret key not configured; skipping transfers")
-        return {"settlementId": settlement_id, "restaurantId": int(restaurant_id), "rows": len(rows), "transfersCreated": 0, "transfersSkipped": len(rows)}
-    stripe.api_key = stripe_secret_key
-
-    fee_cents = 100
-    created_count = 0
-    skipped_count = 0
-    for row in rows:
-        employee_guid = row.get("employee_guid")
-        if not employee_guid:
-            skipped_count += 1
-            continue
-        if _settlement_transfer_exists(settlement_id, employee_guid):
-            skipped_count += 1
-            continue
-
-        net_cents = _to_cents(row.get("net_payout"))
-        carry_forward_cents = _get_carry_forward(employee_guid, int(restaurant_id))
-        effective_cents = net_cents + carry_forward_cents
-
-        transfer_cents = effective_cents - fee_cents
-        if transfer_cents <= 0:
-            _set_carry_forward(employee_guid, int(restaurant_id), effective_cents)
-            skipped_count += 1
-            continue
-
-        account = _fetch_connected_account(employee_guid)
-        if not account or not account.get("stripe_account_id"):
-            logger.warning("Missing Stripe account for %s", employee_guid)
-            _set_carry_forward(employee_guid, int(restaurant_id), effective_cents)
-            skipped_count += 1
-            continue
-
-        if not account.get("payouts_enabled") or account.get("account_deauthorized"):
-            logger.warning("Stripe account not payout-ready for %s", employee_guid)
-            _set_carry_forward(employee_guid, int(restaurant_id), effective_cents)
-            skipped_count += 1
-            continue
+    try:
+        from Backend.settlement_executor import run_settlement_transfers
+    except ImportError:
+        from settlement_executor import run_settlement_transfers
 
-        try:
-            transfer = stripe.Transfer.create(
-                amount=transfer_cents,
-                currency="usd",
-                destination=account.get("stripe_account_id"),
-                metadata={
-                    "settlement_id": settlement_id,
-                    "employee_guid": employee_guid,
-                    "business_date": business_date,
-                    "fee_cents": fee_cents,
-                },
-                idempotency_key=f"tr_{settlement_id}_{employee_guid}",
-            )
-        except StripeError:
-            logger.exception("Stripe transfer failed for %s", employee_guid)
-            skipped_count += 1
-            continue
-
-        _set_carry_forward(employee_guid, int(restaurant_id), 0)
-        _record_settlement_transfer(
-            settlement_id=settlement_id,
-            employee_guid=employee_guid,
-            transfer_id=transfer.get("id"),
-            amount_cents=transfer_cents,
-            fee_cents=fee_cents,
-            carry_forward_cents=carry_forward_cents,
-            restaurant_guid=restaurant_guid_resolved,
-        )
-        created_count += 1
-    result = {
-        "settlementId": settlement_id,
-        "restaurantId": int(restaurant_id),
-        "rows": len(rows),
-        "transfersCreated": created_count,
-        "transfersSkipped": skipped_count,
-    }
+    result = run_settlement_transfers(settlement_id, int(restaurant_id), restaurant_guid_resolved, business_date)
+    created_count = result["transfersCreated"]
+    skipped_count = result["transfersSkipped"]
     logger.info(
         "Finished settlement transfers for %s (created %s, skipped %s)",
         settlement_id,
@@ -822,9 +868,10 @@ def _handle_charge_dispute_event(event: Dict[str, Any]) -> None:
                 REASON,
                 CREATED_AT,
                 RAW_PAYLOAD,
+                RAW_PAYLOAD_COMPRESSED,
                 RESTAURANTGUID
             )
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, FROM_UNIXTIME(%s), %s, %s)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, FROM_UNIXTIME(%s), %s, %s, %s)
             """,
             (
                 event_id,
@@ -837,7 +884,7 @@ def _handle_charge_dispute_event(event: Dict[str, Any]) -> None:
                 status,
                 reason,
                 created_unix,
-                json.dumps(event),
+                *_raw_payload_values(event),
                 restaurant_guid,
             ),
         )
@@ -862,16 +909,17 @@ def _handle_balance_available(event: Dict[str, Any]) -> None:
                 EVENT_TYPE,
                 RESTAURANTGUID,
                 CREATED_AT,
-                RAW_PAYLOAD
+                RAW_PAYLOAD,
+                RAW_PAYLOAD_COMPRESSED
             )
-            VALUES (%s, %s, %s, FROM_UNIXTIME(%s), %s)
+            VALUES (%s, %s, %s, FROM_UNIXTIME(%s), %s, %s)
             """,
             (
                 event_id,
                 event_type,
                 None,
                 created_unix,
-                json.dumps(event),
+                *_raw_payload_values(event),
             ),
         )
         cursor.connection.commit()
@@ -912,9 +960,10 @@ def _handle_transfer_event(event: Dict[str, Any]) -> None:
                 DESTINATION_ACCOUNT,
                 CREATED_AT,
                 RAW_PAYLOAD,
+                RAW_PAYLOAD_COMPRESSED,
                 RESTAURANTGUID
             )
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, FROM_UNIXTIME(%s), %s, %s)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, FROM_UNIXTIME(%s), %s, %s, %s)
             """,
             (
                 event_id,
@@ -926,7 +975,7 @@ def _handle_transfer_event(event: Dict[str, Any]) -> None:
                 status,
                 destination,
                 created_unix,
-                json.dumps(event),
+                *_raw_payload_values(event),
                 restaurant_guid,
             ),
         )
@@ -974,9 +1023,10 @@ def _handle_payout_event(event: Dict[str, Any]) -> None:
                 ACCOUNT_ID,
                 CREATED_AT,
                 RAW_PAYLOAD,
+                RAW_PAYLOAD_COMPRESSED,
                 RESTAURANTGUID
             )
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, FROM_UNIXTIME(%s), %s, %s)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, FROM_UNIXTIME(%s), %s, %s, %s)
             """,
             (
                 event_id,
@@ -991,7 +1041,7 @@ def _handle_payout_event(event: Dict[str, Any]) -> None:
                 destination,
                 account_id,
                 created_unix,
-                json.dumps(event),
+                *_raw_payload_values(event),
                 restaurant_guid,
             ),
         )
@@ -1003,11 +1053,9 @@ def _handle_payout_event(event: Dict[str, Any]) -> None:
 def _resolve_metadata_from_charge(charge_id: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
     if not charge_id:
         return None, None
-    stripe, StripeError = _get_stripe_module()
-    stripe_secret_key = os.getenv("STRIPE_SECRET_KEY") or os.getenv("STRIPE_API_KEY")
-    if not stripe_secret_key:
+    stripe, StripeError = _stripe_gateway.client()
+    if not _stripe_gateway.configured:
         return None, None
-    stripe.api_key = stripe_secret_key
     try:
         charge = stripe.Charge.retrieve(charge_id)
         return _extract_metadata(charge)
@@ -1018,11 +1066,9 @@ def _resolve_metadata_from_charge(charge_id: Optional[str]) -> Tuple[Optional[st
 def _resolve_metadata_from_transfer(transfer_id: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
     if not transfer_id:
         return None, None
-    stripe, StripeError = _get_stripe_module()
-    stripe_secret_key = os.getenv("STRIPE_SECRET_KEY") or os.getenv("STRIPE_API_KEY")
-    if not stripe_secret_key:
+    stripe, StripeError = _stripe_gateway.client()
+    if not _stripe_gateway.configured:
         return None, None
-    stripe.api_key = stripe_secret_key
     try:
         transfer = stripe.Transfer.retrieve(transfer_id)
         return _extract_metadata(transfer)
@@ -1056,284 +1102,142 @@ def _resolve_metadata_from_account(account_id: Optional[str]) -> Tuple[Optional[
     return employee_guid, restaurant_guid
 
 
-def _update_metadata_fields(
-    table: str,
-    event_id: str,
-    employee_guid: Optional[str],
-    restaurant_guid: Optional[str],
-) -> None:
+BACKFILL_CHUNK_SIZE = int(os.getenv("BACKFILL_CHUNK_SIZE") or 5000)
+
+EMPLOYEE_SOURCE_JOIN = (
+    "JOIN GRATLYDB.SRC_EMPLOYEES {source} ON {source}.EMPLOYEEGUID = {alias}.EMPLOYEEGUID"
+)
+RESTAURANT_SOURCE_JOIN = (
+    "JOIN GRATLYDB.SRC_ONBOARDING {source} ON {source}.RESTAURANTID = {alias}.RESTAURANTID"
+)
+
+
+def _run_chunked_update(sql: str, limit: int) -> int:
+    updated = 0
     cursor = _get_cursor(dictionary=False)
     try:
-        cursor.execute(
-            f"""
-            UPDATE GRATLYDB.{table}
-            SET EMPLOYEEGUID = COALESCE(%s, EMPLOYEEGUID),
-                RESTAURANTGUID = COALESCE(%s, RESTAURANTGUID)
-            WHERE EVENT_ID = %s
-            """,
-            (employee_guid, restaurant_guid, event_id),
-        )
-        cursor.connection.commit()
+        while updated < limit:
+            cursor.execute(sql, (min(BACKFILL_CHUNK_SIZE, limit - updated),))
+            cursor.connection.commit()
+            if cursor.rowcount <= 0:
+                break
+            updated += cursor.rowcount
     finally:
         cursor.close()
+    return updated
 
 
-def _backfill_dispute_events(limit: int) -> int:
-    cursor = _get_cursor(dictionary=True)
-    try:
-        cursor.execute(
-            """
-            SELECT EVENT_ID, CHARGE_ID, RAW_PAYLOAD, EMPLOYEEGUID, RESTAURANTGUID
-            FROM GRATLYDB.STRIPE_DISPUTE_EVENTS
-            WHERE (EMPLOYEEGUID IS NULL OR RESTAURANTGUID IS NULL)
+def _backfill_event_metadata_from_payload(table: str, limit: int) -> int:
+    return _run_chunked_update(
+        f"""
+        UPDATE GRATLYDB.{table} t
+        JOIN (
+            SELECT EVENT_ID
+            FROM GRATLYDB.{table}
+            WHERE EMPLOYEEGUID IS NULL AND PAYLOAD_EMPLOYEEGUID IS NOT NULL
+            UNION
+            SELECT EVENT_ID
+            FROM GRATLYDB.{table}
+            WHERE RESTAURANTGUID IS NULL AND PAYLOAD_RESTAURANTGUID IS NOT NULL
             LIMIT %s
-            """,
-            (limit,),
-        )
-        rows = cursor.fetchall()
-    finally:
-        cursor.close()
-    updated = 0
-    for row in rows:
-        employee_guid, restaurant_guid = _extract_metadata_from_raw(row.get("RAW_PAYLOAD"))
-        if not employee_guid or not restaurant_guid:
-            employee_guid, restaurant_guid = _resolve_metadata_from_charge(row.get("CHARGE_ID"))
-        if employee_guid or restaurant_guid:
-            _update_metadata_fields(
-                "STRIPE_DISPUTE_EVENTS",
-                row.get("EVENT_ID"),
-                employee_guid,
-                restaurant_guid,
-            )
-            updated += 1
-    return updated
+        ) batch ON batch.EVENT_ID = t.EVENT_ID
+        SET t.EMPLOYEEGUID = COALESCE(t.EMPLOYEEGUID, t.PAYLOAD_EMPLOYEEGUID),
+            t.RESTAURANTGUID = COALESCE(t.RESTAURANTGUID, t.PAYLOAD_RESTAURANTGUID)
+        """,
+        limit,
+    )
 
 
-def _backfill_transfer_events(limit: int) -> int:
-    cursor = _get_cursor(dictionary=True)
-    try:
-        cursor.execute(
-            """
-            SELECT EVENT_ID, TRANSFER_ID, RAW_PAYLOAD, EMPLOYEEGUID, RESTAURANTGUID
-            FROM GRATLYDB.STRIPE_TRANSFER_EVENTS
-            WHERE (EMPLOYEEGUID IS NULL OR RESTAURANTGUID IS NULL)
+def _backfill_payout_events_from_accounts(limit: int) -> int:
+    return _run_chunked_update(
+        """
+        UPDATE GRATLYDB.STRIPE_PAYOUT_EVENTS t
+        JOIN (
+            SELECT pending.EVENT_ID
+            FROM GRATLYDB.STRIPE_PAYOUT_EVENTS pending
+            JOIN GRATLYDB.STRIPE_CONNECTED_ACCOUNTS pending_sca
+              ON pending_sca.STRIPE_ACCOUNT_ID = pending.ACCOUNT_ID
+            LEFT JOIN GRATLYDB.SRC_EMPLOYEES pending_se
+              ON pending_se.EMPLOYEEGUID = pending_sca.EMPLOYEEGUID
+            WHERE (pending.EMPLOYEEGUID IS NULL AND pending_sca.EMPLOYEEGUID IS NOT NULL)
+               OR (pending.RESTAURANTGUID IS NULL AND pending_se.RESTAURANTGUID IS NOT NULL)
             LIMIT %s
-            """,
-            (limit,),
-        )
-        rows = cursor.fetchall()
-    finally:
-        cursor.close()
-    updated = 0
-    for row in rows:
-        employee_guid, restaurant_guid = _extract_metadata_from_raw(row.get("RAW_PAYLOAD"))
-        if not employee_guid or not restaurant_guid:
-            employee_guid, restaurant_guid = _resolve_metadata_from_transfer(row.get("TRANSFER_ID"))
-        if employee_guid or restaurant_guid:
-            _update_metadata_fields(
-                "STRIPE_TRANSFER_EVENTS",
-                row.get("EVENT_ID"),
-                employee_guid,
-                restaurant_guid,
-            )
-            updated += 1
-    return updated
+        ) batch ON batch.EVENT_ID = t.EVENT_ID
+        JOIN GRATLYDB.STRIPE_CONNECTED_ACCOUNTS sca
+          ON sca.STRIPE_ACCOUNT_ID = t.ACCOUNT_ID
+        LEFT JOIN GRATLYDB.SRC_EMPLOYEES se
+          ON se.EMPLOYEEGUID = sca.EMPLOYEEGUID
+        SET t.EMPLOYEEGUID = COALESCE(t.EMPLOYEEGUID, sca.EMPLOYEEGUID),
+            t.RESTAURANTGUID = COALESCE(t.RESTAURANTGUID, se.RESTAURANTGUID)
+        """,
+        limit,
+    )
+
+
+def _backfill_dispute_events(limit: int) -> int:
+    return _backfill_event_metadata_from_payload("STRIPE_DISPUTE_EVENTS", limit)
+
+
+def _backfill_transfer_events(limit: int) -> int:
+    return _backfill_event_metadata_from_payload("STRIPE_TRANSFER_EVENTS", limit)
 
 
 def _backfill_payout_events(limit: int) -> int:
-    cursor = _get_cursor(dictionary=True)
-    try:
-        cursor.execute(
-            """
-            SELECT EVENT_ID, ACCOUNT_ID, RAW_PAYLOAD, EMPLOYEEGUID, RESTAURANTGUID
-            FROM GRATLYDB.STRIPE_PAYOUT_EVENTS
-            WHERE (EMPLOYEEGUID IS NULL OR RESTAURANTGUID IS NULL)
-            LIMIT %s
-            """,
-            (limit,),
-        )
-        rows = cursor.fetchall()
-    finally:
-        cursor.close()
-    updated = 0
-    for row in rows:
-        employee_guid, restaurant_guid = _extract_metadata_from_raw(row.get("RAW_PAYLOAD"))
-        if not employee_guid or not restaurant_guid:
-            employee_guid, restaurant_guid = _resolve_metadata_from_account(row.get("ACCOUNT_ID"))
-        if employee_guid or restaurant_guid:
-            _update_metadata_fields(
-                "STRIPE_PAYOUT_EVENTS",
-                row.get("EVENT_ID"),
-                employee_guid,
-                restaurant_guid,
-            )
-            updated += 1
-    return updated
+    updated = _backfill_event_metadata_from_payload("STRIPE_PAYOUT_EVENTS", limit)
+    return updated + _backfill_payout_events_from_accounts(max(limit - updated, 0))
 
 
-def _backfill_restaurant_guid_by_employee(table: str, limit: int) -> int:
-    cursor = _get_cursor(dictionary=True)
-    try:
-        cursor.execute(
-            f"""
-            SELECT t.EVENT_ID, t.EMPLOYEEGUID
-            FROM GRATLYDB.{table} t
-            WHERE (t.RESTAURANTGUID IS NULL OR t.RESTAURANTGUID = '')
-              AND t.EMPLOYEEGUID IS NOT NULL
+def _backfill_restaurant_guid_chunked(
+    table: str,
+    key_columns: List[str],
+    source_join: str,
+    limit: int,
+) -> int:
+    keys = ", ".join(f"pending.{column}" for column in key_columns)
+    key_match = " AND ".join(f"batch.{column} = t.{column}" for column in key_columns)
+    return _run_chunked_update(
+        f"""
+        UPDATE GRATLYDB.{table} t
+        JOIN (
+            SELECT DISTINCT {keys}
+            FROM GRATLYDB.{table} pending
+            {source_join.format(alias="pending", source="pending_source")}
+            WHERE (pending.RESTAURANTGUID IS NULL OR pending.RESTAURANTGUID = '')
+              AND pending_source.RESTAURANTGUID IS NOT NULL
+              AND pending_source.RESTAURANTGUID <> ''
             LIMIT %s
-            """,
-            (limit,),
-        )
-        rows = cursor.fetchall()
-    finally:
-        cursor.close()
+        ) batch ON {key_match}
+        {source_join.format(alias="t", source="src")}
+        SET t.RESTAURANTGUID = src.RESTAURANTGUID
+        """,
+        limit,
+    )
 
-    updated = 0
-    for row in rows:
-        employee_guid = row.get("EMPLOYEEGUID")
-        if not employee_guid:
-            continue
-        cursor = _get_cursor(dictionary=False)
-        try:
-            cursor.execute(
-                """
-                UPDATE GRATLYDB.{table} t
-                JOIN GRATLYDB.SRC_EMPLOYEES se
-                  ON se.EMPLOYEEGUID = t.EMPLOYEEGUID
-                SET t.RESTAURANTGUID = se.RESTAURANTGUID
-                WHERE t.EVENT_ID = %s
-                """.format(table=table),
-                (row.get("EVENT_ID"),),
-            )
-            cursor.connection.commit()
-            updated += cursor.rowcount
-        finally:
-            cursor.close()
-    return updated
 
+def _backfill_restaurant_guid_by_employee(table: str, limit: int) -> int:
+    return _backfill_restaurant_guid_chunked(table, ["EVENT_ID"], EMPLOYEE_SOURCE_JOIN, limit)
 
-def _backfill_restaurant_guid_by_restaurant_id(table: str, limit: int) -> int:
-    cursor = _get_cursor(dictionary=True)
-    try:
-        cursor.execute(
-            f"""
-            SELECT t.RESTAURANTID
-            FROM GRATLYDB.{table} t
-            WHERE (t.RESTAURANTGUID IS NULL OR t.RESTAURANTGUID = '')
-              AND t.RESTAURANTID IS NOT NULL
-            LIMIT %s
-            """,
-            (limit,),
-        )
-        rows = cursor.fetchall()
-    finally:
-        cursor.close()
 
-    updated = 0
-    for row in rows:
-        restaurant_id = row.get("RESTAURANTID")
-        if restaurant_id is None:
-            continue
-        cursor = _get_cursor(dictionary=False)
-        try:
-            cursor.execute(
-                """
-                UPDATE GRATLYDB.{table} t
-                JOIN GRATLYDB.SRC_ONBOARDING so
-                  ON so.RESTAURANTID = t.RESTAURANTID
-                SET t.RESTAURANTGUID = so.RESTAURANTGUID
-                WHERE t.RESTAURANTID = %s
-                """.format(table=table),
-                (restaurant_id,),
-            )
-            cursor.connection.commit()
-            updated += cursor.rowcount
-        finally:
-            cursor.close()
-    return updated
+def _backfill_restaurant_guid_by_restaurant_id(table: str, limit: int) -> int:
+    return _backfill_restaurant_guid_chunked(table, ["RESTAURANTID"], RESTAURANT_SOURCE_JOIN, limit)
 
 
 def _backfill_restaurant_guid_connected_accounts(limit: int) -> int:
-    cursor = _get_cursor(dictionary=True)
-    try:
-        cursor.execute(
-            """
-            SELECT EMPLOYEEGUID
-            FROM GRATLYDB.STRIPE_CONNECTED_ACCOUNTS
-            WHERE (RESTAURANTGUID IS NULL OR RESTAURANTGUID = '')
-              AND EMPLOYEEGUID IS NOT NULL
-            LIMIT %s
-            """,
-            (limit,),
-        )
-        rows = cursor.fetchall()
-    finally:
-        cursor.close()
-
-    updated = 0
-    for row in rows:
-        employee_guid = row.get("EMPLOYEEGUID")
-        if not employee_guid:
-            continue
-        cursor = _get_cursor(dictionary=False)
-        try:
-            cursor.execute(
-                """
-                UPDATE GRATLYDB.STRIPE_CONNECTED_ACCOUNTS sca
-                JOIN GRATLYDB.SRC_EMPLOYEES se
-                  ON se.EMPLOYEEGUID = sca.EMPLOYEEGUID
-                SET sca.RESTAURANTGUID = se.RESTAURANTGUID
-                WHERE sca.EMPLOYEEGUID = %s
-                """,
-                (employee_guid,),
-            )
-            cursor.connection.commit()
-            updated += cursor.rowcount
-        finally:
-            cursor.close()
-    return updated
+    return _backfill_restaurant_guid_chunked(
+        "STRIPE_CONNECTED_ACCOUNTS",
+        ["EMPLOYEEGUID"],
+        EMPLOYEE_SOURCE_JOIN,
+        limit,
+    )
 
 
 def _backfill_restaurant_guid_settlement_transfers(limit: int) -> int:
-    cursor = _get_cursor(dictionary=True)
-    try:
-        cursor.execute(
-            """
-            SELECT SETTLEMENT_ID, EMPLOYEEGUID
-            FROM GRATLYDB.STRIPE_SETTLEMENT_TRANSFERS
-            WHERE (RESTAURANTGUID IS NULL OR RESTAURANTGUID = '')
-              AND EMPLOYEEGUID IS NOT NULL
-            LIMIT %s
-            """,
-            (limit,),
-        )
-        rows = cursor.fetchall()
-    finally:
-        cursor.close()
-
-    updated = 0
-    for row in rows:
-        settlement_id = row.get("SETTLEMENT_ID")
-        employee_guid = row.get("EMPLOYEEGUID")
-        if not settlement_id or not employee_guid:
-            continue
-        cursor = _get_cursor(dictionary=False)
-        try:
-            cursor.execute(
-                """
-                UPDATE GRATLYDB.STRIPE_SETTLEMENT_TRANSFERS st
-                JOIN GRATLYDB.SRC_EMPLOYEES se
-                  ON se.EMPLOYEEGUID = st.EMPLOYEEGUID
-                SET st.RESTAURANTGUID = se.RESTAURANTGUID
-                WHERE st.SETTLEMENT_ID = %s AND st.EMPLOYEEGUID = %s
-                """,
-                (settlement_id, employee_guid),
-            )
-            cursor.connection.commit()
-            updated += cursor.rowcount
-        finally:
-            cursor.close()
-    return updated
+    return _backfill_restaurant_guid_chunked(
+        "STRIPE_SETTLEMENT_TRANSFERS",
+        ["SETTLEMENT_ID", "EMPLOYEEGUID"],
+        EMPLOYEE_SOURCE_JOIN,
+        limit,
+    )
 
 def _fetch_employee_guid_for_account(account_id: str) -> Optional[str]:
     cursor = _get_cursor(dictionary=True)
@@ -1533,6 +1437,66 @@ def _assert_employee_exists(employee_guid: str) -> None:
         cursor.close()
 
 
+def _fetch_recent_settlements(
+    cursor,
+    restaurant_id: int,
+    employee_guid: Optional[str],
+    limit: int,
+) -> List[Dict[str, Any]]:
+    query = """
+        SELECT
+            st.SETTLEMENT_ID AS settlement_id,
+            st.EMPLOYEEGUID AS employee_guid,
+            CONCAT_WS(' ', se.EMPLOYEEFNAME, se.EMPLOYEELNAME) AS employee_name,
+            st.AMOUNT_CENTS AS amount_cents,
+            st.CREATED_AT AS created_at,
+            pf.business_date AS business_date
+        FROM GRATLYDB.STRIPE_SETTLEMENT_TRANSFERS st
+        LEFT JOIN GRATLYDB.SRC_EMPLOYEES se
+            ON se.EMPLOYEEGUID = st.EMPLOYEEGUID
+        JOIN GRATLYDB.SRC_ONBOARDING so
+            ON so.RESTAURANTGUID = st.RESTAURANTGUID
+        LEFT JOIN (
+            SELECT
+                PAYOUT_APPROVALID AS settlement_id,
+                RESTAURANTID AS restaurant_id,
+                MIN(BUSINESSDATE) AS business_date
+            FROM GRATLYDB.PAYOUT_FINAL
+            GROUP BY PAYOUT_APPROVALID, RESTAURANTID
+        ) pf
+            ON pf.settlement_id = st.SETTLEMENT_ID
+            AND pf.restaurant_id = so.RESTAURANTID
+        WHERE so.RESTAURANTID = %s
+    """
+    params: List[Any] = [restaurant_id]
+    if employee_guid:
+        query += " AND st.EMPLOYEEGUID = %s"
+        params.append(employee_guid)
+    query += " ORDER BY st.CREATED_AT DESC LIMIT %s"
+    params.append(limit)
+    cursor.execute(query, params)
+    rows = cursor.fetchall()
+    settlements = []
+    for row in rows:
+        employee_name = (row.get("employee_name") or "").strip() or None
+        amount_cents = int(row.get("amount_cents") or 0)
+        created_at = row.get("created_at")
+        created_at_value = (
+            created_at.isoformat() if hasattr(created_at, "isoformat") else created_at
+        )
+        settlements.append(
+            {
+                "settlementId": str(row.get("settlement_id") or ""),
+                "employeeGuid": row.get("employee_guid"),
+                "employeeName": employee_name,
+                "amount": round(amount_cents / 100, 2),
+                "businessDate": row.get("business_date"),
+                "createdAt": created_at_value,
+            }
+        )
+    return settlements
+
+
 @router.get("/recent-settlements", response_model=RecentSettlementsResponse)
 def get_recent_settlements(user_id: int, limit: int = 5):
     permission_names = _fetch_user_permission_names(user_id)
@@ -1554,58 +1518,7 @@ def get_recent_settlements(user_id: int, limit: int = 5):
 
     cursor = _get_cursor(dictionary=True)
     try:
-        query = """
-            SELECT
-                st.SETTLEMENT_ID AS settlement_id,
-                st.EMPLOYEEGUID AS employee_guid,
-                CONCAT_WS(' ', se.EMPLOYEEFNAME, se.EMPLOYEELNAME) AS employee_name,
-                st.AMOUNT_CENTS AS amount_cents,
-                st.CREATED_AT AS created_at,
-                pf.business_date AS business_date
-            FROM GRATLYDB.STRIPE_SETTLEMENT_TRANSFERS st
-            LEFT JOIN GRATLYDB.SRC_EMPLOYEES se
-                ON se.EMPLOYEEGUID = st.EMPLOYEEGUID
-            LEFT JOIN GRATLYDB.SRC_ONBOARDING so
-                ON so.RESTAURANTGUID = COALESCE(st.RESTAURANTGUID, se.RESTAURANTGUID)
-            LEFT JOIN (
-                SELECT
-                    PAYOUT_APPROVALID AS settlement_id,
-                    RESTAURANTID AS restaurant_id,
-                    MIN(BUSINESSDATE) AS business_date
-                FROM GRATLYDB.PAYOUT_FINAL
-                GROUP BY PAYOUT_APPROVALID, RESTAURANTID
-            ) pf
-                ON pf.settlement_id = st.SETTLEMENT_ID
-                AND pf.restaurant_id = so.RESTAURANTID
-            WHERE so.RESTAURANTID = %s
-        """
-        params: List[Any] = [restaurant_id]
-        if employee_guid:
-            query += " AND st.EMPLOYEEGUID = %s"
-            params.append(employee_guid)
-        query += " ORDER BY st.CREATED_AT DESC LIMIT %s"
-        params.append(safe_limit)
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        settlements = []
-        for row in rows:
-            employee_name = (row.get("employee_name") or "").strip() or None
-            amount_cents = int(row.get("amount_cents") or 0)
-            created_at = row.get("created_at")
-            created_at_value = (
-                created_at.isoformat() if hasattr(created_at, "isoformat") else created_at
-            )
-            settlements.append(
-                {
-                    "settlementId": str(row.get("settlement_id") or ""),
-                    "employeeGuid": row.get("employee_guid"),
-                    "employeeName": employee_name,
-                    "amount": round(amount_cents / 100, 2),
-                    "businessDate": row.get("business_date"),
-                    "createdAt": created_at_value,
-                }
-            )
-        return {"settlements": settlements}
+        return {"settlements": _fetch_recent_settlements(cursor, restaurant_id, employee_guid, safe_limit)}
     except pymysql.MySQLError as err:
         raise HTTPException(status_code=500, detail=f"Error fetching recent settlements: {err}")
     finally:
@@ -1614,15 +1527,13 @@ def get_recent_settlements(user_id: int, limit: int = 5):
 
 @router.post("/employees/{employee_guid}/stripe-connected-account")
 def create_or_fetch_connected_account(employee_guid: str):
-    stripe, StripeError = _get_stripe_module()
+    stripe, StripeError = _stripe_gateway.client()
 
-    stripe_secret_key = os.getenv("STRIPE_SECRET_KEY") or os.getenv("STRIPE_API_KEY")
-    if not stripe_secret_key:
+    if not _stripe_gateway.configured:
         raise HTTPException(status_code=500, detail="Stripe secret key not configured")
 
     _assert_employee_exists(employee_guid)
 
-    stripe.api_key = stripe_secret_key
     existing_account_id = _fetch_connected_account_id(employee_guid)
 
     try:
@@ -1696,11 +1607,9 @@ def get_connected_account(employee_guid: str):
     capabilities = None
     default_currency = None
     card_summary = None
-    stripe_secret_key = os.getenv("STRIPE_SECRET_KEY") or os.getenv("STRIPE_API_KEY")
-    if stripe_secret_key:
+    if _stripe_gateway.configured:
         try:
-            stripe, StripeError = _get_stripe_module()
-            stripe.api_key = stripe_secret_key
+            stripe, StripeError = _stripe_gateway.client()
             account = stripe.Account.retrieve(row.get("account_id"))
             if account:
                 business_type = account.get("business_type")
@@ -1731,10 +1640,9 @@ def get_connected_account(employee_guid: str):
 
 @router.post("/employees/{employee_guid}/stripe-onboarding-link")
 def create_onboarding_link(employee_guid: str):
-    stripe, StripeError = _get_stripe_module()
+    stripe, StripeError = _stripe_gateway.client()
 
-    stripe_secret_key = os.getenv("STRIPE_SECRET_KEY") or os.getenv("STRIPE_API_KEY")
-    if not stripe_secret_key:
+    if not _stripe_gateway.configured:
         raise HTTPException(status_code=500, detail="Stripe secret key not configured")
 
     refresh_url = os.getenv("STRIPE_CONNECT_REFRESH_URL")
@@ -1747,7 +1655,6 @@ def create_onboarding_link(employee_guid: str):
 
     _assert_employee_exists(employee_guid)
 
-    stripe.api_key = stripe_secret_key
     account_id = _fetch_connected_account_id(employee_guid)
     if not account_id:
         raise HTTPException(status_code=404, detail="Stripe connected account not found")
@@ -1767,10 +1674,9 @@ def create_onboarding_link(employee_guid: str):
 
 @router.post("/payments/create-intent")
 def create_payment_intent(payload: PaymentIntentPayload):
-    stripe, StripeError = _get_stripe_module()
+    stripe, StripeError = _stripe_gateway.client()
 
-    stripe_secret_key = os.getenv("STRIPE_SECRET_KEY") or os.getenv("STRIPE_API_KEY")
-    if not stripe_secret_key:
+    if not _stripe_gateway.configured:
         raise HTTPException(status_code=500, detail="Stripe secret key not configured")
 
     if payload.amount <= 0:
@@ -1780,7 +1686,6 @@ def create_payment_intent(payload: PaymentIntentPayload):
 
     _assert_employee_exists(payload.employeeGuid)
 
-    stripe.api_key = stripe_secret_key
     try:
         intent = stripe.PaymentIntent.create(
             amount=payload.amount,
@@ -1807,10 +1712,9 @@ def _create_restaurant_debit_for_settlement(
     restaurant_guid: Optional[str] = None,
     business_date: Optional[str] = None,
 ) -> Dict[str, Any]:
-    stripe, StripeError = _get_stripe_module()
+    stripe, StripeError = _stripe_gateway.client()
 
-    stripe_secret_key = os.getenv("STRIPE_SECRET_KEY") or os.getenv("STRIPE_API_KEY")
-    if not stripe_secret_key:
+    if not _stripe_gateway.configured:
         raise HTTPException(status_code=500, detail="Stripe secret key not configured")
 
     rows = _fetch_payout_final_rows(settlement_id, restaurant_id)
@@ -1832,7 +1736,6 @@ def _create_restaurant_debit_for_settlement(
 
     resolved_business_date = business_date or _fetch_settlement_business_date(settlement_id, restaurant_id)
 
-    stripe.api_key = stripe_secret_key
     try:
         intent = stripe.PaymentIntent.create(
             amount=total_cents,
@@ -1883,13 +1786,11 @@ def create_restaurant_debit(payload: RestaurantDebitPayload):
 
 @router.post("/stripe/restaurants/{restaurant_id}/setup-intent")
 def create_restaurant_setup_intent(restaurant_id: int):
-    stripe, StripeError = _get_stripe_module()
+    stripe, StripeError = _stripe_gateway.client()
 
-    stripe_secret_key = os.getenv("STRIPE_SECRET_KEY") or os.getenv("STRIPE_API_KEY")
-    if not stripe_secret_key:
+    if not _stripe_gateway.configured:
         raise HTTPException(status_code=500, detail="Stripe secret key not configured")
 
-    stripe.api_key = stripe_secret_key
     settings = _fetch_restaurant_settings(restaurant_id) or {}
     customer_id = settings.get("stripe_customer_id")
 
@@ -1919,11 +1820,9 @@ def create_restaurant_setup_intent(restaurant_id: int):
 def save_restaurant_payment_method(restaurant_id: int, payload: RestaurantPaymentMethodPayload):
     if not payload.paymentMethodId:
         raise HTTPException(status_code=400, detail="paymentMethodId is required")
-    stripe, StripeError = _get_stripe_module()
-    stripe_secret_key = os.getenv("STRIPE_SECRET_KEY") or os.getenv("STRIPE_API_KEY")
-    if not stripe_secret_key:
+    stripe, StripeError = _stripe_gateway.client()
+    if not _stripe_gateway.configured:
         raise HTTPException(status_code=500, detail="Stripe secret key not configured")
-    stripe.api_key = stripe_secret_key
 
     bank_last4 = None
     bank_name = None
@@ -1955,11 +1854,9 @@ def get_restaurant_payment_method(restaurant_id: int):
     business_profile = None
     capabilities = None
     default_currency = None
-    stripe_secret_key = os.getenv("STRIPE_SECRET_KEY") or os.getenv("STRIPE_API_KEY")
-    if stripe_secret_key:
+    if _stripe_gateway.configured:
         try:
-            stripe, StripeError = _get_stripe_module()
-            stripe.api_key = stripe_secret_key
+            stripe, StripeError = _stripe_gateway.client()
             payment_method = stripe.PaymentMethod.retrieve(
                 settings.get("us_bank_payment_method_id"),
             )
@@ -1989,18 +1886,6 @@ def get_restaurant_payment_method(restaurant_id: int):
     }
 
 
-@router.post("/admin/stripe/backfill-metadata")
-def backfill_stripe_metadata(payload: StripeBackfillPayload, request: Request):
-    _require_admin_token(request)
-    limit = max(1, min(payload.limit, 500))
-    return {
-        "disputesUpdated": _backfill_dispute_events(limit),
-        "transfersUpdated": _backfill_transfer_events(limit),
-        "payoutsUpdated": _backfill_payout_events(limit),
-        "limit": limit,
-    }
-
-
 @router.get("/admin/stripe/carry-forward")
 def get_carry_forward(
     request: Request,
@@ -2035,10 +1920,9 @@ def get_carry_forward(
 @router.post("/admin/stripe/refresh-account")
 def refresh_stripe_account(payload: StripeRefreshAccountPayload, request: Request):
     _require_admin_token(request)
-    stripe, StripeError = _get_stripe_module()
+    stripe, StripeError = _stripe_gateway.client()
 
-    stripe_secret_key = os.getenv("STRIPE_SECRET_KEY") or os.getenv("STRIPE_API_KEY")
-    if not stripe_secret_key:
+    if not _stripe_gateway.configured:
         raise HTTPException(status_code=500, detail="Stripe secret key not configured")
 
     stripe_account_id = payload.stripeAccountId
@@ -2049,7 +1933,6 @@ def refresh_stripe_account(payload: StripeRefreshAccountPayload, request: Reques
     if not stripe_account_id:
         raise HTTPException(status_code=400, detail="stripeAccountId or employeeGuid is required")
 
-    stripe.api_key = stripe_secret_key
     try:
         account = stripe.Account.retrieve(stripe_account_id)
     except StripeError as exc:
@@ -2080,95 +1963,30 @@ def refresh_stripe_account(payload: StripeRefreshAccountPayload, request: Reques
     }
 
 
+@router.get("/admin/stripe/gateway-metrics")
+def get_stripe_gateway_metrics(request: Request):
+    _require_admin_token(request)
+    return {"configured": _stripe_gateway.configured, "operations": _stripe_gateway.metrics()}
+
+
 @router.post("/admin/stripe/refresh-accounts")
 def refresh_stripe_accounts(payload: StripeBulkRefreshPayload, request: Request):
     _require_admin_token(request)
-    stripe, StripeError = _get_stripe_module()
+    try:
+        from Backend.account_refresher import AccountRefreshError, _fetch_stale_accounts, refresh_account_rows
+    except ImportError:
+        from account_refresher import AccountRefreshError, _fetch_stale_accounts, refresh_account_rows
 
-    stripe_secret_key = os.getenv("STRIPE_SECRET_KEY") or os.getenv("STRIPE_API_KEY")
-    if not stripe_secret_key:
+    if not _stripe_gateway.configured:
         raise HTTPException(status_code=500, detail="Stripe secret key not configured")
 
     limit = max(1, min(payload.limit, 200))
-    stripe.api_key = stripe_secret_key
-
-    cursor = _get_cursor(dictionary=True)
+    rows = _fetch_stale_accounts(limit)
     try:
-        cursor.execute(
-            """
-            SELECT EMPLOYEEGUID AS employee_guid, STRIPE_ACCOUNT_ID AS stripe_account_id
-            FROM GRATLYDB.STRIPE_CONNECTED_ACCOUNTS
-            WHERE STRIPE_ACCOUNT_ID IS NOT NULL
-              AND PAYOUTS_ENABLED = 0
-            ORDER BY UPDATEDAT DESC
-            LIMIT %s
-            """,
-            (limit,),
-        )
-        rows = cursor.fetchall()
-    finally:
-        cursor.close()
-
-    updated = 0
-    failed = 0
-    for row in rows:
-        account_id = row.get("stripe_account_id")
-        employee_guid = row.get("employee_guid")
-        if not account_id:
-            continue
-        try:
-            account = stripe.Account.retrieve(account_id)
-            _update_connected_account_status(
-                stripe_account_id=account_id,
-                charges_enabled=bool(account.get("charges_enabled")),
-                payouts_enabled=bool(account.get("payouts_enabled")),
-                details_submitted=bool(account.get("details_submitted")),
-                disabled_reason=account.get("disabled_reason"),
-                account_deauthorized=False,
-                employee_guid=employee_guid,
-            )
-            updated += 1
-        except StripeError:
-            failed += 1
-            logger.exception("Stripe account refresh failed for %s", account_id)
-
-    return {"updated": updated, "failed": failed, "limit": limit}
-
-
-@router.post("/admin/stripe/backfill-restaurant-guid")
-def backfill_restaurant_guid(payload: StripeRestaurantGuidBackfillPayload, request: Request):
-    _require_admin_token(request)
-    limit = max(1, min(payload.limit, 1000))
-
-    results = {
-        "stripe_connected_accounts": _backfill_restaurant_guid_connected_accounts(limit),
-        "stripe_payment_events": _backfill_restaurant_guid_by_employee(
-            "STRIPE_PAYMENT_EVENTS",
-            limit,
-        ),
-        "stripe_dispute_events": _backfill_restaurant_guid_by_employee(
-            "STRIPE_DISPUTE_EVENTS",
-            limit,
-        ),
-        "stripe_transfer_events": _backfill_restaurant_guid_by_employee(
-            "STRIPE_TRANSFER_EVENTS",
-            limit,
-        ),
-        "stripe_payout_events": _backfill_restaurant_guid_by_employee(
-            "STRIPE_PAYOUT_EVENTS",
-            limit,
-        ),
-        "stripe_employee_carry_forward": _backfill_restaurant_guid_by_restaurant_id(
-            "STRIPE_EMPLOYEE_CARRY_FORWARD",
-            limit,
-        ),
-        "stripe_settlement_transfers": _backfill_restaurant_guid_settlement_transfers(limit),
-        "stripe_restaurant_settings": _backfill_restaurant_guid_by_restaurant_id(
-            "STRIPE_RESTAURANT_SETTINGS",
-            limit,
-        ),
-    }
-    return {"limit": limit, "updated": results}
+        refreshed = refresh_account_rows(rows)
+    except AccountRefreshError as err:
+        raise HTTPException(status_code=500, detail=f"Error refreshing Stripe accounts: {err}")
+    return {"updated": len(refreshed), "failed": len(rows) - len(refreshed), "limit": limit}
 
 
 @router.post("/admin/stripe/settlement-transfers")
@@ -2211,10 +2029,10 @@ async def handle_stripe_webhook(request: Request):
         raise HTTPException(status_code=400, detail="Invalid JSON payload") from exc
 
     try:
-        _dispatch_event(event)
-    except Exception:
-        logger.exception("Stripe webhook handler failed for event %s", event.get("type"))
-        raise
+        from Backend.webhook_inbox import _enqueue_webhook_event
+    except ImportError:
+        from webhook_inbox import _enqueue_webhook_event
+    await run_in_threadpool(_enqueue_webhook_event, "platform", event)
 
     return {"received": True, "type": event.get("type")}
 
@@ -2238,9 +2056,9 @@ async def handle_stripe_connect_webhook(request: Request):
         raise HTTPException(status_code=400, detail="Invalid JSON payload") from exc
 
     try:
-        _dispatch_connect_event(event)
-    except Exception:
-        logger.exception("Stripe connect webhook handler failed for event %s", event.get("type"))
-        raise
+        from Backend.webhook_inbox import _enqueue_webhook_event
+    except ImportError:
+        from webhook_inbox import _enqueue_webhook_event
+    await run_in_threadpool(_enqueue_webhook_event, "connect", event)
 
     return {"received": True, "type": event.get("type")}
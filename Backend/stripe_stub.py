@@ -0,0 +1,473 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+import argparse
+import hashlib
+import hmac
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+import urllib.request
+import uuid
+
+logger = logging.getLogger(__name__)
+
+STRIPE_STUB_HOST = os.getenv("STRIPE_STUB_HOST") or "127.0.0.1"
+STRIPE_STUB_PORT = int(os.getenv("STRIPE_STUB_PORT") or 12111)
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name) or default)
+    except ValueError:
+        return default
+
+
+class StubConfig:
+    def __init__(self):
+        self.latency_ms = _env_float("STRIPE_STUB_LATENCY_MS", 0.0)
+        self.latency_jitter_ms = _env_float("STRIPE_STUB_LATENCY_JITTER_MS", 0.0)
+        self.failure_rate = _env_float("STRIPE_STUB_FAILURE_RATE", 0.0)
+        self.rate_limit_rate = _env_float("STRIPE_STUB_RATE_LIMIT_RATE", 0.0)
+        self.fail_resources = {
+            value.strip()
+            for value in (os.getenv("STRIPE_STUB_FAIL_RESOURCES") or "").split(",")
+            if value.strip()
+        }
+        self.webhook_url = os.getenv("STRIPE_STUB_WEBHOOK_URL")
+        self.connect_webhook_url = os.getenv("STRIPE_STUB_CONNECT_WEBHOOK_URL")
+        self.webhook_secret = os.getenv("STRIPE_WEBHOOK_SECRET")
+        self.connect_webhook_secret = os.getenv("STRIPE_CONNECT_WEBHOOK_SECRET") or self.webhook_secret
+        self.webhook_delay_ms = _env_float("STRIPE_STUB_WEBHOOK_DELAY_MS", 0.0)
+
+    def update(self, values: Dict[str, Any]) -> None:
+        for key, value in values.items():
+            if key == "fail_resources":
+                self.fail_resources = set(value or [])
+            elif hasattr(self, key):
+                setattr(self, key, value)
+
+    def as_dict(self) -> Dict[str, Any]:
+        values = dict(vars(self))
+        values["fail_resources"] = sorted(self.fail_resources)
+        values.pop("webhook_secret", None)
+        values.pop("connect_webhook_secret", None)
+        return values
+
+
+class StubStripeError(Exception):
+    def __init__(self, status: int, error_type: str, message: str, code: Optional[str] = None):
+        super().__init__(message)
+        self.status = status
+        self.body = {"error": {"type": error_type, "message": message, "code": code}}
+
+
+def _listify(value: Any) -> Any:
+    if not isinstance(value, dict):
+        return value
+    if value and all(key.isdigit() for key in value):
+        return [_listify(value[key]) for key in sorted(value, key=int)]
+    return {key: _listify(item) for key, item in value.items()}
+
+
+def _decode_form(body: str) -> Dict[str, Any]:
+    params: Dict[str, Any] = {}
+    for raw_key, value in parse_qsl(body, keep_blank_values=True):
+        parts = re.findall(r"[^\[\]]+|(?<=\[)(?=\])", raw_key)
+        target = params
+        for part in parts[:-1]:
+            target = target.setdefault(part or str(len(target)), {})
+        last = parts[-1] if parts else raw_key
+        target[last or str(len(target))] = value
+    return _listify(params)
+
+
+def _now() -> int:
+    return int(time.time())
+
+
+class StubStripeState:
+    def __init__(self, config: StubConfig):
+        self.config = config
+        self._lock = threading.Lock()
+        self._objects: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._idempotent: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def record(self, operation: str, outcome: str) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(operation, {"ok": 0, "failed": 0, "rateLimited": 0, "replayed": 0})
+            stats[outcome] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "operations": {name: dict(values) for name, values in self._stats.items()},
+                "objects": {name: len(values) for name, values in self._objects.items()},
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._objects.clear()
+            self._idempotent.clear()
+            self._stats.clear()
+
+    def idempotent_response(self, key: Optional[str]) -> Optional[Tuple[int, Dict[str, Any]]]:
+        if not key:
+            return None
+        with self._lock:
+            return self._idempotent.get(key)
+
+    def remember(self, key: Optional[str], status: int, body: Dict[str, Any]) -> None:
+        if key and status < 500:
+            with self._lock:
+                self._idempotent[key] = (status, body)
+
+    def store(self, resource: str, obj: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            self._objects.setdefault(resource, {})[obj["id"]] = obj
+        return obj
+
+    def fetch(self, resource: str, object_id: str) -> Dict[str, Any]:
+        with self._lock:
+            obj = self._objects.get(resource, {}).get(object_id)
+        if obj is None:
+            obj = self._synthesize(resource, object_id)
+        return obj
+
+    def _synthesize(self, resource: str, object_id: str) -> Dict[str, Any]:
+        obj: Dict[str, Any] = {"id": object_id, "object": resource.rstrip("s"), "metadata": {}, "created": _now()}
+        if resource == "accounts":
+            obj.update(_account_fields())
+        elif resource == "payment_methods":
+            obj.update(
+                {
+                    "type": "us_bank_account",
+                    "us_bank_account": {"last4": "6789", "bank_name": "STUB BANK"},
+                }
+            )
+        return self.store(resource, obj)
+
+
+def _account_fields() -> Dict[str, Any]:
+    return {
+        "object": "account",
+        "type": "express",
+        "business_type": "individual",
+        "charges_enabled": True,
+        "payouts_enabled": True,
+        "details_submitted": True,
+        "default_currency": "usd",
+        "capabilities": {"card_payments": "active", "transfers": "active"},
+    }
+
+
+def _new_id(prefix: str) -> str:
+    return f"{prefix}_stub_{uuid.uuid4().hex[:20]}"
+
+
+def _int_param(params: Dict[str, Any], key: str) -> int:
+    try:
+        return int(params.get(key) or 0)
+    except (TypeError, ValueError):
+        raise StubStripeError(400, "invalid_request_error", f"Invalid integer: {key}", "parameter_invalid_integer")
+
+
+def _sign_payload(payload: bytes, secret: str) -> str:
+    timestamp = str(_now())
+    signature = hmac.new(secret.encode("utf-8"), timestamp.encode("utf-8") + b"." + payload, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={signature}"
+
+
+def _deliver_event(url: str, secret: Optional[str], event: Dict[str, Any], delay_ms: float) -> None:
+    if delay_ms:
+        time.sleep(delay_ms / 1000)
+    payload = json.dumps(event).encode("utf-8")
+    headers = {"Content-Type": "application/json"}
+    if secret:
+        headers["Stripe-Signature"] = _sign_payload(payload, secret)
+    request = urllib.request.Request(url, data=payload, headers=headers, method="POST")
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            response.read()
+    except Exception:
+        logger.exception("Stub webhook delivery of %s to %s failed", event.get("type"), url)
+
+
+def _emit_event(state: StubStripeState, event_type: str, obj: Dict[str, Any], account: Optional[str] = None) -> None:
+    config = state.config
+    url = config.connect_webhook_url if account else config.webhook_url
+    if not url:
+        return
+    secret = config.connect_webhook_secret if account else config.webhook_secret
+    event: Dict[str, Any] = {
+        "id": _new_id("evt"),
+        "object": "event",
+        "type": event_type,
+        "created": _now(),
+        "livemode": False,
+        "data": {"object": obj},
+    }
+    if account:
+        event["account"] = account
+    threading.Thread(
+        target=_deliver_event,
+        args=(url, secret, event, config.webhook_delay_ms),
+        name="stripe-stub-webhook",
+        daemon=True,
+    ).start()
+
+
+def _create_account(state: StubStripeState, params: Dict[str, Any]) -> Dict[str, Any]:
+    account = {"id": _new_id("acct"), "created": _now(), "metadata": params.get("metadata") or {}}
+    account.update(_account_fields())
+    state.store("accounts", account)
+    _emit_event(state, "account.updated", account)
+    return account
+
+
+def _create_account_link(state: StubStripeState, params: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "object": "account_link",
+        "created": _now(),
+        "expires_at": _now() + 300,
+        "url": params.get("return_url") or "http://localhost/stub-onboarding",
+    }
+
+
+def _create_payment_intent(state: StubStripeState, params: Dict[str, Any]) -> Dict[str, Any]:
+    amount = _int_param(params, "amount")
+    if amount <= 0:
+        raise StubStripeError(400, "invalid_request_error", "Amount must be greater than 0", "parameter_invalid_integer")
+    confirm = str(params.get("confirm") or "").lower() == "true"
+    intent = state.store(
+        "payment_intents",
+        {
+            "id": _new_id("pi"),
+            "object": "payment_intent",
+            "amount": amount,
+            "currency": params.get("currency") or "usd",
+            "customer": params.get("customer"),
+            "payment_method": params.get("payment_method"),
+            "description": params.get("description"),
+            "metadata": params.get("metadata") or {},
+            "status": "processing" if confirm else "requires_payment_method",
+            "created": _now(),
+        },
+    )
+    intent["client_secret"] = f"{intent['id']}_secret_stub"
+    if confirm:
+        succeeded = dict(intent, status="succeeded")
+        state.store("payment_intents", succeeded)
+        _emit_event(state, "payment_intent.succeeded", succeeded)
+    return intent
+
+
+def _create_transfer(state: StubStripeState, params: Dict[str, Any]) -> Dict[str, Any]:
+    amount = _int_param(params, "amount")
+    destination = params.get("destination")
+    if amount <= 0 or not destination:
+        raise StubStripeError(400, "invalid_request_error", "Transfer requires amount and destination")
+    transfer = state.store(
+        "transfers",
+        {
+            "id": _new_id("tr"),
+            "object": "transfer",
+            "amount": amount,
+            "currency": params.get("currency") or "usd",
+            "destination": destination,
+            "metadata": params.get("metadata") or {},
+            "reversed": False,
+            "created": _now(),
+        },
+    )
+    _emit_event(state, "transfer.created", transfer, account=destination)
+    return transfer
+
+
+def _create_customer(state: StubStripeState, params: Dict[str, Any]) -> Dict[str, Any]:
+    return state.store(
+        "customers",
+        {
+            "id": _new_id("cus"),
+            "object": "customer",
+            "description": params.get("description"),
+            "email": params.get("email"),
+            "name": params.get("name"),
+            "metadata": params.get("metadata") or {},
+            "created": _now(),
+        },
+    )
+
+
+def _create_setup_intent(state: StubStripeState, params: Dict[str, Any]) -> Dict[str, Any]:
+    setup_intent = state.store(
+        "setup_intents",
+        {
+            "id": _new_id("seti"),
+            "object": "setup_intent",
+            "customer": params.get("customer"),
+            "payment_method_types": params.get("payment_method_types") or ["us_bank_account"],
+            "status": "requires_payment_method",
+            "created": _now(),
+        },
+    )
+    setup_intent["client_secret"] = f"{setup_intent['id']}_secret_stub"
+    return setup_intent
+
+
+CREATE_ROUTES = {
+    "accounts": _create_account,
+    "account_links": _create_account_link,
+    "payment_intents": _create_payment_intent,
+    "transfers": _create_transfer,
+    "customers": _create_customer,
+    "setup_intents": _create_setup_intent,
+}
+RETRIEVE_RESOURCES = ("accounts", "payment_intents", "transfers", "customers", "setup_intents", "payment_methods", "charges")
+
+
+def _handle_stripe_request(
+    state: StubStripeState,
+    method: str,
+    parts: List[str],
+    params: Dict[str, Any],
+) -> Tuple[str, Dict[str, Any]]:
+    resource = parts[0] if parts else ""
+    if method == "POST" and len(parts) == 1 and resource in CREATE_ROUTES:
+        return resource, CREATE_ROUTES[resource](state, params)
+    if method == "GET" and len(parts) == 2 and resource in RETRIEVE_RESOURCES:
+        return resource, state.fetch(resource, parts[1])
+    if method == "GET" and len(parts) == 3 and resource == "accounts" and parts[2] == "external_accounts":
+        card = {"object": "card", "last4": "4242", "exp_month": 12, "exp_year": 2030, "funding": "debit", "country": "US"}
+        return resource, {"object": "list", "data": [card], "has_more": False, "url": f"/v1/accounts/{parts[1]}/external_accounts"}
+    raise StubStripeError(404, "invalid_request_error", f"Unrecognized request URL ({method}: /v1/{'/'.join(parts)})")
+
+
+def _inject_fault(config: StubConfig, resource: str) -> None:
+    if config.fail_resources and resource not in config.fail_resources:
+        return
+    roll = random.random()
+    if roll < config.rate_limit_rate:
+        raise StubStripeError(429, "rate_limit_error", "Stub rate limit", "rate_limit")
+    if roll < config.rate_limit_rate + config.failure_rate:
+        raise StubStripeError(500, "api_error", "Stub injected failure")
+
+
+def _simulate_latency(config: StubConfig) -> None:
+    delay_ms = config.latency_ms
+    if config.latency_jitter_ms:
+        delay_ms += random.uniform(-config.latency_jitter_ms, config.latency_jitter_ms)
+    if delay_ms > 0:
+        time.sleep(delay_ms / 1000)
+
+
+def _make_handler(state: StubStripeState):
+    class StubStripeHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format: str, *args: Any) -> None:
+            logger.debug("stripe-stub %s", format % args)
+
+        def _send(self, status: int, body: Dict[str, Any]) -> None:
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.send_header("Request-Id", _new_id("req"))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _read_body(self) -> str:
+            length = int(self.headers.get("Content-Length") or 0)
+            return self.rfile.read(length).decode("utf-8") if length else ""
+
+        def _dispatch(self, method: str) -> None:
+            url = urlsplit(self.path)
+            body = self._read_body()
+            parts = [part for part in url.path.split("/") if part]
+            if parts[:1] == ["_stub"]:
+                self._handle_control(method, parts[1:], body)
+                return
+            if parts[:1] != ["v1"]:
+                self._send(404, {"error": {"type": "invalid_request_error", "message": "Not found"}})
+                return
+            parts = parts[1:]
+            operation = f"{method} /{parts[0] if parts else ''}"
+            idempotency_key = self.headers.get("Idempotency-Key") if method == "POST" else None
+            cached = state.idempotent_response(idempotency_key)
+            if cached is not None:
+                state.record(operation, "replayed")
+                self._send(*cached)
+                return
+            params = _decode_form(url.query if method == "GET" else body)
+            _simulate_latency(state.config)
+            try:
+                _inject_fault(state.config, parts[0] if parts else "")
+                _, result = _handle_stripe_request(state, method, parts, params)
+            except StubStripeError as exc:
+                state.record(operation, "rateLimited" if exc.status == 429 else "failed")
+                state.remember(idempotency_key, exc.status, exc.body)
+                self._send(exc.status, exc.body)
+                return
+            state.record(operation, "ok")
+            state.remember(idempotency_key, 200, result)
+            self._send(200, result)
+
+        def _handle_control(self, method: str, parts: List[str], body: str) -> None:
+            if method == "GET" and parts == ["stats"]:
+                self._send(200, state.stats())
+            elif method == "GET" and parts == ["config"]:
+                self._send(200, state.config.as_dict())
+            elif method == "POST" and parts == ["config"]:
+                state.config.update(json.loads(body or "{}"))
+                self._send(200, state.config.as_dict())
+            elif method == "POST" and parts == ["reset"]:
+                state.reset()
+                self._send(200, {"reset": True})
+            else:
+                self._send(404, {"error": {"message": "Unknown stub control endpoint"}})
+
+        def do_GET(self) -> None:
+            self._dispatch("GET")
+
+        def do_POST(self) -> None:
+            self._dispatch("POST")
+
+        def do_DELETE(self) -> None:
+            self._dispatch("DELETE")
+
+    return StubStripeHandler
+
+
+def create_stub_server(host: str = STRIPE_STUB_HOST, port: int = STRIPE_STUB_PORT) -> ThreadingHTTPServer:
+    state = StubStripeState(StubConfig())
+    server = ThreadingHTTPServer((host, port), _make_handler(state))
+    server.daemon_threads = True
+    server.stub_state = state
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a local stand-in for the Stripe API endpoints Gratly uses.")
+    parser.add_argument("--host", default=STRIPE_STUB_HOST)
+    parser.add_argument("--port", type=int, default=STRIPE_STUB_PORT)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(message)s")
+    server = create_stub_server(args.host, args.port)
+    logger.info("Stripe stub listening on http://%s:%s (set STRIPE_API_BASE to this URL)", args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import os
+import re
+from typing import Any, Callable, Dict, List, Optional
+
+import pymysql
+import pytest
+
+os.environ.setdefault("AUTH_TOKEN_SECRET", "test-secret")
+os.environ.setdefault("RATE_LIMIT_BACKEND", "memory")
+
+
+def _normalize(sql: str) -> str:
+    return " ".join(sql.split())
+
+
+def _check_params(sql: str, params) -> None:
+    # Same argument check pymysql performs when it interpolates parameters.
+    if params is None:
+        return
+    if isinstance(params, dict):
+        sql % {key: "?" for key in params}
+    else:
+        sql % tuple("?" for _ in params)
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.executed: List[tuple] = []
+        self.commits = 0
+        self.rollbacks = 0
+        self._handlers: List[tuple] = []
+
+    def on(self, pattern: str, rows: Optional[List[Any]] = None, rowcount: Optional[int] = None,
+           lastrowid: Optional[int] = None, handler: Optional[Callable] = None) -> None:
+        self._handlers.insert(0, (re.compile(pattern, re.IGNORECASE | re.DOTALL), rows, rowcount, lastrowid, handler))
+
+    def respond(self, sql: str, params) -> Dict[str, Any]:
+        for pattern, rows, rowcount, lastrowid, handler in self._handlers:
+            if pattern.search(sql):
+                if handler is not None:
+                    return handler(sql, params)
+                rows = list(rows or [])
+                return {
+                    "rows": rows,
+                    "rowcount": len(rows) if rowcount is None else rowcount,
+                    "lastrowid": lastrowid,
+                }
+        return {"rows": [], "rowcount": 0, "lastrowid": None}
+
+    def statements(self, pattern: str) -> List[tuple]:
+        regex = re.compile(pattern, re.IGNORECASE | re.DOTALL)
+        return [entry for entry in self.executed if regex.search(entry[0])]
+
+
+class FakeCursor:
+    def __init__(self, database: FakeDatabase, connection: "FakeConnection"):
+        self._database = database
+        self.connection = connection
+        self.rowcount = 0
+        self.lastrowid = None
+        self._rows: List[Any] = []
+
+    def execute(self, sql: str, params=None) -> int:
+        _check_params(sql, params)
+        normalized = _normalize(sql)
+        self._database.executed.append((normalized, params))
+        result = self._database.respond(normalized, params)
+        self._rows = list(result.get("rows") or [])
+        self.rowcount = result.get("rowcount", len(self._rows))
+        self.lastrowid = result.get("lastrowid")
+        return self.rowcount
+
+    def executemany(self, sql: str, rows) -> int:
+        total = 0
+        for params in rows:
+            total += self.execute(sql, params)
+        self.rowcount = total
+        return total
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def close(self) -> None:
+        pass
+
+
+class FakeConnection:
+    def __init__(self, database: FakeDatabase):
+        self._database = database
+
+    def cursor(self, *args, **kwargs) -> FakeCursor:
+        return FakeCursor(self._database, self)
+
+    def begin(self) -> None:
+        pass
+
+    def commit(self) -> None:
+        self._database.commits += 1
+
+    def rollback(self) -> None:
+        self._database.rollbacks += 1
+
+    def close(self) -> None:
+        pass
+
+
+_active_database = FakeDatabase()
+
+
+def _fake_connect(*args, **kwargs) -> FakeConnection:
+    return FakeConnection(_active_database)
+
+
+pymysql.connect = _fake_connect
+
+
+@pytest.fixture
+def fake_db():
+    global _active_database
+    _active_database = FakeDatabase()
+    yield _active_database
+    _active_database = FakeDatabase()
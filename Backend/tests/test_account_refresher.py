@@ -0,0 +1,28 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from Backend import account_refresher, stripe_payments
+
+
+def test_unconfigured_refresh_raises_a_domain_error(monkeypatch):
+    monkeypatch.setattr(account_refresher, "_stripe_gateway", SimpleNamespace(configured=False))
+
+    with pytest.raises(account_refresher.AccountRefreshError):
+        account_refresher.refresh_account_rows([{"employee_guid": "emp-1", "stripe_account_id": "acct_1"}])
+
+
+def test_refresh_endpoint_maps_the_domain_error_to_a_500(fake_db, monkeypatch):
+    def fail(rows):
+        raise account_refresher.AccountRefreshError("Stripe secret key not configured")
+
+    monkeypatch.setattr(stripe_payments, "_require_admin_token", lambda request: None)
+    monkeypatch.setattr(stripe_payments, "_stripe_gateway", SimpleNamespace(configured=True))
+    monkeypatch.setattr(account_refresher, "refresh_account_rows", fail)
+
+    with pytest.raises(HTTPException) as excinfo:
+        stripe_payments.refresh_stripe_accounts(stripe_payments.StripeBulkRefreshPayload(), request=None)
+
+    assert excinfo.value.status_code == 500
+    assert "Stripe secret key not configured" in excinfo.value.detail
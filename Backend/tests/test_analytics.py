@@ -0,0 +1,91 @@
+import json
+import os
+from datetime import date, datetime
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from Backend import analytics
+
+
+@pytest.fixture
+def snapshot_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(analytics, "ANALYTICS_SNAPSHOT_DIR", str(tmp_path))
+    analytics._reset_duckdb()
+    yield tmp_path
+    analytics._reset_duckdb()
+
+
+def _write_snapshot(root, amount_cents, mtime):
+    partition = root / "settlement_transfers" / "restaurant_id=7" / "business_month=2026-01"
+    partition.mkdir(parents=True, exist_ok=True)
+    table = pa.table({
+        "settlement_id": ["s1"],
+        "employee_guid": ["emp-1"],
+        "employee_name": ["Ana Server"],
+        "transfer_id": ["tr_1"],
+        "amount_cents": [amount_cents],
+        "fee_cents": [0],
+        "carry_forward_cents": [0],
+        "created_at": [datetime(2026, 1, 5, 12)],
+    })
+    pq.write_table(table, partition / "part-0.parquet")
+    manifest = root / analytics.MANIFEST_FILENAME
+    manifest.write_text(json.dumps({"watermark": "2026-02-01", "tables": {"settlement_transfers": 1}}))
+    os.utime(manifest, ns=(mtime, mtime))
+
+
+def _totals():
+    return analytics.fetch_settlement_totals_snapshot(7, None, date(2026, 1, 1), date(2026, 1, 31))
+
+
+def test_views_are_rebuilt_when_another_process_writes_a_new_snapshot(snapshot_dir):
+    first = analytics._get_duckdb_connection()
+    assert analytics._get_duckdb_connection() is first
+
+    _write_snapshot(snapshot_dir, 1250, 1_000_000_000)
+
+    assert _totals()[0]["totalPayout"] == 12.5
+    assert analytics._get_duckdb_connection() is not first
+
+
+def _write_payouts(root, rows):
+    partition = root / "payout_final" / "restaurant_id=7" / "business_month=2026-01"
+    partition.mkdir(parents=True, exist_ok=True)
+    columns = {name: [row.get(name) for row in rows] for name, _ in analytics.SNAPSHOT_TABLES["payout_final"]["columns"]}
+    schema = pa.schema([
+        (name, {"int": pa.int64(), "string": pa.string(), "date": pa.date32(), "decimal": pa.decimal128(12, 2)}[kind])
+        for name, kind in analytics.SNAPSHOT_TABLES["payout_final"]["columns"]
+    ])
+    pq.write_table(pa.table(columns, schema=schema), partition / "part-0.parquet")
+    (root / analytics.MANIFEST_FILENAME).write_text(json.dumps({"watermark": "2026-02-01", "tables": {}}))
+
+
+def test_weekly_timeseries_sums_tips_from_the_payout_snapshot(snapshot_dir):
+    from decimal import Decimal
+
+    _write_payouts(snapshot_dir, [
+        {"business_date": date(2026, 1, 5), "employee_guid": "emp-1", "employee_name": "Ana",
+         "overall_tips": Decimal("10.00"), "payout_tips": Decimal("2.50"), "net_payout": Decimal("12.50")},
+        {"business_date": date(2026, 1, 7), "employee_guid": "emp-2", "employee_name": "Ben",
+         "overall_tips": Decimal("4.00"), "net_payout": Decimal("4.00")},
+        {"business_date": date(2026, 1, 12), "employee_guid": "emp-1", "employee_name": "Ana",
+         "payout_tips": Decimal("1.00"), "net_payout": Decimal("1.00")},
+    ])
+
+    rows = analytics.fetch_timeseries_snapshot(
+        7, None, ["TIPS", "NET_PAYOUT"], date(2026, 1, 1), date(2026, 1, 31), "week", None
+    )
+
+    assert [(row["period_start"], float(row["TIPS"]), float(row["NET_PAYOUT"])) for row in rows] == [
+        (date(2026, 1, 5), 16.5, 16.5),
+        (date(2026, 1, 12), 1.0, 1.0),
+    ]
+
+
+def test_broken_snapshot_raises_an_analytics_error(snapshot_dir):
+    (snapshot_dir / analytics.MANIFEST_FILENAME).write_text(json.dumps({"watermark": "2026-02-01"}))
+
+    with pytest.raises(analytics.AnalyticsError):
+        analytics.fetch_timeseries_snapshot(7, None, ["TIPS"], date(2026, 1, 1), date(2026, 1, 31), "day", None)
@@ -0,0 +1,134 @@
+import pytest
+from fastapi import HTTPException
+
+from Backend import auth_tokens, reports
+from Backend.auth_tokens import AccessContext
+
+
+def _context(restaurant_id=7, restaurant_guid="rest-7", admin=True, employee_guid="emp-1"):
+    permissions = {"adminAccess": admin, "employeeOnly": not admin}
+    return AccessContext(
+        user_id=42,
+        restaurant_id=restaurant_id,
+        restaurant_guid=restaurant_guid,
+        employee_guid=employee_guid,
+        permissions=permissions,
+    )
+
+
+def test_access_token_round_trips_claims():
+    token = auth_tokens.issue_tokens(_context())["access_token"]
+
+    context = AccessContext.from_claims(auth_tokens._decode_token(token, "access"))
+
+    assert (context.user_id, context.restaurant_id, context.restaurant_guid) == (42, 7, "rest-7")
+    assert context.is_admin_view
+
+
+def test_tampered_token_is_rejected():
+    token = auth_tokens.issue_tokens(_context())["access_token"]
+    header, body, signature = token.split(".")
+    forged = auth_tokens._encode_token(dict(_context(restaurant_id=8).to_claims()), "access", 60).split(".")[1]
+
+    with pytest.raises(HTTPException) as excinfo:
+        auth_tokens._decode_token(".".join([header, forged, signature]), "access")
+    assert excinfo.value.status_code == 401
+
+
+def test_refresh_token_is_not_an_access_token():
+    refresh_token = auth_tokens.issue_tokens(_context())["refresh_token"]
+
+    with pytest.raises(HTTPException) as excinfo:
+        auth_tokens._decode_token(refresh_token, "access")
+    assert excinfo.value.status_code == 401
+
+
+def test_expired_token_is_rejected():
+    token = auth_tokens._encode_token(_context().to_claims(), "access", -1)
+
+    with pytest.raises(HTTPException) as excinfo:
+        auth_tokens._decode_token(token, "access")
+    assert excinfo.value.detail == "Token expired"
+
+
+def test_token_for_another_user_is_forbidden():
+    with pytest.raises(HTTPException) as excinfo:
+        auth_tokens.resolve_access_context(43, _context())
+    assert excinfo.value.status_code == 403
+
+
+def test_user_id_fallback_is_refused_when_tokens_are_required(monkeypatch):
+    monkeypatch.setattr(auth_tokens, "AUTH_REQUIRE_TOKENS", True)
+
+    with pytest.raises(HTTPException) as excinfo:
+        auth_tokens.resolve_access_context(42, None)
+    assert excinfo.value.status_code == 401
+
+
+def _scheduled_restaurant(fake_db):
+    queries = fake_db.statements(r"WHERE pa\.RESTAURANTID = %s")
+    assert len(queries) == 1
+    return queries[0][1][0]
+
+
+def test_yesterday_report_is_scoped_to_the_token_restaurant(fake_db):
+    assert reports.get_yesterday_report(user_id=None, context=_context()) == {"schedules": []}
+
+    assert _scheduled_restaurant(fake_db) == 7
+
+
+@pytest.mark.parametrize("params", [{"restaurant_id": 8}, {"restaurant_guid": "rest-8"}])
+def test_yesterday_report_rejects_another_restaurant(fake_db, params):
+    with pytest.raises(HTTPException) as excinfo:
+        reports.get_yesterday_report(context=_context(), **params)
+
+    assert excinfo.value.status_code == 403
+    assert not fake_db.executed
+
+
+def test_yesterday_report_limits_employees_to_their_own_rows(fake_db):
+    reports.get_yesterday_report(restaurant_id=7, context=_context(admin=False, employee_guid="emp-9"))
+
+    params = fake_db.statements(r"WHERE pa\.RESTAURANTID = %s")[0][1]
+    assert (params[0], params[-1]) == (7, "emp-9")
+
+
+def test_yesterday_report_requires_a_token_when_tokens_are_required(fake_db, monkeypatch):
+    monkeypatch.setattr(auth_tokens, "AUTH_REQUIRE_TOKENS", True)
+    monkeypatch.setattr(reports, "AUTH_REQUIRE_TOKENS", True)
+
+    with pytest.raises(HTTPException) as excinfo:
+        reports.get_yesterday_report(restaurant_id=7, user_id=None, context=None)
+
+    assert excinfo.value.status_code == 401
+    assert not fake_db.executed
+
+
+def _refresh(fake_db, monkeypatch, issued_version, current_version):
+    monkeypatch.setattr(auth_tokens, "_load_access_context", lambda user_id: _context())
+    refresh_token = auth_tokens.issue_tokens(_context(), issued_version)["refresh_token"]
+    fake_db.on(r"SELECT TOKEN_VERSION", rows=[{"token_version": current_version}])
+    return auth_tokens.refresh_access_token(auth_tokens.RefreshTokenPayload(refreshToken=refresh_token))
+
+
+def test_refresh_issues_tokens_for_the_current_version(fake_db, monkeypatch):
+    tokens = _refresh(fake_db, monkeypatch, issued_version=3, current_version=3)
+
+    assert auth_tokens._decode_token(tokens["refresh_token"], "refresh")["ver"] == 3
+
+
+def test_refresh_token_is_revoked_after_a_password_reset(fake_db, monkeypatch):
+    with pytest.raises(HTTPException) as excinfo:
+        _refresh(fake_db, monkeypatch, issued_version=3, current_version=4)
+
+    assert excinfo.value.detail == "Token revoked"
+
+
+def test_tokens_are_disabled_without_a_secret(monkeypatch):
+    token = auth_tokens.issue_tokens(_context())["access_token"]
+    monkeypatch.setattr(auth_tokens, "_signing_key", None)
+
+    assert auth_tokens.issue_tokens(_context()) == {}
+    with pytest.raises(HTTPException) as excinfo:
+        auth_tokens._decode_token(token, "access")
+    assert excinfo.value.status_code == 401
@@ -0,0 +1,26 @@
+from Backend import email_outbox
+
+
+def _row(invite_id, attempts):
+    return {"outbox_id": 40 + invite_id, "invite_id": invite_id, "attempts": attempts}
+
+
+def test_dead_messages_mark_their_invite_failed(fake_db):
+    failed = [
+        (_row(1, 1), email_outbox._SendGridError("rejected", retryable=False)),
+        (_row(2, email_outbox.EMAIL_OUTBOX_MAX_ATTEMPTS), email_outbox._SendGridError("timeout", retryable=True)),
+    ]
+
+    email_outbox._record_results([], failed)
+
+    invite_updates = fake_db.statements(r"UPDATE GRATLYDB\.EMAIL_INVITES SET STATUS = 'failed'")
+    assert [params for _, params in invite_updates] == [("rejected", 1), ("timeout", 2)]
+    assert fake_db.commits == 1
+
+
+def test_retryable_failures_leave_the_invite_queued(fake_db):
+    email_outbox._record_results([], [(_row(3, 1), email_outbox._SendGridError("busy", retryable=True))])
+
+    assert not fake_db.statements(r"UPDATE GRATLYDB\.EMAIL_INVITES")
+    outbox_update = fake_db.statements(r"UPDATE GRATLYDB\.EMAIL_OUTBOX")[0][1]
+    assert outbox_update[0] == "pending"
@@ -0,0 +1,61 @@
+import pytest
+from fastapi import HTTPException
+
+from Backend import auth_tokens, email_templates
+from Backend.email_outbox import SENDGRID_SUBSTITUTION_LIMIT_BYTES
+
+
+def _render_invite(branding):
+    context = email_templates.invite_context("Employee Name", "https://app.example.com/signup?token=" + "x" * 43)
+    return email_templates.render_email("invite", branding, context)
+
+
+def test_hosted_logo_invite_fits_under_the_sendgrid_substitution_limit():
+    branding = {**email_templates.get_branding(None, "Bistro"), "logo_src": "https://cdn.example.com/gratly_logo.png"}
+
+    rendered = _render_invite(branding)
+
+    size = sum(len(rendered[part].encode("utf-8")) for part in ("subject", "content", "html_content"))
+    assert size < SENDGRID_SUBSTITUTION_LIMIT_BYTES
+
+
+def test_logo_falls_back_to_the_inline_asset_without_a_hosted_url(monkeypatch):
+    monkeypatch.setattr(email_templates, "EMAIL_LOGO_URL", None)
+    assert email_templates._default_logo_src().startswith("data:image/png;base64,")
+
+    monkeypatch.setattr(email_templates, "EMAIL_LOGO_URL", "https://cdn.example.com/gratly_logo.png")
+    assert email_templates._default_logo_src() == "https://cdn.example.com/gratly_logo.png"
+
+
+def _context(restaurant_id=7, **permissions):
+    return auth_tokens.AccessContext(42, restaurant_id, "rest-7", None, permissions)
+
+
+def test_branding_update_requires_admin_access(fake_db):
+    payload = email_templates.EmailBrandingPayload(primaryColor="#123456")
+
+    with pytest.raises(HTTPException) as excinfo:
+        email_templates.update_email_branding(payload, context=_context(managerAccess=True))
+
+    assert excinfo.value.status_code == 403
+    assert not fake_db.executed
+
+
+def test_branding_update_rejects_another_users_id(fake_db):
+    payload = email_templates.EmailBrandingPayload(user_id=99, primaryColor="#123456")
+
+    with pytest.raises(HTTPException) as excinfo:
+        email_templates.update_email_branding(payload, context=_context(adminAccess=True))
+
+    assert excinfo.value.status_code == 403
+    assert not fake_db.executed
+
+
+def test_branding_update_writes_the_token_restaurant(fake_db):
+    payload = email_templates.EmailBrandingPayload(primaryColor="#123456")
+
+    result = email_templates.update_email_branding(payload, context=_context(restaurant_id=7, adminAccess=True))
+
+    assert result == {"success": True, "restaurantId": 7}
+    _, params = fake_db.statements(r"INSERT INTO GRATLYDB\.RESTAURANT_EMAIL_BRANDING")[0]
+    assert params[0] == 7
@@ -0,0 +1,25 @@
+from fastapi.testclient import TestClient
+
+from Backend import main
+
+WORKERS = [
+    ("start_webhook_workers", "stop_webhook_workers"),
+    ("start_settlement_resumer", "stop_settlement_resumer"),
+    ("resume_stripe_backfill_jobs", "stop_stripe_backfill_jobs"),
+    ("start_account_refresher", "stop_account_refresher"),
+    ("start_reconciler", "stop_reconciler"),
+    ("start_email_sender", "stop_email_sender"),
+    ("start_token_purger", "stop_token_purger"),
+]
+
+
+def test_lifespan_starts_workers_and_stops_them_in_reverse(monkeypatch):
+    calls = []
+    for pair in WORKERS:
+        for name in pair:
+            monkeypatch.setattr(main, name, lambda name=name: calls.append(name))
+
+    with TestClient(main.app):
+        assert calls == [start for start, _ in WORKERS]
+
+    assert calls[len(WORKERS):] == [stop for _, stop in reversed(WORKERS)]
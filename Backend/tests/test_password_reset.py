@@ -0,0 +1,26 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from Backend import password_reset
+
+
+def test_confirm_awaits_the_hashing_pool_between_db_calls(fake_db, monkeypatch):
+    hashed = []
+
+    async def fake_hash(password):
+        hashed.append(password)
+        return "hashed"
+
+    monkeypatch.setattr(password_reset, "hash_password_async", fake_hash)
+    fake_db.on(r"FROM GRATLYDB\.PASSWORD_RESET_TOKENS", rows=[{
+        "resetId": 3, "userId": 11, "expiresAt": datetime.utcnow() + timedelta(hours=1), "usedAt": None,
+    }])
+    fake_db.on(r"UPDATE GRATLYDB\.PASSWORD_RESET_TOKENS", rowcount=1)
+    payload = password_reset.PasswordResetConfirm(token="tok", password="Secret1!")
+
+    result = asyncio.run(password_reset.confirm_password_reset(payload))
+
+    assert result == {"success": True}
+    assert hashed == ["Secret1!"]
+    assert fake_db.statements(r"UPDATE USER_MASTER SET PASSWORD_HASH")[0][1] == ("hashed", 11)
+    assert fake_db.commits == 1
@@ -0,0 +1,38 @@
+from datetime import date
+
+from Backend import db
+
+
+def test_refresh_matches_business_date_strings_instead_of_parsing_in_sql(fake_db):
+    cursor = db._get_cursor(dictionary=True)
+
+    db._refresh_payout_daily_totals(cursor, 7, "1/5/2026")
+
+    sql, params = fake_db.statements(r"INSERT INTO GRATLYDB\.PAYOUT_DAILY_TOTALS")[0]
+    assert "STR_TO_DATE" not in sql
+    assert params[:2] == (date(2026, 1, 5), 7)
+    assert {"2026-01-05", "01/05/2026", "1/5/2026", "20260105"} <= set(params[2:-1])
+    assert params[-1] == "2026-01-05%"
+
+
+def test_refresh_ignores_unparseable_dates(fake_db):
+    db._refresh_payout_daily_totals(db._get_cursor(dictionary=True), 7, "not a date")
+
+    assert not fake_db.executed
+
+
+def test_backfill_groups_raw_dates_by_parsed_day(fake_db):
+    fake_db.on(r"SELECT DISTINCT RESTAURANTID", rows=[
+        {"restaurant_id": 7, "business_date": "2026-01-05"},
+        {"restaurant_id": 7, "business_date": "01/05/2026"},
+        {"restaurant_id": 7, "business_date": "garbage"},
+        {"restaurant_id": 8, "business_date": "20260106"},
+    ])
+
+    assert db._backfill_payout_daily_totals(db._get_cursor(dictionary=True)) == 2
+
+    inserts = fake_db.statements(r"INSERT INTO GRATLYDB\.PAYOUT_DAILY_TOTALS")
+    assert [params[:-1] for _, params in inserts] == [
+        (date(2026, 1, 5), 7, "2026-01-05", "01/05/2026"),
+        (date(2026, 1, 6), 8, "20260106"),
+    ]
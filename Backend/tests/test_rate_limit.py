@@ -0,0 +1,84 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from Backend import auth_tokens
+from Backend.rate_limit import MemoryRateLimitStore, RateLimiter, RateLimitMiddleware
+
+
+def _limiter(**limits):
+    scope_limits = {"ip": 1000, "user": 1000, "restaurant": 1000, "email": 1000}
+    scope_limits.update(limits)
+    return RateLimiter(MemoryRateLimitStore(), 60, scope_limits, {"/login": 5, "/approvals": 3})
+
+
+def _client(limiter):
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware, limiter=limiter)
+    seen = []
+
+    @app.post("/login")
+    def login(data: dict):
+        seen.append(data)
+        return {"success": True}
+
+    @app.get("/approvals")
+    def approvals():
+        return {"schedules": []}
+
+    return TestClient(app), seen
+
+
+def _bearer(user_id=42, restaurant_id=7):
+    context = auth_tokens.AccessContext(user_id, restaurant_id, "rest-7", None, {})
+    return {"Authorization": f"Bearer {auth_tokens.issue_tokens(context)['access_token']}"}
+
+
+def test_query_parameters_do_not_pick_the_user_or_restaurant_bucket():
+    limiter = _limiter(user=3)
+    client, _ = _client(limiter)
+
+    responses = [client.get("/approvals", params={"user_id": 42, "restaurant_id": 7}) for _ in range(3)]
+
+    assert [response.status_code for response in responses] == [200, 200, 200]
+    assert not [key for key in limiter.store._counts if ":user:" in key or ":restaurant:" in key]
+
+
+def test_user_and_restaurant_buckets_come_from_the_verified_token():
+    limiter = _limiter(restaurant=6)
+    client, _ = _client(limiter)
+
+    statuses = [client.get("/approvals", headers=_bearer(user_id=user_id)).status_code for user_id in (1, 2, 3)]
+
+    assert statuses == [200, 200, 429]
+
+
+def test_forged_token_falls_back_to_the_ip_bucket():
+    limiter = _limiter(user=3)
+    client, _ = _client(limiter)
+    headers = {"Authorization": "Bearer not.a.token"}
+
+    assert client.get("/approvals", headers=headers).status_code == 200
+    assert not [key for key in limiter.store._counts if ":user:" in key]
+
+
+def test_login_is_limited_per_email_and_the_body_still_reaches_the_route():
+    limiter = _limiter(email=10)
+    client, seen = _client(limiter)
+
+    statuses = [client.post("/login", json={"email": "Owner@Example.com", "password": "x"}).status_code for _ in range(2)]
+    statuses.append(client.post("/login", json={"email": "owner@example.com ", "password": "x"}).status_code)
+    statuses.append(client.post("/login", json={"email": "other@example.com", "password": "x"}).status_code)
+
+    assert statuses == [200, 200, 429, 200]
+    assert [data["email"] for data in seen] == ["Owner@Example.com", "Owner@Example.com", "other@example.com"]
+    assert not [key for key in limiter.store._counts if "example.com" in key]
+
+
+def test_rejected_requests_do_not_spend_budget():
+    limiter = _limiter(ip=6)
+    client, _ = _client(limiter)
+
+    statuses = [client.get("/approvals").status_code for _ in range(5)]
+
+    assert statuses == [200, 200, 429, 429, 429]
+    assert [count for count, _ in limiter.store._counts.values()] == [6]
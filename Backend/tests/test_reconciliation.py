@@ -0,0 +1,153 @@
+import re
+from datetime import datetime
+
+import duckdb
+import pytest
+
+from Backend import reconciliation
+
+SINCE = datetime(2026, 1, 1)
+UNTIL = datetime(2026, 1, 2)
+TOUCHED = datetime(2026, 1, 1, 12)
+
+TABLES = """
+CREATE SCHEMA GRATLYDB;
+CREATE TABLE GRATLYDB.STRIPE_SETTLEMENT_TRANSFER_STATE (
+    SETTLEMENT_ID VARCHAR, EMPLOYEEGUID VARCHAR, RESTAURANTID INT, RESTAURANTGUID VARCHAR, STATUS VARCHAR,
+    AMOUNT_CENTS BIGINT, FEE_CENTS BIGINT, CARRY_FORWARD_CENTS BIGINT, CREATED_AT TIMESTAMP, UPDATED_AT TIMESTAMP
+);
+CREATE TABLE GRATLYDB.STRIPE_EMPLOYEE_CARRY_FORWARD (
+    EMPLOYEEGUID VARCHAR, RESTAURANTID INT, CARRY_FORWARD_CENTS BIGINT
+);
+CREATE TABLE GRATLYDB.PAYOUT_FINAL (
+    PAYOUT_APPROVALID VARCHAR, RESTAURANTID INT, EMPLOYEEGUID VARCHAR, NET_PAYOUT DECIMAL(12, 2)
+);
+CREATE TABLE GRATLYDB.STRIPE_SETTLEMENT_TRANSFERS (
+    SETTLEMENT_ID VARCHAR, EMPLOYEEGUID VARCHAR, RESTAURANTGUID VARCHAR, TRANSFER_ID VARCHAR, AMOUNT_CENTS BIGINT
+);
+CREATE TABLE GRATLYDB.STRIPE_TRANSFER_EVENTS (TRANSFER_ID VARCHAR, EVENT_TYPE VARCHAR, CREATED_AT TIMESTAMP);
+CREATE TABLE GRATLYDB.STRIPE_PAYOUT_EVENTS (
+    RESTAURANTGUID VARCHAR, EMPLOYEEGUID VARCHAR, PAYOUT_ID VARCHAR, AMOUNT BIGINT, STATUS VARCHAR,
+    ACCOUNT_ID VARCHAR, EVENT_TYPE VARCHAR, CREATED_AT TIMESTAMP
+);
+CREATE TABLE GRATLYDB.SRC_ONBOARDING (RESTAURANTID INT, RESTAURANTGUID VARCHAR);
+CREATE TABLE GRATLYDB.STRIPE_RECONCILIATION_RESULTS (
+    CHECK_TYPE VARCHAR, RESTAURANTID INT, RESTAURANTGUID VARCHAR, SETTLEMENT_ID VARCHAR, EMPLOYEEGUID VARCHAR,
+    REFERENCE_ID VARCHAR, EXPECTED_CENTS BIGINT, ACTUAL_CENTS BIGINT, DETAIL VARCHAR,
+    STATUS VARCHAR DEFAULT 'open', LAST_SEEN_AT TIMESTAMP DEFAULT current_timestamp,
+    UNIQUE (CHECK_TYPE, SETTLEMENT_ID, EMPLOYEEGUID, REFERENCE_ID)
+);
+"""
+
+
+class _DuckCursor:
+    """Runs the reconciliation SQL on DuckDB, translating the MySQL-only upsert syntax."""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._result = None
+
+    def execute(self, sql, params=()):
+        sql = sql.replace(
+            "ON DUPLICATE KEY UPDATE",
+            "ON CONFLICT (CHECK_TYPE, SETTLEMENT_ID, EMPLOYEEGUID, REFERENCE_ID) DO UPDATE SET",
+        )
+        sql = re.sub(r"VALUES\((\w+)\)", r"excluded.\1", sql)
+        self._result = self._conn.execute(sql.replace("%s", "?"), list(params))
+
+    def fetchone(self):
+        row = self._result.fetchone()
+        if row is None:
+            return None
+        return dict(zip([column[0] for column in self._result.description], row))
+
+
+@pytest.fixture
+def ledger():
+    conn = duckdb.connect()
+    conn.execute(TABLES)
+    yield conn
+    conn.close()
+
+
+def _state(conn, settlement_id, employee_guid, status, created_at, amount=0, fee=0, carry_forward=0):
+    conn.execute(
+        "INSERT INTO GRATLYDB.STRIPE_SETTLEMENT_TRANSFER_STATE VALUES (?, ?, 7, 'rg', ?, ?, ?, ?, ?, ?)",
+        [settlement_id, employee_guid, status, amount, fee, carry_forward, created_at, TOUCHED],
+    )
+
+
+def _balance(conn, employee_guid, cents):
+    conn.execute("INSERT INTO GRATLYDB.STRIPE_EMPLOYEE_CARRY_FORWARD VALUES (?, 7, ?)", [employee_guid, cents])
+
+
+def _results(conn, check_type):
+    return conn.execute(
+        """
+        SELECT EMPLOYEEGUID, EXPECTED_CENTS, ACTUAL_CENTS, STATUS
+        FROM GRATLYDB.STRIPE_RECONCILIATION_RESULTS
+        WHERE CHECK_TYPE = ?
+        ORDER BY EMPLOYEEGUID
+        """,
+        [check_type],
+    ).fetchall()
+
+
+def test_counts_come_from_the_checks_not_the_upsert_rowcount(fake_db):
+    fake_db.on(r"SELECT COUNT\(\*\) AS flagged", rows=[{"flagged": 3}])
+    fake_db.on(r"INSERT INTO GRATLYDB\.STRIPE_RECONCILIATION_RESULTS", rowcount=6)
+    cursor = reconciliation._get_cursor(dictionary=True)
+
+    counts = reconciliation._run_checks(cursor, SINCE, UNTIL, 7)
+
+    assert counts == {check_type: 3 for check_type in reconciliation.RECONCILIATION_CHECKS}
+    inserts = fake_db.statements(r"INSERT INTO GRATLYDB\.STRIPE_RECONCILIATION_RESULTS")
+    assert len(inserts) == len(reconciliation.RECONCILIATION_CHECKS)
+    assert all(params == [SINCE, UNTIL, 7] for _, params in inserts)
+
+
+def test_drift_skips_employees_whose_latest_state_is_still_open(ledger):
+    # The balance already holds the pending settlement; the older sent state must not be compared.
+    _state(ledger, "s1", "pending-emp", "sent", datetime(2026, 1, 1, 8))
+    _state(ledger, "s2", "pending-emp", "pending", datetime(2026, 1, 1, 9), carry_forward=500)
+    _balance(ledger, "pending-emp", 500)
+    _state(ledger, "s1", "dead-emp", "carried_forward", datetime(2026, 1, 1, 8), amount=200, fee=10)
+    _state(ledger, "s2", "dead-emp", "dead", datetime(2026, 1, 1, 9))
+
+    counts = reconciliation._run_checks(_DuckCursor(ledger), SINCE, UNTIL, None)
+
+    assert counts["carry_forward_drift"] == 0
+    assert _results(ledger, "carry_forward_drift") == []
+
+
+def test_drift_compares_settled_employees_against_their_latest_state(ledger):
+    _state(ledger, "s1", "drifted", "pending", datetime(2026, 1, 1, 8))
+    _state(ledger, "s2", "drifted", "carried_forward", datetime(2026, 1, 1, 9), amount=300, fee=20)
+    _balance(ledger, "drifted", 100)
+    _state(ledger, "s1", "paid", "carried_forward", datetime(2026, 1, 1, 8), amount=400)
+    _state(ledger, "s2", "paid", "sent", datetime(2026, 1, 1, 9))
+    _state(ledger, "s1", "skipped", "skipped", datetime(2026, 1, 1, 8), carry_forward=50)
+    _balance(ledger, "skipped", 50)
+
+    counts = reconciliation._run_checks(_DuckCursor(ledger), SINCE, UNTIL, None)
+
+    assert counts["carry_forward_drift"] == 1
+    assert _results(ledger, "carry_forward_drift") == [("drifted", 320, 100, "open")]
+
+
+def test_redetected_results_stay_resolved(ledger):
+    _state(ledger, "s1", "drifted", "carried_forward", datetime(2026, 1, 1, 8), amount=300)
+    _state(ledger, "s1", "reopened", "carried_forward", datetime(2026, 1, 1, 8), amount=100)
+    cursor = _DuckCursor(ledger)
+    reconciliation._run_checks(cursor, SINCE, UNTIL, None)
+    ledger.execute(
+        "UPDATE GRATLYDB.STRIPE_RECONCILIATION_RESULTS SET STATUS = 'resolved' WHERE EMPLOYEEGUID = 'drifted'"
+    )
+    ledger.execute("UPDATE GRATLYDB.STRIPE_SETTLEMENT_TRANSFER_STATE SET AMOUNT_CENTS = AMOUNT_CENTS + 5")
+
+    reconciliation._run_checks(cursor, SINCE, UNTIL, None)
+
+    assert _results(ledger, "carry_forward_drift") == [
+        ("drifted", 305, 0, "resolved"),
+        ("reopened", 105, 0, "open"),
+    ]
@@ -0,0 +1,64 @@
+from datetime import date
+
+from Backend import analytics, dashboard, reports
+
+
+def _fail(*args, **kwargs):
+    raise analytics.AnalyticsError("Analytics query failed: corrupt parquet")
+
+
+def test_timeseries_falls_back_to_mysql_when_duckdb_fails(fake_db, monkeypatch):
+    monkeypatch.setattr(reports, "analytics_covers", lambda end_value: True)
+    monkeypatch.setattr(reports, "fetch_timeseries_snapshot", _fail)
+    fake_db.on(r"FROM GRATLYDB\.PAYOUT_DAILY_TOTALS", rows=[{"period_start": date(2026, 1, 5), "TIPS": 3}])
+    cursor = reports._get_cursor(dictionary=True)
+
+    series = reports._fetch_timeseries(cursor, 7, None, ["tips"], date(2026, 1, 5), date(2026, 1, 5), "day", None)
+
+    assert series[0]["points"] == [{"period": "2026-01-05", "tips": 3.0}]
+
+
+def test_timeseries_uses_the_snapshot_when_it_covers_the_range(fake_db, monkeypatch):
+    monkeypatch.setattr(reports, "analytics_covers", lambda end_value: True)
+    monkeypatch.setattr(reports, "fetch_timeseries_snapshot",
+                        lambda *args: [{"period_start": date(2026, 1, 5), "TIPS": 8}])
+    cursor = reports._get_cursor(dictionary=True)
+
+    series = reports._fetch_timeseries(cursor, 7, None, ["tips"], date(2026, 1, 5), date(2026, 1, 5), "day", None)
+
+    assert series[0]["points"] == [{"period": "2026-01-05", "tips": 8.0}]
+    assert not fake_db.executed
+
+
+def test_pending_payouts_add_the_mysql_tail_after_the_watermark(fake_db, monkeypatch):
+    monkeypatch.setattr(reports, "analytics_watermark", lambda: date(2026, 2, 1))
+    monkeypatch.setattr(reports, "fetch_pending_payout_totals_snapshot", lambda restaurant_id, employee_guid: (100.0, 60.0))
+    fake_db.on(r"FROM GRATLYDB\.SRC_ALLORDERS", rows=[{"total_tips_gratuity": 20}])
+    fake_db.on(r"FROM GRATLYDB\.PAYOUT_FINAL", rows=[{"total_paid": 15}])
+    cursor = reports._get_cursor(dictionary=True)
+
+    assert reports._fetch_pending_payouts(cursor, 7, "rest-7", None) == 45.0
+
+    for _, params in fake_db.executed:
+        assert params[-1] == date(2026, 2, 1)
+
+
+def test_pending_payouts_read_everything_from_mysql_when_duckdb_fails(fake_db, monkeypatch):
+    monkeypatch.setattr(reports, "analytics_watermark", lambda: date(2026, 2, 1))
+    monkeypatch.setattr(reports, "fetch_pending_payout_totals_snapshot", _fail)
+    fake_db.on(r"FROM GRATLYDB\.SRC_ALLORDERS", rows=[{"total_tips_gratuity": 20}])
+    fake_db.on(r"FROM GRATLYDB\.PAYOUT_FINAL", rows=[{"total_paid": 15}])
+    cursor = reports._get_cursor(dictionary=True)
+
+    assert reports._fetch_pending_payouts(cursor, 7, "rest-7", None) == 5.0
+    assert [params for _, params in fake_db.executed] == [["rest-7"], [7]]
+
+
+def test_dashboard_section_reports_analytics_errors(fake_db, monkeypatch):
+    monkeypatch.setitem(dashboard.DASHBOARD_SECTIONS, "pending-payouts", lambda cursor, context: _fail())
+
+    result, error, _ = dashboard._run_section("pending-payouts", None)
+
+    assert result is None
+    assert error["status"] == 500
+    assert "corrupt parquet" in error["detail"]
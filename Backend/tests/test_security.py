@@ -0,0 +1,89 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from Backend import security
+
+
+def test_pool_rejects_immediately_when_every_slot_is_taken():
+    pool = security._HashingPool(1, 0)
+    release = threading.Event()
+    blocker = threading.Thread(target=pool.run, args=(release.wait,))
+    blocker.start()
+    while pool.metrics()["inFlight"] < 1:
+        time.sleep(0.001)
+
+    started = time.perf_counter()
+    with pytest.raises(HTTPException) as excinfo:
+        pool.run(len, "x")
+    elapsed = time.perf_counter() - started
+
+    release.set()
+    blocker.join(timeout=2)
+    assert excinfo.value.status_code == 503
+    assert elapsed < 0.5
+    assert pool.metrics()["rejected"] == 1
+
+
+def test_async_run_does_not_block_the_event_loop():
+    pool = security._HashingPool(1, 1)
+    release = threading.Event()
+
+    async def scenario():
+        hashed = asyncio.ensure_future(pool.run_async(lambda: release.wait(2) and "hashed"))
+        ticks = 0
+        while not hashed.done():
+            ticks += 1
+            if ticks == 5:
+                release.set()
+            await asyncio.sleep(0.01)
+        return await hashed, ticks
+
+    result, ticks = asyncio.run(scenario())
+
+    assert result == "hashed"
+    assert ticks >= 5
+    metrics = pool.metrics()
+    assert (metrics["completed"], metrics["inFlight"]) == (1, 0)
+
+
+def test_failed_hash_frees_its_slot():
+    pool = security._HashingPool(1, 0)
+
+    def boom():
+        raise ValueError("bad hash")
+
+    with pytest.raises(ValueError):
+        pool.run(boom)
+
+    assert pool.run(len, "ok") == 2
+
+
+def test_verification_hashers_are_built_once_per_scheme(monkeypatch):
+    built = []
+
+    class _Fake:
+        def __init__(self, cost):
+            built.append(self.scheme)
+
+        def identify(self, hashed):
+            return hashed.startswith(self.scheme)
+
+    class _Current(_Fake):
+        scheme = "current"
+
+    class _Older(_Fake):
+        scheme = "older"
+
+    monkeypatch.setattr(security, "PASSWORD_HASHERS", {"current": _Current, "older": _Older})
+    monkeypatch.setattr(security, "_hasher", _Current(0))
+    monkeypatch.setattr(security, "_verification_hashers", {})
+
+    first = security._hasher_for("older$hash")
+    second = security._hasher_for("older$other")
+
+    assert first is second
+    assert built == ["current", "older"]
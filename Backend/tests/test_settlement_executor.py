@@ -0,0 +1,207 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from Backend import settlement_executor
+
+READY_ACCOUNT = {"stripe_account_id": "acct_1", "payouts_enabled": 1, "account_deauthorized": 0}
+
+
+class FakeStripeError(Exception):
+    pass
+
+
+class APIConnectionError(FakeStripeError):
+    pass
+
+
+class FakeGateway:
+    configured = True
+
+    def __init__(self, create):
+        self._stripe = SimpleNamespace(Transfer=SimpleNamespace(create=create))
+
+    def client(self):
+        return self._stripe, FakeStripeError
+
+
+def _plan(rows, carry_forwards=None, accounts=None, existing=None):
+    return settlement_executor._build_settlement_plan(
+        "settle-1", 7, "rest-1", "2024-01-01", rows, existing or set(), carry_forwards or {}, accounts or {}
+    )
+
+
+def test_pending_transfer_consumes_carry_forward():
+    plan, deltas, skipped = _plan(
+        [{"employee_guid": "emp-1", "net_payout": "20.00"}],
+        carry_forwards={"emp-1": 550},
+        accounts={"emp-1": READY_ACCOUNT},
+    )
+    assert skipped == 0
+    row = plan["emp-1"]
+    assert row[5] == "pending"
+    assert row[7] == 2000 + 550 - settlement_executor.SETTLEMENT_FEE_CENTS
+    assert row[9] == 550
+    assert deltas == [("rest-1", "emp-1", 7, -550)]
+
+
+def test_skipped_transfer_adds_net_to_carry_forward():
+    plan, deltas, skipped = _plan(
+        [{"employee_guid": "emp-1", "net_payout": "0.40"}],
+        carry_forwards={"emp-1": 30},
+        accounts={"emp-1": READY_ACCOUNT},
+    )
+    assert skipped == 1
+    assert plan["emp-1"][5] == "skipped"
+    assert plan["emp-1"][9] == 70
+    assert deltas == [("rest-1", "emp-1", 7, 40)]
+
+
+def test_missing_account_keeps_balance_and_duplicate_rows_net_out():
+    plan, deltas, _ = _plan(
+        [
+            {"employee_guid": "emp-1", "net_payout": "5.00"},
+            {"employee_guid": "emp-2", "net_payout": "3.00"},
+            {"employee_guid": "emp-2", "net_payout": "4.00"},
+        ],
+        carry_forwards={"emp-2": 100},
+        accounts={"emp-2": READY_ACCOUNT},
+    )
+    assert plan["emp-1"][5] == "skipped"
+    assert plan["emp-2"][7] == 300 + 100 - settlement_executor.SETTLEMENT_FEE_CENTS
+    # The second row for emp-2 arrives after its transfer is planned and is not paid twice.
+    assert sum(delta[3] for delta in deltas if delta[1] == "emp-2") == -100
+    assert ("rest-1", "emp-1", 7, 500) in deltas
+
+
+def test_existing_transfer_is_not_planned_again():
+    plan, deltas, skipped = _plan(
+        [{"employee_guid": "emp-1", "net_payout": "20.00"}],
+        carry_forwards={"emp-1": 550},
+        accounts={"emp-1": READY_ACCOUNT},
+        existing={"emp-1"},
+    )
+    assert plan == {} and deltas == [] and skipped == 1
+
+
+def test_plan_consumes_carry_forward_in_the_planning_transaction(fake_db, monkeypatch):
+    monkeypatch.setattr(
+        settlement_executor, "_fetch_settlement_transfer_context", lambda settlement_id, guids: (set(), {"emp-1": READY_ACCOUNT})
+    )
+    fake_db.on(r"FROM GRATLYDB\.STRIPE_EMPLOYEE_CARRY_FORWARD .* FOR UPDATE",
+               rows=[{"employee_guid": "emp-1", "carry_forward_cents": 550}])
+
+    settlement_executor._plan_settlement("settle-1", 7, "rest-1", "2024-01-01", [{"employee_guid": "emp-1", "net_payout": "20.00"}])
+
+    statements = [sql for sql, _ in fake_db.executed]
+    lock_index = next(i for i, sql in enumerate(statements) if "FOR UPDATE" in sql and "CARRY_FORWARD" in sql)
+    adjust_index = next(i for i, sql in enumerate(statements) if sql.startswith("INSERT INTO GRATLYDB.STRIPE_EMPLOYEE_CARRY_FORWARD"))
+    state_index = next(i for i, sql in enumerate(statements) if "INSERT IGNORE INTO GRATLYDB.STRIPE_SETTLEMENT_TRANSFER_STATE" in sql)
+    assert lock_index < adjust_index < state_index
+    assert fake_db.executed[adjust_index][1] == ("rest-1", "emp-1", 7, -550)
+    assert fake_db.commits == 1
+
+
+def test_plan_is_abandoned_when_settlement_was_planned_concurrently(fake_db, monkeypatch):
+    monkeypatch.setattr(
+        settlement_executor, "_fetch_settlement_transfer_context", lambda settlement_id, guids: (set(), {"emp-1": READY_ACCOUNT})
+    )
+    fake_db.on(r"FROM GRATLYDB\.STRIPE_SETTLEMENT_TRANSFER_STATE WHERE SETTLEMENT_ID = %s LIMIT 1 FOR UPDATE", rows=[(1,)])
+
+    settlement_executor._plan_settlement("settle-1", 7, "rest-1", None, [{"employee_guid": "emp-1", "net_payout": "20.00"}])
+
+    assert not fake_db.statements(r"^INSERT")
+    assert fake_db.rollbacks == 1 and fake_db.commits == 0
+
+
+def _claimed_state(attempts=1):
+    return {
+        "settlement_id": "settle-1",
+        "employee_guid": "emp-1",
+        "restaurant_id": 7,
+        "restaurant_guid": "rest-1",
+        "business_date": "2024-01-01",
+        "stripe_account_id": "acct_1",
+        "amount_cents": 2450,
+        "fee_cents": 100,
+        "carry_forward_cents": 550,
+        "attempts": attempts,
+    }
+
+
+def _claim_once(fake_db, state):
+    claims = {"count": 0}
+
+    def claim(sql, params):
+        claims["count"] += 1
+        return {"rows": [], "rowcount": 1 if claims["count"] == 1 else 0}
+
+    fake_db.on(r"^SELECT NOW\(\) AS now", rows=[{"now": datetime(2024, 1, 2)}])
+    fake_db.on(r"SET STATUS = 'sending'", handler=claim)
+    fake_db.on(r"WHERE SETTLEMENT_ID = %s AND STATUS = 'sending' AND CLAIMED_BY = %s", rows=[state])
+    fake_db.on(r"SET STATUS = %s, LAST_ERROR = %s", rowcount=1)
+    return claims
+
+
+def test_executor_claims_rows_before_sending(fake_db, monkeypatch):
+    sent = []
+    monkeypatch.setattr(settlement_executor, "_stripe_gateway", FakeGateway(lambda **kwargs: sent.append(kwargs) or {"id": "tr_1"}))
+    claims = _claim_once(fake_db, _claimed_state())
+
+    created, failed = settlement_executor._execute_settlement_transfers("settle-1")
+
+    assert (created, failed) == (1, 0)
+    assert claims["count"] == 2
+    assert sent[0]["idempotency_key"] == "tr_settle-1_emp-1"
+    claim_id = fake_db.statements(r"SET STATUS = 'sending'")[0][1][0]
+    sent_update = fake_db.statements(r"SET STATUS = 'sent'")[0]
+    assert sent_update[1] == ("tr_1", "settle-1", "emp-1", claim_id)
+
+
+def test_executor_sends_nothing_when_another_worker_holds_the_claim(fake_db, monkeypatch):
+    monkeypatch.setattr(settlement_executor, "_stripe_gateway", FakeGateway(lambda **kwargs: pytest.fail("sent twice")))
+    fake_db.on(r"^SELECT NOW\(\) AS now", rows=[{"now": datetime(2024, 1, 2)}])
+    fake_db.on(r"SET STATUS = 'sending'", rowcount=0)
+
+    assert settlement_executor._execute_settlement_transfers("settle-1") == (0, 0)
+
+
+def test_rejected_transfer_returns_to_carry_forward_after_last_attempt(fake_db, monkeypatch):
+    def reject(**kwargs):
+        raise FakeStripeError("account closed")
+
+    monkeypatch.setattr(settlement_executor, "_stripe_gateway", FakeGateway(reject))
+    _claim_once(fake_db, _claimed_state(attempts=settlement_executor.SETTLEMENT_TRANSFER_MAX_ATTEMPTS))
+
+    assert settlement_executor._execute_settlement_transfers("settle-1") == (0, 1)
+
+    assert fake_db.statements(r"SET STATUS = %s, LAST_ERROR = %s")[0][1][0] == "carried_forward"
+    adjust = fake_db.statements(r"^INSERT INTO GRATLYDB\.STRIPE_EMPLOYEE_CARRY_FORWARD")
+    assert adjust[0][1] == ("rest-1", "emp-1", 7, 2550)
+
+
+@pytest.mark.parametrize("error", [APIConnectionError("timed out"), RuntimeError("worker bug")])
+def test_uncertain_failure_is_dead_lettered_for_an_admin(fake_db, monkeypatch, error):
+    def fail(**kwargs):
+        raise error
+
+    monkeypatch.setattr(settlement_executor, "_stripe_gateway", FakeGateway(fail))
+    _claim_once(fake_db, _claimed_state(attempts=settlement_executor.SETTLEMENT_TRANSFER_MAX_ATTEMPTS))
+
+    assert settlement_executor._execute_settlement_transfers("settle-1") == (0, 1)
+
+    assert fake_db.statements(r"SET STATUS = %s, LAST_ERROR = %s")[0][1][0] == "dead"
+    assert not fake_db.statements(r"^INSERT INTO GRATLYDB\.STRIPE_EMPLOYEE_CARRY_FORWARD")
+
+
+def test_failure_before_last_attempt_stays_retryable(fake_db, monkeypatch):
+    def reject(**kwargs):
+        raise FakeStripeError("rate limited")
+
+    monkeypatch.setattr(settlement_executor, "_stripe_gateway", FakeGateway(reject))
+    _claim_once(fake_db, _claimed_state(attempts=1))
+
+    settlement_executor._execute_settlement_transfers("settle-1")
+
+    assert fake_db.statements(r"SET STATUS = %s, LAST_ERROR = %s")[0][1][0] == "failed"
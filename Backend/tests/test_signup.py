@@ -0,0 +1,51 @@
+import asyncio
+
+from Backend import main
+
+
+def _signup_data():
+    return {"firstName": "A", "lastName": "B", "email": "new@example.com", "password": "Secret1!"}
+
+
+def test_signup_awaits_the_hashing_pool(fake_db, monkeypatch):
+    hashed = []
+
+    async def fake_hash(password):
+        hashed.append(password)
+        return "hashed"
+
+    monkeypatch.setattr(main, "hash_password_async", fake_hash)
+    monkeypatch.setattr(main, "issue_tokens_for_profile", lambda profile: {"access_token": "t"})
+    fake_db.on(r"INSERT INTO USER_MASTER", lastrowid=21)
+    fake_db.on(r"FROM GRATLYDB\.USER_MASTER um", rows=[{
+        "user_id": 21, "firstname": "A", "lastname": "B", "password_hash": "hashed", "token_version": 0,
+        "user_restaurant_id": None, "user_restaurant_guid": None, "user_restaurant_name": None,
+        "employee_guid": "emp", "email_restaurant_id": 7, "email_restaurant_guid": "rg",
+        "email_restaurant_name": "Bistro", "permission_names": "Employee",
+    }])
+
+    result = asyncio.run(main.signup(_signup_data()))
+
+    assert hashed == ["Secret1!"]
+    assert fake_db.statements(r"INSERT INTO USER_MASTER")[0][1][4] == "hashed"
+    assert (result["user_id"], result["restaurant_key"]) == (21, 7)
+
+
+def test_signup_takes_the_restaurant_from_the_profile_query(fake_db, monkeypatch):
+    async def fake_hash(password):
+        return "hashed"
+
+    monkeypatch.setattr(main, "hash_password_async", fake_hash)
+    monkeypatch.setattr(main, "issue_tokens_for_profile", lambda profile: {})
+    fake_db.on(r"INSERT INTO USER_MASTER", lastrowid=21)
+    fake_db.on(r"FROM GRATLYDB\.USER_MASTER um", rows=[{
+        "user_id": 21, "firstname": "A", "lastname": "B", "password_hash": "hashed", "token_version": 0,
+        "user_restaurant_id": None, "user_restaurant_guid": None, "user_restaurant_name": None,
+        "employee_guid": "emp", "email_restaurant_id": 7, "email_restaurant_guid": "rg",
+        "email_restaurant_name": "Bistro", "permission_names": "",
+    }])
+
+    asyncio.run(main.signup(dict(_signup_data(), email="profile@example.com")))
+
+    assert not fake_db.statements(r"FROM GRATLYDB\.SRC_EMPLOYEES se\s+JOIN")
+    assert fake_db.statements(r"UPDATE GRATLYDB\.USERRESTAURANT")[0][1] == (7, 21)
@@ -0,0 +1,47 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from Backend import stripe_backfill
+
+
+@pytest.fixture(autouse=True)
+def _admin(monkeypatch):
+    monkeypatch.setattr(stripe_backfill, "_require_admin_token", lambda request: None)
+
+
+def test_metadata_backfill_checks_the_stripe_key_before_any_sql(fake_db, monkeypatch):
+    monkeypatch.setattr(stripe_backfill, "_stripe_gateway", SimpleNamespace(configured=False))
+
+    with pytest.raises(HTTPException) as excinfo:
+        stripe_backfill.backfill_stripe_metadata(request=None)
+
+    assert excinfo.value.status_code == 500
+    assert not fake_db.executed
+
+
+def test_job_held_by_another_process_is_not_claimed(fake_db):
+    fake_db.on(r"GET_LOCK", rows=[{"acquired": 0}])
+
+    stripe_backfill._start_job("dispute-payload")
+
+    assert not fake_db.statements(r"INSERT INTO GRATLYDB\.STRIPE_BACKFILL_JOBS")
+    assert "dispute-payload" not in stripe_backfill._job_threads
+
+
+def test_sql_job_runs_in_chunks_until_nothing_changes(fake_db, monkeypatch):
+    steps = iter([5, 3, 0])
+    limits = []
+
+    def step(limit):
+        limits.append(limit)
+        return next(steps)
+
+    monkeypatch.setitem(stripe_backfill.STRIPE_BACKFILL_SQL_JOBS, "dispute-payload", step)
+
+    assert stripe_backfill._run_sql_job("dispute-payload") is True
+
+    assert limits == [stripe_backfill.BACKFILL_CHUNK_SIZE] * 3
+    progress = fake_db.statements(r"SET SCANNED = SCANNED \+ %s, UPDATED = UPDATED \+ %s")
+    assert [params for _, params in progress] == [(5, 5, "dispute-payload"), (3, 3, "dispute-payload")]
@@ -0,0 +1,43 @@
+import re
+
+import pytest
+
+from Backend import stripe_payments
+
+METADATA = {"employee_guid": "emp-1", "restaurant_guid": "rest-1"}
+
+EVENT_HANDLERS = [
+    ("STRIPE_PAYMENT_EVENTS", stripe_payments._handle_payment_intent_processing, "payment_intent.processing",
+     {"id": "pi_1", "amount": 1200, "currency": "usd", "status": "processing", "metadata": METADATA}),
+    ("STRIPE_DISPUTE_EVENTS", stripe_payments._handle_charge_dispute_event, "charge.dispute.created",
+     {"id": "dp_1", "charge": "ch_1", "amount": 500, "currency": "usd", "status": "needs_response",
+      "reason": "fraudulent", "metadata": METADATA}),
+    ("STRIPE_BALANCE_EVENTS", stripe_payments._handle_balance_available, "balance.available", {"object": "balance"}),
+    ("STRIPE_TRANSFER_EVENTS", stripe_payments._handle_transfer_event, "transfer.created",
+     {"id": "tr_1", "amount": 700, "currency": "usd", "destination": "acct_1", "metadata": METADATA}),
+    ("STRIPE_PAYOUT_EVENTS", stripe_payments._handle_payout_event, "payout.paid",
+     {"id": "po_1", "amount": 700, "currency": "usd", "status": "paid", "arrival_date": 1700000000,
+      "method": "standard", "destination": "ba_1", "metadata": METADATA}),
+]
+
+
+def _insert_shape(sql: str):
+    columns = re.search(r"\(([^)]*)\)\s*VALUES", sql).group(1)
+    values = sql[sql.index("VALUES"):]
+    return len([column for column in columns.split(",") if column.strip()]), values.count("%s")
+
+
+@pytest.mark.parametrize("compress", [False, True])
+@pytest.mark.parametrize("table, handler, event_type, data_object", EVENT_HANDLERS)
+def test_event_insert_binds_every_column(fake_db, monkeypatch, compress, table, handler, event_type, data_object):
+    monkeypatch.setattr(stripe_payments, "STRIPE_COMPRESS_RAW_PAYLOAD", compress)
+    event = {"id": "evt_1", "type": event_type, "created": 1700000000, "account": "acct_1",
+             "data": {"object": data_object}}
+
+    handler(event)
+
+    inserts = fake_db.statements(rf"INSERT IGNORE INTO GRATLYDB\.{table} ")
+    assert len(inserts) == 1
+    sql, params = inserts[0]
+    column_count, placeholder_count = _insert_shape(sql)
+    assert column_count == placeholder_count == len(params)
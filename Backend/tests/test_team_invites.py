@@ -0,0 +1,67 @@
+from Backend import main
+
+
+def _recipient(email):
+    return main.TeamInviteRecipient(email=email, first_name="A", last_name="B")
+
+
+def test_invite_ids_are_read_back_by_batch_not_assumed_consecutive(fake_db, monkeypatch):
+    monkeypatch.setattr(main, "TEAM_BULK_INVITE_CHUNK_SIZE", 2)
+    inserted = []
+
+    def insert(sql, params):
+        inserted.extend(params)
+        return {"rowcount": len(params) // 8, "lastrowid": 100}
+
+    def reselect(sql, params):
+        # Interleaved ids: another request grabbed 101 between our rows.
+        assert set(params) == {inserted[7]}
+        return {"rows": [
+            {"invite_id": 104, "email": "c@example.com"},
+            {"invite_id": 100, "email": "A@example.com"},
+            {"invite_id": 102, "email": "b@example.com"},
+        ]}
+
+    fake_db.on(r"INSERT INTO GRATLYDB\.EMAIL_INVITES", handler=insert)
+    fake_db.on(r"FROM GRATLYDB\.EMAIL_INVITES WHERE BATCH_ID = %s", handler=reselect)
+    cursor = main._get_cursor(dictionary=True)
+    recipients = [_recipient("A@example.com"), _recipient("b@example.com"), _recipient("c@example.com")]
+
+    assert main._insert_invite_logs(cursor, 9, recipients, "queued") == [100, 102, 104]
+
+    batch_ids = {inserted[index] for index in range(7, len(inserted), 8)}
+    assert len(batch_ids) == 1
+
+
+def test_uninvited_employees_skip_anyone_with_a_pending_invite(fake_db):
+    cursor = main._get_cursor(dictionary=True)
+
+    main._fetch_uninvited_employees(cursor, 7)
+
+    sql, params = fake_db.statements(r"FROM GRATLYDB\.SRC_EMPLOYEES")[0]
+    assert "NOT EXISTS" in sql
+    assert "tit.USED_AT IS NULL" in sql
+    assert "tit.EXPIRES_AT > UTC_TIMESTAMP()" in sql
+    assert params == (7,)
+
+
+def test_bulk_invite_wakes_the_sender_only_after_commit(fake_db, monkeypatch):
+    monkeypatch.setenv("SENDGRID_API_KEY", "key")
+    monkeypatch.setenv("SENDGRID_FROM_EMAIL", "team@example.com")
+    monkeypatch.setattr(main, "_fetch_restaurant_key", lambda user_id: 7)
+    monkeypatch.setattr(main, "_fetch_restaurant_name", lambda user_id: "Bistro")
+    monkeypatch.setattr(main, "get_branding", lambda restaurant_id, name: {"restaurant_name": name})
+    monkeypatch.setattr(main, "render_emails", lambda name, branding, contexts: [
+        {"subject": "s", "content": "c", "html_content": None} for _ in contexts
+    ])
+    commits_at_wake = []
+    monkeypatch.setattr(main, "wake_email_sender", lambda: commits_at_wake.append(fake_db.commits))
+    fake_db.on(r"FROM GRATLYDB\.EMAIL_INVITES WHERE BATCH_ID = %s",
+               rows=[{"invite_id": 5, "email": "new@example.com"}])
+    payload = main.TeamBulkInvitePayload(user_id=9, invites=[_recipient("new@example.com")])
+
+    result = main.send_team_invites_bulk(payload)
+
+    assert result["invite_ids"] == [5]
+    assert fake_db.statements(r"INSERT INTO GRATLYDB\.EMAIL_OUTBOX")
+    assert commits_at_wake == [1]
@@ -0,0 +1,84 @@
+import threading
+
+from Backend import webhook_inbox
+
+
+def _claimable(attempts=0):
+    return {"inbox_id": 11, "source": "platform", "event_type": "transfer.created", "attempts": attempts,
+            "payload": '{"id": "evt_1"}'}
+
+
+def test_claim_marks_the_row_processing_and_counts_the_attempt(fake_db):
+    fake_db.on(r"FOR UPDATE SKIP LOCKED", rows=[_claimable(attempts=2)])
+
+    row = webhook_inbox._claim_next_event("host:1:0")
+
+    assert row["attempts"] == 3
+    claim = fake_db.statements(r"SET STATUS = 'processing'")
+    assert claim[0][1] == ("host:1:0", 11)
+    assert "ATTEMPTS = ATTEMPTS + 1" in claim[0][0]
+    assert fake_db.commits == 1
+
+
+def test_claim_returns_nothing_when_the_inbox_is_empty(fake_db):
+    assert webhook_inbox._claim_next_event("host:1:0") is None
+    assert not fake_db.statements(r"SET STATUS = 'processing'")
+
+
+def test_failure_is_retried_until_the_last_attempt_then_dead_lettered(fake_db, monkeypatch):
+    def explode(event):
+        raise RuntimeError("handler bug")
+
+    monkeypatch.setitem(webhook_inbox.WEBHOOK_DISPATCHERS, "platform", explode)
+
+    webhook_inbox._process_event(_claimable(attempts=1))
+    webhook_inbox._process_event(_claimable(attempts=webhook_inbox.WEBHOOK_MAX_ATTEMPTS))
+
+    statuses = [params[0] for _, params in fake_db.statements(r"SET STATUS = %s, NEXT_ATTEMPT_AT")]
+    assert statuses == ["pending", "dead"]
+    assert not fake_db.statements(r"SET STATUS = 'done'")
+
+
+def test_heartbeat_refreshes_only_this_process_claims(fake_db):
+    cursor = webhook_inbox._get_cursor(dictionary=False)
+
+    webhook_inbox._heartbeat_claims(cursor, ["host:1:0", "host:1:1"])
+    webhook_inbox._heartbeat_claims(cursor, [])
+
+    heartbeats = fake_db.statements(r"SET LOCKED_AT = NOW\(\)")
+    assert len(heartbeats) == 1
+    assert "LOCKED_BY IN (%s, %s)" in heartbeats[0][0]
+    assert heartbeats[0][1] == ("host:1:0", "host:1:1")
+
+
+def test_reaper_dead_letters_claims_that_exhausted_their_attempts(fake_db):
+    fake_db.on(r"LOCKED_AT < NOW\(\) - INTERVAL %s SECOND", rowcount=2)
+    cursor = webhook_inbox._get_cursor(dictionary=False)
+
+    assert webhook_inbox._release_stale_claims(cursor) == 2
+
+    sql, params = fake_db.statements(r"WHERE STATUS = 'processing' AND LOCKED_AT <")[0]
+    assert "STATUS = IF(ATTEMPTS >= %s, 'dead', 'pending')" in sql
+    assert params[0] == webhook_inbox.WEBHOOK_MAX_ATTEMPTS
+    assert params[-1] == webhook_inbox.WEBHOOK_LOCK_TIMEOUT_SECONDS
+
+
+def test_enqueue_wakes_every_waiting_worker(fake_db):
+    fake_db.on(r"INSERT IGNORE INTO GRATLYDB\.STRIPE_WEBHOOK_INBOX", rowcount=1)
+    seen = webhook_inbox._wake_seen()
+    woken = []
+
+    def wait():
+        webhook_inbox._wait_for_wake(seen, 5)
+        woken.append(threading.current_thread().name)
+
+    waiters = [threading.Thread(target=wait, name=f"worker-{index}") for index in range(3)]
+    for waiter in waiters:
+        waiter.start()
+
+    webhook_inbox._enqueue_webhook_event("platform", {"id": "evt_1", "type": "transfer.created",
+                                                      "data": {"object": {"id": "tr_1"}}})
+    for waiter in waiters:
+        waiter.join(timeout=2)
+
+    assert sorted(woken) == ["worker-0", "worker-1", "worker-2"]
@@ -0,0 +1,110 @@
+from fastapi import APIRouter, HTTPException, Request
+from typing import Dict
+import logging
+import os
+import threading
+import pymysql
+
+try:
+    from Backend.db import _get_cursor
+except ImportError:
+    from db import _get_cursor
+
+router = APIRouter()
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PURGE_INTERVAL_SECONDS = int(os.getenv("TOKEN_PURGE_INTERVAL_SECONDS") or 900)
+TOKEN_PURGE_BATCH_SIZE = int(os.getenv("TOKEN_PURGE_BATCH_SIZE") or 500)
+TOKEN_PURGE_BATCH_PAUSE_SECONDS = float(os.getenv("TOKEN_PURGE_BATCH_PAUSE_SECONDS") or 0.05)
+TOKEN_PURGE_RETENTION_SECONDS = int(os.getenv("TOKEN_PURGE_RETENTION_SECONDS") or 86400)
+TOKEN_PURGE_LOCK_NAME = "gratly_token_purge"
+
+# Each column is purged with its own statement so the DELETE walks that column's index.
+TOKEN_PURGE_TARGETS = [
+    ("PASSWORD_RESET_TOKENS", "EXPIRES_AT"),
+    ("PASSWORD_RESET_TOKENS", "USED_AT"),
+    ("TEAM_INVITE_TOKENS", "EXPIRES_AT"),
+    ("TEAM_INVITE_TOKENS", "USED_AT"),
+]
+
+_stop_event = threading.Event()
+_purger_thread = None
+
+
+def _purge_target(cursor, table: str, column: str) -> int:
+    purged = 0
+    while True:
+        cursor.execute(
+            f"""
+            DELETE FROM GRATLYDB.{table}
+            WHERE {column} < NOW() - INTERVAL %s SECOND
+            ORDER BY {column}
+            LIMIT %s
+            """,
+            (TOKEN_PURGE_RETENTION_SECONDS, TOKEN_PURGE_BATCH_SIZE),
+        )
+        purged += cursor.rowcount
+        if cursor.rowcount < TOKEN_PURGE_BATCH_SIZE or _stop_event.wait(TOKEN_PURGE_BATCH_PAUSE_SECONDS):
+            return purged
+
+
+def purge_expired_tokens() -> Dict[str, int]:
+    cursor = _get_cursor(dictionary=True)
+    try:
+        cursor.execute("SELECT GET_LOCK(%s, 0) AS acquired", (TOKEN_PURGE_LOCK_NAME,))
+        if (cursor.fetchone() or {}).get("acquired") != 1:
+            raise HTTPException(status_code=409, detail="Token purge already running")
+        try:
+            purged: Dict[str, int] = {}
+            for table, column in TOKEN_PURGE_TARGETS:
+                purged[table] = purged.get(table, 0) + _purge_target(cursor, table, column)
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (TOKEN_PURGE_LOCK_NAME,))
+    finally:
+        cursor.close()
+    if any(purged.values()):
+        logger.info("Purged expired and used tokens: %s", purged)
+    return purged
+
+
+def _purger_loop() -> None:
+    while not _stop_event.wait(TOKEN_PURGE_INTERVAL_SECONDS):
+        try:
+            purge_expired_tokens()
+        except HTTPException as err:
+            if err.status_code != 409:
+                logger.exception("Token purge failed")
+        except pymysql.MySQLError:
+            logger.exception("Token purge failed")
+
+
+def start_token_purger() -> None:
+    global _purger_thread
+    if _purger_thread is not None:
+        return
+    _stop_event.clear()
+    _purger_thread = threading.Thread(target=_purger_loop, name="token-purger", daemon=True)
+    _purger_thread.start()
+
+
+def stop_token_purger() -> None:
+    global _purger_thread
+    _stop_event.set()
+    if _purger_thread is not None:
+        _purger_thread.join(timeout=5)
+    _purger_thread = None
+
+
+@router.post("/admin/security/token-purge/run")
+def run_token_purge(request: Request):
+    try:
+        from Backend.stripe_payments import _require_admin_token
+    except ImportError:
+        from stripe_payments import _require_admin_token
+    _require_admin_token(request)
+    try:
+        purged = purge_expired_tokens()
+    except pymysql.MySQLError as err:
+        raise HTTPException(status_code=500, detail=f"Error purging tokens: {err}")
+    return {"success": True, "purged": purged}
@@ -0,0 +1,354 @@
+from fastapi import APIRouter, HTTPException, Request
+from typing import Any, Callable, Dict, List, Optional
+import json
+import logging
+import os
+import socket
+import threading
+import pymysql
+
+try:
+    from Backend.db import _get_cursor
+    from Backend.stripe_payments import _dispatch_connect_event, _dispatch_event, _require_admin_token
+except ImportError:
+    from db import _get_cursor
+    from stripe_payments import _dispatch_connect_event, _dispatch_event, _require_admin_token
+
+router = APIRouter()
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS") or 4)
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv("WEBHOOK_MAX_ATTEMPTS") or 8)
+WEBHOOK_POLL_SECONDS = float(os.getenv("WEBHOOK_POLL_SECONDS") or 1.0)
+WEBHOOK_LOCK_TIMEOUT_SECONDS = int(os.getenv("WEBHOOK_LOCK_TIMEOUT_SECONDS") or 300)
+WEBHOOK_HEARTBEAT_SECONDS = int(os.getenv("WEBHOOK_HEARTBEAT_SECONDS") or max(1, WEBHOOK_LOCK_TIMEOUT_SECONDS // 3))
+WEBHOOK_RETRY_BASE_SECONDS = int(os.getenv("WEBHOOK_RETRY_BASE_SECONDS") or 30)
+WEBHOOK_RETRY_MAX_SECONDS = 3600
+
+WEBHOOK_DISPATCHERS: Dict[str, Callable[[Dict[str, Any]], None]] = {
+    "platform": _dispatch_event,
+    "connect": _dispatch_connect_event,
+}
+
+_wake_condition = threading.Condition()
+_wake_generation = 0
+_stop_event = threading.Event()
+_worker_threads: List[threading.Thread] = []
+_worker_ids: List[str] = []
+
+
+def _wake_workers() -> None:
+    global _wake_generation
+    with _wake_condition:
+        _wake_generation += 1
+        _wake_condition.notify_all()
+
+
+def _wake_seen() -> int:
+    with _wake_condition:
+        return _wake_generation
+
+
+def _wait_for_wake(seen: int, timeout: float) -> None:
+    with _wake_condition:
+        _wake_condition.wait_for(lambda: _wake_generation != seen or _stop_event.is_set(), timeout)
+
+
+def _enqueue_webhook_event(source: str, event: Dict[str, Any]) -> bool:
+    event_id = event.get("id")
+    if not event_id:
+        raise HTTPException(status_code=400, detail="Stripe event id missing")
+    data_object = (event.get("data") or {}).get("object") or {}
+    object_id = data_object.get("id") if isinstance(data_object, dict) else None
+    cursor = _get_cursor(dictionary=False)
+    try:
+        cursor.execute(
+            """
+            INSERT IGNORE INTO GRATLYDB.STRIPE_WEBHOOK_INBOX (
+                EVENT_ID,
+                SOURCE,
+                EVENT_TYPE,
+                OBJECT_ID,
+                PAYLOAD
+            )
+            VALUES (%s, %s, %s, %s, %s)
+            """,
+            (event_id, source, event.get("type"), object_id, json.dumps(event)),
+        )
+        cursor.connection.commit()
+        inserted = cursor.rowcount > 0
+    except pymysql.MySQLError as err:
+        raise HTTPException(status_code=500, detail=f"Error storing Stripe event: {err}")
+    finally:
+        cursor.close()
+    if inserted:
+        _wake_workers()
+    return inserted
+
+
+def _heartbeat_claims(cursor, worker_ids: List[str]) -> None:
+    if not worker_ids:
+        return
+    placeholders = ", ".join(["%s"] * len(worker_ids))
+    cursor.execute(
+        f"""
+        UPDATE GRATLYDB.STRIPE_WEBHOOK_INBOX
+        SET LOCKED_AT = NOW()
+        WHERE STATUS = 'processing'
+          AND LOCKED_BY IN ({placeholders})
+        """,
+        tuple(worker_ids),
+    )
+
+
+def _release_stale_claims(cursor) -> int:
+    # Live workers heartbeat their claims, so a claim this old belongs to a worker that is gone.
+    # The claim already counted an attempt; an event that keeps killing its worker is dead-lettered.
+    cursor.execute(
+        """
+        UPDATE GRATLYDB.STRIPE_WEBHOOK_INBOX
+        SET STATUS = IF(ATTEMPTS >= %s, 'dead', 'pending'),
+            NEXT_ATTEMPT_AT = NOW() + INTERVAL LEAST(%s * POW(2, GREATEST(ATTEMPTS - 1, 0)), %s) SECOND,
+            LAST_ERROR = CONCAT('Claim by ', LOCKED_BY, ' expired'),
+            LOCKED_BY = NULL,
+            LOCKED_AT = NULL
+        WHERE STATUS = 'processing'
+          AND LOCKED_AT < NOW() - INTERVAL %s SECOND
+        """,
+        (WEBHOOK_MAX_ATTEMPTS, WEBHOOK_RETRY_BASE_SECONDS, WEBHOOK_RETRY_MAX_SECONDS, WEBHOOK_LOCK_TIMEOUT_SECONDS),
+    )
+    return cursor.rowcount
+
+
+def _claim_next_event(worker_id: str) -> Optional[Dict[str, Any]]:
+    cursor = _get_cursor(dictionary=True)
+    conn = cursor.connection
+    try:
+        conn.begin()
+        cursor.execute(
+            """
+            SELECT inbox.INBOX_ID AS inbox_id,
+                   inbox.SOURCE AS source,
+                   inbox.EVENT_TYPE AS event_type,
+                   inbox.ATTEMPTS AS attempts,
+                   inbox.PAYLOAD AS payload
+            FROM GRATLYDB.STRIPE_WEBHOOK_INBOX inbox
+            WHERE inbox.STATUS = 'pending'
+              AND inbox.NEXT_ATTEMPT_AT <= NOW()
+              AND NOT EXISTS (
+                  SELECT 1
+                  FROM GRATLYDB.STRIPE_WEBHOOK_INBOX earlier
+                  WHERE earlier.OBJECT_ID = inbox.OBJECT_ID
+                    AND earlier.INBOX_ID < inbox.INBOX_ID
+                    AND earlier.STATUS IN ('pending', 'processing')
+              )
+            ORDER BY inbox.INBOX_ID
+            LIMIT 1
+            FOR UPDATE SKIP LOCKED
+            """
+        )
+        row = cursor.fetchone()
+        if not row:
+            conn.commit()
+            return None
+        cursor.execute(
+            """
+            UPDATE GRATLYDB.STRIPE_WEBHOOK_INBOX
+            SET STATUS = 'processing',
+                ATTEMPTS = ATTEMPTS + 1,
+                LOCKED_BY = %s,
+                LOCKED_AT = NOW()
+            WHERE INBOX_ID = %s
+            """,
+            (worker_id, row["inbox_id"]),
+        )
+        conn.commit()
+        row["attempts"] = int(row.get("attempts") or 0) + 1
+        return row
+    except pymysql.MySQLError:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def _complete_event(inbox_id: int) -> None:
+    cursor = _get_cursor(dictionary=False)
+    try:
+        cursor.execute(
+            """
+            UPDATE GRATLYDB.STRIPE_WEBHOOK_INBOX
+            SET STATUS = 'done', LOCKED_BY = NULL, LOCKED_AT = NULL, LAST_ERROR = NULL, PROCESSED_AT = NOW()
+            WHERE INBOX_ID = %s
+            """,
+            (inbox_id,),
+        )
+        cursor.connection.commit()
+    finally:
+        cursor.close()
+
+
+def _fail_event(inbox_id: int, attempts: int, error: str) -> None:
+    dead = attempts >= WEBHOOK_MAX_ATTEMPTS
+    delay_seconds = min(WEBHOOK_RETRY_BASE_SECONDS * (2 ** (attempts - 1)), WEBHOOK_RETRY_MAX_SECONDS)
+    cursor = _get_cursor(dictionary=False)
+    try:
+        cursor.execute(
+            """
+            UPDATE GRATLYDB.STRIPE_WEBHOOK_INBOX
+            SET STATUS = %s,
+                NEXT_ATTEMPT_AT = NOW() + INTERVAL %s SECOND,
+                LOCKED_BY = NULL,
+                LOCKED_AT = NULL,
+                LAST_ERROR = %s
+            WHERE INBOX_ID = %s
+            """,
+            ("dead" if dead else "pending", delay_seconds, error[:65000], inbox_id),
+        )
+        cursor.connection.commit()
+    finally:
+        cursor.close()
+    if dead:
+        logger.error("Stripe inbox event %s dead-lettered after %s attempts", inbox_id, attempts)
+
+
+def _process_event(row: Dict[str, Any]) -> None:
+    inbox_id = row["inbox_id"]
+    try:
+        payload = row.get("payload")
+        event = json.loads(payload) if isinstance(payload, (str, bytes)) else payload
+        dispatcher = WEBHOOK_DISPATCHERS.get(row.get("source"))
+        if dispatcher is None:
+            raise ValueError(f"Unknown webhook source {row.get('source')}")
+        dispatcher(event)
+    except Exception as exc:
+        logger.exception("Stripe inbox event %s (%s) failed", inbox_id, row.get("event_type"))
+        _fail_event(inbox_id, int(row["attempts"]), f"{type(exc).__name__}: {exc}")
+        return
+    _complete_event(inbox_id)
+
+
+def _drain_once(worker_id: str) -> bool:
+    row = _claim_next_event(worker_id)
+    if not row:
+        return False
+    _process_event(row)
+    return True
+
+
+def _worker_loop(worker_id: str) -> None:
+    while not _stop_event.is_set():
+        seen = _wake_seen()
+        try:
+            if _drain_once(worker_id):
+                continue
+        except (pymysql.MySQLError, HTTPException):
+            logger.exception("Stripe inbox worker %s failed to claim an event", worker_id)
+        _wait_for_wake(seen, WEBHOOK_POLL_SECONDS)
+
+
+def _reaper_loop() -> None:
+    while not _stop_event.wait(WEBHOOK_HEARTBEAT_SECONDS):
+        cursor = None
+        try:
+            cursor = _get_cursor(dictionary=False)
+            _heartbeat_claims(cursor, _worker_ids)
+            released = _release_stale_claims(cursor)
+            cursor.connection.commit()
+            if released:
+                logger.warning("Released %s abandoned Stripe inbox claims", released)
+                _wake_workers()
+        except (pymysql.MySQLError, HTTPException):
+            logger.exception("Stripe inbox reaper failed")
+        finally:
+            if cursor is not None:
+                cursor.close()
+
+
+def start_webhook_workers() -> None:
+    if _worker_threads:
+        return
+    _stop_event.clear()
+    host = socket.gethostname()
+    for index in range(WEBHOOK_WORKERS):
+        worker_id = f"{host}:{os.getpid()}:{index}"
+        _worker_ids.append(worker_id)
+        thread = threading.Thread(target=_worker_loop, args=(worker_id,), name=f"stripe-inbox-{index}", daemon=True)
+        thread.start()
+        _worker_threads.append(thread)
+    reaper = threading.Thread(target=_reaper_loop, name="stripe-inbox-reaper", daemon=True)
+    reaper.start()
+    _worker_threads.append(reaper)
+
+
+def stop_webhook_workers() -> None:
+    _stop_event.set()
+    _wake_workers()
+    for thread in _worker_threads:
+        thread.join(timeout=5)
+    _worker_threads.clear()
+    _worker_ids.clear()
+
+
+@router.get("/admin/stripe/webhook-inbox")
+def get_webhook_inbox(request: Request, status: str = "dead", limit: int = 50):
+    _require_admin_token(request)
+    safe_limit = max(1, min(int(limit), 500))
+    cursor = _get_cursor(dictionary=True)
+    try:
+        cursor.execute(
+            """
+            SELECT STATUS AS status, COUNT(*) AS count
+            FROM GRATLYDB.STRIPE_WEBHOOK_INBOX
+            GROUP BY STATUS
+            """
+        )
+        counts = {row["status"]: int(row["count"]) for row in cursor.fetchall()}
+        cursor.execute(
+            """
+            SELECT INBOX_ID AS inboxId,
+                   EVENT_ID AS eventId,
+                   SOURCE AS source,
+                   EVENT_TYPE AS eventType,
+                   OBJECT_ID AS objectId,
+                   ATTEMPTS AS attempts,
+                   NEXT_ATTEMPT_AT AS nextAttemptAt,
+                   LAST_ERROR AS lastError,
+                   RECEIVED_AT AS receivedAt
+            FROM GRATLYDB.STRIPE_WEBHOOK_INBOX
+            WHERE STATUS = %s
+            ORDER BY INBOX_ID DESC
+            LIMIT %s
+            """,
+            (status, safe_limit),
+        )
+        return {"counts": counts, "events": cursor.fetchall()}
+    except pymysql.MySQLError as err:
+        raise HTTPException(status_code=500, detail=f"Error fetching webhook inbox: {err}")
+    finally:
+        cursor.close()
+
+
+@router.post("/admin/stripe/webhook-inbox/{inbox_id}/retry")
+def retry_webhook_inbox_event(inbox_id: int, request: Request):
+    _require_admin_token(request)
+    cursor = _get_cursor(dictionary=False)
+    try:
+        cursor.execute(
+            """
+            UPDATE GRATLYDB.STRIPE_WEBHOOK_INBOX
+            SET STATUS = 'pending', ATTEMPTS = 0, NEXT_ATTEMPT_AT = NOW(), LAST_ERROR = NULL
+            WHERE INBOX_ID = %s AND STATUS = 'dead'
+            """,
+            (inbox_id,),
+        )
+        cursor.connection.commit()
+        if cursor.rowcount == 0:
+            raise HTTPException(status_code=404, detail="Dead-lettered event not found")
+    except pymysql.MySQLError as err:
+        raise HTTPException(status_code=500, detail=f"Error requeueing webhook event: {err}")
+    finally:
+        cursor.close()
+    _wake_workers()
+    return {"success": True, "inboxId": inbox_id}
@@ -0,0 +1,352 @@
+from datetime import datetime
+from fastapi import HTTPException
+from typing import Any, Dict, Iterator, List, Optional
+import argparse
+import json
+import logging
+import threading
+import time
+import uuid
+import pymysql
+
+try:
+    from Backend.db import _get_cursor, STRIPE_EVENT_TABLES
+    from Backend.stripe_payments import (
+        _dispatch_connect_event,
+        _dispatch_event,
+        _load_raw_payload,
+        _stripe_gateway,
+    )
+except ImportError:
+    from db import _get_cursor, STRIPE_EVENT_TABLES
+    from stripe_payments import (
+        _dispatch_connect_event,
+        _dispatch_event,
+        _load_raw_payload,
+        _stripe_gateway,
+    )
+
+logger = logging.getLogger(__name__)
+
+CONNECT_EVENT_PREFIXES = ("payout.", "transfer.")
+DEFAULT_REPLAY_EVENT_TYPES = (
+    "payment_intent.payment_failed",
+    "payment_intent.processing",
+    "payment_intent.requires_action",
+    "charge.dispute.created",
+    "charge.dispute.closed",
+    "balance.available",
+    "transfer.created",
+    "transfer.reversed",
+    "payout.paid",
+    "payout.failed",
+    "payout.canceled",
+)
+CLEANUP_CHUNK_SIZE = 500
+
+
+class _StubStripeError(Exception):
+    pass
+
+
+class _StubStripeResource:
+    def __init__(self, stub: "_ReplayStripeStub", name: str):
+        self._stub = stub
+        self._name = name
+
+    def retrieve(self, object_id: str, **kwargs) -> Dict[str, Any]:
+        self._stub.pause()
+        return {
+            "id": object_id,
+            "object": self._name.lower(),
+            "metadata": dict(self._stub.metadata),
+            "charges_enabled": True,
+            "payouts_enabled": True,
+            "details_submitted": True,
+        }
+
+
+class _ReplayStripeStub:
+    def __init__(self, latency_ms: float, employee_guid: str, restaurant_guid: str):
+        self.latency_seconds = max(0.0, latency_ms) / 1000
+        self.metadata = {"employee_guid": employee_guid, "restaurant_guid": restaurant_guid}
+
+    def pause(self) -> None:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+
+    def __getattr__(self, resource_name: str) -> _StubStripeResource:
+        return _StubStripeResource(self, resource_name)
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.queries = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._original_query = None
+        self._original_connect = None
+
+    def __enter__(self) -> "_QueryCounter":
+        connection_class = pymysql.connections.Connection
+        self._original_query = connection_class.query
+        self._original_connect = connection_class.connect
+        counter = self
+        original_query = self._original_query
+        original_connect = self._original_connect
+
+        def _query(connection, sql, unbuffered=False):
+            with counter._lock:
+                counter.queries += 1
+            return original_query(connection, sql, unbuffered)
+
+        def _connect(connection, sock=None):
+            with counter._lock:
+                counter.connections += 1
+            return original_connect(connection, sock)
+
+        connection_class.query = _query
+        connection_class.connect = _connect
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        connection_class = pymysql.connections.Connection
+        connection_class.query = self._original_query
+        connection_class.connect = self._original_connect
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {"queries": self.queries, "connections": self.connections}
+
+
+def _iter_stored_events(event_types: List[str], limit: int) -> Iterator[Dict[str, Any]]:
+    placeholders = ", ".join(["%s"] * len(event_types))
+    per_table = max(1, limit)
+    rows: List[Dict[str, Any]] = []
+    cursor = _get_cursor(dictionary=True)
+    try:
+        for table in STRIPE_EVENT_TABLES:
+            cursor.execute(
+                f"""
+                SELECT CREATED_AT AS created_at,
+                       RAW_PAYLOAD AS raw_payload,
+                       RAW_PAYLOAD_COMPRESSED AS raw_payload_compressed
+                FROM GRATLYDB.{table}
+                WHERE EVENT_TYPE IN ({placeholders})
+                ORDER BY CREATED_AT DESC
+                LIMIT %s
+                """,
+                (*event_types, per_table),
+            )
+            rows.extend(cursor.fetchall())
+    finally:
+        cursor.close()
+    rows.sort(key=lambda row: row["created_at"] or datetime.min)
+    for row in rows[-limit:]:
+        event = _load_raw_payload(row["raw_payload"], row["raw_payload_compressed"])
+        if isinstance(event, dict) and event.get("type"):
+            yield event
+
+
+def _synthetic_event(
+    event_type: str,
+    index: int,
+    employee_guid: str,
+    restaurant_guid: str,
+    with_metadata: bool = True,
+) -> Dict[str, Any]:
+    metadata = {"employee_guid": employee_guid, "restaurant_guid": restaurant_guid} if with_metadata else {}
+    created = int(time.time())
+    resource = event_type.split(".", 1)[0]
+    data_object: Dict[str, Any] = {
+        "id": f"{resource[:2]}_replay_{index}",
+        "object": resource,
+        "amount": 1000 + index % 5000,
+        "currency": "usd",
+        "created": created,
+        "metadata": metadata,
+    }
+    event: Dict[str, Any] = {"type": event_type, "created": created, "data": {"object": data_object}}
+    if resource == "payment_intent":
+        data_object["status"] = event_type.split(".", 1)[1]
+    elif resource == "charge":
+        data_object.update({"object": "dispute", "id": f"dp_replay_{index}", "charge": f"ch_replay_{index}"})
+        data_object["status"] = "needs_response" if event_type.endswith("created") else "lost"
+    elif resource == "balance":
+        data_object = {"object": "balance", "available": [{"amount": 1000 + index, "currency": "usd"}]}
+        event["data"] = {"object": data_object}
+    elif resource == "transfer":
+        data_object.update({"id": f"tr_replay_{index}", "destination": "acct_replay", "status": "paid"})
+        event["account"] = "acct_replay"
+    elif resource == "payout":
+        data_object.update(
+            {
+                "id": f"po_replay_{index}",
+                "status": event_type.split(".", 1)[1],
+                "arrival_date": created,
+                "method": "standard",
+                "destination": "ba_replay",
+            }
+        )
+        event["account"] = "acct_replay"
+    return event
+
+
+def _iter_synthetic_events(
+    event_types: List[str],
+    count: int,
+    employee_guid: str,
+    restaurant_guid: str,
+    with_metadata: bool = True,
+) -> Iterator[Dict[str, Any]]:
+    for index in range(count):
+        event_type = event_types[index % len(event_types)]
+        yield _synthetic_event(event_type, index, employee_guid, restaurant_guid, with_metadata)
+
+
+def _replay_event(event: Dict[str, Any]) -> None:
+    if str(event.get("type") or "").startswith(CONNECT_EVENT_PREFIXES):
+        _dispatch_connect_event(event)
+    else:
+        _dispatch_event(event)
+
+
+def _delete_replayed_events(event_ids: List[str]) -> int:
+    deleted = 0
+    cursor = _get_cursor(dictionary=False)
+    try:
+        for start in range(0, len(event_ids), CLEANUP_CHUNK_SIZE):
+            chunk = event_ids[start:start + CLEANUP_CHUNK_SIZE]
+            placeholders = ", ".join(["%s"] * len(chunk))
+            for table in STRIPE_EVENT_TABLES:
+                cursor.execute(f"DELETE FROM GRATLYDB.{table} WHERE EVENT_ID IN ({placeholders})", chunk)
+                deleted += cursor.rowcount
+            cursor.connection.commit()
+    finally:
+        cursor.close()
+    return deleted
+
+
+def _percentile(samples: List[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_replay(
+    source: str = "synthetic",
+    event_types: Optional[List[str]] = None,
+    count: int = 1000,
+    stub_latency_ms: float = 0.0,
+    employee_guid: str = "replay-employee",
+    restaurant_guid: str = "replay-restaurant",
+    keep_events: bool = False,
+    with_metadata: bool = True,
+) -> Dict[str, Any]:
+    event_types = list(event_types or DEFAULT_REPLAY_EVENT_TYPES)
+    _stripe_gateway.use_module(
+        _ReplayStripeStub(stub_latency_ms, employee_guid, restaurant_guid),
+        error=_StubStripeError,
+        secret_key="sk_test_replay",
+    )
+    if source == "stored":
+        events = list(_iter_stored_events(event_types, count))
+    else:
+        events = list(_iter_synthetic_events(event_types, count, employee_guid, restaurant_guid, with_metadata))
+
+    run_id = uuid.uuid4().hex[:12]
+    replayed_ids: List[str] = []
+    per_type: Dict[str, Dict[str, Any]] = {}
+    failures = 0
+    with _QueryCounter() as counter:
+        started = time.perf_counter()
+        for index, event in enumerate(events):
+            event = dict(event)
+            event["id"] = f"evt_replay_{run_id}_{index}"
+            event_type = event["type"]
+            before = counter.snapshot()
+            event_started = time.perf_counter()
+            try:
+                _replay_event(event)
+            except (pymysql.MySQLError, HTTPException):
+                failures += 1
+                logger.exception("Replay of %s failed", event_type)
+            elapsed_ms = (time.perf_counter() - event_started) * 1000
+            after = counter.snapshot()
+            replayed_ids.append(event["id"])
+            stats = per_type.setdefault(event_type, {"events": 0, "queries": 0, "connections": 0, "latencies": []})
+            stats["events"] += 1
+            stats["queries"] += after["queries"] - before["queries"]
+            stats["connections"] += after["connections"] - before["connections"]
+            stats["latencies"].append(elapsed_ms)
+        elapsed = time.perf_counter() - started
+        totals = counter.snapshot()
+
+    deleted = 0
+    if replayed_ids and not keep_events:
+        deleted = _delete_replayed_events(replayed_ids)
+
+    total_events = len(events)
+    summary_types = {}
+    for event_type, stats in sorted(per_type.items()):
+        latencies = stats.pop("latencies")
+        summary_types[event_type] = {
+            "events": stats["events"],
+            "queriesPerEvent": round(stats["queries"] / stats["events"], 2),
+            "connectionsPerEvent": round(stats["connections"] / stats["events"], 2),
+            "p50Ms": round(_percentile(latencies, 0.5), 3),
+            "p95Ms": round(_percentile(latencies, 0.95), 3),
+        }
+    return {
+        "runId": run_id,
+        "source": source,
+        "events": total_events,
+        "failures": failures,
+        "elapsedSeconds": round(elapsed, 3),
+        "eventsPerSecond": round(total_events / elapsed, 1) if elapsed else 0.0,
+        "queriesPerEvent": round(totals["queries"] / total_events, 2) if total_events else 0.0,
+        "connectionsPerEvent": round(totals["connections"] / total_events, 2) if total_events else 0.0,
+        "stripeCalls": _stripe_gateway.metrics(),
+        "deletedEvents": deleted,
+        "types": summary_types,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay Stripe webhook events through the dispatch handlers.")
+    parser.add_argument("--source", choices=("synthetic", "stored"), default="synthetic")
+    parser.add_argument("--count", type=int, default=1000, help="Events to generate, or to load when replaying stored events")
+    parser.add_argument("--types", help="Comma separated event types (defaults to append-only event types)")
+    parser.add_argument("--stub-latency-ms", type=float, default=0.0, help="Simulated latency of stub Stripe API calls")
+    parser.add_argument("--employee-guid", default="replay-employee")
+    parser.add_argument("--restaurant-guid", default="replay-restaurant")
+    parser.add_argument("--keep-events", action="store_true", help="Leave replayed event rows in the event tables")
+    parser.add_argument(
+        "--without-metadata",
+        action="store_true",
+        help="Omit metadata from synthetic events so handlers resolve it through Stripe or the database",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(message)s")
+    event_types = [value.strip() for value in args.types.split(",") if value.strip()] if args.types else None
+    try:
+        summary = run_replay(
+            source=args.source,
+            event_types=event_types,
+            count=max(1, args.count),
+            stub_latency_ms=args.stub_latency_ms,
+            employee_guid=args.employee_guid,
+            restaurant_guid=args.restaurant_guid,
+            keep_events=args.keep_events,
+            with_metadata=not args.without_metadata,
+        )
+    except (pymysql.MySQLError, HTTPException) as err:
+        logger.error("Webhook replay failed: %s", getattr(err, "detail", err))
+        raise SystemExit(1)
+    print(json.dumps(summary, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
@@ -182,6 +182,7 @@ ALTER TABLE GRATLYDB.SRC_ONBOARDING AUTO_INCREMENT = 100;
     EMAIL VARCHAR(64) NOT NULL UNIQUE,
     PHONENUMBER VARCHAR(32),
     PASSWORD_HASH VARCHAR(255) NOT NULL,
+    TOKEN_VERSION INT NOT NULL DEFAULT 0,
     USERSTATUS BOOLEAN,
     CREATEDAT TIMESTAMP DEFAULT CURRENT_TIMESTAMP,2
     USERSTATUS TINYINT(1) DEFAULT NULL
@@ -297,13 +298,44 @@ LASTNAME VARCHAR(64),
 STATUS VARCHAR(32) NOT NULL,
 PROVIDER VARCHAR(32),
 PROVIDER_RESPONSE TEXT,
+BATCH_ID VARCHAR(32),
 CREATEDDATE DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
 MODIFIEDDATE DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
 INDEX IDX_EMAIL_INVITES_USERID (USERID),
 INDEX IDX_EMAIL_INVITES_EMAIL (EMAIL),
+INDEX IDX_EMAIL_INVITES_BATCH (BATCH_ID),
 CONSTRAINT FK_EMAIL_INVITES_USERID FOREIGN KEY(USERID) REFERENCES GRATLYDB.USER_MASTER(USERID)
 );
 
+CREATE TABLE IF NOT EXISTS GRATLYDB.TEAM_INVITE_TOKENS (
+INVITE_TOKEN_ID INT AUTO_INCREMENT PRIMARY KEY,
+INVITEID INT NOT NULL,
+RESTAURANTID INT NOT NULL,
+TOKEN_HASH VARCHAR(64) NOT NULL,
+EMAIL VARCHAR(128),
+EXPIRES_AT TIMESTAMP NOT NULL,
+USED_AT TIMESTAMP NULL,
+CREATED_AT TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+UNIQUE KEY UQ_TEAM_INVITE_TOKEN_HASH (TOKEN_HASH),
+INDEX IDX_TEAM_INVITE_TOKENS_EXPIRES (EXPIRES_AT),
+INDEX IDX_TEAM_INVITE_TOKENS_USED (USED_AT),
+INDEX (INVITEID),
+INDEX (RESTAURANTID)
+);
+
+CREATE TABLE IF NOT EXISTS GRATLYDB.PASSWORD_RESET_TOKENS (
+RESETID INT AUTO_INCREMENT PRIMARY KEY,
+USERID INT NOT NULL,
+TOKEN_HASH VARCHAR(64) NOT NULL,
+EXPIRES_AT TIMESTAMP NOT NULL,
+USED_AT TIMESTAMP NULL,
+CREATED_AT TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+UNIQUE KEY UQ_PASSWORD_RESET_TOKEN_HASH (TOKEN_HASH),
+INDEX IDX_PASSWORD_RESET_TOKENS_EXPIRES (EXPIRES_AT),
+INDEX IDX_PASSWORD_RESET_TOKENS_USED (USED_AT),
+INDEX (USERID)
+);
+
 CREATE TABLE IF NOT EXISTS GRATLYDB.PAYOUT_APPROVAL (
 PAYOUT_APPROVALID INT AUTO_INCREMENT PRIMARY KEY,
 RESTAURANTID INT NOT NULL,
@@ -371,6 +403,26 @@ UPDATED_AT DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTA
 UNIQUE KEY UQ_PAYOUT_FINAL (PAYOUT_APPROVALID, EMPLOYEEGUID, JOBTITLE, IS_CONTRIBUTOR),
 CONSTRAINT FK_PAYOUT_FINAL FOREIGN KEY(PAYOUT_APPROVALID) REFERENCES GRATLYDB.PAYOUT_APPROVAL(PAYOUT_APPROVALID));
 
+-- Pre-aggregated daily payout totals keyed by canonical business date (feeds time-series reports)
+CREATE TABLE IF NOT EXISTS GRATLYDB.PAYOUT_DAILY_TOTALS (
+  RESTAURANTID INT NOT NULL,
+  BUSINESS_DATE DATE NOT NULL,
+  EMPLOYEEGUID VARCHAR(36) NOT NULL DEFAULT '',
+  JOBTITLE VARCHAR(128) NOT NULL DEFAULT '',
+  EMPLOYEE_NAME VARCHAR(128),
+  TOTAL_SALES DECIMAL(14,2) NOT NULL DEFAULT 0,
+  NET_SALES DECIMAL(14,2) NOT NULL DEFAULT 0,
+  TIPS DECIMAL(14,2) NOT NULL DEFAULT 0,
+  GRATUITY DECIMAL(14,2) NOT NULL DEFAULT 0,
+  NET_PAYOUT DECIMAL(14,2) NOT NULL DEFAULT 0,
+  PREPAYOUT_DEDUCTION DECIMAL(14,2) NOT NULL DEFAULT 0,
+  UPDATED_AT DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (RESTAURANTID, BUSINESS_DATE, EMPLOYEEGUID, JOBTITLE)
+);
+
+CREATE INDEX IDX_PAYOUT_DAILY_EMPLOYEE
+  ON GRATLYDB.PAYOUT_DAILY_TOTALS (RESTAURANTID, EMPLOYEEGUID, BUSINESS_DATE);
+
 -- Stripe connected accounts for employee payouts
 CREATE TABLE IF NOT EXISTS GRATLYDB.STRIPE_CONNECTED_ACCOUNTS (
   RESTAURANTGUID VARCHAR(36),
@@ -495,6 +547,144 @@ CREATE TABLE IF NOT EXISTS GRATLYDB.STRIPE_SETTLEMENT_TRANSFERS (
 
 CREATE INDEX IDX_STRIPE_SETTLEMENT_TRANSFER_ID
   ON GRATLYDB.STRIPE_SETTLEMENT_TRANSFERS (TRANSFER_ID);
+CREATE INDEX IDX_STRIPE_SETTLEMENT_RESTAURANT_CREATED
+  ON GRATLYDB.STRIPE_SETTLEMENT_TRANSFERS (RESTAURANTGUID, CREATED_AT, EMPLOYEEGUID, AMOUNT_CENTS);
+
+-- Backfill settlement transfer restaurant guids from the employee record
+UPDATE GRATLYDB.STRIPE_SETTLEMENT_TRANSFERS st
+JOIN GRATLYDB.SRC_EMPLOYEES se
+  ON se.EMPLOYEEGUID = st.EMPLOYEEGUID
+SET st.RESTAURANTGUID = se.RESTAURANTGUID
+WHERE (st.RESTAURANTGUID IS NULL OR st.RESTAURANTGUID = '')
+  AND se.RESTAURANTGUID IS NOT NULL;
+
+-- Durable inbox of verified Stripe webhook events, drained by background workers
+CREATE TABLE IF NOT EXISTS GRATLYDB.STRIPE_WEBHOOK_INBOX (
+  INBOX_ID BIGINT AUTO_INCREMENT PRIMARY KEY,
+  EVENT_ID VARCHAR(255) NOT NULL UNIQUE,
+  SOURCE VARCHAR(16) NOT NULL,
+  EVENT_TYPE VARCHAR(128),
+  OBJECT_ID VARCHAR(255),
+  STATUS VARCHAR(16) NOT NULL DEFAULT 'pending',
+  ATTEMPTS INT NOT NULL DEFAULT 0,
+  NEXT_ATTEMPT_AT DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  LOCKED_BY VARCHAR(64),
+  LOCKED_AT DATETIME,
+  LAST_ERROR TEXT,
+  PAYLOAD JSON NOT NULL,
+  RECEIVED_AT DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PROCESSED_AT DATETIME
+);
+
+CREATE INDEX IDX_STRIPE_WEBHOOK_INBOX_STATUS ON GRATLYDB.STRIPE_WEBHOOK_INBOX (STATUS, NEXT_ATTEMPT_AT);
+CREATE INDEX IDX_STRIPE_WEBHOOK_INBOX_OBJECT ON GRATLYDB.STRIPE_WEBHOOK_INBOX (OBJECT_ID, INBOX_ID);
+
+-- Per-employee progress of settlement transfers, used to resume interrupted settlements
+CREATE TABLE IF NOT EXISTS GRATLYDB.STRIPE_SETTLEMENT_TRANSFER_STATE (
+  SETTLEMENT_ID VARCHAR(64) NOT NULL,
+  EMPLOYEEGUID VARCHAR(64) NOT NULL,
+  RESTAURANTID INT NOT NULL,
+  RESTAURANTGUID VARCHAR(36),
+  BUSINESS_DATE VARCHAR(32),
+  STATUS VARCHAR(16) NOT NULL DEFAULT 'pending',
+  STRIPE_ACCOUNT_ID VARCHAR(255),
+  AMOUNT_CENTS BIGINT NOT NULL DEFAULT 0,
+  FEE_CENTS BIGINT NOT NULL DEFAULT 0,
+  CARRY_FORWARD_CENTS BIGINT NOT NULL DEFAULT 0,
+  TRANSFER_ID VARCHAR(255),
+  ATTEMPTS INT NOT NULL DEFAULT 0,
+  LAST_ERROR TEXT,
+  CLAIMED_BY VARCHAR(64),
+  CLAIMED_AT DATETIME,
+  CREATED_AT DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  UPDATED_AT DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (SETTLEMENT_ID, EMPLOYEEGUID)
+);
+
+CREATE INDEX IDX_STRIPE_SETTLEMENT_STATE_STATUS ON GRATLYDB.STRIPE_SETTLEMENT_TRANSFER_STATE (STATUS, UPDATED_AT);
+
+-- Progress of resumable Stripe metadata backfill jobs
+CREATE TABLE IF NOT EXISTS GRATLYDB.STRIPE_BACKFILL_JOBS (
+  JOB_NAME VARCHAR(64) NOT NULL PRIMARY KEY,
+  STATUS VARCHAR(16) NOT NULL DEFAULT 'running',
+  CURSOR_VALUE VARCHAR(255),
+  SCANNED BIGINT NOT NULL DEFAULT 0,
+  UPDATED BIGINT NOT NULL DEFAULT 0,
+  LAST_ERROR TEXT,
+  STARTED_AT DATETIME,
+  UPDATED_AT DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  FINISHED_AT DATETIME
+);
+
+CREATE INDEX IDX_STRIPE_CONNECTED_ACCOUNT_ID ON GRATLYDB.STRIPE_CONNECTED_ACCOUNTS (STRIPE_ACCOUNT_ID);
+
+-- Last time a connected account's status was confirmed with Stripe
+ALTER TABLE GRATLYDB.STRIPE_CONNECTED_ACCOUNTS
+  ADD COLUMN LAST_REFRESHED_AT DATETIME;
+
+-- Discrepancies found by the settlement / transfer / payout reconciliation job
+CREATE TABLE IF NOT EXISTS GRATLYDB.STRIPE_RECONCILIATION_RESULTS (
+  RESULT_ID BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+  CHECK_TYPE VARCHAR(32) NOT NULL,
+  RESTAURANTID INT,
+  RESTAURANTGUID VARCHAR(36),
+  SETTLEMENT_ID VARCHAR(64) NOT NULL DEFAULT '',
+  EMPLOYEEGUID VARCHAR(64) NOT NULL DEFAULT '',
+  REFERENCE_ID VARCHAR(255) NOT NULL DEFAULT '',
+  EXPECTED_CENTS BIGINT,
+  ACTUAL_CENTS BIGINT,
+  DETAIL VARCHAR(255),
+  STATUS VARCHAR(16) NOT NULL DEFAULT 'open',
+  FIRST_SEEN_AT DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  LAST_SEEN_AT DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  RESOLVED_AT DATETIME,
+  UNIQUE KEY UQ_STRIPE_RECONCILIATION_RESULT (CHECK_TYPE, SETTLEMENT_ID, EMPLOYEEGUID, REFERENCE_ID)
+);
+
+CREATE INDEX IDX_STRIPE_RECONCILIATION_STATUS ON GRATLYDB.STRIPE_RECONCILIATION_RESULTS (STATUS, RESTAURANTID, LAST_SEEN_AT);
+
+-- High-water mark of the incremental reconciliation job
+CREATE TABLE IF NOT EXISTS GRATLYDB.STRIPE_RECONCILIATION_WATERMARKS (
+  NAME VARCHAR(64) NOT NULL PRIMARY KEY,
+  WATERMARK DATETIME NOT NULL
+);
+
+CREATE INDEX IDX_STRIPE_TRANSFER_TYPE_CREATED ON GRATLYDB.STRIPE_TRANSFER_EVENTS (EVENT_TYPE, CREATED_AT);
+CREATE INDEX IDX_STRIPE_PAYOUT_TYPE_CREATED ON GRATLYDB.STRIPE_PAYOUT_EVENTS (EVENT_TYPE, CREATED_AT);
+CREATE INDEX IDX_STRIPE_SETTLEMENT_STATE_UPDATED ON GRATLYDB.STRIPE_SETTLEMENT_TRANSFER_STATE (UPDATED_AT);
+CREATE INDEX IDX_STRIPE_SETTLEMENT_STATE_EMPLOYEE ON GRATLYDB.STRIPE_SETTLEMENT_TRANSFER_STATE (RESTAURANTID, EMPLOYEEGUID, CREATED_AT);
+
+-- Outbox of transactional emails, sent in batches by the background email sender
+CREATE TABLE IF NOT EXISTS GRATLYDB.EMAIL_OUTBOX (
+  OUTBOX_ID BIGINT AUTO_INCREMENT PRIMARY KEY,
+  TO_EMAIL VARCHAR(255) NOT NULL,
+  SENDER_NAME VARCHAR(255) NOT NULL,
+  SUBJECT VARCHAR(255) NOT NULL,
+  TEXT_CONTENT MEDIUMTEXT NOT NULL,
+  HTML_CONTENT MEDIUMTEXT,
+  INVITEID INT,
+  STATUS VARCHAR(16) NOT NULL DEFAULT 'pending',
+  ATTEMPTS INT NOT NULL DEFAULT 0,
+  NEXT_ATTEMPT_AT DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  LOCKED_BY VARCHAR(64),
+  LOCKED_AT DATETIME,
+  LAST_ERROR TEXT,
+  CREATED_AT DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  SENT_AT DATETIME
+);
+
+CREATE INDEX IDX_EMAIL_OUTBOX_STATUS ON GRATLYDB.EMAIL_OUTBOX (STATUS, NEXT_ATTEMPT_AT);
+
+-- Per-restaurant overrides for email template branding
+CREATE TABLE IF NOT EXISTS GRATLYDB.RESTAURANT_EMAIL_BRANDING (
+  RESTAURANTID INT NOT NULL PRIMARY KEY,
+  PRIMARY_COLOR VARCHAR(16),
+  BACKGROUND_COLOR VARCHAR(16),
+  BORDER_COLOR VARCHAR(16),
+  TEXT_COLOR VARCHAR(16),
+  LOGO_URL VARCHAR(1024),
+  UPDATED_AT DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
 
 -- Indexes for Stripe event tables
 CREATE INDEX IDX_STRIPE_PAYMENT_EMPLOYEE ON GRATLYDB.STRIPE_PAYMENT_EVENTS (EMPLOYEEGUID);
@@ -515,6 +705,57 @@ CREATE INDEX IDX_STRIPE_PAYOUT_EMPLOYEE ON GRATLYDB.STRIPE_PAYOUT_EVENTS (EMPLOY
 CREATE INDEX IDX_STRIPE_PAYOUT_RESTAURANT ON GRATLYDB.STRIPE_PAYOUT_EVENTS (RESTAURANTGUID);
 CREATE INDEX IDX_STRIPE_PAYOUT_ID ON GRATLYDB.STRIPE_PAYOUT_EVENTS (PAYOUT_ID);
 
+-- Stored generated columns extracted from RAW_PAYLOAD, plus optional compressed raw storage
+ALTER TABLE GRATLYDB.STRIPE_PAYMENT_EVENTS
+  ADD COLUMN PAYLOAD_EMPLOYEEGUID VARCHAR(64) GENERATED ALWAYS AS (COALESCE(NULLIF(JSON_VALUE(RAW_PAYLOAD, '$.data.object.metadata.employee_guid' RETURNING CHAR(64) NULL ON EMPTY NULL ON ERROR), ''), NULLIF(JSON_VALUE(RAW_PAYLOAD, '$.data.object.metadata.employeeGuid' RETURNING CHAR(64) NULL ON EMPTY NULL ON ERROR), ''))) STORED,
+  ADD COLUMN PAYLOAD_RESTAURANTGUID VARCHAR(36) GENERATED ALWAYS AS (COALESCE(NULLIF(JSON_VALUE(RAW_PAYLOAD, '$.data.object.metadata.restaurant_guid' RETURNING CHAR(36) NULL ON EMPTY NULL ON ERROR), ''), NULLIF(JSON_VALUE(RAW_PAYLOAD, '$.data.object.metadata.restaurantGuid' RETURNING CHAR(36) NULL ON EMPTY NULL ON ERROR), ''))) STORED,
+  ADD COLUMN PAYLOAD_OBJECT_ID VARCHAR(255) GENERATED ALWAYS AS (JSON_VALUE(RAW_PAYLOAD, '$.data.object.id' RETURNING CHAR(255) NULL ON EMPTY NULL ON ERROR)) STORED,
+  ADD COLUMN PAYLOAD_AMOUNT BIGINT GENERATED ALWAYS AS (JSON_VALUE(RAW_PAYLOAD, '$.data.object.amount' RETURNING SIGNED NULL ON EMPTY NULL ON ERROR)) STORED,
+  ADD COLUMN RAW_PAYLOAD_COMPRESSED LONGBLOB;
+CREATE INDEX IDX_STRIPE_PAYMENT_EVENTS_PAYLOAD_EMPLOYEE ON GRATLYDB.STRIPE_PAYMENT_EVENTS (PAYLOAD_EMPLOYEEGUID);
+CREATE INDEX IDX_STRIPE_PAYMENT_EVENTS_PAYLOAD_RESTAURANT ON GRATLYDB.STRIPE_PAYMENT_EVENTS (PAYLOAD_RESTAURANTGUID);
+CREATE INDEX IDX_STRIPE_PAYMENT_EVENTS_PAYLOAD_OBJECT ON GRATLYDB.STRIPE_PAYMENT_EVENTS (PAYLOAD_OBJECT_ID);
+
+ALTER TABLE GRATLYDB.STRIPE_DISPUTE_EVENTS
+  ADD COLUMN PAYLOAD_EMPLOYEEGUID VARCHAR(64) GENERATED ALWAYS AS (COALESCE(NULLIF(JSON_VALUE(RAW_PAYLOAD, '$.data.object.metadata.employee_guid' RETURNING CHAR(64) NULL ON EMPTY NULL ON ERROR), ''), NULLIF(JSON_VALUE(RAW_PAYLOAD, '$.data.object.metadata.employeeGuid' RETURNING CHAR(64) NULL ON EMPTY NULL ON ERROR), ''))) STORED,
+  ADD COLUMN PAYLOAD_RESTAURANTGUID VARCHAR(36) GENERATED ALWAYS AS (COALESCE(NULLIF(JSON_VALUE(RAW_PAYLOAD, '$.data.object.metadata.restaurant_guid' RETURNING CHAR(36) NULL ON EMPTY NULL ON ERROR), ''), NULLIF(JSON_VALUE(RAW_PAYLOAD, '$.data.object.metadata.restaurantGuid' RETURNING CHAR(36) NULL ON EMPTY NULL ON ERROR), ''))) STORED,
+  ADD COLUMN PAYLOAD_OBJECT_ID VARCHAR(255) GENERATED ALWAYS AS (JSON_VALUE(RAW_PAYLOAD, '$.data.object.id' RETURNING CHAR(255) NULL ON EMPTY NULL ON ERROR)) STORED,
+  ADD COLUMN PAYLOAD_AMOUNT BIGINT GENERATED ALWAYS AS (JSON_VALUE(RAW_PAYLOAD, '$.data.object.amount' RETURNING SIGNED NULL ON EMPTY NULL ON ERROR)) STORED,
+  ADD COLUMN RAW_PAYLOAD_COMPRESSED LONGBLOB;
+CREATE INDEX IDX_STRIPE_DISPUTE_EVENTS_PAYLOAD_EMPLOYEE ON GRATLYDB.STRIPE_DISPUTE_EVENTS (PAYLOAD_EMPLOYEEGUID);
+CREATE INDEX IDX_STRIPE_DISPUTE_EVENTS_PAYLOAD_RESTAURANT ON GRATLYDB.STRIPE_DISPUTE_EVENTS (PAYLOAD_RESTAURANTGUID);
+CREATE INDEX IDX_STRIPE_DISPUTE_EVENTS_PAYLOAD_OBJECT ON GRATLYDB.STRIPE_DISPUTE_EVENTS (PAYLOAD_OBJECT_ID);
+
+ALTER TABLE GRATLYDB.STRIPE_BALANCE_EVENTS
+  ADD COLUMN PAYLOAD_EMPLOYEEGUID VARCHAR(64) GENERATED ALWAYS AS (COALESCE(NULLIF(JSON_VALUE(RAW_PAYLOAD, '$.data.object.metadata.employee_guid' RETURNING CHAR(64) NULL ON EMPTY NULL ON ERROR), ''), NULLIF(JSON_VALUE(RAW_PAYLOAD, '$.data.object.metadata.employeeGuid' RETURNING CHAR(64) NULL ON EMPTY NULL ON ERROR), ''))) STORED,
+  ADD COLUMN PAYLOAD_RESTAURANTGUID VARCHAR(36) GENERATED ALWAYS AS (COALESCE(NULLIF(JSON_VALUE(RAW_PAYLOAD, '$.data.object.metadata.restaurant_guid' RETURNING CHAR(36) NULL ON EMPTY NULL ON ERROR), ''), NULLIF(JSON_VALUE(RAW_PAYLOAD, '$.data.object.metadata.restaurantGuid' RETURNING CHAR(36) NULL ON EMPTY NULL ON ERROR), ''))) STORED,
+  ADD COLUMN PAYLOAD_OBJECT_ID VARCHAR(255) GENERATED ALWAYS AS (JSON_VALUE(RAW_PAYLOAD, '$.data.object.id' RETURNING CHAR(255) NULL ON EMPTY NULL ON ERROR)) STORED,
+  ADD COLUMN PAYLOAD_AMOUNT BIGINT GENERATED ALWAYS AS (JSON_VALUE(RAW_PAYLOAD, '$.data.object.amount' RETURNING SIGNED NULL ON EMPTY NULL ON ERROR)) STORED,
+  ADD COLUMN RAW_PAYLOAD_COMPRESSED LONGBLOB;
+CREATE INDEX IDX_STRIPE_BALANCE_EVENTS_PAYLOAD_EMPLOYEE ON GRATLYDB.STRIPE_BALANCE_EVENTS (PAYLOAD_EMPLOYEEGUID);
+CREATE INDEX IDX_STRIPE_BALANCE_EVENTS_PAYLOAD_RESTAURANT ON GRATLYDB.STRIPE_BALANCE_EVENTS (PAYLOAD_RESTAURANTGUID);
+CREATE INDEX IDX_STRIPE_BALANCE_EVENTS_PAYLOAD_OBJECT ON GRATLYDB.STRIPE_BALANCE_EVENTS (PAYLOAD_OBJECT_ID);
+
+ALTER TABLE GRATLYDB.STRIPE_TRANSFER_EVENTS
+  ADD COLUMN PAYLOAD_EMPLOYEEGUID VARCHAR(64) GENERATED ALWAYS AS (COALESCE(NULLIF(JSON_VALUE(RAW_PAYLOAD, '$.data.object.metadata.employee_guid' RETURNING CHAR(64) NULL ON EMPTY NULL ON ERROR), ''), NULLIF(JSON_VALUE(RAW_PAYLOAD, '$.data.object.metadata.employeeGuid' RETURNING CHAR(64) NULL ON EMPTY NULL ON ERROR), ''))) STORED,
+  ADD COLUMN PAYLOAD_RESTAURANTGUID VARCHAR(36) GENERATED ALWAYS AS (COALESCE(NULLIF(JSON_VALUE(RAW_PAYLOAD, '$.data.object.metadata.restaurant_guid' RETURNING CHAR(36) NULL ON EMPTY NULL ON ERROR), ''), NULLIF(JSON_VALUE(RAW_PAYLOAD, '$.data.object.metadata.restaurantGuid' RETURNING CHAR(36) NULL ON EMPTY NULL ON ERROR), ''))) STORED,
+  ADD COLUMN PAYLOAD_OBJECT_ID VARCHAR(255) GENERATED ALWAYS AS (JSON_VALUE(RAW_PAYLOAD, '$.data.object.id' RETURNING CHAR(255) NULL ON EMPTY NULL ON ERROR)) STORED,
+  ADD COLUMN PAYLOAD_AMOUNT BIGINT GENERATED ALWAYS AS (JSON_VALUE(RAW_PAYLOAD, '$.data.object.amount' RETURNING SIGNED NULL ON EMPTY NULL ON ERROR)) STORED,
+  ADD COLUMN RAW_PAYLOAD_COMPRESSED LONGBLOB;
+CREATE INDEX IDX_STRIPE_TRANSFER_EVENTS_PAYLOAD_EMPLOYEE ON GRATLYDB.STRIPE_TRANSFER_EVENTS (PAYLOAD_EMPLOYEEGUID);
+CREATE INDEX IDX_STRIPE_TRANSFER_EVENTS_PAYLOAD_RESTAURANT ON GRATLYDB.STRIPE_TRANSFER_EVENTS (PAYLOAD_RESTAURANTGUID);
+CREATE INDEX IDX_STRIPE_TRANSFER_EVENTS_PAYLOAD_OBJECT ON GRATLYDB.STRIPE_TRANSFER_EVENTS (PAYLOAD_OBJECT_ID);
+
+ALTER TABLE GRATLYDB.STRIPE_PAYOUT_EVENTS
+  ADD COLUMN PAYLOAD_EMPLOYEEGUID VARCHAR(64) GENERATED ALWAYS AS (COALESCE(NULLIF(JSON_VALUE(RAW_PAYLOAD, '$.data.object.metadata.employee_guid' RETURNING CHAR(64) NULL ON EMPTY NULL ON ERROR), ''), NULLIF(JSON_VALUE(RAW_PAYLOAD, '$.data.object.metadata.employeeGuid' RETURNING CHAR(64) NULL ON EMPTY NULL ON ERROR), ''))) STORED,
+  ADD COLUMN PAYLOAD_RESTAURANTGUID VARCHAR(36) GENERATED ALWAYS AS (COALESCE(NULLIF(JSON_VALUE(RAW_PAYLOAD, '$.data.object.metadata.restaurant_guid' RETURNING CHAR(36) NULL ON EMPTY NULL ON ERROR), ''), NULLIF(JSON_VALUE(RAW_PAYLOAD, '$.data.object.metadata.restaurantGuid' RETURNING CHAR(36) NULL ON EMPTY NULL ON ERROR), ''))) STORED,
+  ADD COLUMN PAYLOAD_OBJECT_ID VARCHAR(255) GENERATED ALWAYS AS (JSON_VALUE(RAW_PAYLOAD, '$.data.object.id' RETURNING CHAR(255) NULL ON EMPTY NULL ON ERROR)) STORED,
+  ADD COLUMN PAYLOAD_AMOUNT BIGINT GENERATED ALWAYS AS (JSON_VALUE(RAW_PAYLOAD, '$.data.object.amount' RETURNING SIGNED NULL ON EMPTY NULL ON ERROR)) STORED,
+  ADD COLUMN RAW_PAYLOAD_COMPRESSED LONGBLOB;
+CREATE INDEX IDX_STRIPE_PAYOUT_EVENTS_PAYLOAD_EMPLOYEE ON GRATLYDB.STRIPE_PAYOUT_EVENTS (PAYLOAD_EMPLOYEEGUID);
+CREATE INDEX IDX_STRIPE_PAYOUT_EVENTS_PAYLOAD_RESTAURANT ON GRATLYDB.STRIPE_PAYOUT_EVENTS (PAYLOAD_RESTAURANTGUID);
+CREATE INDEX IDX_STRIPE_PAYOUT_EVENTS_PAYLOAD_OBJECT ON GRATLYDB.STRIPE_PAYOUT_EVENTS (PAYLOAD_OBJECT_ID);
+
 -- Optional: move RESTAURANTGUID to the first column on existing tables
 ALTER TABLE GRATLYDB.STRIPE_BALANCE_EVENTS
   MODIFY COLUMN RESTAURANTGUID VARCHAR(36) FIRST;